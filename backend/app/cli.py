@@ -0,0 +1,85 @@
+"""Management commands.
+
+    python -m app.cli init-db
+    python -m app.cli rebuild-search
+    python -m app.cli rebuild-skills
+    python -m app.cli rebuild-recipients
+    python -m app.cli dispatch-outbox
+"""
+import argparse
+
+def init_db(args):
+    from app.database import init_db
+    init_db()
+    print("Database schema is up to date")
+
+def rebuild_search(args):
+    from app.database import engine, init_db
+    from app.services.search import rebuild_search_index
+    init_db()
+    count = rebuild_search_index(engine, batch_size=args.batch_size)
+    print(f"Indexed {count} drafts and sent emails")
+
+def rebuild_skills(args):
+    from app.database import SessionLocal, init_db
+    from app.services.skill_index import SkillIndex
+    init_db()
+    db = SessionLocal()
+    try:
+        count = SkillIndex().rebuild(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Indexed skills of {count} parsed documents")
+
+def rebuild_recipients(args):
+    from app.database import SessionLocal, init_db
+    from app.services.recipients import RecipientHistory
+    init_db()
+    db = SessionLocal()
+    try:
+        count = RecipientHistory().rebuild(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Recorded recipients of {count} sent emails")
+
+def dispatch_outbox(args):
+    import asyncio
+    import logging
+    from app.database import init_db
+    from app.services.outbox import run_dispatcher
+    from app.config import settings
+    logging.basicConfig(level=logging.INFO)
+    if settings.event_backend == "memory":
+        logging.getLogger(__name__).warning(
+            "EVENT_BACKEND=memory: email status events from this dispatcher won't reach web clients; set EVENT_BACKEND=redis"
+        )
+    init_db()
+    asyncio.run(run_dispatcher())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="ApplyBotX management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init-db", help="create missing database tables and add new columns to existing ones").set_defaults(handler=init_db)
+
+    rebuild = commands.add_parser("rebuild-search", help="re-index all drafts and sent emails for full-text search")
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+    rebuild.set_defaults(handler=rebuild_search)
+
+    rebuild = commands.add_parser("rebuild-skills", help="re-index the skills of all parsed documents")
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+    rebuild.set_defaults(handler=rebuild_skills)
+
+    rebuild = commands.add_parser("rebuild-recipients", help="re-create recipient history from sent emails")
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+    rebuild.set_defaults(handler=rebuild_recipients)
+
+    commands.add_parser(
+        "dispatch-outbox", help="deliver queued email sends and release scheduled ones until stopped (alongside or instead of the web workers' dispatchers)"
+    ).set_defaults(handler=dispatch_outbox)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, List, Dict, Any
 
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./test.db"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30.0
+    auto_create_schema: bool = True  # create missing tables and columns at startup; disable when using `python -m app.cli init-db`
     
     # Security
     secret_key: str = "your-secret-key-change-in-production"
@@ -18,6 +22,43 @@ class Settings(BaseSettings):
     
     # OpenAI
     openai_api_key: Optional[str] = None
+    openai_base_url: Optional[str] = None  # e.g. a local fake/inference server
+    openai_models: List[str] = ["gpt-3.5-turbo"]
+    
+    # LLM backends and routing
+    llm_backends: List[Dict[str, Any]] = []  # extra OpenAI-compatible HTTP backends (JSON)
+    llm_timeout_seconds: float = 20.0
+    llm_max_retries: int = 1
+    llm_max_attempts: int = 2  # backends tried per request before the template fallback
+    llm_router_tier_penalty_seconds: float = 2.0
+    llm_router_cost_weight: float = 1000.0  # seconds of latency one dollar is worth
+    llm_router_explore_rate: float = 0.05
+    
+    # LLM circuit breaker
+    llm_breaker_failure_rate: float = 0.5
+    llm_breaker_slow_call_rate: float = 0.8
+    llm_breaker_slow_call_seconds: float = 10.0
+    llm_breaker_window_size: int = 20
+    llm_breaker_minimum_calls: int = 5
+    llm_breaker_open_seconds: float = 30.0
+
+    # LLM call scheduling (limits are per worker process)
+    llm_max_concurrency: int = 8  # LLM calls in flight at once
+    llm_tokens_per_minute: int = 0  # prompt + max completion tokens started per minute; keep under the provider's TPM (0 = no limit)
+    llm_bulk_share: float = 0.75  # share of the calls and tokens batch generation may use; the rest is kept for interactive requests
+    llm_rate_limit_pause_seconds: float = 5.0  # pause after a 429 without Retry-After
+
+    # AI batch generation
+    ai_batch_max_jobs: int = 50
+    ai_batch_concurrency: int = 5
+    ai_max_variants: int = 4
+    
+    # AI prompt context
+    ai_prompt_input_budget: int = 1500
+    ai_context_token_budget: int = 500
+    ai_job_description_token_budget: int = 300
+    ai_context_max_skills: int = 10
+    ai_context_max_experiences: int = 3
     
     # AWS S3
     aws_access_key_id: Optional[str] = None
@@ -28,12 +69,117 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = "redis://localhost:6379/0"
     
+    # Real-time status events (GET /api/v1/events/stream)
+    event_backend: str = "memory"  # memory (one process only) or redis (needed with several workers or a separate dispatch-outbox process)
+    event_queue_size: int = 100  # buffered events per connection before the oldest are dropped
+    event_heartbeat_seconds: float = 15.0
+    event_stream_max_seconds: float = 300.0  # clients reconnect after this, so workers can drain
+    event_ticket_seconds: int = 30  # lifetime of the ?ticket= that opens a stream; checked only on connect
+    
     # Encryption
     encryption_key: Optional[str] = None
     
     # CORS
     frontend_url: str = "http://localhost:3000"
     
+    # Full-text search
+    search_rank_window: int = 1000  # newest matches scored per query; older ones only count toward the total
+    
+    # Resume matching
+    skill_cache_users: int = 200  # users whose skill bitmaps each worker keeps in memory
+    skill_change_log_size: int = 10000  # posting changes kept per user for catching up cached bitmaps
+    resume_rank_cache_users: int = 200  # users whose resume vector matrices each worker keeps in memory
+    skill_taxonomy_path: Optional[str] = None  # skills and aliases to recognize (default app/data/skill_taxonomy.txt); run rebuild-skills after changing it
+    skill_automaton_cache_dir: Optional[str] = None  # where the compiled taxonomy is cached (default ~/.cache/applybotx)
+    
+    # Recipient history
+    email_suppress_duplicates: bool = True  # reject sends to addresses already emailed unless allow_duplicate is set
+    recipient_filter_error_rate: float = 0.01  # Bloom filter false-positive rate (a hit is confirmed in the database)
+    recipient_cache_users: int = 1000  # users whose recipient filters each worker keeps in memory
+    
+    # Email providers (overridable to point at stub servers)
+    gmail_api_url: str = "https://gmail.googleapis.com"
+    gmail_batch_url: str = "https://www.googleapis.com/batch/gmail/v1"
+    graph_api_url: str = "https://graph.microsoft.com/v1.0"
+    email_transport: str = "api"  # api (Gmail/Graph REST) or smtp (pooled SMTP sessions authenticated with XOAUTH2)
+    smtp_providers: str = "google"  # providers sent over SMTP when email_transport=smtp; microsoft tokens also need the SMTP.Send scope
+    smtp_gmail_host: str = "smtp.gmail.com"
+    smtp_gmail_port: int = 587
+    smtp_outlook_host: str = "smtp.office365.com"
+    smtp_outlook_port: int = 587
+    smtp_starttls: bool = True  # off only for local test servers
+    smtp_connections_per_account: int = 2
+    smtp_max_messages_per_connection: int = 100  # reconnect after this many, below provider per-session limits
+    smtp_idle_seconds: float = 60.0  # pooled connections idle longer than this are closed rather than reused
+    smtp_timeout_seconds: float = 30.0
+    smtp_backoff_base_seconds: float = 1.0  # wait after a failed connect, doubling per failure
+    smtp_backoff_max_seconds: float = 60.0
+    email_max_attachment_bytes: int = 25 * 1024 * 1024  # total attachment size per send (Gmail's and Outlook's limit)
+    email_spool_memory_bytes: int = 1024 * 1024  # MIME messages with attachments larger than this are built in a temp file
+    gmail_resumable_threshold_bytes: int = 5 * 1024 * 1024  # larger messages upload in a resumable session, a chunk per request
+    graph_upload_session_threshold_bytes: int = 3 * 1024 * 1024  # larger attachments upload in a Graph upload session (its inline limit)
+    email_batch_enabled: bool = True  # coalesce the dispatcher's sends per account into Gmail batch / Graph $batch calls
+    email_batch_window_seconds: float = 0.05  # how long the first send of a batch waits for others from the same account
+    
+    # Email outbox (sends are queued, then delivered by dispatchers)
+    outbox_dispatcher_enabled: bool = True  # run a dispatcher in each web worker; disable when running python -m app.cli dispatch-outbox instead
+    outbox_concurrency: int = 20  # sends in flight per dispatcher, so also the most one batch call can carry
+    outbox_batch_size: int = 10  # entries claimed per query
+    outbox_lease_seconds: int = 120  # a claimed entry is reclaimable after this, e.g. when its dispatcher died
+    outbox_poll_seconds: float = 1.0  # idle check for entries queued by other processes or coming off backoff
+    outbox_max_attempts: int = 5  # throttled or unreachable provider; other errors fail the send at once
+    outbox_retry_base_seconds: float = 30.0  # doubles with each attempt, up to an hour
+    outbox_drain_seconds: float = 10.0  # time in-flight sends get to finish on shutdown
+    
+    # Scheduled sends and per-account quotas
+    scheduler_lookahead_seconds: float = 300.0  # scheduled sends due within this are held in memory
+    scheduler_max_loaded: int = 10000  # most scheduled sends held in memory per process
+    scheduler_rescan_seconds: float = 30.0  # re-read the window for sends scheduled by other processes
+    email_account_minute_limit: int = 20  # sends started per account per minute; more are scheduled (0 = no limit)
+    email_account_daily_limit: int = 450  # per rolling day, under Gmail's 500 for consumer accounts (0 = no limit)
+    
+    # Idempotency-Key support (generate and send endpoints)
+    idempotency_backend: str = "database"  # database or redis (redis_url)
+    idempotency_ttl_seconds: int = 86400  # how long a completed response is replayed
+    idempotency_lock_seconds: int = 300  # a first request still running after this is treated as abandoned
+    idempotency_wait_seconds: float = 60.0  # how long a concurrent duplicate waits for the first before a 409
+
+    # Admission control (parse, generate-email and generate-batch; caps are per worker, quotas per user)
+    admission_backend: str = "memory"  # memory (per process) or redis (quotas shared by every worker and node)
+    admission_max_wait_seconds: float = 10.0  # a queued request gets a 429 after waiting this long
+    parse_max_concurrency: int = 4  # parses running at once (0 = no limit)
+    parse_max_queue: int = 16  # parses waiting for a slot; more get a 429 at once
+    parse_user_per_minute: float = 30.0  # per-user quota, refilled continuously (0 = no quota)
+    parse_user_burst: int = 10  # parses a user may start back to back
+    generate_max_concurrency: int = 16
+    generate_max_queue: int = 64
+    generate_user_per_minute: float = 20.0
+    generate_user_burst: int = 10
+    batch_max_concurrency: int = 4  # batch streams at once, each running up to ai_batch_concurrency generations
+    batch_max_queue: int = 8
+    batch_user_per_minute: float = 2.0
+    batch_user_burst: int = 2
+
+    # Startup
+    prewarm_on_startup: bool = False  # import parsers/LLM clients in the background after startup
+    
+    # Web server (python -m app.server)
+    web_host: str = "0.0.0.0"
+    web_port: int = 8000
+    web_workers: int = 0  # 0 = one worker per CPU core
+    web_preload: bool = True  # import the app once before forking workers (gunicorn only)
+    web_loop: str = "auto"  # auto = uvloop when installed, else asyncio
+    web_http: str = "auto"  # auto = httptools when installed, else h11
+    web_backlog: int = 2048
+    web_keepalive_seconds: int = 5
+    web_worker_timeout_seconds: int = 60  # gunicorn restarts a worker that stops heartbeating this long
+    web_graceful_timeout_seconds: int = 30  # time in-flight requests get to finish on SIGTERM
+    web_max_inflight_requests: int = 0  # per worker; 0 = db_pool_size + db_max_overflow, -1 = unlimited
+    web_max_requests: int = 0  # recycle a worker after this many requests (0 = never)
+    web_max_requests_jitter: int = 0
+    web_access_log: bool = True
+    web_log_level: str = "info"
+    
     class Config:
         env_file = ".env"
 
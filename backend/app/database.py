@@ -1,9 +1,23 @@
-from sqlalchemy import create_engine
+from typing import List, Optional, Tuple
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(settings.database_url)
+def _engine_options():
+    # In-memory SQLite uses a single-connection pool without sizing options
+    if settings.database_url in ("sqlite://", "sqlite:///:memory:"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_pre_ping": True
+    }
+
+engine = create_engine(settings.database_url, **_engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -13,4 +27,79 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Columns added to tables that existed in earlier releases: (table, column,
+# statement filling the column in on existing rows). create_all never alters
+# an existing table, so init_db adds these to older databases itself.
+ADDED_COLUMNS: List[Tuple[str, str, Optional[str]]] = [
+    ("ai_drafts", "variant_group", None),
+    ("ai_drafts", "variant_label", None),
+    ("parsed_documents", "updated_at", "UPDATE parsed_documents SET updated_at = created_at"),
+    ("templates", "updated_at", "UPDATE templates SET updated_at = created_at"),
+    ("parsed_documents", "resume_vector", None),  # computed on a document's first ranking
+    ("email_sends", "send_at", None),
+    ("email_sends", "sent_at", "UPDATE email_sends SET sent_at = created_at WHERE status = 'sent'"),
+]
+
+# Columns that have since become nullable: (table, column)
+NULLABLE_COLUMNS: List[Tuple[str, str]] = [
+    ("email_outbox", "available_at"),  # null while a send is scheduled
+]
+
+def init_db():
+    """Create any missing tables and columns, including the full-text search index."""
+    from app.models.database import Base as ModelsBase
+    from app.services.search import create_search_index
+    ModelsBase.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    create_search_index(engine)
+
+def upgrade_schema(bind: Engine) -> List[str]:
+    """Add the ADDED_COLUMNS an existing database lacks, and the indexes over them,
+    and drop NOT NULL from NULLABLE_COLUMNS.
+
+    Returns the columns added or changed, as ``table.column``.
+    """
+    from app.models.database import Base as ModelsBase
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    added = []
+    with bind.begin() as connection:
+        for table_name, column_name, backfill in ADDED_COLUMNS:
+            if table_name not in tables or column_name in {column["name"] for column in inspector.get_columns(table_name)}:
+                continue
+            column = ModelsBase.metadata.tables[table_name].c[column_name]
+            column_type = column.type.compile(dialect=bind.dialect)
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            if backfill:
+                connection.execute(text(backfill))
+            added.append(f"{table_name}.{column_name}")
+        for table_name in {name.split(".")[0] for name in added}:
+            for index in ModelsBase.metadata.tables[table_name].indexes:
+                index.create(connection, checkfirst=True)
+
+        for table_name, column_name in NULLABLE_COLUMNS:
+            if table_name not in tables:
+                continue
+            column = next(column for column in inspector.get_columns(table_name) if column["name"] == column_name)
+            if column["nullable"]:
+                continue
+            if bind.dialect.name == "sqlite":
+                index_names = [index["name"] for index in inspector.get_indexes(table_name)]
+                _rebuild_sqlite_table(connection, ModelsBase.metadata.tables[table_name], index_names)
+            else:
+                connection.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} DROP NOT NULL"))
+            added.append(f"{table_name}.{column_name}")
+    return added
+
+def _rebuild_sqlite_table(connection: Connection, table: Table, index_names: List[str]):
+    """Recreate ``table`` from its model, keeping its rows; SQLite can't change a column's constraints in place."""
+    old_name = f"{table.name}_old"
+    for name in index_names:
+        connection.execute(text(f"DROP INDEX {name}"))
+    connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+    table.create(connection)
+    columns = ", ".join(column.name for column in table.columns)
+    connection.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}"))
+    connection.execute(text(f"DROP TABLE {old_name}"))
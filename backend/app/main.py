@@ -1,28 +1,75 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.routers import auth, files, ai, email, templates
-from app.models.database import Base
-from app.database import engine
+from app.routers import auth, files, ai, email, templates, events, search, skills
+from app.database import init_db
 from app.config import settings
+from app.services.container import ServiceContainer
+from app.middleware import AdmissionMiddleware, IdempotencyMiddleware, InflightLimitMiddleware, max_inflight_requests
+from app.services.admission import AdmissionLane
+import asyncio
 import os
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create missing tables at startup rather than on import, so importing the
+    # app (tests, workers, CLI tools) never touches the database
+    if settings.auto_create_schema:
+        await asyncio.to_thread(init_db)
+    
+    # Build shared services once per worker and close their pools on shutdown
+    app.state.services = ServiceContainer()
+    await app.state.services.startup()
+    try:
+        yield
+    finally:
+        await app.state.services.shutdown()
 
 app = FastAPI(
     title="ApplyBotX API",
     description="AI-powered job application email generator",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# CORS middleware
+# Cap concurrent requests per worker at the database pool capacity
+app.add_middleware(
+    InflightLimitMiddleware,
+    limit=max_inflight_requests(),
+    exempt_paths=["/api/v1/events/stream"]
+)
+
+# Parsing and generation are the expensive routes: cap them per worker and per
+# user, answering 429 when full. Outside the in-flight cap, so a refused request
+# holds no request slot or database connection
+admission_lanes = [
+    AdmissionLane("parse", r"/api/v1/files/\d+/parse", settings.parse_max_concurrency, settings.parse_max_queue,
+                  settings.parse_user_per_minute, settings.parse_user_burst),
+    AdmissionLane("generate", "/api/v1/ai/generate-email", settings.generate_max_concurrency, settings.generate_max_queue,
+                  settings.generate_user_per_minute, settings.generate_user_burst),
+    AdmissionLane("batch", "/api/v1/ai/generate-batch", settings.batch_max_concurrency, settings.batch_max_queue,
+                  settings.batch_user_per_minute, settings.batch_user_burst),
+]
+app.add_middleware(AdmissionMiddleware, lanes=admission_lanes)
+
+# Retried generate/send requests replay the first response instead of running
+# again. Outside admission control, so a replay costs no quota and a duplicate
+# waiting on the first holds no lane slot or request slot
+app.add_middleware(
+    IdempotencyMiddleware,
+    paths=["/api/v1/ai/generate-email", "/api/v1/email/send"]
+)
+
+# CORS middleware, added last so it is outermost: responses the middlewares
+# above produce themselves (429s, Idempotency-Key errors) carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[settings.frontend_url, "http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Batch-Id", "Idempotent-Replayed"],  # readable by the frontend
 )
 
 # Include routers
@@ -31,6 +78,9 @@ app.include_router(files.router, prefix="/api/v1/files", tags=["Files"])
 app.include_router(ai.router, prefix="/api/v1/ai", tags=["AI"])
 app.include_router(email.router, prefix="/api/v1/email", tags=["Email"])
 app.include_router(templates.router, prefix="/api/v1/templates", tags=["Templates"])
+app.include_router(events.router, prefix="/api/v1/events", tags=["Events"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
+app.include_router(skills.router, prefix="/api/v1/skills", tags=["Skills"])
 
 # Create uploads directory if it doesn't exist
 os.makedirs("uploads", exist_ok=True)
@@ -41,7 +91,7 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    return {"status": "healthy", "admission": {lane.name: lane.snapshot() for lane in admission_lanes}}
 
 if __name__ == "__main__":
     import uvicorn
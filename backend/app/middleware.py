@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import math
+import time
+from typing import Iterable, Optional
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from app.config import settings
+from app.services import idempotency
+from app.services.admission import AdmissionLane, Overloaded
+
+def max_inflight_requests() -> Optional[int]:
+    if settings.web_max_inflight_requests < 0:
+        return None
+    if settings.web_max_inflight_requests > 0:
+        return settings.web_max_inflight_requests
+    return settings.db_pool_size + settings.db_max_overflow
+
+class InflightLimitMiddleware:
+    """Queue HTTP requests beyond ``limit`` until an earlier one finishes.
+
+    Route handlers use synchronous SQLAlchemy sessions, so a connection checkout
+    on an exhausted pool blocks the event loop -- including the request
+    teardowns that would return connections -- until ``pool_timeout``. Keeping
+    in-flight requests at or below the pool capacity makes excess requests wait
+    here, on the loop, instead.
+    """
+
+    def __init__(self, app, limit: Optional[int] = None, exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.limit = limit
+        # Long-lived streams that hold no database connection
+        self.exempt_paths = frozenset(exempt_paths)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.limit is None or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self._semaphore is None:
+            # Created lazily so it binds to the worker's running loop
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+        async with self._semaphore:
+            await self.app(scope, receive, send)
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    """The ``sub`` of a valid bearer token, without loading the user."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm]).get("sub")
+    except JWTError:
+        return None
+
+class AdmissionMiddleware:
+    """Turn away expensive requests beyond capacity with a 429 and ``Retry-After``.
+
+    Each lane caps how many of its requests run at once in this worker and
+    how many may wait for a slot (``AdmissionLane``); a user over their
+    quota for the lane is refused before taking a place. Requests without a
+    valid bearer token pass straight through, since the route rejects them.
+    """
+
+    def __init__(self, app, lanes: Iterable[AdmissionLane] = ()):
+        self.app = app
+        self.lanes = list(lanes)
+
+    async def __call__(self, scope, receive, send):
+        lane = None
+        if scope["type"] == "http":
+            lane = next((lane for lane in self.lanes if lane.matches(scope["method"], scope["path"])), None)
+        subject = token_subject(Headers(scope=scope).get("authorization")) if lane is not None else None
+        if subject is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = scope["app"].state.services.rate_limiter
+        key = f"{lane.name}:{hashlib.sha256(subject.encode()).hexdigest()}"
+        if lane.user_per_minute > 0:
+            wait = await limiter.acquire(key, lane.user_per_minute, lane.user_burst)
+            if wait > 0:
+                await self._reject(scope, receive, send, Overloaded(f"Too many {lane.name} requests; slow down", math.ceil(wait)))
+                return
+        try:
+            await lane.acquire()
+        except Overloaded as e:
+            if lane.user_per_minute > 0:
+                await limiter.refund(key, lane.user_per_minute, lane.user_burst)
+            await self._reject(scope, receive, send, e)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release(time.monotonic() - started)
+
+    async def _reject(self, scope, receive, send, error: Overloaded):
+        await JSONResponse(
+            {"detail": error.reason},
+            status_code=429,
+            headers={"Retry-After": str(error.retry_after)}
+        )(scope, receive, send)
+
+class IdempotencyMiddleware:
+    """Run a POST carrying an ``Idempotency-Key`` header at most once per user and key.
+
+    The response of the first request is stored as sent (status, headers
+    and body bytes) and replayed to retries, marked ``Idempotent-Replayed:
+    true``. A duplicate arriving while the first is still running waits for
+    it, up to ``idempotency_wait_seconds``. Reusing a key for a different
+    request body is a 422; 5xx and 429 responses are not stored, so a retry
+    after a server error or an overload runs again.
+    """
+
+    def __init__(self, app, paths: Iterable[str] = ()):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        subject = token_subject(headers.get("authorization"))
+        if not key or subject is None:
+            # Unauthenticated requests are rejected by the route itself
+            await self.app(scope, receive, send)
+            return
+        if len(key) > 255:
+            await JSONResponse({"detail": "Idempotency-Key is too long"}, status_code=400)(scope, receive, send)
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        owner = hashlib.sha256(subject.encode()).hexdigest()
+        fingerprint = hashlib.sha256(b"\n".join([scope["path"].encode(), scope.get("query_string", b""), body])).hexdigest()
+
+        store = scope["app"].state.services.idempotency
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.idempotency_wait_seconds
+        while True:
+            state, stored = await store.begin(owner, key, fingerprint)
+            if state != idempotency.BUSY:
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                await JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"}
+                )(scope, receive, send)
+                return
+            await store.wait(owner, key, remaining)
+
+        if state == idempotency.MISMATCH:
+            await JSONResponse({"detail": "Idempotency-Key was already used for a different request"}, status_code=422)(scope, receive, send)
+            return
+        if state == idempotency.REPLAY:
+            await send({
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers] + [(b"idempotent-replayed", b"true")]
+            })
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+
+        replayed = False
+
+        async def receive_body():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "headers": [], "body": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            try:
+                await send(message)
+            except OSError:
+                pass  # client went away; the response is still stored for its retry
+
+        try:
+            await self.app(scope, receive_body, capture)
+        except BaseException:
+            await store.release(owner, key)
+            raise
+        if response["status"] >= 500 or response["status"] == 429:
+            # Not an outcome to replay: a retry should run again
+            await store.release(owner, key)
+        else:
+            await store.complete(owner, key, fingerprint, idempotency.StoredResponse(response["status"], response["headers"], b"".join(response["body"])))
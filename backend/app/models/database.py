@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -64,11 +64,54 @@ class ParsedDocument(Base):
     file_id = Column(Integer, ForeignKey("files.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     json_extraction = Column(JSON, nullable=False)
+    resume_vector = Column(LargeBinary, nullable=True)  # float32 keyword vector for ranking against job descriptions
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     file = relationship("File", back_populates="parsed_document")
 
+class Skill(Base):
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)  # normalized, e.g. "kubernetes"
+
+class DocumentSkill(Base):
+    """Posting list entry: a parsed document mentions a skill."""
+    __tablename__ = "document_skills"
+    
+    parsed_document_id = Column(Integer, ForeignKey("parsed_documents.id"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # copied from the document for scoped lookups
+    
+    __table_args__ = (
+        # Covers skill queries: one range scan per skill, already in document order
+        Index("ix_document_skills_lookup", "user_id", "skill_id", "parsed_document_id"),
+    )
+
+class SkillIndexVersion(Base):
+    """Per-user version of the skill postings, bumped by every change to them."""
+    __tablename__ = "skill_index_versions"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class SkillPostingChange(Base):
+    """Log of posting additions/removals, replayed onto cached skill bitmaps."""
+    __tablename__ = "skill_posting_changes"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    skill_id = Column(Integer, ForeignKey("skills.id"), nullable=False)
+    parsed_document_id = Column(Integer, nullable=False)  # may reference a deleted document
+    added = Column(Boolean, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_skill_posting_changes_user_version", "user_id", "version"),
+    )
+
 class AIDraft(Base):
     __tablename__ = "ai_drafts"
     
@@ -79,6 +122,8 @@ class AIDraft(Base):
     html_body = Column(Text, nullable=False)
     plain_body = Column(Text, nullable=False)
     model_meta = Column(JSON, nullable=True)  # model info, tokens used, etc.
+    variant_group = Column(String, nullable=True, index=True)  # shared by drafts generated together
+    variant_label = Column(String, nullable=True)  # e.g. the tone of this variant
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -97,11 +142,80 @@ class EmailSend(Base):
     subject = Column(String, nullable=False)
     html_body = Column(Text, nullable=False)
     provider_response = Column(JSON, nullable=True)
-    status = Column(String, default="pending")  # pending, sent, failed
+    status = Column(String, default="pending")  # scheduled, queued, sending, sent, failed (pending: sent inline before the outbox)
+    send_at = Column(DateTime, nullable=True)  # UTC; when a scheduled send is released to the outbox
+    sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="email_sends")
+    
+    __table_args__ = (
+        # The scheduler loads due sends as a range of this index
+        Index("ix_email_sends_status_send_at", "status", "send_at"),
+        # Per-account quota windows
+        Index("ix_email_sends_account_sent_at", "from_account_id", "sent_at"),
+    )
+
+class EmailOutbox(Base):
+    """A send waiting for a dispatcher, committed with its EmailSend row.
+
+    A dispatcher leases an entry by setting ``lease_owner`` and pushing
+    ``available_at`` out by the lease length, so an entry whose dispatcher
+    died becomes claimable again once the lease runs out. A scheduled
+    send's entry has no ``available_at`` until the scheduler releases it.
+    """
+    __tablename__ = "email_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    email_send_id = Column(Integer, ForeignKey("email_sends.id"), nullable=False, unique=True)
+    payload = Column(JSON, nullable=False)  # send options not stored on EmailSend (plain_body, send_as_html, attachments)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=True)  # claimable from; lease expiry while leased; null while scheduled
+    lease_owner = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_email_outbox_available", "available_at"),
+    )
+
+class IdempotencyKey(Base):
+    """A client-supplied Idempotency-Key and the response it produced."""
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)  # hash of the user the key belongs to
+    key = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)  # hash of method, path and body
+    response_status = Column(Integer, nullable=True)  # null while the first request is running
+    response_headers = Column(JSON, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    locked_until = Column(DateTime, nullable=True)  # a running request older than this was abandoned
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_idempotency_keys_scope_key", "scope", "key", unique=True),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+class EmailRecipient(Base):
+    """One address a send was delivered to, normalized for history lookups."""
+    __tablename__ = "email_recipients"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    email_send_id = Column(Integer, ForeignKey("email_sends.id"), nullable=False)
+    address = Column(String, nullable=False)  # lowercased
+    kind = Column(String, nullable=False)  # to, cc, bcc
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_email_recipients_user_address", "user_id", "address"),
+        # Lets workers fetch only the rows added since they built their filter
+        Index("ix_email_recipients_user_created", "user_id", "created_at"),
+    )
 
 class Template(Base):
     __tablename__ = "templates"
@@ -113,6 +227,7 @@ class Template(Base):
     body_template = Column(Text, nullable=False)
     is_public = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="templates")
@@ -69,9 +69,15 @@ class Education(BaseModel):
     end: Optional[str] = None
     gpa: Optional[str] = None
 
+class SkillMention(BaseModel):
+    name: str  # canonical name from the skill taxonomy
+    count: int
+    positions: List[int] = []  # character offsets in the extracted text
+
 class ParsedDocumentResponse(BaseModel):
     contact: ContactInfo
-    skills: List[str] = []
+    skills: List[str] = []  # most mentioned first
+    skill_mentions: List[SkillMention] = []
     experiences: List[Experience] = []
     education: List[Education] = []
     summary: Optional[str] = None
@@ -87,6 +93,21 @@ class AIGenerateRequest(BaseModel):
     template_id: Optional[int] = None
     tone: str = "professional"  # professional, friendly, enthusiastic
     length: str = "normal"  # short, normal, long
+    variants: Optional[List[str]] = None  # tones to generate side by side in one request
+    auto: bool = False  # use the parsed resume (among file_ids, if given) that best matches job_description
+
+class AIBatchJob(BaseModel):
+    job_description: str
+    company_name: str
+    role: str
+
+class AIBatchGenerateRequest(BaseModel):
+    file_ids: Optional[List[int]] = None
+    extracted_data: Optional[ParsedDocumentResponse] = None
+    jobs: List[AIBatchJob]
+    template_id: Optional[int] = None
+    tone: str = "professional"  # professional, friendly, enthusiastic
+    length: str = "normal"  # short, normal, long
 
 class AIDraftResponse(BaseModel):
     id: int
@@ -94,8 +115,26 @@ class AIDraftResponse(BaseModel):
     html_body: str
     plain_body: str
     model_meta: Optional[Dict[str, Any]] = None
+    variant_group: Optional[str] = None
+    variant_label: Optional[str] = None
+    variants: List["AIDraftResponse"] = []
+    selected_file_id: Optional[int] = None  # resume picked by auto
     created_at: datetime
 
+class ResumeRankRequest(BaseModel):
+    job_description: str
+    file_ids: Optional[List[int]] = None  # rank only these; all parsed files by default
+    limit: int = 10
+
+class ResumeRankResult(BaseModel):
+    file_id: int
+    parsed_document_id: int
+    filename: str
+    score: float
+
+class ResumeRankResponse(BaseModel):
+    results: List[ResumeRankResult] = []
+
 # Email schemas
 class EmailSendRequest(BaseModel):
     draft_id: Optional[int] = None
@@ -107,11 +146,16 @@ class EmailSendRequest(BaseModel):
     cc: Optional[List[EmailStr]] = []
     bcc: Optional[List[EmailStr]] = []
     send_as_html: bool = True
+    allow_duplicate: bool = False  # send even if a recipient was already emailed
+    attachment_file_ids: Optional[List[int]] = []  # uploaded files (e.g. a resume) to attach
+    send_at: Optional[datetime] = None  # send later; with an offset, or local time in ``timezone``
+    timezone: Optional[str] = None  # IANA name, e.g. America/New_York for 9am at the recipient's office
 
 class EmailSendResponse(BaseModel):
     id: int
     status: str
     provider_response: Optional[Dict[str, Any]] = None
+    send_at: Optional[datetime] = None  # UTC
     created_at: datetime
 
 class EmailSendStatusResponse(BaseModel):
@@ -119,8 +163,31 @@ class EmailSendStatusResponse(BaseModel):
     status: str
     subject: str
     to_list: List[str]
+    send_at: Optional[datetime] = None  # UTC
+    sent_at: Optional[datetime] = None
     created_at: datetime
 
+class RecipientCheckRequest(BaseModel):
+    addresses: List[EmailStr]
+
+class RecipientCheckResponse(BaseModel):
+    contacted: List[str] = []  # normalized addresses earlier sends went to
+
+class RecipientSend(BaseModel):
+    send_id: int
+    subject: str
+    status: str
+    kind: str  # to, cc, bcc
+    created_at: datetime
+
+class RecipientHistoryResponse(BaseModel):
+    address: str
+    contacted: bool
+    send_count: int
+    first_contacted_at: Optional[datetime] = None
+    last_contacted_at: Optional[datetime] = None
+    sends: List[RecipientSend] = []
+
 # Template schemas
 class TemplateCreate(BaseModel):
     name: str
@@ -139,6 +206,37 @@ class TemplateResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Search schemas
+class SearchResult(BaseModel):
+    kind: str  # draft or email
+    id: int
+    subject: str
+    snippet: Optional[str] = None
+    score: float
+    created_at: Optional[datetime] = None
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    results: List[SearchResult] = []
+
+# Skill index schemas
+class SkillDocument(BaseModel):
+    parsed_document_id: int
+    file_id: int
+    filename: str
+    created_at: Optional[datetime] = None
+
+class SkillSearchResponse(BaseModel):
+    all_of: List[str] = []
+    any_of: List[str] = []
+    total: int
+    limit: int
+    offset: int
+    documents: List[SkillDocument] = []
+
 # Token schemas
 class Token(BaseModel):
     access_token: str
@@ -1,45 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
+import asyncio
+import json
+import uuid
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, SessionLocal
 from app.models.database import User, AIDraft, ParsedDocument, File
-from app.models.schemas import AIGenerateRequest, AIDraftResponse
+from app.models.schemas import AIGenerateRequest, AIBatchGenerateRequest, AIDraftResponse, ResumeRankRequest, ResumeRankResponse
 from app.routers.auth import get_current_user
 from app.services.ai_generator import AIEmailGenerator
+from app.services.container import get_ai_generator, get_event_broker, get_resume_ranker
+from app.services.llm_scheduler import BULK
+from app.services.events import EventBroker
+from app.services.resume_ranker import ResumeRanker
+from app.services.http_cache import make_etag, is_not_modified, not_modified, cache_headers
+from app.services.circuit_breaker import circuit_breaker_snapshots
 
 router = APIRouter()
 
+def load_extracted_data(
+    file_ids: Optional[List[int]],
+    extracted_data: Optional[Any],
+    current_user: User,
+    db: Session
+) -> Dict[str, Any]:
+    """Resolve the candidate profile from parsed files or inline extracted data."""
+    if file_ids:
+        # Fetch and combine extracted data from multiple files
+        parsed_docs = db.query(ParsedDocument).join(File).filter(
+            ParsedDocument.file_id.in_(file_ids),
+            File.user_id == current_user.id
+        ).all()
+        
+        if not parsed_docs:
+            raise HTTPException(status_code=404, detail="No parsed documents found for provided file IDs")
+        
+        # Merge extracted data from multiple documents
+        return merge_extracted_data([doc.json_extraction for doc in parsed_docs])
+    
+    if extracted_data:
+        return extracted_data.dict()
+    
+    raise HTTPException(status_code=400, detail="Either file_ids or extracted_data must be provided")
+
+def select_best_resume(
+    job_description: str,
+    file_ids: Optional[List[int]],
+    current_user: User,
+    db: Session,
+    resume_ranker: ResumeRanker
+) -> int:
+    """File ID of the parsed resume that best matches the job description."""
+    ranked = resume_ranker.rank(db, current_user.id, job_description)
+    if file_ids:
+        ranked = [result for result in ranked if result["file_id"] in file_ids]
+    
+    if not ranked:
+        raise HTTPException(status_code=404, detail="No parsed documents to choose from")
+    
+    return ranked[0]["file_id"]
+
+@router.post("/rank-resumes", response_model=ResumeRankResponse)
+async def rank_resumes(
+    request: ResumeRankRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    resume_ranker: ResumeRanker = Depends(get_resume_ranker)
+):
+    """Rank the user's parsed resumes by how well they match a job description."""
+    if not 1 <= request.limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    
+    ranked = resume_ranker.rank(db, current_user.id, request.job_description)
+    if request.file_ids:
+        ranked = [result for result in ranked if result["file_id"] in request.file_ids]
+    
+    return ResumeRankResponse(results=ranked[:request.limit])
+
 @router.post("/generate-email", response_model=AIDraftResponse)
 async def generate_email(
     request: AIGenerateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    ai_generator: AIEmailGenerator = Depends(get_ai_generator),
+    resume_ranker: ResumeRanker = Depends(get_resume_ranker)
 ):
-    """Generate an email draft using AI."""
+    """Generate an email draft using AI.
+    
+    With ``auto``, the draft is based on the parsed resume that best matches
+    the job description instead of every file in ``file_ids``.
+    """
     try:
-        # Get extracted data if file_ids provided
-        extracted_data = None
-        if request.file_ids:
-            # Fetch and combine extracted data from multiple files
-            parsed_docs = db.query(ParsedDocument).join(File).filter(
-                ParsedDocument.file_id.in_(request.file_ids),
-                File.user_id == current_user.id
-            ).all()
-            
-            if not parsed_docs:
-                raise HTTPException(status_code=404, detail="No parsed documents found for provided file IDs")
-            
-            # Merge extracted data from multiple documents
-            extracted_data = merge_extracted_data([doc.json_extraction for doc in parsed_docs])
-        
-        elif request.extracted_data:
-            extracted_data = request.extracted_data.dict()
+        selected_file_id = None
+        if request.auto:
+            if request.extracted_data:
+                raise HTTPException(status_code=400, detail="auto selects among parsed files; omit extracted_data")
+            selected_file_id = select_best_resume(request.job_description, request.file_ids, current_user, db, resume_ranker)
+            extracted_data = load_extracted_data([selected_file_id], None, current_user, db)
         else:
-            raise HTTPException(status_code=400, detail="Either file_ids or extracted_data must be provided")
+            extracted_data = load_extracted_data(request.file_ids, request.extracted_data, current_user, db)
         
         # Generate email using AI
-        ai_generator = AIEmailGenerator()
+        if request.variants:
+            response = await _generate_variants(request, extracted_data, ai_generator, current_user, db)
+            response.selected_file_id = selected_file_id
+            return response
         
         generation_result = await ai_generator.generate_email(
             extracted_data=extracted_data,
@@ -48,20 +117,14 @@ async def generate_email(
             role=request.role,
             tone=request.tone,
             length=request.length,
-            template_id=request.template_id
+            template_id=request.template_id,
+            user_id=current_user.id
         )
         
         # Store draft in database
         draft = AIDraft(
             user_id=current_user.id,
-            inputs_json={
-                "job_description": request.job_description,
-                "company_name": request.company_name,
-                "role": request.role,
-                "tone": request.tone,
-                "length": request.length,
-                "template_id": request.template_id
-            },
+            inputs_json=_draft_inputs(request, request.tone),
             subject=generation_result["subject"],
             html_body=generation_result["html_body"],
             plain_body=generation_result["plain_body"],
@@ -72,64 +135,305 @@ async def generate_email(
         db.commit()
         db.refresh(draft)
         
-        return AIDraftResponse(
-            id=draft.id,
-            subject=draft.subject,
-            html_body=draft.html_body,
-            plain_body=draft.plain_body,
-            model_meta=draft.model_meta,
-            created_at=draft.created_at
-        )
+        response = _draft_response(draft)
+        response.selected_file_id = selected_file_id
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Email generation failed: {str(e)}")
 
+async def _generate_variants(
+    request: AIGenerateRequest,
+    extracted_data: Dict[str, Any],
+    ai_generator: AIEmailGenerator,
+    current_user: User,
+    db: Session
+) -> AIDraftResponse:
+    """Generate one draft per requested tone and store them as a linked group."""
+    tones = list(dict.fromkeys(tone.lower() for tone in request.variants))
+    if len(tones) > settings.ai_max_variants:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many variants. Maximum: {settings.ai_max_variants}"
+        )
+    
+    results = await ai_generator.generate_variants(
+        extracted_data=extracted_data,
+        job_description=request.job_description,
+        company_name=request.company_name,
+        role=request.role,
+        tones=tones,
+        length=request.length,
+        template_id=request.template_id,
+        user_id=current_user.id
+    )
+    
+    # All variants share a group ID and are stored in one transaction
+    variant_group = uuid.uuid4().hex
+    drafts = [
+        AIDraft(
+            user_id=current_user.id,
+            inputs_json=_draft_inputs(request, tone),
+            subject=result["subject"],
+            html_body=result["html_body"],
+            plain_body=result["plain_body"],
+            model_meta=result.get("model_meta", {}),
+            variant_group=variant_group,
+            variant_label=tone
+        )
+        for tone, result in zip(tones, results)
+    ]
+    
+    db.add_all(drafts)
+    db.commit()
+    for draft in drafts:
+        db.refresh(draft)
+    
+    response = _draft_response(drafts[0])
+    response.variants = [_draft_response(draft) for draft in drafts]
+    return response
+
+def _draft_inputs(request: AIGenerateRequest, tone: str) -> Dict[str, Any]:
+    return {
+        "job_description": request.job_description,
+        "company_name": request.company_name,
+        "role": request.role,
+        "tone": tone,
+        "length": request.length,
+        "template_id": request.template_id
+    }
+
+def _draft_response(draft: AIDraft) -> AIDraftResponse:
+    return AIDraftResponse(
+        id=draft.id,
+        subject=draft.subject,
+        html_body=draft.html_body,
+        plain_body=draft.plain_body,
+        model_meta=draft.model_meta,
+        variant_group=draft.variant_group,
+        variant_label=draft.variant_label,
+        created_at=draft.created_at
+    )
+
+@router.post("/generate-batch")
+async def generate_batch(
+    request: AIBatchGenerateRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    ai_generator: AIEmailGenerator = Depends(get_ai_generator),
+    events: EventBroker = Depends(get_event_broker)
+):
+    """Generate drafts for many job postings, streaming each result as it completes.
+    
+    The response is newline-delimited JSON: one line per job in completion order,
+    followed by a final ``done`` line mapping job indexes to the stored draft IDs.
+    Progress is also published as ``batch.progress``/``batch.done`` events under
+    the ``X-Batch-Id`` response header's ID.
+    """
+    if not request.jobs:
+        raise HTTPException(status_code=400, detail="At least one job is required")
+    
+    if len(request.jobs) > settings.ai_batch_max_jobs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many jobs in one batch. Maximum: {settings.ai_batch_max_jobs}"
+        )
+    
+    # Resolve the candidate profile once for the whole batch
+    extracted_data = load_extracted_data(request.file_ids, request.extracted_data, current_user, db)
+    
+    batch_id = uuid.uuid4().hex
+    
+    return StreamingResponse(
+        _stream_batch(request, extracted_data, current_user.id, ai_generator, events, batch_id),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch_id}
+    )
+
+async def _stream_batch(
+    request: AIBatchGenerateRequest,
+    extracted_data: Dict[str, Any],
+    user_id: int,
+    ai_generator: AIEmailGenerator,
+    events: EventBroker,
+    batch_id: str
+):
+    """Fan generation out with bounded concurrency, storing each draft as soon as it is generated.
+
+    A job stores its own draft, so drafts already generated are kept when
+    the client disconnects and the remaining jobs are cancelled.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.ai_batch_concurrency))
+    
+    async def run_job(index: int, job):
+        async with semaphore:
+            try:
+                result = await ai_generator.generate_email(
+                    extracted_data=extracted_data,
+                    job_description=job.job_description,
+                    company_name=job.company_name,
+                    role=job.role,
+                    tone=request.tone,
+                    length=request.length,
+                    template_id=request.template_id,
+                    user_id=user_id,
+                    priority=BULK
+                )
+            except Exception as e:
+                return index, None, None, str(e)
+        draft = AIDraft(
+            user_id=user_id,
+            inputs_json={
+                "job_description": job.job_description,
+                "company_name": job.company_name,
+                "role": job.role,
+                "tone": request.tone,
+                "length": request.length,
+                "template_id": request.template_id
+            },
+            subject=result["subject"],
+            html_body=result["html_body"],
+            plain_body=result["plain_body"],
+            model_meta=result.get("model_meta", {})
+        )
+        # Runs to completion in its thread even if this task is cancelled meanwhile
+        draft_id = await asyncio.to_thread(_save_draft, draft)
+        return index, result, draft_id, None
+    
+    tasks = [asyncio.create_task(run_job(index, job)) for index, job in enumerate(request.jobs)]
+    draft_ids: Dict[str, int] = {}
+    failed = 0
+    
+    try:
+        for finished in asyncio.as_completed(tasks):
+            index, result, draft_id, error = await finished
+            job = request.jobs[index]
+            
+            if error:
+                failed += 1
+                await _publish_progress(events, user_id, batch_id, index, "error", len(draft_ids), failed, len(tasks))
+                yield _ndjson({"index": index, "status": "error", "error": error})
+                continue
+            
+            draft_ids[str(index)] = draft_id
+            await _publish_progress(events, user_id, batch_id, index, "completed", len(draft_ids), failed, len(tasks))
+            yield _ndjson({
+                "index": index,
+                "status": "completed",
+                "draft_id": draft_id,
+                "company_name": job.company_name,
+                "role": job.role,
+                "subject": result["subject"],
+                "html_body": result["html_body"],
+                "plain_body": result["plain_body"],
+                "model_meta": result.get("model_meta", {})
+            })
+        
+        draft_ids = {key: draft_ids[key] for key in sorted(draft_ids, key=int)}
+        await events.publish(user_id, "batch.done", {
+            "batch_id": batch_id,
+            "completed": len(draft_ids),
+            "failed": failed,
+            "draft_ids": draft_ids
+        })
+        yield _ndjson({
+            "status": "done",
+            "batch_id": batch_id,
+            "completed": len(draft_ids),
+            "failed": failed,
+            "draft_ids": draft_ids
+        })
+    finally:
+        # Client went away mid-stream: stop any generations still running
+        for task in tasks:
+            task.cancel()
+
+def _save_draft(draft: AIDraft) -> int:
+    db = SessionLocal()
+    try:
+        db.add(draft)
+        db.commit()
+        return draft.id
+    finally:
+        db.close()
+
+async def _publish_progress(
+    events: EventBroker,
+    user_id: int,
+    batch_id: str,
+    index: int,
+    status: str,
+    completed: int,
+    failed: int,
+    total: int
+):
+    await events.publish(user_id, "batch.progress", {
+        "batch_id": batch_id,
+        "index": index,
+        "status": status,
+        "completed": completed,
+        "failed": failed,
+        "total": total
+    })
+
+def _ndjson(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, default=str) + "\n"
+
 @router.get("/drafts/{draft_id}", response_model=AIDraftResponse)
 async def get_draft(
     draft_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific AI draft."""
-    draft = db.query(AIDraft).filter(
+    # Drafts never change after creation, so the ID and timestamp identify the version
+    version = db.query(AIDraft.id, AIDraft.created_at).filter(
         AIDraft.id == draft_id,
         AIDraft.user_id == current_user.id
     ).first()
     
-    if not draft:
+    if not version:
         raise HTTPException(status_code=404, detail="Draft not found")
     
-    return AIDraftResponse(
-        id=draft.id,
-        subject=draft.subject,
-        html_body=draft.html_body,
-        plain_body=draft.plain_body,
-        model_meta=draft.model_meta,
-        created_at=draft.created_at
-    )
+    etag = make_etag("draft", version.id, version.created_at)
+    if is_not_modified(request, etag, version.created_at):
+        return not_modified(etag, version.created_at)
+    
+    draft = db.query(AIDraft).filter(AIDraft.id == version.id).first()
+    response.headers.update(cache_headers(etag, version.created_at))
+    
+    return _draft_response(draft)
 
 @router.get("/drafts", response_model=List[AIDraftResponse])
 async def list_drafts(
+    request: Request,
+    response: Response,
     limit: int = 20,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List AI drafts for the current user."""
+    # Drafts are only ever added or deleted. An add changes the newest creation
+    # time and a delete the count; the newest ID alone isn't enough, as SQLite
+    # reuses the ID of a deleted newest row
+    count, newest_id, newest_at = db.query(
+        func.count(AIDraft.id), func.max(AIDraft.id), func.max(AIDraft.created_at)
+    ).filter(AIDraft.user_id == current_user.id).one()
+    
+    etag = make_etag("drafts", current_user.id, limit, count, newest_id, newest_at)
+    if is_not_modified(request, etag):
+        return not_modified(etag, newest_at)
+    
     drafts = db.query(AIDraft).filter(
         AIDraft.user_id == current_user.id
     ).order_by(AIDraft.created_at.desc()).limit(limit).all()
     
-    return [
-        AIDraftResponse(
-            id=draft.id,
-            subject=draft.subject,
-            html_body=draft.html_body,
-            plain_body=draft.plain_body,
-            model_meta=draft.model_meta,
-            created_at=draft.created_at
-        )
-        for draft in drafts
-    ]
+    response.headers.update(cache_headers(etag, newest_at))
+    return [_draft_response(draft) for draft in drafts]
 
 @router.delete("/drafts/{draft_id}")
 async def delete_draft(
@@ -151,6 +455,20 @@ async def delete_draft(
     
     return {"message": "Draft deleted successfully"}
 
+@router.get("/providers/health")
+async def provider_health(
+    current_user: User = Depends(get_current_user),
+    ai_generator: AIEmailGenerator = Depends(get_ai_generator)
+):
+    """Routing profile, circuit breaker state and fallback counts for each LLM backend, and LLM call queues."""
+    model_router = ai_generator.router
+    return {
+        "backends": model_router.describe(),
+        "providers": circuit_breaker_snapshots(),
+        "template_fallbacks": model_router.fallbacks,
+        "scheduler": ai_generator.scheduler.snapshot()
+    }
+
 def merge_extracted_data(data_list: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Merge extracted data from multiple documents."""
     merged = {
@@ -1,22 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import datetime
 
+from app.config import settings
 from app.database import get_db
-from app.models.database import User, EmailSend, AIDraft, OAuthAccount
-from app.models.schemas import EmailSendRequest, EmailSendResponse, EmailSendStatusResponse
+from app.models.database import User, EmailSend, EmailOutbox, AIDraft, OAuthAccount, File
+from app.models.schemas import EmailSendRequest, EmailSendResponse, EmailSendStatusResponse, RecipientCheckRequest, RecipientCheckResponse, RecipientHistoryResponse
 from app.routers.auth import get_current_user
-from app.services.email_sender import EmailSender
+from app.services.container import get_event_broker, get_file_storage, get_outbox, get_recipient_history, get_scheduler
+from app.services.events import EventBroker
+from app.services.file_storage import FileStorage
+from app.services.outbox import OutboxDispatcher, enqueue_send, publish_send_status, queued_recipients
+from app.services.recipients import RecipientHistory
+from app.services.scheduler import SendScheduler, next_send_times, to_utc
 
 router = APIRouter()
 
-@router.post("/send", response_model=EmailSendResponse)
+@router.post("/send", response_model=EmailSendResponse, status_code=202)
 async def send_email(
     request: EmailSendRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    outbox: OutboxDispatcher = Depends(get_outbox),
+    events: EventBroker = Depends(get_event_broker),
+    recipients: RecipientHistory = Depends(get_recipient_history),
+    file_storage: FileStorage = Depends(get_file_storage),
+    scheduler: SendScheduler = Depends(get_scheduler)
 ):
-    """Send an email using the user's connected email account."""
+    """Queue an email for sending from the user's connected email account.
+    
+    Returns at once with status ``queued``; follow it with
+    ``GET /sends/{id}`` or ``email.status`` events (sending, then sent or
+    failed). Fails with 409 if any recipient was already emailed or is in
+    a queued send, unless ``allow_duplicate`` is set. Files in
+    ``attachment_file_ids`` are attached, streamed from storage when the
+    email goes out.
+    
+    With ``send_at`` (and optionally ``timezone``) the send is
+    ``scheduled`` until then. A send that would take the account past its
+    per-minute or daily limit is scheduled for when it may go out.
+    """
     
     # Validate from_account_id belongs to current user
     oauth_account = db.query(OAuthAccount).filter(
@@ -49,7 +74,60 @@ async def send_email(
     if not subject or not html_body:
         raise HTTPException(status_code=400, detail="Subject and body are required")
     
-    # Create email send record
+    attachments = []
+    if request.attachment_file_ids:
+        file_ids = list(dict.fromkeys(request.attachment_file_ids))
+        files = {
+            file.id: file
+            for file in db.query(File).filter(File.id.in_(file_ids), File.user_id == current_user.id)
+        }
+        missing = [
+            file_id for file_id in file_ids
+            if file_id not in files or not files[file_id].s3_key or not file_storage.file_exists(files[file_id].s3_key)
+        ]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Attachment file not found: {', '.join(map(str, missing))}")
+        
+        attachments = [
+            {
+                "file_id": file_id,
+                "path": files[file_id].s3_key,
+                "filename": files[file_id].filename,
+                "content_type": files[file_id].content_type,
+                "size": file_storage.get_file_size(files[file_id].s3_key)
+            }
+            for file_id in file_ids
+        ]
+        total_size = sum(attachment["size"] for attachment in attachments)
+        if total_size > settings.email_max_attachment_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Attachments too large. Maximum total size: {settings.email_max_attachment_bytes // (1024*1024)}MB"
+            )
+    
+    now = datetime.utcnow()
+    send_at = None
+    if request.send_at is not None:
+        try:
+            send_at = to_utc(request.send_at, request.timezone)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if send_at is None or send_at <= now:
+        # Due now: held back only as long as the account's quota needs
+        send_at = next_send_times(db, oauth_account.id, now, 1)[0]
+        if send_at <= now:
+            send_at = None
+    
+    if settings.email_suppress_duplicates and not request.allow_duplicate:
+        addresses = request.to + (request.cc or []) + (request.bcc or [])
+        contacted = sorted(set(recipients.already_contacted(db, current_user.id, addresses)) | set(queued_recipients(db, current_user.id, addresses)))
+        if contacted:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Already contacted: {', '.join(contacted)}. Set allow_duplicate to send anyway."
+            )
+    
+    # The send and its outbox entry commit together, so a crash can't lose it
     email_send = EmailSend(
         user_id=current_user.id,
         draft_id=request.draft_id,
@@ -59,47 +137,44 @@ async def send_email(
         bcc_list=request.bcc or [],
         subject=subject,
         html_body=html_body,
-        status="pending"
+        send_at=send_at
     )
-    
-    db.add(email_send)
+    enqueue_send(db, email_send, plain_body, request.send_as_html, attachments)
     db.commit()
     db.refresh(email_send)
+    if email_send.status == "scheduled":
+        scheduler.add(email_send)
+    else:
+        outbox.notify()
+    await publish_send_status(events, email_send)
     
-    try:
-        # Send email
-        email_sender = EmailSender()
-        
-        send_result = await email_sender.send_email(
-            oauth_account=oauth_account,
-            to_emails=request.to,
-            cc_emails=request.cc or [],
-            bcc_emails=request.bcc or [],
-            subject=subject,
-            html_body=html_body,
-            plain_body=plain_body,
-            send_as_html=request.send_as_html
-        )
-        
-        # Update email send record
-        email_send.status = "sent" if send_result["success"] else "failed"
-        email_send.provider_response = send_result
-        db.commit()
-        
-        return EmailSendResponse(
-            id=email_send.id,
-            status=email_send.status,
-            provider_response=send_result,
-            created_at=email_send.created_at
-        )
-        
-    except Exception as e:
-        # Update status to failed
-        email_send.status = "failed"
-        email_send.provider_response = {"error": str(e)}
-        db.commit()
-        
-        raise HTTPException(status_code=500, detail=f"Email sending failed: {str(e)}")
+    return EmailSendResponse(
+        id=email_send.id,
+        status=email_send.status,
+        send_at=email_send.send_at,
+        created_at=email_send.created_at
+    )
+
+@router.post("/recipients/check", response_model=RecipientCheckResponse)
+async def check_recipients(
+    request: RecipientCheckRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    recipients: RecipientHistory = Depends(get_recipient_history)
+):
+    """Which of the given addresses were already emailed, e.g. to filter a batch before sending."""
+    return RecipientCheckResponse(contacted=recipients.already_contacted(db, current_user.id, request.addresses))
+
+@router.get("/recipients/{address}", response_model=RecipientHistoryResponse)
+async def get_recipient_history_for_address(
+    address: str,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    recipients: RecipientHistory = Depends(get_recipient_history)
+):
+    """Sends delivered to an address, newest first."""
+    return RecipientHistoryResponse(**recipients.history(db, current_user.id, address, limit=min(max(limit, 1), 200)))
 
 @router.get("/sends/{send_id}", response_model=EmailSendStatusResponse)
 async def get_send_status(
@@ -122,6 +197,8 @@ async def get_send_status(
         status=email_send.status,
         subject=email_send.subject,
         to_list=email_send.to_list,
+        send_at=email_send.send_at,
+        sent_at=email_send.sent_at,
         created_at=email_send.created_at
     )
 
@@ -143,6 +220,8 @@ async def list_sent_emails(
             status=send.status,
             subject=send.subject,
             to_list=send.to_list,
+            send_at=send.send_at,
+            sent_at=send.sent_at,
             created_at=send.created_at
         )
         for send in email_sends
@@ -152,9 +231,10 @@ async def list_sent_emails(
 async def delete_send_record(
     send_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    recipients: RecipientHistory = Depends(get_recipient_history)
 ):
-    """Delete a send record (this doesn't recall the email)."""
+    """Delete a send record (this doesn't recall the email); a queued send is cancelled."""
     
     email_send = db.query(EmailSend).filter(
         EmailSend.id == send_id,
@@ -164,6 +244,25 @@ async def delete_send_record(
     if not email_send:
         raise HTTPException(status_code=404, detail="Email send record not found")
     
+    # Only an unleased entry is removed, and the send is re-read locked, so a
+    # dispatcher claiming it after the read above gets a 409 here instead of
+    # sending a deleted record. A lease that has run out still counts: the
+    # send may be going out
+    sending = HTTPException(status_code=409, detail="The email is being sent")
+    if email_send.status == "sending":
+        raise sending
+    db.execute(delete(EmailOutbox).where(
+        EmailOutbox.email_send_id == email_send.id,
+        EmailOutbox.lease_owner.is_(None)
+    ))
+    leased = db.query(EmailOutbox.id).filter(EmailOutbox.email_send_id == email_send.id).first()
+    db.refresh(email_send, with_for_update=True)
+    if leased or email_send.status == "sending":
+        db.rollback()
+        raise sending
+    
+    recipients.forget_send(db, email_send)
+    # Through the session, so the search index drops the send too
     db.delete(email_send)
     db.commit()
     
@@ -0,0 +1,111 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, status
+from fastapi.responses import StreamingResponse
+from datetime import timedelta
+from typing import Optional
+import asyncio
+import json
+import time
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database import User
+from app.routers.auth import create_access_token, get_current_user, get_user_from_token
+from app.services.container import get_event_broker
+from app.services.events import EventBroker
+
+router = APIRouter()
+
+STREAM_TICKET_SCOPE = "events.stream"
+
+@router.post("/ticket")
+async def create_stream_ticket(current_user: User = Depends(get_current_user)):
+    """Issue a short-lived ticket that opens the event stream.
+    
+    ``EventSource`` can't set headers, so browsers pass credentials in the
+    query string, where access logs record them. A ticket opens the stream
+    and nothing else, and expires within seconds.
+    """
+    ticket = create_access_token(
+        {"uid": current_user.id, "scope": STREAM_TICKET_SCOPE},
+        timedelta(seconds=settings.event_ticket_seconds)
+    )
+    return {"ticket": ticket, "expires_in": settings.event_ticket_seconds}
+
+def _user_id_from_ticket(ticket: str) -> int:
+    from jose import JWTError, jwt
+    
+    try:
+        payload = jwt.decode(ticket, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        payload = {}
+    # Access tokens carry no scope, so they are refused here
+    if payload.get("scope") != STREAM_TICKET_SCOPE or not isinstance(payload.get("uid"), int):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired stream ticket")
+    return payload["uid"]
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    ticket: Optional[str] = Query(None),
+    events: EventBroker = Depends(get_event_broker)
+):
+    """Server-sent events with the current user's status changes.
+    
+    Pushes ``file.status``, ``email.status``, ``batch.progress`` and
+    ``batch.done`` events so clients don't need to poll. Authenticates with
+    a bearer token in the ``Authorization`` header or, for ``EventSource``,
+    a ticket from ``POST /ticket`` passed as ``?ticket=``.
+    """
+    if ticket is not None:
+        user_id = _user_id_from_ticket(ticket)
+    else:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        # Authenticate with a short-lived session; the stream itself holds no connection
+        db = SessionLocal()
+        try:
+            user_id = get_user_from_token(token, db).id
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        _event_stream(user_id, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _event_stream(user_id: int, events: EventBroker):
+    deadline = time.monotonic() + settings.event_stream_max_seconds
+    event_id = 0
+    
+    async with events.subscribe(user_id) as queue:
+        # Reconnect delay for EventSource when the stream ends
+        yield "retry: 3000\n\n"
+        yield _sse("ready", {"user_id": user_id})
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            
+            try:
+                event = await asyncio.wait_for(queue.get(), min(settings.event_heartbeat_seconds, remaining))
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+            
+            event_id += 1
+            yield _sse(event["type"], {**event["data"], "ts": event["ts"]}, event_id)
+
+def _sse(event_type: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event_type}", f"data: {json.dumps(data, default=str)}"]
+    if event_id is not None:
+        lines.insert(0, f"id: {event_id}")
+    return "\n".join(lines) + "\n\n"
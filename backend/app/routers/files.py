@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastAPIFile
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File as FastAPIFile
 from sqlalchemy.orm import Session
 from typing import List
 import os
@@ -12,6 +12,11 @@ from app.models.schemas import FileUploadResponse, FileStatusResponse, ParsedDoc
 from app.routers.auth import get_current_user
 from app.services.document_parser import DocumentParser
 from app.services.file_storage import FileStorage
+from app.services.container import get_document_parser, get_file_storage, get_event_broker, get_skill_index, get_resume_ranker
+from app.services.events import EventBroker
+from app.services.resume_ranker import ResumeRanker
+from app.services.skill_index import SkillIndex
+from app.services.http_cache import make_etag, is_not_modified, not_modified, cache_headers
 
 router = APIRouter()
 
@@ -35,11 +40,20 @@ def validate_file(file: UploadFile):
             detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
         )
 
+async def publish_file_status(events: EventBroker, db_file: File):
+    await events.publish(db_file.user_id, "file.status", {
+        "file_id": db_file.id,
+        "status": db_file.status,
+        "filename": db_file.filename
+    })
+
 @router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
     file: UploadFile = FastAPIFile(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    file_storage: FileStorage = Depends(get_file_storage),
+    events: EventBroker = Depends(get_event_broker)
 ):
     """Upload a file for processing."""
     validate_file(file)
@@ -63,7 +77,6 @@ async def upload_file(
     
     try:
         # Save file
-        file_storage = FileStorage()
         file_path = await file_storage.save_file(file, unique_filename)
         
         # Update file record with actual size and path
@@ -72,6 +85,7 @@ async def upload_file(
         db_file.size = file_size
         db_file.status = "uploaded"
         db.commit()
+        await publish_file_status(events, db_file)
         
         return FileUploadResponse(
             id=db_file.id,
@@ -86,6 +100,7 @@ async def upload_file(
         # Update status to error
         db_file.status = "error"
         db.commit()
+        await publish_file_status(events, db_file)
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
 @router.get("/{file_id}/status", response_model=FileStatusResponse)
@@ -113,7 +128,11 @@ async def get_file_status(
 async def parse_file(
     file_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    parser: DocumentParser = Depends(get_document_parser),
+    events: EventBroker = Depends(get_event_broker),
+    skill_index: SkillIndex = Depends(get_skill_index),
+    resume_ranker: ResumeRanker = Depends(get_resume_ranker)
 ):
     """Trigger document parsing for a file."""
     db_file = db.query(File).filter(
@@ -131,24 +150,27 @@ async def parse_file(
         # Update status
         db_file.status = "processing"
         db.commit()
+        await publish_file_status(events, db_file)
         
         # Parse document
-        parser = DocumentParser()
         file_path = db_file.s3_key  # Local file path for now
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found on disk")
         
-        parsed_data = await parser.parse_document(file_path, db_file.content_type)
+        # Stored in the response shape, so what is served never depends on when a file was parsed
+        parsed_data = ParsedDocumentResponse.model_validate(
+            await parser.parse_document(file_path, db_file.content_type)
+        ).model_dump()
         
         # Check if parsing result already exists
-        existing_parsed = db.query(ParsedDocument).filter(
+        parsed_doc = db.query(ParsedDocument).filter(
             ParsedDocument.file_id == file_id
         ).first()
         
-        if existing_parsed:
+        if parsed_doc:
             # Update existing
-            existing_parsed.json_extraction = parsed_data
+            parsed_doc.json_extraction = parsed_data
         else:
             # Create new parsed document record
             parsed_doc = ParsedDocument(
@@ -158,39 +180,62 @@ async def parse_file(
             )
             db.add(parsed_doc)
         
+        # Committed together with the extraction
+        resume_ranker.vectorize(parsed_doc)
+        skill_index.index_document(db, parsed_doc)
+        
         # Update file status
         db_file.status = "completed"
         db.commit()
+        await publish_file_status(events, db_file)
         
         return {"message": "File parsed successfully", "file_id": file_id}
         
     except Exception as e:
         db_file.status = "error"
         db.commit()
+        await publish_file_status(events, db_file)
         raise HTTPException(status_code=500, detail=f"Parsing failed: {str(e)}")
 
 @router.get("/{file_id}/extracted", response_model=ParsedDocumentResponse)
 async def get_extracted_data(
     file_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get extracted data from a parsed document."""
-    parsed_doc = db.query(ParsedDocument).join(File).filter(
+    # Check the version first so a revalidation never loads the extraction
+    version = db.query(ParsedDocument.id, ParsedDocument.updated_at).join(File).filter(
         ParsedDocument.file_id == file_id,
         File.user_id == current_user.id
     ).first()
     
-    if not parsed_doc:
+    if not version:
         raise HTTPException(status_code=404, detail="Parsed document not found")
     
-    return ParsedDocumentResponse(**parsed_doc.json_extraction)
+    etag = make_etag("parsed", version.id, version.updated_at)
+    if is_not_modified(request, etag, version.updated_at):
+        return not_modified(etag, version.updated_at)
+    
+    json_extraction = db.query(ParsedDocument.json_extraction).filter(
+        ParsedDocument.id == version.id
+    ).scalar()
+    
+    # Validated again: documents parsed before extractions were normalized may
+    # lack fields (skill_mentions) or carry extra contact keys
+    return Response(
+        content=ParsedDocumentResponse.model_validate(json_extraction).model_dump_json(),
+        media_type="application/json",
+        headers=cache_headers(etag, version.updated_at)
+    )
 
 @router.delete("/{file_id}")
 async def delete_file(
     file_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    skill_index: SkillIndex = Depends(get_skill_index)
 ):
     """Delete a file and its associated data."""
     db_file = db.query(File).filter(
@@ -211,6 +256,7 @@ async def delete_file(
             ParsedDocument.file_id == file_id
         ).first()
         if parsed_doc:
+            skill_index.remove_document(db, parsed_doc)
             db.delete(parsed_doc)
         
         # Delete file record
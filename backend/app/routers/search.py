@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.models.database import User
+from app.models.schemas import SearchResponse
+from app.routers.auth import get_current_user
+from app.services.search import get_search_index, KIND_DRAFT, KIND_EMAIL
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[str] = Query(None, description="draft or email"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over the user's drafts and sent emails.
+    
+    Matches subject, body, company, role and recipients; every term must
+    match and the last one is treated as a prefix. Results are ranked by
+    relevance.
+    """
+    if kind is not None and kind not in (KIND_DRAFT, KIND_EMAIL):
+        raise HTTPException(status_code=400, detail="kind must be 'draft' or 'email'")
+    
+    index = get_search_index(db.get_bind())
+    if index is None:
+        raise HTTPException(status_code=501, detail="Full-text search requires SQLite or PostgreSQL")
+    
+    found = index.search(db.connection(), current_user.id, q, kind=kind, limit=limit, offset=offset)
+    
+    return SearchResponse(query=q, limit=limit, offset=offset, **found)
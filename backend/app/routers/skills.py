@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.models.database import User
+from app.models.schemas import SkillSearchResponse
+from app.routers.auth import get_current_user
+from app.services.container import get_skill_index
+from app.services.skill_index import SkillIndex
+
+router = APIRouter()
+
+@router.get("/documents", response_model=SkillSearchResponse)
+async def find_documents(
+    all_of: List[str] = Query([], alias="all", description="skills every document must mention"),
+    any_of: List[str] = Query([], alias="any", description="skills of which at least one must be mentioned"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    skill_index: SkillIndex = Depends(get_skill_index)
+):
+    """Find the user's parsed resumes by skill.
+    
+    ``?all=go&all=kubernetes`` matches documents mentioning both,
+    ``?any=aws&any=azure`` either; combined, both conditions apply. Skill
+    names are normalized (case, whitespace, common aliases such as
+    golang/go). Newest documents first.
+    """
+    if not all_of and not any_of:
+        raise HTTPException(status_code=400, detail="Pass at least one 'all' or 'any' skill")
+    
+    found = skill_index.find_documents(db, current_user.id, all_of, any_of, limit=limit, offset=offset)
+    
+    return SkillSearchResponse(all_of=all_of, any_of=any_of, limit=limit, offset=offset, **found)
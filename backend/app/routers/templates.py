@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,9 +7,69 @@ from app.database import get_db
 from app.models.database import User, Template
 from app.models.schemas import TemplateCreate, TemplateResponse
 from app.routers.auth import get_current_user
+from app.services.http_cache import StaticPayload, make_etag, is_not_modified, not_modified, cache_headers
 
 router = APIRouter()
 
+BUILTIN_TEMPLATES = [
+    {
+        "id": "professional",
+        "name": "Professional",
+        "subject_template": "Application for {role} Position - {candidate_name}",
+        "body_template": """Dear Hiring Manager,
+
+I am writing to express my strong interest in the {role} position at {company_name}. With my background in {key_skills}, I am confident that I would be a valuable addition to your team.
+
+{experience_summary}
+
+I am particularly drawn to this opportunity because {company_interest_reason}. I believe my skills in {relevant_skills} would enable me to contribute effectively to your team's goals.
+
+I would welcome the opportunity to discuss how my background and enthusiasm can contribute to {company_name}'s success. Thank you for your time and consideration.
+
+Best regards,
+{candidate_name}
+{contact_info}"""
+    },
+    {
+        "id": "enthusiastic",
+        "name": "Enthusiastic",
+        "subject_template": "Excited to Apply - {role} at {company_name}",
+        "body_template": """Hello {company_name} Team!
+
+I hope this email finds you well. I'm reaching out because I'm genuinely excited about the {role} opportunity at {company_name}!
+
+{experience_summary}
+
+What really excites me about this role is {company_interest_reason}. I'm passionate about {relevant_skills} and would love to bring my energy and expertise to your team.
+
+I'd be thrilled to chat more about how I can contribute to {company_name}'s amazing work. Looking forward to hearing from you!
+
+Warm regards,
+{candidate_name}
+{contact_info}"""
+    },
+    {
+        "id": "concise",
+        "name": "Concise",
+        "subject_template": "{candidate_name} - {role} Application",
+        "body_template": """Dear Hiring Team,
+
+I am interested in the {role} position at {company_name}. My experience includes:
+
+{key_achievements}
+
+I believe my skills in {relevant_skills} align well with your requirements. I would appreciate the opportunity to discuss this position further.
+
+Thank you for your consideration.
+
+{candidate_name}
+{contact_info}"""
+    }
+]
+
+# Serialized once; requests only compare ETags or write these bytes
+BUILTIN_TEMPLATES_PAYLOAD = StaticPayload({"builtin_templates": BUILTIN_TEMPLATES})
+
 @router.post("/", response_model=TemplateResponse)
 async def create_template(
     template: TemplateCreate,
@@ -40,16 +101,29 @@ async def create_template(
 
 @router.get("/", response_model=List[TemplateResponse])
 async def list_templates(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List templates available to the current user."""
+    visible = (Template.user_id == current_user.id) | (Template.is_public == True)
+    
+    # Adds, edits and deletes each change the count, newest ID or latest update.
+    # Only the ETag covers all three: a delete leaves the latest update time
+    # as it was, so If-Modified-Since alone is not honored here
+    count, newest_id, last_modified = db.query(
+        func.count(Template.id), func.max(Template.id), func.max(Template.updated_at)
+    ).filter(visible).one()
+    
+    etag = make_etag("templates", current_user.id, count, newest_id, last_modified)
+    if is_not_modified(request, etag):
+        return not_modified(etag, last_modified)
     
     # Get user's templates and public templates
-    templates = db.query(Template).filter(
-        (Template.user_id == current_user.id) | (Template.is_public == True)
-    ).order_by(Template.created_at.desc()).all()
+    templates = db.query(Template).filter(visible).order_by(Template.created_at.desc()).all()
     
+    response.headers.update(cache_headers(etag, last_modified))
     return [
         TemplateResponse(
             id=template.id,
@@ -65,19 +139,28 @@ async def list_templates(
 @router.get("/{template_id}", response_model=TemplateResponse)
 async def get_template(
     template_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific template."""
     
-    template = db.query(Template).filter(
+    version = db.query(Template.id, Template.updated_at).filter(
         Template.id == template_id,
         (Template.user_id == current_user.id) | (Template.is_public == True)
     ).first()
     
-    if not template:
+    if not version:
         raise HTTPException(status_code=404, detail="Template not found")
     
+    etag = make_etag("template", version.id, version.updated_at)
+    if is_not_modified(request, etag, version.updated_at):
+        return not_modified(etag, version.updated_at)
+    
+    template = db.query(Template).filter(Template.id == version.id).first()
+    response.headers.update(cache_headers(etag, version.updated_at))
+    
     return TemplateResponse(
         id=template.id,
         name=template.name,
@@ -144,63 +227,6 @@ async def delete_template(
 
 # Built-in templates endpoint
 @router.get("/builtin/list")
-async def list_builtin_templates():
+async def list_builtin_templates(request: Request):
     """List built-in email templates."""
-    
-    builtin_templates = [
-        {
-            "id": "professional",
-            "name": "Professional",
-            "subject_template": "Application for {role} Position - {candidate_name}",
-            "body_template": """Dear Hiring Manager,
-
-I am writing to express my strong interest in the {role} position at {company_name}. With my background in {key_skills}, I am confident that I would be a valuable addition to your team.
-
-{experience_summary}
-
-I am particularly drawn to this opportunity because {company_interest_reason}. I believe my skills in {relevant_skills} would enable me to contribute effectively to your team's goals.
-
-I would welcome the opportunity to discuss how my background and enthusiasm can contribute to {company_name}'s success. Thank you for your time and consideration.
-
-Best regards,
-{candidate_name}
-{contact_info}"""
-        },
-        {
-            "id": "enthusiastic",
-            "name": "Enthusiastic",
-            "subject_template": "Excited to Apply - {role} at {company_name}",
-            "body_template": """Hello {company_name} Team!
-
-I hope this email finds you well. I'm reaching out because I'm genuinely excited about the {role} opportunity at {company_name}!
-
-{experience_summary}
-
-What really excites me about this role is {company_interest_reason}. I'm passionate about {relevant_skills} and would love to bring my energy and expertise to your team.
-
-I'd be thrilled to chat more about how I can contribute to {company_name}'s amazing work. Looking forward to hearing from you!
-
-Warm regards,
-{candidate_name}
-{contact_info}"""
-        },
-        {
-            "id": "concise",
-            "name": "Concise",
-            "subject_template": "{candidate_name} - {role} Application",
-            "body_template": """Dear Hiring Team,
-
-I am interested in the {role} position at {company_name}. My experience includes:
-
-{key_achievements}
-
-I believe my skills in {relevant_skills} align well with your requirements. I would appreciate the opportunity to discuss this position further.
-
-Thank you for your consideration.
-
-{candidate_name}
-{contact_info}"""
-        }
-    ]
-    
-    return {"builtin_templates": builtin_templates}
\ No newline at end of file
+    return BUILTIN_TEMPLATES_PAYLOAD.response(request)
@@ -0,0 +1,169 @@
+"""Production launcher.
+
+    python -m app.server [--host HOST] [--port PORT] [--workers N]
+
+Uses gunicorn with uvicorn workers when gunicorn is installed (Linux/macOS):
+the app is imported once in the master (``web_preload``) and forked, so
+workers share the imported code. Without gunicorn (e.g. Windows) it falls
+back to uvicorn's own process manager, which spawns fresh interpreters.
+
+In both modes SIGTERM stops accepting connections and gives in-flight
+requests (sends, generations, batch streams) ``web_graceful_timeout_seconds``
+to finish before workers exit. Tuning lives in the ``web_*`` settings.
+
+``python -m app.main`` remains the single-process auto-reload dev server.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import warnings
+from typing import Any, Dict
+
+from app.config import settings
+
+try:
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            from uvicorn.workers import UvicornWorker
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+APP = "app.main:app"
+
+logger = logging.getLogger(__name__)
+
+def worker_count() -> int:
+    # Workers are async, so one per core keeps every core busy without
+    # oversubscribing; blocking work already runs in thread pools
+    if settings.web_workers > 0:
+        return settings.web_workers
+    return os.cpu_count() or 1
+
+def event_loop() -> str:
+    if settings.web_loop != "auto":
+        return settings.web_loop
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+def http_protocol() -> str:
+    if settings.web_http != "auto":
+        return settings.web_http
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+def check_event_backend(workers: int):
+    """Warn when status events can't reach clients connected to another worker."""
+    if workers > 1 and settings.event_backend == "memory":
+        logger.warning(
+            "EVENT_BACKEND=memory with %d workers: file, email and batch status events only reach SSE "
+            "clients connected to the worker that produced them. Set EVENT_BACKEND=redis for multiple workers.",
+            workers
+        )
+
+def prepare_schema():
+    """Create tables once in the launcher instead of racing in every worker."""
+    if settings.auto_create_schema:
+        from app.database import init_db, engine
+        init_db()
+        # Don't hand pooled connections from the launcher to forked workers
+        engine.dispose()
+    settings.auto_create_schema = False
+    os.environ["AUTO_CREATE_SCHEMA"] = "false"  # for spawned uvicorn workers
+
+def reset_after_fork():
+    """Drop state a forked worker inherited from the preloading master.
+
+    Sockets in the SQLAlchemy pool and the LLM HTTP clients belong to the
+    parent; the child gets fresh pools on first use. ``close=False`` leaves the
+    parent's connections alone instead of closing them from the child.
+    """
+    from app.database import engine
+    from app.services.llm_backends import discard_backend_registry
+    from app.services.model_router import reset_model_router
+
+    engine.dispose(close=False)
+    discard_backend_registry()
+    reset_model_router()
+
+if GUNICORN_AVAILABLE:
+    class AppUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": event_loop(),
+            "http": http_protocol(),
+            "timeout_graceful_shutdown": settings.web_graceful_timeout_seconds,
+            "access_log": settings.web_access_log
+        }
+
+    class GunicornApplication(BaseApplication):
+        def __init__(self, options: Dict[str, Any]):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+def post_fork(server, worker):
+    reset_after_fork()
+
+def run_gunicorn(host: str, port: int, workers: int):
+    GunicornApplication({
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": AppUvicornWorker,
+        "preload_app": settings.web_preload,
+        "post_fork": post_fork,
+        "backlog": settings.web_backlog,
+        "keepalive": settings.web_keepalive_seconds,
+        "timeout": settings.web_worker_timeout_seconds,
+        "graceful_timeout": settings.web_graceful_timeout_seconds,
+        "max_requests": settings.web_max_requests,
+        "max_requests_jitter": settings.web_max_requests_jitter,
+        "loglevel": settings.web_log_level,
+        "accesslog": "-" if settings.web_access_log else None
+    }).run()
+
+def run_uvicorn(host: str, port: int, workers: int):
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=host,
+        port=port,
+        workers=workers,
+        loop=event_loop(),
+        http=http_protocol(),
+        backlog=settings.web_backlog,
+        timeout_keep_alive=settings.web_keepalive_seconds,
+        timeout_graceful_shutdown=settings.web_graceful_timeout_seconds,
+        limit_max_requests=settings.web_max_requests or None,
+        access_log=settings.web_access_log,
+        log_level=settings.web_log_level
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Run the ApplyBotX API")
+    parser.add_argument("--host", default=settings.web_host)
+    parser.add_argument("--port", type=int, default=settings.web_port)
+    parser.add_argument("--workers", type=int, default=worker_count())
+    args = parser.parse_args(argv)
+
+    check_event_backend(args.workers)
+    prepare_schema()
+
+    if GUNICORN_AVAILABLE and sys.platform != "win32":
+        run_gunicorn(args.host, args.port, args.workers)
+    else:
+        run_uvicorn(args.host, args.port, args.workers)
+
+if __name__ == "__main__":
+    main()
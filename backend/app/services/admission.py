@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Overloaded(Exception):
+    """A request turned away; the client should retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionLane:
+    """Concurrency cap and bounded wait queue for the requests matching one route.
+
+    Up to ``concurrency`` requests run at once and up to ``queue_size`` wait
+    for a slot, in arrival order, for at most ``admission_max_wait_seconds``;
+    anything beyond that is turned away at once rather than piling up. The
+    suggested retry delay is how long the requests ahead would take to clear,
+    from a moving average of recent service times.
+    """
+
+    # Weight of the newest service time in the moving average
+    SMOOTHING = 0.2
+
+    def __init__(self, name: str, path: str, concurrency: int, queue_size: int, user_per_minute: float = 0.0, user_burst: int = 0):
+        self.name = name
+        self.path = re.compile(path)
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.user_per_minute = user_per_minute
+        self.user_burst = user_burst
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_seconds: Optional[float] = None
+        # Metrics
+        self.admitted = 0
+        self.rejected = 0
+
+    def matches(self, method: str, path: str) -> bool:
+        return method == "POST" and self.path.fullmatch(path) is not None
+
+    def retry_after(self) -> int:
+        """Seconds until a request arriving now could expect a slot."""
+        if not self._service_seconds or self.concurrency <= 0:
+            return 1
+        return max(1, math.ceil((len(self._waiters) + 1) * self._service_seconds / self.concurrency))
+
+    async def acquire(self):
+        """Take a slot, waiting in line if need be; raises Overloaded if none comes free in time."""
+        if self.concurrency <= 0:
+            return
+        if self._in_flight < self.concurrency and not self._waiters:
+            self._in_flight += 1
+        elif len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise Overloaded(f"Too many {self.name} requests in progress", self.retry_after())
+        else:
+            await self._wait()
+        self.admitted += 1
+
+    def release(self, elapsed: float):
+        """Give the slot back after a request that ran for ``elapsed`` seconds."""
+        if self.concurrency <= 0:
+            return
+        if self._service_seconds is None:
+            self._service_seconds = elapsed
+        else:
+            self._service_seconds += self.SMOOTHING * (elapsed - self._service_seconds)
+        self._release()
+
+    async def _wait(self):
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), settings.admission_max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # The slot was handed over just as the wait ended
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise Overloaded(f"Timed out waiting for a {self.name} slot", self.retry_after())
+            raise
+
+    def _release(self):
+        # Hand the slot straight to the longest waiter, so newcomers can't take it first
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_ms": int((self._service_seconds or 0) * 1000)
+        }
+
+class RateLimiter:
+    """Per-user token buckets in this process's memory.
+
+    Each bucket holds up to ``burst`` requests and refills at ``per_minute``;
+    a request takes one token. Full buckets are forgotten, so memory stays
+    proportional to recently active users.
+    """
+
+    MAX_BUCKETS = 100000
+
+    def __init__(self):
+        # key -> (tokens, updated at, when the bucket will be full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    async def acquire(self, key: str, per_minute: float, burst: int) -> float:
+        """Take a token; returns 0 if granted, else the seconds until one is available."""
+        return self._take(key, per_minute, burst, 1)
+
+    async def refund(self, key: str, per_minute: float, burst: int):
+        """Give back a token taken by a request that was turned away anyway."""
+        self._take(key, per_minute, burst, -1)
+
+    def _take(self, key: str, per_minute: float, burst: int, take: int) -> float:
+        now = time.monotonic()
+        tokens, updated_at, _ = self._buckets.get(key, (float(burst), now, now))
+        tokens = min(float(burst), tokens + (now - updated_at) * per_minute / 60)
+        if take > 0 and tokens < take:
+            wait = (take - tokens) * 60 / per_minute
+        else:
+            tokens, wait = min(float(burst), tokens - take), 0.0
+        self._buckets[key] = (tokens, now, now + (burst - tokens) * 60 / per_minute)
+        if len(self._buckets) > self.MAX_BUCKETS:
+            self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        return wait
+
+    async def aclose(self):
+        pass
+
+class RedisRateLimiter(RateLimiter):
+    """Per-user token buckets in Redis, shared by every worker and node.
+
+    A bucket is a hash updated by one Lua script, so concurrent requests on
+    different nodes can't both take the last token; it expires once it
+    would have refilled. Clocks come from Redis. If Redis is unreachable,
+    requests are let through rather than failing.
+    """
+
+    KEY_PREFIX = "ratelimit:"
+
+    # KEYS[1] bucket; ARGV: per minute, burst, tokens to take (negative refunds).
+    # Returns milliseconds until a token is available, 0 when taken.
+    SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate = tonumber(ARGV[1]) / 60
+local burst = tonumber(ARGV[2])
+local take = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or burst
+local at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - at) * rate)
+local wait = 0
+if take > 0 and tokens < take then
+    wait = math.ceil((take - tokens) / rate * 1000)
+else
+    tokens = math.min(burst, tokens - take)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return wait
+"""
+
+    def __init__(self, redis_url: str):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url)
+        self._script = self.redis.register_script(self.SCRIPT)
+
+    async def acquire(self, key: str, per_minute: float, burst: int) -> float:
+        try:
+            wait_ms = await self._script(keys=[f"{self.KEY_PREFIX}{key}"], args=[per_minute, burst, 1])
+        except Exception:
+            logger.warning("Rate limit check failed; letting the request through", exc_info=True)
+            return 0.0
+        return int(wait_ms) / 1000
+
+    async def refund(self, key: str, per_minute: float, burst: int):
+        try:
+            await self._script(keys=[f"{self.KEY_PREFIX}{key}"], args=[per_minute, burst, -1])
+        except Exception:
+            logger.warning("Rate limit refund failed", exc_info=True)
+
+    async def aclose(self):
+        await self.redis.aclose()
+
+def build_rate_limiter() -> RateLimiter:
+    """Limiter for ``admission_backend``: ``memory`` or ``redis``."""
+    if settings.admission_backend == "redis":
+        return RedisRateLimiter(settings.redis_url)
+    return RateLimiter()
@@ -1,21 +1,22 @@
+import asyncio
 import json
 import re
-from typing import Dict, Any, Optional
+import time
+from typing import Callable, Dict, Any, List, Optional
 from app.config import settings
-
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+from app.services.circuit_breaker import get_circuit_breaker
+from app.services.llm_backends import LLMBackend
+from app.services.llm_scheduler import INTERACTIVE, LLMScheduler, rate_limit_delay
+from app.services.model_router import ModelRouter, get_model_router
+from app.services.prompt_builder import PromptBuilder
+from app.services.relevance import relevance_ranker
+from app.services.tokens import fit_to_budget, split_sentences
 
 class AIEmailGenerator:
-    def __init__(self):
-        if OPENAI_AVAILABLE and settings.openai_api_key:
-            openai.api_key = settings.openai_api_key
-            self.client = openai.OpenAI(api_key=settings.openai_api_key)
-        else:
-            self.client = None
+    def __init__(self, router: Optional[ModelRouter] = None, scheduler: Optional[LLMScheduler] = None):
+        self.router = router or get_model_router()
+        self.scheduler = scheduler or LLMScheduler()
+        self._prompt_builders: Dict[str, PromptBuilder] = {}
     
     async def generate_email(
         self,
@@ -25,52 +26,161 @@ class AIEmailGenerator:
         role: str,
         tone: str = "professional",
         length: str = "normal",
-        template_id: Optional[int] = None
+        template_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        priority: str = INTERACTIVE
     ) -> Dict[str, Any]:
         """Generate email using AI."""
         
-        if not self.client:
+        if not self.router.has_backends():
             # Fallback to template-based generation
             return self._generate_template_email(
                 extracted_data, job_description, company_name, role, tone, length
             )
         
-        try:
-            # Prepare context
-            context = self._prepare_context(extracted_data, job_description, company_name, role)
-            
-            # Generate email using OpenAI
-            prompt = self._create_prompt(context, tone, length)
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional career advisor helping job seekers write compelling application emails."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=800
+        # Prepare context
+        context = self._prepare_context(extracted_data, job_description, company_name, role)
+        
+        result = await self._complete(
+            length, lambda builder: builder.build(context, tone, length), user_id, priority
+        )
+        
+        if "completion" in result:
+            try:
+                # Parse the result
+                return self._parse_ai_response(result["completion"]["contents"][0], result["meta"])
+            except Exception:
+                result = {"fallback_reason": "parse_error"}
+        
+        # No backend produced a usable draft: fall back to template generation
+        self.router.record_fallback(result["fallback_reason"])
+        return self._generate_template_email(
+            extracted_data, job_description, company_name, role, tone, length,
+            fallback_reason=result["fallback_reason"]
+        )
+    
+    async def generate_variants(
+        self,
+        extracted_data: Dict[str, Any],
+        job_description: str,
+        company_name: str,
+        role: str,
+        tones: List[str],
+        length: str = "normal",
+        template_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        priority: str = INTERACTIVE
+    ) -> List[Dict[str, Any]]:
+        """Generate one draft per tone from a single LLM call sharing the candidate/job context."""
+        
+        if not self.router.has_backends():
+            return [
+                self._generate_template_email(
+                    extracted_data, job_description, company_name, role, tone, length
+                )
+                for tone in tones
+            ]
+        
+        context = self._prepare_context(extracted_data, job_description, company_name, role)
+        
+        result = await self._complete(
+            length, lambda builder: builder.build_variants(context, tones, length), user_id, priority
+        )
+        
+        drafts: List[Optional[Dict[str, Any]]] = [None] * len(tones)
+        fallback_reason = result.get("fallback_reason")
+        if "completion" in result:
+            try:
+                drafts = self._parse_ai_variants(result["completion"]["contents"][0], tones, result["meta"])
+            except Exception:
+                pass
+            if not all(drafts):
+                fallback_reason = "parse_error"
+        
+        if fallback_reason:
+            self.router.record_fallback(fallback_reason)
+        
+        # Any tone the model didn't deliver gets a template draft
+        return [
+            draft or self._generate_template_email(
+                extracted_data, job_description, company_name, role, tone, length,
+                fallback_reason=fallback_reason
             )
+            for tone, draft in zip(tones, drafts)
+        ]
+    
+    async def _complete(
+        self,
+        length: str,
+        build_prompt: Callable[[PromptBuilder], Dict[str, Any]],
+        user_id: Optional[int] = None,
+        priority: str = INTERACTIVE
+    ) -> Dict[str, Any]:
+        """Run a completion on the best available backend, when the scheduler gives it a turn.
+        
+        Returns ``{"completion", "meta"}`` on success, otherwise ``{"fallback_reason"}``.
+        """
+        # Try the best backends for this request, skipping any whose circuit is open
+        fallback_reason = "circuit_open"
+        for backend in self.router.rank(length)[:settings.llm_max_attempts]:
+            breaker = get_circuit_breaker(backend.name)
+            # Checked without claiming a half-open probe; that waits for the scheduler's turn
+            if not breaker.is_available():
+                breaker.record_fallback("circuit_open")
+                continue
             
-            result = response.choices[0].message.content
+            # Build a prompt that fits the input token budget
+            prompt = build_prompt(self._prompt_builder(backend.model))
             
-            # Parse the result
-            return self._parse_ai_response(result, response.usage.total_tokens if response.usage else 0)
+            async with self.scheduler.slot(user_id, priority, prompt["prompt_tokens"] + prompt["max_tokens"]) as grant:
+                # The circuit may have opened, or its probe gone to another request, while this one queued
+                if not breaker.allow_request():
+                    breaker.record_fallback("circuit_open")
+                    continue
+                
+                # Only the backend call counts towards the breaker, not queueing time or scheduler errors
+                started = time.monotonic()
+                try:
+                    completion = await backend.complete(prompt["messages"], prompt["max_tokens"])
+                    grant.used_tokens = completion["usage"].get("total_tokens")
+                except asyncio.CancelledError:
+                    breaker.release()
+                    raise
+                except Exception as e:
+                    delay = rate_limit_delay(e)
+                    if delay is not None:
+                        self.scheduler.throttle(delay)
+                    breaker.record_failure(time.monotonic() - started)
+                    breaker.record_fallback("error")
+                    fallback_reason = "error"
+                    continue
+                latency = time.monotonic() - started
             
-        except Exception as e:
-            # Fallback to template generation
-            return self._generate_template_email(
-                extracted_data, job_description, company_name, role, tone, length
-            )
+            breaker.record_success(latency)
+            
+            return {
+                "completion": completion,
+                "meta": self._usage_meta(backend, completion["usage"], prompt, latency)
+            }
+        
+        return {"fallback_reason": fallback_reason}
+    
+    def _prompt_builder(self, model: str) -> PromptBuilder:
+        """Prompt builder counting tokens with the model's tokenizer."""
+        builder = self._prompt_builders.get(model)
+        if builder is None:
+            builder = PromptBuilder(model=model)
+            self._prompt_builders[model] = builder
+        return builder
     
     def _prepare_context(self, extracted_data: Dict[str, Any], job_description: str, company_name: str, role: str) -> Dict[str, Any]:
-        """Prepare context for AI generation."""
+        """Prepare context for AI generation, keeping the material most relevant to the job."""
         
         # Extract key information
         contact = extracted_data.get("contact", {})
-        skills = extracted_data.get("skills", [])[:10]  # Top 10 skills
-        experiences = extracted_data.get("experiences", [])[:3]  # Top 3 experiences
-        summary = extracted_data.get("summary", "")[:500]  # Truncate summary
+        skills = self._select_skills(extracted_data.get("skills", []), job_description)
+        experiences = self._select_experiences(extracted_data.get("experiences", []), job_description)
+        summary = self._select_summary(extracted_data.get("summary", ""), job_description)
         
         # Create a concise candidate summary
         candidate_summary = []
@@ -85,82 +195,103 @@ class AIEmailGenerator:
             candidate_summary.append(f"Key Skills: {', '.join(skills)}")
         
         if experiences:
-            exp_text = []
-            for exp in experiences:
-                if exp.get("title") and exp.get("company"):
-                    exp_text.append(f"{exp['title']} at {exp['company']}")
-            if exp_text:
-                candidate_summary.append(f"Recent Experience: {'; '.join(exp_text)}")
+            candidate_summary.append(f"Relevant Experience: {'; '.join(experiences)}")
         
         return {
             "candidate_summary": "\n".join(candidate_summary),
-            "job_description": job_description[:1000],  # Truncate job description
+            "job_description": fit_to_budget(job_description, settings.ai_job_description_token_budget),
             "company_name": company_name,
             "role": role,
             "contact_email": contact.get("email", ""),
             "contact_phone": contact.get("phone", "")
         }
     
-    def _create_prompt(self, context: Dict[str, Any], tone: str, length: str) -> str:
-        """Create AI prompt for email generation."""
+    def _select_skills(self, skills: List[str], job_description: str) -> List[str]:
+        """Skills ranked by relevance to the job description."""
+        selected = relevance_ranker.select(
+            job_description,
+            skills,
+            top_k=settings.ai_context_max_skills,
+            token_budget=settings.ai_context_token_budget // 5,
+            min_items=3
+        )
+        return [skills[index] for index in selected]
+    
+    def _select_experiences(self, experiences: List[Dict[str, Any]], job_description: str) -> List[str]:
+        """Most relevant experiences, each with its most relevant highlights."""
+        experiences = [exp for exp in experiences if exp.get("title") and exp.get("company")]
+        if not experiences:
+            return []
         
-        length_instructions = {
-            "short": "Keep the email concise (150-200 words max)",
-            "normal": "Write a standard length email (200-300 words)",
-            "long": "Write a detailed email (300-400 words)"
-        }
+        texts = [
+            " ".join(filter(None, [exp["title"], exp["company"], exp.get("description", "")] + exp.get("highlights", [])))
+            for exp in experiences
+        ]
+        selected = relevance_ranker.select(
+            job_description,
+            texts,
+            top_k=settings.ai_context_max_experiences,
+            token_budget=settings.ai_context_token_budget * 3 // 5,
+            min_items=1
+        )
         
-        tone_instructions = {
-            "professional": "Use a formal, professional tone",
-            "friendly": "Use a warm but professional tone",
-            "enthusiastic": "Use an enthusiastic and energetic tone"
-        }
+        exp_text = []
+        for index in sorted(selected):  # keep resume order for readability
+            exp = experiences[index]
+            line = f"{exp['title']} at {exp['company']}"
+            highlights = exp.get("highlights", [])
+            top_highlights = relevance_ranker.select(
+                job_description,
+                highlights,
+                top_k=2,
+                token_budget=settings.ai_context_token_budget // 5
+            )
+            if top_highlights:
+                line += f" ({'; '.join(highlights[i] for i in top_highlights)})"
+            exp_text.append(line)
         
-        prompt = f"""
-Generate a job application email with the following requirements:
-
-CANDIDATE INFORMATION:
-{context['candidate_summary']}
-
-JOB DETAILS:
-Company: {context['company_name']}
-Position: {context['role']}
-Job Description: {context['job_description']}
-
-REQUIREMENTS:
-- {tone_instructions.get(tone, 'Use a professional tone')}
-- {length_instructions.get(length, 'Write a standard length email')}
-- Include a compelling subject line (max 10 words)
-- Highlight 2-3 most relevant skills/experiences that match the job
-- Include contact information if available
-- End with a clear call-to-action
-
-OUTPUT FORMAT (return as JSON):
-{{
-    "subject": "Subject line here",
-    "body_html": "<p>HTML formatted email body</p>",
-    "body_text": "Plain text version"
-}}
-
-Generate the email now:
-"""
-        return prompt
+        return exp_text
+    
+    def _select_summary(self, summary: str, job_description: str) -> str:
+        """Summary sentences most relevant to the job, in original order."""
+        sentences = split_sentences(summary)
+        if not sentences:
+            return ""
+        
+        selected = relevance_ranker.select(
+            job_description,
+            sentences,
+            top_k=len(sentences),
+            token_budget=settings.ai_context_token_budget // 5,
+            min_items=1
+        )
+        return " ".join(sentences[index] for index in sorted(selected))
+    
+    def _usage_meta(self, backend: LLMBackend, usage: Dict[str, Any], prompt: Dict[str, Any], latency: float) -> Dict[str, Any]:
+        """Model and token accounting for one completion call."""
+        return {
+            "model": backend.model,
+            "backend": backend.name,
+            "latency_ms": int(latency * 1000),
+            "tokens_used": usage.get("total_tokens", 0),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "cached_prompt_tokens": usage.get("cached_prompt_tokens", 0),
+            "prompt_tokens_estimated": prompt["prompt_tokens"],
+            "max_tokens": prompt["max_tokens"]
+        }
     
-    def _parse_ai_response(self, response: str, tokens_used: int) -> Dict[str, Any]:
+    def _parse_ai_response(self, response: str, meta: Dict[str, Any]) -> Dict[str, Any]:
         """Parse AI response and extract email components."""
         try:
             # Try to parse JSON response
-            if response.strip().startswith('{'):
-                parsed = json.loads(response)
+            parsed = self._extract_json(response)
+            if isinstance(parsed, dict):
                 return {
                     "subject": parsed.get("subject", "Application for Position"),
                     "html_body": parsed.get("body_html", parsed.get("body", "")),
                     "plain_body": parsed.get("body_text", self._html_to_text(parsed.get("body_html", ""))),
-                    "model_meta": {
-                        "model": "gpt-3.5-turbo",
-                        "tokens_used": tokens_used,
-                        "response_type": "json"
-                    }
+                    "model_meta": {**meta, "response_type": "json"}
                 }
         except json.JSONDecodeError:
             pass
@@ -184,13 +315,49 @@ Generate the email now:
             "subject": subject,
             "html_body": body_html,
             "plain_body": body_text,
-            "model_meta": {
-                "model": "gpt-3.5-turbo",
-                "tokens_used": tokens_used,
-                "response_type": "text"
-            }
+            "model_meta": {**meta, "response_type": "text"}
         }
     
+    def _parse_ai_variants(self, response: str, tones: List[str], meta: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+        """Split a multi-draft response into per-tone drafts, in the order of ``tones``."""
+        parsed = self._extract_json(response)
+        items = parsed.get("drafts", []) if isinstance(parsed, dict) else parsed
+        if not isinstance(items, list):
+            raise ValueError("Multi-draft response has no drafts list")
+        
+        # Match drafts to tones by label when given, otherwise by position
+        by_tone = {}
+        unlabeled = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            tone = str(item.get("tone", "")).lower()
+            if tone in tones and tone not in by_tone:
+                by_tone[tone] = item
+            else:
+                unlabeled.append(item)
+        
+        drafts = []
+        for index, tone in enumerate(tones):
+            item = by_tone.get(tone) or (unlabeled.pop(0) if unlabeled else None)
+            if item is None:
+                drafts.append(None)
+                continue
+            drafts.append(self._parse_ai_response(
+                json.dumps(item),
+                {**meta, "variant_index": index, "variant_count": len(tones), "tone": tone}
+            ))
+        return drafts
+    
+    def _extract_json(self, response: str) -> Any:
+        """Decode the JSON payload of a response, tolerating Markdown code fences."""
+        text = response.strip()
+        if text.startswith("```"):
+            text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", text)
+        if not text.startswith(("{", "[")):
+            raise json.JSONDecodeError("No JSON object found", text, 0)
+        return json.loads(text)
+    
     def _generate_template_email(
         self,
         extracted_data: Dict[str, Any],
@@ -198,13 +365,22 @@ Generate the email now:
         company_name: str,
         role: str,
         tone: str,
-        length: str
+        length: str,
+        fallback_reason: Optional[str] = None
     ) -> Dict[str, Any]:
         """Fallback template-based email generation."""
         
         contact = extracted_data.get("contact", {})
-        skills = extracted_data.get("skills", [])[:5]
-        experiences = extracted_data.get("experiences", [])[:2]
+        skills = self._select_skills(extracted_data.get("skills", []), job_description)[:5]
+        experiences = [exp for exp in extracted_data.get("experiences", []) if exp.get("title") and exp.get("company")]
+        top_experience = relevance_ranker.select(
+            job_description,
+            [f"{exp['title']} {exp['company']} {exp.get('description', '')}" for exp in experiences],
+            top_k=1,
+            token_budget=settings.ai_context_token_budget,
+            min_items=1
+        )
+        experiences = [experiences[index] for index in top_experience]
         
         name = contact.get("name", "")
         
@@ -268,7 +444,8 @@ Generate the email now:
             "model_meta": {
                 "model": "template",
                 "tokens_used": 0,
-                "response_type": "template"
+                "response_type": "template",
+                "fallback_reason": fallback_reason
             }
         }
     
@@ -0,0 +1,169 @@
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+from app.config import settings
+
+class CircuitBreaker:
+    """Per-provider circuit breaker driven by failure rate and call latency.
+
+    The breaker keeps the outcome of the last ``window_size`` calls. Once at least
+    ``minimum_calls`` are recorded, it opens when the failure rate or the rate of
+    slow calls crosses its threshold. While open, ``allow_request`` returns False
+    so callers can fall back immediately instead of waiting on a sick provider.
+    After ``open_seconds`` it lets ``half_open_max_calls`` probe requests through:
+    a healthy probe closes the circuit, a failed or slow one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.8,
+        slow_call_seconds: float = 10.0,
+        window_size: int = 20,
+        minimum_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self.probes_in_flight = 0
+        # (succeeded, latency_seconds) for the most recent calls
+        self.calls = deque(maxlen=window_size)
+
+        self.times_opened = 0
+        self.fallbacks: Dict[str, int] = {}
+
+    def allow_request(self) -> bool:
+        """Whether a call to the provider may go ahead right now."""
+        if self.state == self.OPEN:
+            if self.clock() - self.opened_at < self.open_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self.probes_in_flight = 0
+
+        if self.state == self.HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_max_calls:
+                return False
+            self.probes_in_flight += 1
+
+        return True
+
+    def is_available(self) -> bool:
+        """Whether the breaker would currently let a call through (without claiming a probe)."""
+        if self.state == self.OPEN:
+            return self.clock() - self.opened_at >= self.open_seconds
+        if self.state == self.HALF_OPEN:
+            return self.probes_in_flight < self.half_open_max_calls
+        return True
+
+    def record_success(self, latency: float):
+        self._record(True, latency)
+
+    def record_failure(self, latency: float):
+        self._record(False, latency)
+
+    def release(self):
+        """Give back a half-open probe slot for a call that never completed (e.g. cancelled)."""
+        if self.state == self.HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def record_fallback(self, reason: str):
+        """Count a request that was served by the fallback path."""
+        self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+
+    def _record(self, succeeded: bool, latency: float):
+        healthy = succeeded and latency < self.slow_call_seconds
+
+        if self.state == self.HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            if healthy:
+                self._close()
+            else:
+                self._open()
+            return
+
+        self.calls.append((succeeded, latency))
+        if self.state == self.CLOSED and len(self.calls) >= self.minimum_calls:
+            if self.failure_rate() >= self.failure_rate_threshold or self.slow_call_rate() >= self.slow_call_rate_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self.times_opened += 1
+
+    def _close(self):
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.calls.clear()
+
+    def failure_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for succeeded, _ in self.calls if not succeeded) / len(self.calls)
+
+    def slow_call_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, latency in self.calls if latency >= self.slow_call_seconds) / len(self.calls)
+
+    def latency_p95(self) -> Optional[float]:
+        """95th percentile latency over the window, or None without enough samples."""
+        if len(self.calls) < self.minimum_calls:
+            return None
+        latencies = sorted(latency for _, latency in self.calls)
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and counters, for health endpoints."""
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.open_seconds - (self.clock() - self.opened_at))
+
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 3),
+            "slow_call_rate": round(self.slow_call_rate(), 3),
+            "latency_p95": self.latency_p95(),
+            "window_calls": len(self.calls),
+            "times_opened": self.times_opened,
+            "retry_in_seconds": retry_in,
+            "fallbacks": dict(self.fallbacks)
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a provider, creating it on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name,
+            failure_rate_threshold=settings.llm_breaker_failure_rate,
+            slow_call_rate_threshold=settings.llm_breaker_slow_call_rate,
+            slow_call_seconds=settings.llm_breaker_slow_call_seconds,
+            window_size=settings.llm_breaker_window_size,
+            minimum_calls=settings.llm_breaker_minimum_calls,
+            open_seconds=settings.llm_breaker_open_seconds
+        )
+        _breakers[name] = breaker
+    return breaker
+
+def circuit_breaker_snapshots() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
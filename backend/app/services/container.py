@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from fastapi import Depends, Request
+from app.config import settings
+from app.services.admission import build_rate_limiter
+from app.services.ai_generator import AIEmailGenerator
+from app.services.document_parser import DocumentParser
+from app.services.email_batching import build_email_transport
+from app.services.email_sender import EmailSender
+from app.services.events import EventBroker, build_event_broker
+from app.services.file_storage import FileStorage
+from app.services.idempotency import build_idempotency_store
+from app.services.llm_backends import close_backend_registry
+from app.services.model_router import get_model_router, reset_model_router
+from app.services.outbox import OutboxDispatcher
+from app.services.recipients import RecipientHistory
+from app.services.resume_ranker import ResumeRanker
+from app.services.scheduler import SendScheduler
+from app.services.skill_index import SkillIndex
+from app.services.skill_recognizer import get_skill_recognizer
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    """Long-lived service instances shared by every request of a worker process.
+
+    Created in the FastAPI lifespan so LLM clients, HTTP connection pools and
+    compiled parser patterns are built once instead of per request.
+    """
+
+    def __init__(self):
+        self.ai_generator = AIEmailGenerator(get_model_router())
+        self.file_storage = FileStorage()
+        self.email_sender = EmailSender(self.file_storage)
+        self.document_parser = DocumentParser()
+        self.events = build_event_broker()
+        self.skill_index = SkillIndex(settings.skill_cache_users, settings.skill_change_log_size)
+        self.resume_ranker = ResumeRanker(cache_users=settings.resume_rank_cache_users)
+        self.recipients = RecipientHistory(settings.recipient_filter_error_rate, settings.recipient_cache_users)
+        self.idempotency = build_idempotency_store()
+        self.rate_limiter = build_rate_limiter()
+        # REST or pooled SMTP, batched per account when enabled
+        self.email_transport = build_email_transport(self.email_sender)
+        self.outbox = OutboxDispatcher(self.email_transport, self.events, self.recipients)
+        self.scheduler = SendScheduler(self.outbox, self.events)
+        self._prewarm_task = None
+
+    async def startup(self):
+        # Compiled once per process (or loaded from its on-disk cache) before the first parse
+        await asyncio.to_thread(get_skill_recognizer)
+        if settings.outbox_dispatcher_enabled:
+            self.outbox.start()
+            self.scheduler.start()
+        if settings.prewarm_on_startup:
+            self._prewarm_task = asyncio.create_task(asyncio.to_thread(self.prewarm))
+
+    def prewarm(self):
+        """Load the lazily imported libraries so the first requests don't pay for them.
+
+        Runs in a worker thread after startup; the server is already accepting
+        requests while it does.
+        """
+        from app.routers.auth import get_pwd_context
+        from app.services.encryption import get_fernet
+        from app.services.tokens import count_tokens
+
+        steps = [
+            ("document parsers", self.document_parser.warm_up),
+            ("LLM backends", lambda: self.ai_generator.router.registry),
+            ("tokenizer", lambda: count_tokens("warm up")),
+            ("password hashing", get_pwd_context),
+            ("token encryption", get_fernet),
+        ]
+        for name, step in steps:
+            try:
+                step()
+            except Exception:
+                logger.exception("Prewarming %s failed", name)
+
+    async def shutdown(self):
+        """Let in-flight sends finish, then close connection pools."""
+        if self._prewarm_task is not None:
+            # The thread can't be interrupted; let it finish before closing clients
+            await asyncio.gather(self._prewarm_task, return_exceptions=True)
+        await self.scheduler.stop()
+        await self.outbox.stop(settings.outbox_drain_seconds)
+        if self.email_transport is not self.email_sender:
+            await self.email_transport.aclose()
+        await self.email_sender.aclose()
+        await self.events.aclose()
+        await self.idempotency.aclose()
+        await self.rate_limiter.aclose()
+        await close_backend_registry()
+        reset_model_router()
+
+def get_services(request: Request) -> ServiceContainer:
+    return request.app.state.services
+
+def get_ai_generator(services: ServiceContainer = Depends(get_services)) -> AIEmailGenerator:
+    return services.ai_generator
+
+def get_email_sender(services: ServiceContainer = Depends(get_services)) -> EmailSender:
+    return services.email_sender
+
+def get_document_parser(services: ServiceContainer = Depends(get_services)) -> DocumentParser:
+    return services.document_parser
+
+def get_file_storage(services: ServiceContainer = Depends(get_services)) -> FileStorage:
+    return services.file_storage
+
+def get_event_broker(services: ServiceContainer = Depends(get_services)) -> EventBroker:
+    return services.events
+
+def get_skill_index(services: ServiceContainer = Depends(get_services)) -> SkillIndex:
+    return services.skill_index
+
+def get_resume_ranker(services: ServiceContainer = Depends(get_services)) -> ResumeRanker:
+    return services.resume_ranker
+
+def get_recipient_history(services: ServiceContainer = Depends(get_services)) -> RecipientHistory:
+    return services.recipients
+
+def get_outbox(services: ServiceContainer = Depends(get_services)) -> OutboxDispatcher:
+    return services.outbox
+
+def get_scheduler(services: ServiceContainer = Depends(get_services)) -> SendScheduler:
+    return services.scheduler
@@ -1,9 +1,10 @@
+import asyncio
 import os
 import re
-import PyPDF2
-import docx
 from typing import Dict, Any, List
 import json
+from app.services.docx_text import iter_docx_text
+from app.services.skill_recognizer import get_skill_recognizer
 
 class DocumentParser:
     def __init__(self):
@@ -21,8 +22,19 @@ class DocumentParser:
             'summary': re.compile(r'\b(summary|profile|objective|about|overview)\b', re.IGNORECASE)
         }
 
+    def warm_up(self):
+        """Import the PDF library ahead of the first parse."""
+        import PyPDF2  # noqa: F401
+
     async def parse_document(self, file_path: str, content_type: str) -> Dict[str, Any]:
-        """Parse document and extract structured data."""
+        """Parse document and extract structured data.
+        
+        Runs in a worker thread: PDF/DOCX extraction is CPU-bound and would
+        otherwise stall every other request on the event loop.
+        """
+        return await asyncio.to_thread(self._parse_document, file_path, content_type)
+
+    def _parse_document(self, file_path: str, content_type: str) -> Dict[str, Any]:
         try:
             if content_type == "application/pdf":
                 text = self._extract_pdf_text(file_path)
@@ -41,6 +53,8 @@ class DocumentParser:
     def _extract_pdf_text(self, file_path: str) -> str:
         """Extract text from PDF file."""
         text = ""
+        import PyPDF2  # heavy, imported on first use
+        
         try:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
@@ -55,13 +69,9 @@ class DocumentParser:
         return text
 
     def _extract_docx_text(self, file_path: str) -> str:
-        """Extract text from DOCX file."""
+        """Extract text from DOCX file, including tables, headers and footers."""
         try:
-            doc = docx.Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            return "\n".join(iter_docx_text(file_path)) + "\n"
         except Exception as e:
             raise Exception(f"DOCX extraction failed: {str(e)}")
 
@@ -87,8 +97,18 @@ class DocumentParser:
         # Extract sections
         sections = self._identify_sections(lines)
         
-        # Extract skills
-        skills = self._extract_skills(sections.get('skills', []))
+        # Recognize taxonomy skills anywhere in the text, not just a skills section
+        recognizer = get_skill_recognizer()
+        skill_mentions = recognizer.mentions(text)
+        skills = [mention["name"] for mention in skill_mentions]
+        
+        # Then what the skills section lists that the taxonomy lacks
+        seen = {skill.lower() for skill in skills}
+        for skill in self._extract_skills(sections.get('skills', [])):
+            skill = recognizer.canonical(skill) or skill
+            if skill.lower() not in seen:
+                seen.add(skill.lower())
+                skills.append(skill)
         
         # Extract experience
         experiences = self._extract_experiences(sections.get('experience', []))
@@ -102,6 +122,7 @@ class DocumentParser:
         return {
             "contact": contact,
             "skills": skills,
+            "skill_mentions": skill_mentions,
             "experiences": experiences,
             "education": education,
             "summary": summary,
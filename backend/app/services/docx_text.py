@@ -0,0 +1,94 @@
+import re
+import zipfile
+from typing import BinaryIO, Iterator, List
+from xml.etree import ElementTree
+
+# WordprocessingML elements that carry text or structure
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+PARAGRAPH = f"{W}p"
+TEXT = f"{W}t"
+TAB = f"{W}tab"
+BREAKS = (f"{W}br", f"{W}cr")
+HYPHEN = f"{W}noBreakHyphen"
+ROW = f"{W}tr"
+CELL = f"{W}tc"
+# Text boxes appear twice: as DrawingML and again as a VML fallback for old readers
+FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+HEADER_PART = re.compile(r"word/header\d*\.xml")
+FOOTER_PART = re.compile(r"word/footer\d*\.xml")
+
+def iter_docx_text(path: str) -> Iterator[str]:
+    """Lines of a .docx file: headers, then the body, then footers.
+
+    Reads the XML parts straight from the zip with ``iterparse`` and drops
+    each element once its text is taken, so memory stays flat however long
+    the document is. Every paragraph is a line; a table row is one line
+    with its cells separated by tabs.
+
+    Raises zipfile.BadZipFile, KeyError (no document part) or
+    ElementTree.ParseError for a file that isn't a valid .docx.
+    """
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        parts = sorted(name for name in names if HEADER_PART.fullmatch(name))
+        parts.append("word/document.xml")
+        parts += sorted(name for name in names if FOOTER_PART.fullmatch(name))
+        for part in parts:
+            with archive.open(part) as stream:
+                yield from _iter_part_lines(stream)
+
+def _iter_part_lines(stream: BinaryIO) -> Iterator[str]:
+    paragraphs: List[List[str]] = []  # text runs of each open paragraph (text boxes nest them)
+    cells: List[List[str]] = []  # paragraphs of each open table cell
+    rows: List[List[str]] = []  # cells of each open table row
+    open_elements = []
+    skipping = 0
+
+    for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            open_elements.append(element)
+            if tag == FALLBACK:
+                skipping += 1
+            elif skipping:
+                pass
+            elif tag == PARAGRAPH:
+                paragraphs.append([])
+            elif tag == CELL:
+                cells.append([])
+            elif tag == ROW:
+                rows.append([])
+            continue
+
+        open_elements.pop()
+        if tag == FALLBACK:
+            skipping -= 1
+        elif skipping:
+            pass
+        elif tag == TEXT and paragraphs:
+            paragraphs[-1].append(element.text or "")
+        elif tag == TAB and paragraphs:
+            paragraphs[-1].append("\t")
+        elif tag in BREAKS and paragraphs:
+            paragraphs[-1].append("\n")
+        elif tag == HYPHEN and paragraphs:
+            paragraphs[-1].append("-")
+        elif tag == PARAGRAPH:
+            line = "".join(paragraphs.pop()).rstrip()
+            if cells and not paragraphs:
+                if line:
+                    cells[-1].append(line)
+            else:
+                yield line
+        elif tag == CELL and rows:
+            rows[-1].append(" ".join(cells.pop()))
+        elif tag == ROW:
+            line = "\t".join(cell for cell in rows.pop() if cell)
+            if line:
+                yield line
+
+        # Its text is taken; drop the subtree, and the emptied shells under the top-level element
+        element.clear()
+        if len(open_elements) <= 2 and open_elements:
+            open_elements[-1].clear()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+from app.config import settings
+from app.models.database import OAuthAccount
+from app.services.email_sender import MAX_BATCH_SIZE, EmailSender
+from app.services.smtp_transport import SMTPTransport
+
+logger = logging.getLogger(__name__)
+
+class PendingBatch:
+    """Sends from one account waiting to go out in the same batch call."""
+
+    def __init__(self, oauth_account: OAuthAccount):
+        self.oauth_account = oauth_account
+        self.items: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class BatchingEmailSender:
+    """``send_email`` that coalesces concurrent sends per account into batch calls.
+
+    The first send from an account opens a batch and waits up to
+    ``window_seconds`` for others from the same account (the outbox
+    dispatcher runs many at once); the batch goes out as a Gmail batch or
+    Microsoft Graph ``$batch`` request when the window closes or it is full.
+    Each caller gets its own message's result, so one rejected message
+    doesn't fail the rest. Over SMTP, a batch is pipelined over one session.
+    """
+
+    def __init__(self, email_sender: Union[EmailSender, SMTPTransport], window_seconds: float = 0.05, max_batch_size: int = MAX_BATCH_SIZE):
+        self.email_sender = email_sender
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, min(max_batch_size, MAX_BATCH_SIZE))
+        self._pending: Dict[int, PendingBatch] = {}
+        self._flushes = set()
+
+    async def send_email(self, oauth_account: OAuthAccount, **message) -> Dict[str, Any]:
+        if oauth_account.provider not in ("google", "microsoft"):
+            return await self.email_sender.send_email(oauth_account=oauth_account, **message)
+
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(oauth_account.id)
+        if batch is None:
+            batch = self._pending[oauth_account.id] = PendingBatch(oauth_account)
+            batch.timer = loop.call_later(self.window_seconds, self._flush, oauth_account.id)
+        result = loop.create_future()
+        batch.items.append((message, result))
+        if len(batch.items) >= self.max_batch_size:
+            self._flush(oauth_account.id)
+        return await result
+
+    def _flush(self, account_id: int):
+        batch = self._pending.pop(account_id, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.create_task(self._send(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _send(self, batch: PendingBatch):
+        # Callers that gave up (timed out) before the batch left are dropped
+        items = [(message, result) for message, result in batch.items if not result.done()]
+        if not items:
+            return
+        try:
+            results = await self.email_sender.send_batch(batch.oauth_account, [message for message, _ in items])
+        except Exception as e:
+            logger.exception("Batch send failed")
+            results = [{"success": False, "error": f"Email sending failed: {str(e)}", "retryable": False}] * len(items)
+        for (_, result), outcome in zip(items, results):
+            if not result.done():
+                result.set_result(outcome)
+
+    async def aclose(self):
+        """Send what is still waiting for its window to close."""
+        for account_id in list(self._pending):
+            self._flush(account_id)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        if isinstance(self.email_sender, SMTPTransport):
+            await self.email_sender.aclose()
+
+def build_email_transport(email_sender: EmailSender) -> Union[EmailSender, SMTPTransport, BatchingEmailSender]:
+    """What the outbox dispatcher sends with: ``email_transport`` (REST or SMTP), batched per account if enabled.
+
+    Close it with ``aclose()`` (when it isn't ``email_sender`` itself) before
+    closing ``email_sender``.
+    """
+    transport = SMTPTransport(email_sender) if settings.email_transport == "smtp" else email_sender
+    if settings.email_batch_enabled:
+        transport = BatchingEmailSender(transport, settings.email_batch_window_seconds)
+    return transport
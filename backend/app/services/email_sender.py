@@ -1,19 +1,189 @@
+import asyncio
 import base64
 import json
+import tempfile
+import uuid
+from urllib.parse import quote
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
+from email.parser import BytesParser
+from email.policy import HTTP, SMTP as SMTP_POLICY
 import httpx
-from typing import List, Dict, Any
+from typing import AsyncIterator, BinaryIO, List, Dict, Any, Optional, Tuple
+from app.config import settings
 from app.models.database import OAuthAccount
 from app.services.encryption import decrypt_token
+from app.services.file_storage import FileStorage
 from app.services.oauth import GoogleOAuth, MicrosoftOAuth
 
+GMAIL_SEND_PATH = "/gmail/v1/users/me/messages/send"
+
+# Requests per provider batch call (Microsoft Graph's $batch limit)
+MAX_BATCH_SIZE = 20
+
+# Bytes per upload request: a multiple of both Gmail's (256 KiB) and Graph's (320 KiB) chunk granularity
+UPLOAD_CHUNK_SIZE = 1280 * 1024
+
+# Bytes read per step while streaming a request body from a file
+STREAM_READ_SIZE = 64 * 1024
+
+# Attachment bytes base64-encoded at a time, a multiple of 57 so every step yields whole 76-character lines
+BASE64_READ_SIZE = 57 * 1024
+
+def _provider_error(provider: str, label: str, status_code: int, detail: Any) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": f"{label} error: {status_code}",
+        "detail": detail,
+        # Throttling and provider outages are worth another attempt
+        "retryable": status_code == 429 or status_code >= 500,
+        "provider": provider
+    }
+
+def _gmail_result(status_code: int, body: str) -> Dict[str, Any]:
+    if status_code == 200:
+        result = json.loads(body) if body else {}
+        return {
+            "success": True,
+            "message_id": result.get("id"),
+            "provider": "gmail",
+            "response": result
+        }
+    return _provider_error("gmail", "Gmail API", status_code, body)
+
+def _outlook_result(status_code: int, detail: Any) -> Dict[str, Any]:
+    if status_code == 202:  # Microsoft Graph returns 202 for successful send
+        return {
+            "success": True,
+            "provider": "microsoft",
+            "response": "Email sent successfully"
+        }
+    return _provider_error("microsoft", "Microsoft Graph API", status_code, detail)
+
+def _parse_http_response(text: str) -> Tuple[int, str]:
+    """Status and body of an HTTP response embedded in a batch response part."""
+    text = text.replace("\r\n", "\n")
+    head, _, body = text.partition("\n\n")
+    status_line = head.split("\n", 1)[0].split()
+    return int(status_line[1]), body.strip()
+
+def build_mime_message(
+    sender: str,
+    to_emails: List[str],
+    cc_emails: List[str],
+    subject: str,
+    html_body: str,
+    plain_body: str,
+    send_as_html: bool = True,
+    bcc_emails: Optional[List[str]] = None
+) -> MIMEMultipart:
+    """The message as sent.
+
+    Pass ``bcc_emails`` only for Gmail, which takes Bcc recipients from the
+    header and strips it before delivery; over SMTP they belong on the
+    envelope alone, as recipients would see the header.
+    """
+    message = MIMEMultipart('alternative')
+    message['Subject'] = subject
+    message['From'] = sender
+    message['To'] = ', '.join(to_emails)
+    
+    if cc_emails:
+        message['Cc'] = ', '.join(cc_emails)
+    
+    if bcc_emails:
+        message['Bcc'] = ', '.join(bcc_emails)
+    
+    # Add text and HTML parts
+    if plain_body:
+        text_part = MIMEText(plain_body, 'plain')
+        message.attach(text_part)
+    
+    if send_as_html and html_body:
+        html_part = MIMEText(html_body, 'html')
+        message.attach(html_part)
+    
+    return message
+
+def spool_mime_message(
+    sender: str,
+    to_emails: List[str],
+    cc_emails: List[str],
+    subject: str,
+    html_body: str,
+    plain_body: str,
+    send_as_html: bool,
+    attachments: List[Dict[str, Any]],
+    file_storage: FileStorage,
+    bcc_emails: Optional[List[str]] = None
+) -> Tuple[BinaryIO, int]:
+    """The message with its attachments as CRLF MIME in a spooled temp file, and its size.
+
+    Attachments are read from storage and base64-encoded a chunk at a time,
+    and the file moves to disk past ``email_spool_memory_bytes``, so memory
+    use does not grow with attachment size.
+    """
+    body = build_mime_message(sender, to_emails, cc_emails, subject, html_body, plain_body, send_as_html, bcc_emails)
+    boundary = f"=_mixed_{uuid.uuid4().hex}"
+    message = MIMEMultipart('mixed', boundary=boundary)
+    for header in ('Subject', 'From', 'To', 'Cc', 'Bcc'):
+        if body[header] is not None:
+            message[header] = body[header]
+            del body[header]
+    message.attach(body)
+    head = message.as_bytes(policy=SMTP_POLICY)
+    close = f"--{boundary}--".encode()
+
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.email_spool_memory_bytes)
+    try:
+        # Everything up to the closing delimiter, then one part per attachment
+        spool.write(head[:head.rindex(close)])
+        for attachment in attachments:
+            maintype, _, subtype = (attachment.get("content_type") or "application/octet-stream").partition("/")
+            part = MIMEBase(maintype, subtype or "octet-stream")
+            part.add_header('Content-Disposition', 'attachment', filename=attachment["filename"])
+            part['Content-Transfer-Encoding'] = 'base64'
+            del part['MIME-Version']
+            spool.write(f"--{boundary}\r\n".encode() + part.as_bytes(policy=SMTP_POLICY))
+            with file_storage.open_file(attachment["path"]) as source:
+                while chunk := source.read(BASE64_READ_SIZE):
+                    spool.write(base64.encodebytes(chunk).replace(b"\n", b"\r\n"))
+        spool.write(close + b"\r\n")
+        size = spool.tell()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool, size
+
+async def _read_chunks(source: BinaryIO, length: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Up to ``length`` bytes of ``source`` (the rest of it by default), as a streamed request body.
+
+    Small reads keep request objects from holding whole upload chunks.
+    """
+    remaining = length
+    while remaining is None or remaining > 0:
+        read_size = STREAM_READ_SIZE if remaining is None else min(STREAM_READ_SIZE, remaining)
+        chunk = await asyncio.to_thread(source.read, read_size)
+        if not chunk:
+            return
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+
 class EmailSender:
-    def __init__(self):
+    def __init__(self, file_storage: Optional[FileStorage] = None):
         self.google_oauth = GoogleOAuth()
         self.microsoft_oauth = MicrosoftOAuth()
+        # Where attachments are read from
+        self.file_storage = file_storage or FileStorage()
+        # Shared connection pool for provider API calls
+        self.http = httpx.AsyncClient(timeout=30.0)
+
+    async def aclose(self):
+        await self.http.aclose()
 
     async def send_email(
         self,
@@ -24,23 +194,105 @@ class EmailSender:
         subject: str,
         html_body: str,
         plain_body: str,
-        send_as_html: bool = True
+        send_as_html: bool = True,
+        attachments: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
-        """Send email using the appropriate provider."""
+        """Send email using the appropriate provider.
+
+        ``attachments`` are stored files (``path``, ``filename``,
+        ``content_type``), streamed from storage into the upload.
+        """
         
         if oauth_account.provider == "google":
             return await self._send_gmail(
                 oauth_account, to_emails, cc_emails, bcc_emails,
-                subject, html_body, plain_body, send_as_html
+                subject, html_body, plain_body, send_as_html, attachments
             )
         elif oauth_account.provider == "microsoft":
             return await self._send_outlook(
                 oauth_account, to_emails, cc_emails, bcc_emails,
-                subject, html_body, plain_body, send_as_html
+                subject, html_body, plain_body, send_as_html, attachments
             )
         else:
             raise ValueError(f"Unsupported email provider: {oauth_account.provider}")
 
+    async def send_batch(self, oauth_account: OAuthAccount, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send several messages from one account in provider batch calls.
+
+        ``messages`` hold ``send_email`` keyword arguments (without the
+        account); results come back in the same order, one per message.
+        Messages with attachments are sent on their own, alongside the
+        batch calls, since their content is uploaded rather than inlined.
+        """
+        if oauth_account.provider == "google":
+            send_chunk = self._send_gmail_batch
+        elif oauth_account.provider == "microsoft":
+            send_chunk = self._send_outlook_batch
+        else:
+            raise ValueError(f"Unsupported email provider: {oauth_account.provider}")
+
+        single = [index for index, message in enumerate(messages) if message.get("attachments")]
+        batched = [index for index, message in enumerate(messages) if not message.get("attachments")]
+        if len(batched) == 1:
+            single, batched = single + batched, []
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+
+        async def send_single(index: int):
+            results[index] = await self.send_email(oauth_account=oauth_account, **messages[index])
+
+        async def send_batched():
+            for start in range(0, len(batched), MAX_BATCH_SIZE):
+                chunk = batched[start:start + MAX_BATCH_SIZE]
+                inline = [{key: value for key, value in messages[index].items() if key != "attachments"} for index in chunk]
+                for index, result in zip(chunk, await send_chunk(oauth_account, inline)):
+                    results[index] = result
+
+        await asyncio.gather(send_batched(), *(send_single(index) for index in single))
+        return results
+
+    def _gmail_raw(
+        self,
+        oauth_account: OAuthAccount,
+        to_emails: List[str],
+        cc_emails: List[str],
+        bcc_emails: List[str],
+        subject: str,
+        html_body: str,
+        plain_body: str,
+        send_as_html: bool = True
+    ) -> str:
+        """The base64url MIME message the Gmail API sends."""
+        message = build_mime_message(oauth_account.email, to_emails, cc_emails, subject, html_body, plain_body, send_as_html, bcc_emails)
+        return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
+    def _outlook_message(
+        self,
+        to_emails: List[str],
+        cc_emails: List[str],
+        bcc_emails: List[str],
+        subject: str,
+        html_body: str,
+        plain_body: str,
+        send_as_html: bool = True
+    ) -> Dict[str, Any]:
+        """The Microsoft Graph sendMail request body."""
+        to_recipients = [{"emailAddress": {"address": email}} for email in to_emails]
+        cc_recipients = [{"emailAddress": {"address": email}} for email in cc_emails] if cc_emails else []
+        bcc_recipients = [{"emailAddress": {"address": email}} for email in bcc_emails] if bcc_emails else []
+        
+        return {
+            "message": {
+                "subject": subject,
+                "body": {
+                    "contentType": "HTML" if send_as_html else "Text",
+                    "content": html_body if send_as_html else plain_body
+                },
+                "toRecipients": to_recipients,
+                "ccRecipients": cc_recipients,
+                "bccRecipients": bcc_recipients
+            }
+        }
+
     async def _send_gmail(
         self,
         oauth_account: OAuthAccount,
@@ -50,70 +302,154 @@ class EmailSender:
         subject: str,
         html_body: str,
         plain_body: str,
-        send_as_html: bool
+        send_as_html: bool,
+        attachments: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """Send email using Gmail API."""
         
         try:
             # Get access token (refresh if needed)
             access_token = await self._get_valid_access_token(oauth_account)
-            
-            # Create MIME message
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = oauth_account.email
-            message['To'] = ', '.join(to_emails)
-            
-            if cc_emails:
-                message['Cc'] = ', '.join(cc_emails)
-            
-            # Add text and HTML parts
-            if plain_body:
-                text_part = MIMEText(plain_body, 'plain')
-                message.attach(text_part)
-            
-            if send_as_html and html_body:
-                html_part = MIMEText(html_body, 'html')
-                message.attach(html_part)
-            
-            # Convert to raw message
-            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+            if attachments:
+                response = await self._upload_gmail(
+                    oauth_account, access_token, to_emails, cc_emails, bcc_emails,
+                    subject, html_body, plain_body, send_as_html, attachments
+                )
+                return _gmail_result(response.status_code, response.text)
+
+            raw_message = self._gmail_raw(
+                oauth_account, to_emails, cc_emails, bcc_emails,
+                subject, html_body, plain_body, send_as_html
+            )
             
             # Send via Gmail API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://gmail.googleapis.com/gmail/v1/users/me/messages/send",
-                    headers={
-                        'Authorization': f'Bearer {access_token}',
-                        'Content-Type': 'application/json'
-                    },
-                    json={'raw': raw_message}
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        "success": True,
-                        "message_id": result.get("id"),
-                        "provider": "gmail",
-                        "response": result
-                    }
-                else:
-                    error_detail = response.text
-                    return {
-                        "success": False,
-                        "error": f"Gmail API error: {response.status_code}",
-                        "detail": error_detail,
-                        "provider": "gmail"
-                    }
+            response = await self.http.post(
+                f"{settings.gmail_api_url}{GMAIL_SEND_PATH}",
+                headers={
+                    'Authorization': f'Bearer {access_token}',
+                    'Content-Type': 'application/json'
+                },
+                json={'raw': raw_message}
+            )
+            return _gmail_result(response.status_code, response.text)
                     
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Gmail sending failed: {str(e)}",
+                "retryable": isinstance(e, httpx.TransportError),
                 "provider": "gmail"
             }
 
+    async def _upload_gmail(
+        self,
+        oauth_account: OAuthAccount,
+        access_token: str,
+        to_emails: List[str],
+        cc_emails: List[str],
+        bcc_emails: List[str],
+        subject: str,
+        html_body: str,
+        plain_body: str,
+        send_as_html: bool,
+        attachments: List[Dict[str, Any]]
+    ) -> httpx.Response:
+        """Send through Gmail's upload endpoint, the MIME message as the request body.
+
+        Messages up to ``gmail_resumable_threshold_bytes`` go in one simple
+        upload; larger ones in a resumable session, one chunk per request.
+        """
+        spool, size = await asyncio.to_thread(
+            spool_mime_message, oauth_account.email, to_emails, cc_emails,
+            subject, html_body, plain_body, send_as_html, attachments, self.file_storage, bcc_emails
+        )
+        with spool:
+            url = f"{settings.gmail_api_url}/upload{GMAIL_SEND_PATH}"
+            headers = {'Authorization': f'Bearer {access_token}'}
+            if size <= settings.gmail_resumable_threshold_bytes:
+                return await self.http.post(
+                    url,
+                    params={'uploadType': 'media'},
+                    headers={**headers, 'Content-Type': 'message/rfc822', 'Content-Length': str(size)},
+                    content=_read_chunks(spool)
+                )
+
+            session = await self.http.post(
+                url,
+                params={'uploadType': 'resumable'},
+                headers={**headers, 'X-Upload-Content-Type': 'message/rfc822', 'X-Upload-Content-Length': str(size)}
+            )
+            if session.status_code != 200:
+                return session
+            offset = 0
+            while True:
+                length = min(UPLOAD_CHUNK_SIZE, size - offset)
+                response = await self.http.put(
+                    session.headers['Location'],
+                    headers={
+                        **headers,
+                        'Content-Length': str(length),
+                        'Content-Range': f'bytes {offset}-{offset + length - 1}/{size}'
+                    },
+                    content=_read_chunks(spool, length)
+                )
+                if response.status_code != 308:
+                    return response
+                # 308 Resume Incomplete; Range says how much was persisted
+                received = response.headers.get('Range')
+                offset = int(received.rpartition('-')[2]) + 1 if received else offset + length
+                if offset >= size:
+                    return response
+                spool.seek(offset)
+
+    async def _send_gmail_batch(self, oauth_account: OAuthAccount, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One Gmail batch request: a multipart/mixed body with one HTTP request per part."""
+        try:
+            access_token = await self._get_valid_access_token(oauth_account)
+            boundary = f"batch_{uuid.uuid4().hex}"
+            parts = []
+            for index, message in enumerate(messages):
+                payload = json.dumps({"raw": self._gmail_raw(oauth_account, **message)})
+                parts.append(
+                    f"--{boundary}\r\n"
+                    "Content-Type: application/http\r\n"
+                    f"Content-ID: <item-{index}>\r\n\r\n"
+                    f"POST {GMAIL_SEND_PATH}\r\n"
+                    "Content-Type: application/json\r\n\r\n"
+                    f"{payload}\r\n"
+                )
+            response = await self.http.post(
+                settings.gmail_batch_url,
+                headers={
+                    'Authorization': f'Bearer {access_token}',
+                    'Content-Type': f'multipart/mixed; boundary={boundary}'
+                },
+                content="".join(parts) + f"--{boundary}--\r\n"
+            )
+            if response.status_code != 200:
+                return [_provider_error("gmail", "Gmail batch", response.status_code, response.text)] * len(messages)
+
+            results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+            envelope = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {response.headers.get('content-type', '')}\r\n\r\n".encode() + response.content
+            )
+            for part in envelope.iter_parts():
+                content_id = (part.get("Content-ID") or "").strip("<>")
+                index = content_id.rpartition("item-")[2]
+                if index.isdigit() and int(index) < len(messages):
+                    payload = part.get_payload(decode=True) or b""
+                    status_code, body = _parse_http_response(payload.decode("utf-8", "replace"))
+                    results[int(index)] = _gmail_result(status_code, body)
+            return [result or _provider_error("gmail", "Gmail batch (no response part)", 500, None) for result in results]
+
+        except Exception as e:
+            return [{
+                "success": False,
+                "error": f"Gmail sending failed: {str(e)}",
+                "retryable": isinstance(e, httpx.TransportError),
+                "provider": "gmail"
+            }] * len(messages)
+
     async def _send_outlook(
         self,
         oauth_account: OAuthAccount,
@@ -123,69 +459,163 @@ class EmailSender:
         subject: str,
         html_body: str,
         plain_body: str,
-        send_as_html: bool
+        send_as_html: bool,
+        attachments: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """Send email using Microsoft Graph API."""
         
         try:
             # Get access token (refresh if needed)
             access_token = await self._get_valid_access_token(oauth_account)
-            
-            # Prepare recipients
-            to_recipients = [{"emailAddress": {"address": email}} for email in to_emails]
-            cc_recipients = [{"emailAddress": {"address": email}} for email in cc_emails] if cc_emails else []
-            bcc_recipients = [{"emailAddress": {"address": email}} for email in bcc_emails] if bcc_emails else []
-            
-            # Prepare message body
-            body_content = html_body if send_as_html else plain_body
-            body_type = "HTML" if send_as_html else "Text"
-            
-            message_payload = {
-                "message": {
-                    "subject": subject,
-                    "body": {
-                        "contentType": body_type,
-                        "content": body_content
-                    },
-                    "toRecipients": to_recipients,
-                    "ccRecipients": cc_recipients,
-                    "bccRecipients": bcc_recipients
-                }
-            }
+            if attachments:
+                return await self._send_outlook_draft(
+                    access_token, to_emails, cc_emails, bcc_emails,
+                    subject, html_body, plain_body, send_as_html, attachments
+                )
+
+            message_payload = self._outlook_message(
+                to_emails, cc_emails, bcc_emails, subject, html_body, plain_body, send_as_html
+            )
             
             # Send via Microsoft Graph API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://graph.microsoft.com/v1.0/me/sendMail",
-                    headers={
-                        'Authorization': f'Bearer {access_token}',
-                        'Content-Type': 'application/json'
-                    },
-                    json=message_payload
-                )
-                
-                if response.status_code == 202:  # Microsoft Graph returns 202 for successful send
-                    return {
-                        "success": True,
-                        "provider": "microsoft",
-                        "response": "Email sent successfully"
-                    }
-                else:
-                    error_detail = response.text
-                    return {
-                        "success": False,
-                        "error": f"Microsoft Graph API error: {response.status_code}",
-                        "detail": error_detail,
-                        "provider": "microsoft"
-                    }
+            response = await self.http.post(
+                f"{settings.graph_api_url}/me/sendMail",
+                headers={
+                    'Authorization': f'Bearer {access_token}',
+                    'Content-Type': 'application/json'
+                },
+                json=message_payload
+            )
+            return _outlook_result(response.status_code, response.text)
                     
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Outlook sending failed: {str(e)}",
+                "retryable": isinstance(e, httpx.TransportError),
                 "provider": "microsoft"
             }
 
+    async def _send_outlook_draft(
+        self,
+        access_token: str,
+        to_emails: List[str],
+        cc_emails: List[str],
+        bcc_emails: List[str],
+        subject: str,
+        html_body: str,
+        plain_body: str,
+        send_as_html: bool,
+        attachments: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Create a draft, attach the files, then send it.
+
+        Files under ``graph_upload_session_threshold_bytes`` are attached
+        in one request; larger ones go through an upload session in
+        ``UPLOAD_CHUNK_SIZE`` pieces. The draft is deleted if sending fails.
+        """
+        headers = {'Authorization': f'Bearer {access_token}'}
+        message = self._outlook_message(to_emails, cc_emails, bcc_emails, subject, html_body, plain_body, send_as_html)["message"]
+        draft = await self.http.post(f"{settings.graph_api_url}/me/messages", headers=headers, json=message)
+        if draft.status_code != 201:
+            return _outlook_result(draft.status_code, draft.text)
+        message_url = f"{settings.graph_api_url}/me/messages/{quote(draft.json()['id'], safe='')}"
+
+        sent = False
+        try:
+            for attachment in attachments:
+                response = await self._attach_outlook_file(message_url, headers, attachment)
+                if response.status_code not in (200, 201):
+                    return _outlook_result(response.status_code, response.text)
+            response = await self.http.post(f"{message_url}/send", headers=headers)
+            sent = response.status_code == 202
+            return _outlook_result(response.status_code, response.text)
+        finally:
+            if not sent:
+                try:
+                    await self.http.delete(message_url, headers=headers)
+                except httpx.HTTPError:
+                    pass
+
+    async def _attach_outlook_file(self, message_url: str, headers: Dict[str, str], attachment: Dict[str, Any]) -> httpx.Response:
+        """Add one stored file to a Graph draft; the last upload response on success."""
+        content_type = attachment.get("content_type") or "application/octet-stream"
+        size = self.file_storage.get_file_size(attachment["path"])
+        with self.file_storage.open_file(attachment["path"]) as source:
+            if size < settings.graph_upload_session_threshold_bytes:
+                content = await asyncio.to_thread(source.read)
+                return await self.http.post(f"{message_url}/attachments", headers=headers, json={
+                    "@odata.type": "#microsoft.graph.fileAttachment",
+                    "name": attachment["filename"],
+                    "contentType": content_type,
+                    "contentBytes": base64.b64encode(content).decode()
+                })
+
+            session = await self.http.post(f"{message_url}/attachments/createUploadSession", headers=headers, json={
+                "AttachmentItem": {
+                    "attachmentType": "file",
+                    "name": attachment["filename"],
+                    "contentType": content_type,
+                    "size": size
+                }
+            })
+            if session.status_code not in (200, 201):
+                return session
+            # The upload URL carries its own credentials
+            upload_url = session.json()["uploadUrl"]
+            for offset in range(0, size, UPLOAD_CHUNK_SIZE):
+                length = min(UPLOAD_CHUNK_SIZE, size - offset)
+                response = await self.http.put(upload_url, headers={
+                    'Content-Length': str(length),
+                    'Content-Range': f'bytes {offset}-{offset + length - 1}/{size}'
+                }, content=_read_chunks(source, length))
+                if response.status_code not in (200, 201):
+                    return response
+            return response
+
+    async def _send_outlook_batch(self, oauth_account: OAuthAccount, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One Microsoft Graph JSON $batch request of sendMail calls."""
+        try:
+            access_token = await self._get_valid_access_token(oauth_account)
+            response = await self.http.post(
+                f"{settings.graph_api_url}/$batch",
+                headers={
+                    'Authorization': f'Bearer {access_token}',
+                    'Content-Type': 'application/json'
+                },
+                json={"requests": [
+                    {
+                        "id": str(index),
+                        "method": "POST",
+                        "url": "/me/sendMail",
+                        "headers": {"Content-Type": "application/json"},
+                        "body": self._outlook_message(**message)
+                    }
+                    for index, message in enumerate(messages)
+                ]}
+            )
+            if response.status_code != 200:
+                return [_provider_error("microsoft", "Microsoft Graph batch", response.status_code, response.text)] * len(messages)
+
+            results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+            for item in response.json().get("responses", []):
+                index = str(item.get("id", ""))
+                if index.isdigit() and int(index) < len(messages):
+                    results[int(index)] = _outlook_result(int(item.get("status", 500)), item.get("body"))
+            return [result or _provider_error("microsoft", "Microsoft Graph batch (no response)", 500, None) for result in results]
+
+        except Exception as e:
+            return [{
+                "success": False,
+                "error": f"Outlook sending failed: {str(e)}",
+                "retryable": isinstance(e, httpx.TransportError),
+                "provider": "microsoft"
+            }] * len(messages)
+
+    async def access_token(self, oauth_account: OAuthAccount) -> str:
+        """A current access token for the account, for other transports (SMTP)."""
+        return await self._get_valid_access_token(oauth_account)
+
     async def _get_valid_access_token(self, oauth_account: OAuthAccount) -> str:
         """Get a valid access token, refreshing if necessary."""
         from datetime import datetime
@@ -1,7 +1,5 @@
 import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from functools import lru_cache
 from app.config import settings
 
 def get_fernet_key():
@@ -9,6 +7,9 @@ def get_fernet_key():
     if settings.encryption_key:
         return base64.urlsafe_b64decode(settings.encryption_key.encode())
     else:
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
         # Generate key from secret (for development)
         password = settings.secret_key.encode()
         salt = b'salt_'  # In production, use a proper random salt
@@ -20,13 +21,22 @@ def get_fernet_key():
         )
         return base64.urlsafe_b64encode(kdf.derive(password))
 
+@lru_cache(maxsize=1)
+def get_fernet():
+    """Fernet instance for the configured key.
+
+    Cached so the key derivation (100k PBKDF2 rounds) runs once per process
+    rather than on every encrypt/decrypt.
+    """
+    from cryptography.fernet import Fernet
+    return Fernet(get_fernet_key())
+
 def encrypt_token(token: str) -> str:
     """Encrypt a token for secure storage."""
     if not token:
         return ""
     
-    key = get_fernet_key()
-    f = Fernet(key)
+    f = get_fernet()
     encrypted = f.encrypt(token.encode())
     return base64.urlsafe_b64encode(encrypted).decode()
 
@@ -36,8 +46,7 @@ def decrypt_token(encrypted_token: str) -> str:
         return ""
     
     try:
-        key = get_fernet_key()
-        f = Fernet(key)
+        f = get_fernet()
         encrypted_bytes = base64.urlsafe_b64decode(encrypted_token.encode())
         decrypted = f.decrypt(encrypted_bytes)
         return decrypted.decode()
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Set
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class EventBroker:
+    """Per-user pub/sub for status events pushed to clients over SSE.
+
+    Events are dicts ``{"type": ..., "data": {...}, "ts": ...}``. Each
+    subscriber gets a bounded queue; a subscriber that falls behind loses its
+    oldest events rather than slowing publishers down.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    async def publish(self, user_id: int, event_type: str, data: Dict[str, Any]):
+        self._deliver(user_id, {"type": event_type, "data": data, "ts": time.time()})
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int):
+        """Yield a queue receiving this user's events until the block exits."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        await self._on_subscribe(user_id)
+        try:
+            yield queue
+        finally:
+            self._subscribers[user_id].discard(queue)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+                await self._on_unsubscribe(user_id)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def _deliver(self, user_id: int, event: Dict[str, Any]):
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _on_subscribe(self, user_id: int):
+        pass
+
+    async def _on_unsubscribe(self, user_id: int):
+        pass
+
+    async def aclose(self):
+        pass
+
+class RedisEventBroker(EventBroker):
+    """Fans events out across processes and nodes through Redis pub/sub.
+
+    Publishing goes to the ``events:user:<id>`` channel. Each worker keeps a
+    single pub/sub connection, subscribed only to the channels of users with a
+    local subscriber, and hands incoming messages to local queues.
+    """
+
+    CHANNEL_PREFIX = "events:user:"
+
+    def __init__(self, redis_url: str, queue_size: int = 100):
+        super().__init__(queue_size)
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._reader: Optional[asyncio.Task] = None
+
+    async def publish(self, user_id: int, event_type: str, data: Dict[str, Any]):
+        event = {"type": event_type, "data": data, "ts": time.time()}
+        try:
+            await self.redis.publish(f"{self.CHANNEL_PREFIX}{user_id}", json.dumps(event, default=str))
+        except Exception:
+            # Status pushes are best effort; clients can still fetch the state
+            logger.exception("Failed to publish %s event", event_type)
+
+    async def _on_subscribe(self, user_id: int):
+        if len(self._subscribers[user_id]) == 1:
+            await self.pubsub.subscribe(f"{self.CHANNEL_PREFIX}{user_id}")
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def _on_unsubscribe(self, user_id: int):
+        await self.pubsub.unsubscribe(f"{self.CHANNEL_PREFIX}{user_id}")
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Redis event subscription failed, retrying")
+                await asyncio.sleep(1.0)
+                continue
+
+            if message is None or message["type"] != "message":
+                continue
+
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            self._deliver(int(channel[len(self.CHANNEL_PREFIX):]), json.loads(message["data"]))
+
+    async def aclose(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self.pubsub.aclose()
+        await self.redis.aclose()
+
+def build_event_broker() -> EventBroker:
+    """Broker for ``event_backend``: ``memory`` (single process) or ``redis``."""
+    if settings.event_backend == "redis":
+        return RedisEventBroker(settings.redis_url, settings.event_queue_size)
+    return EventBroker(settings.event_queue_size)
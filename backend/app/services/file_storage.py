@@ -1,6 +1,6 @@
 import os
 import shutil
-from typing import Optional
+from typing import BinaryIO, Optional
 from fastapi import UploadFile
 import uuid
 
@@ -43,4 +43,8 @@ class FileStorage:
 
     def file_exists(self, file_path: str) -> bool:
         """Check if file exists."""
-        return os.path.exists(file_path)
\ No newline at end of file
+        return os.path.exists(file_path)
+
+    def open_file(self, file_path: str) -> BinaryIO:
+        """Open a stored file for reading in chunks."""
+        return open(file_path, "rb")
@@ -0,0 +1,80 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+from fastapi import Request, Response
+
+# Cache-Control policies
+PRIVATE_REVALIDATE = "private, no-cache"  # per-user data: always revalidate, 304 when unchanged
+PUBLIC_STATIC = "public, max-age=3600"  # identical for every user until the next deploy
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the values that identify a representation's version."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, as required for If-None-Match
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return modified.replace(microsecond=0) <= since
+
+    return False
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None, cache_control: str = PRIVATE_REVALIDATE) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    # Responses depend on the bearer token
+    if cache_control.startswith("private"):
+        headers["Vary"] = "Authorization"
+    return headers
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified, cache_control))
+
+def json_bytes(payload: Any) -> bytes:
+    return json.dumps(payload, default=str, separators=(",", ":")).encode()
+
+class StaticPayload:
+    """A constant JSON body serialized once, with its ETag.
+
+    For responses that only change with a deploy: each request is a header
+    comparison plus, at most, writing the precomputed bytes.
+    """
+
+    def __init__(self, payload: Any, cache_control: str = PUBLIC_STATIC):
+        self.body = json_bytes(payload)
+        self.etag = make_etag(hashlib.sha1(self.body).hexdigest())
+        self.cache_control = cache_control
+
+    def response(self, request: Request) -> Response:
+        if is_not_modified(request, self.etag):
+            return not_modified(self.etag, cache_control=self.cache_control)
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers=cache_headers(self.etag, cache_control=self.cache_control)
+        )
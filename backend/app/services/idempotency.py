@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database import IdempotencyKey
+
+# begin() outcomes
+STARTED = "started"  # the caller runs the request, then calls complete() or release()
+REPLAY = "replay"  # a stored response is returned
+MISMATCH = "mismatch"  # the key was used for a different request
+BUSY = "busy"  # the first request with the key is still running
+
+class StoredResponse:
+    """A completed response as sent: status, raw headers and body bytes."""
+
+    def __init__(self, status: int, headers: List[List[str]], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+class IdempotencyStore:
+    """Idempotency keys in the ``idempotency_keys`` table.
+
+    The first request with a key inserts a row (the unique ``(scope, key)``
+    index decides races between workers) and stores its response there when
+    done. Duplicates wait for that, woken at once when the first request ran
+    in the same process and by polling otherwise.
+    """
+
+    POLL_SECONDS = 0.1
+
+    def __init__(self, ttl_seconds: int = 86400, lock_seconds: int = 300):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.lock = timedelta(seconds=lock_seconds)
+        self._done: Dict[Tuple[str, str], asyncio.Event] = {}
+        self._purged_at = datetime.min
+
+    async def begin(self, scope: str, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        return await asyncio.to_thread(self._begin, scope, key, fingerprint)
+
+    async def complete(self, scope: str, key: str, fingerprint: str, response: StoredResponse):
+        await asyncio.to_thread(self._complete, scope, key, response)
+        self._notify(scope, key)
+
+    async def release(self, scope: str, key: str):
+        """Forget a request that failed, so a retry runs it again."""
+        await asyncio.to_thread(self._release, scope, key)
+        self._notify(scope, key)
+
+    async def wait(self, scope: str, key: str, timeout: float):
+        """Wait until the running request may have finished."""
+        done = self._done.setdefault((scope, key), asyncio.Event())
+        try:
+            await asyncio.wait_for(done.wait(), min(timeout, self.POLL_SECONDS))
+        except asyncio.TimeoutError:
+            # Not finished here (it may run in another worker); poll again
+            self._done.pop((scope, key), None)
+
+    def _notify(self, scope: str, key: str):
+        done = self._done.pop((scope, key), None)
+        if done is not None:
+            done.set()
+
+    def _begin(self, scope: str, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            if now - self._purged_at > timedelta(minutes=1):
+                self._purged_at = now
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+                db.commit()
+
+            for _ in range(3):
+                try:
+                    db.add(IdempotencyKey(
+                        scope=scope, key=key, fingerprint=fingerprint,
+                        locked_until=now + self.lock, expires_at=now + self.ttl
+                    ))
+                    db.commit()
+                    return STARTED, None
+                except IntegrityError:
+                    db.rollback()
+
+                record = db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).first()
+                if record is None:
+                    continue  # released meanwhile
+                if record.expires_at <= now:
+                    db.delete(record)
+                    db.commit()
+                    continue
+                if record.fingerprint != fingerprint:
+                    return MISMATCH, None
+                if record.response_status is not None:
+                    return REPLAY, StoredResponse(record.response_status, record.response_headers, record.response_body)
+                if record.locked_until <= now:
+                    # Whoever ran it died before finishing; take it over
+                    taken = db.execute(
+                        update(IdempotencyKey)
+                        .where(IdempotencyKey.id == record.id, IdempotencyKey.response_status.is_(None), IdempotencyKey.locked_until <= now)
+                        .values(locked_until=now + self.lock)
+                    ).rowcount
+                    db.commit()
+                    if taken:
+                        return STARTED, None
+                return BUSY, None
+            return BUSY, None
+        finally:
+            db.close()
+
+    def _complete(self, scope: str, key: str, response: StoredResponse):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                .values(
+                    response_status=response.status,
+                    response_headers=response.headers,
+                    response_body=response.body,
+                    locked_until=None,
+                    expires_at=datetime.utcnow() + self.ttl
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _release(self, scope: str, key: str):
+        db = SessionLocal()
+        try:
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.response_status.is_(None)
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    async def aclose(self):
+        pass
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """Idempotency keys in Redis, one JSON value per key.
+
+    The first request claims the key with ``SET NX`` and a lock-length
+    expiry, so an abandoned claim simply expires; the completed response
+    replaces it with the full TTL.
+    """
+
+    KEY_PREFIX = "idempotency:"
+
+    def __init__(self, redis_url: str, ttl_seconds: int = 86400, lock_seconds: int = 300):
+        super().__init__(ttl_seconds, lock_seconds)
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url)
+
+    def _key(self, scope: str, key: str) -> str:
+        return f"{self.KEY_PREFIX}{scope}:{key}"
+
+    async def begin(self, scope: str, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        name = self._key(scope, key)
+        for _ in range(3):
+            claim = json.dumps({"fingerprint": fingerprint})
+            if await self.redis.set(name, claim, nx=True, ex=int(self.lock.total_seconds())):
+                return STARTED, None
+            stored = await self.redis.get(name)
+            if stored is None:
+                continue  # expired or released meanwhile
+            record = json.loads(stored)
+            if record["fingerprint"] != fingerprint:
+                return MISMATCH, None
+            if "status" in record:
+                return REPLAY, StoredResponse(record["status"], record["headers"], base64.b64decode(record["body"]))
+            return BUSY, None
+        return BUSY, None
+
+    async def complete(self, scope: str, key: str, fingerprint: str, response: StoredResponse):
+        await self.redis.set(self._key(scope, key), json.dumps({
+            "fingerprint": fingerprint,
+            "status": response.status,
+            "headers": response.headers,
+            "body": base64.b64encode(response.body).decode()
+        }), ex=int(self.ttl.total_seconds()))
+        self._notify(scope, key)
+
+    async def release(self, scope: str, key: str):
+        name = self._key(scope, key)
+        stored = await self.redis.get(name)
+        if stored is not None and "status" not in json.loads(stored):
+            await self.redis.delete(name)
+        self._notify(scope, key)
+
+    async def aclose(self):
+        await self.redis.aclose()
+
+def build_idempotency_store() -> IdempotencyStore:
+    """Store for ``idempotency_backend``: ``database`` or ``redis``."""
+    if settings.idempotency_backend == "redis":
+        return RedisIdempotencyStore(settings.redis_url, settings.idempotency_ttl_seconds, settings.idempotency_lock_seconds)
+    return IdempotencyStore(settings.idempotency_ttl_seconds, settings.idempotency_lock_seconds)
@@ -0,0 +1,232 @@
+import importlib.util
+from typing import Dict, Any, List, Optional
+import httpx
+from app.config import settings
+
+# The SDK takes several hundred ms to import, so it is only loaded once an
+# OpenAI backend is actually built
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+# Published per-1k-token prices (USD) and typical latency for a ~300 word email.
+# Used as the routing profile until enough real latency samples are observed.
+OPENAI_MODEL_PROFILES = {
+    "gpt-3.5-turbo": {"cost_per_1k_input": 0.0005, "cost_per_1k_output": 0.0015, "expected_latency_seconds": 3.0, "tier": "standard"},
+    "gpt-4o-mini": {"cost_per_1k_input": 0.00015, "cost_per_1k_output": 0.0006, "expected_latency_seconds": 2.5, "tier": "fast"},
+    "gpt-4o": {"cost_per_1k_input": 0.0025, "cost_per_1k_output": 0.01, "expected_latency_seconds": 5.0, "tier": "quality"},
+}
+
+class LLMBackend:
+    """A chat completion backend plus the cost/latency profile the router uses.
+
+    ``tier`` is one of ``fast``, ``standard`` or ``quality``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        cost_per_1k_input: float = 0.0,
+        cost_per_1k_output: float = 0.0,
+        expected_latency_seconds: float = 3.0,
+        tier: str = "standard"
+    ):
+        self.name = name
+        self.model = model
+        self.cost_per_1k_input = cost_per_1k_input
+        self.cost_per_1k_output = cost_per_1k_output
+        self.expected_latency_seconds = expected_latency_seconds
+        self.tier = tier
+
+    def estimate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.cost_per_1k_input + completion_tokens * self.cost_per_1k_output) / 1000
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float = 0.3,
+        n: int = 1
+    ) -> Dict[str, Any]:
+        """Run a chat completion.
+
+        Returns ``{"contents": [str, ...], "usage": {...}}`` with one content per
+        requested choice and OpenAI-style token usage.
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+    def profile(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "tier": self.tier,
+            "cost_per_1k_input": self.cost_per_1k_input,
+            "cost_per_1k_output": self.cost_per_1k_output,
+            "expected_latency_seconds": self.expected_latency_seconds
+        }
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI through the official SDK."""
+
+    def __init__(self, name: str, model: str, api_key: str, base_url: Optional[str] = None, **profile):
+        super().__init__(name, model, **profile)
+        import openai
+        
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=settings.llm_timeout_seconds,
+            max_retries=settings.llm_max_retries
+        )
+
+    async def complete(self, messages, max_tokens, temperature=0.3, n=1):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            n=n
+        )
+
+        usage = {}
+        if response.usage:
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens or 0,
+                "completion_tokens": response.usage.completion_tokens or 0,
+                "total_tokens": response.usage.total_tokens or 0
+            }
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            if details and getattr(details, "cached_tokens", None):
+                usage["cached_prompt_tokens"] = details.cached_tokens
+
+        return {
+            "contents": [choice.message.content for choice in response.choices],
+            "usage": usage
+        }
+
+    async def aclose(self):
+        await self.client.close()
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server speaking the OpenAI chat completions protocol over HTTP.
+
+    Works with local inference servers (vLLM, llama.cpp, Ollama, ...) without the
+    OpenAI SDK.
+    """
+
+    def __init__(self, name: str, model: str, base_url: str, api_key: Optional[str] = None, **profile):
+        super().__init__(name, model, **profile)
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=settings.llm_timeout_seconds
+        )
+
+    async def complete(self, messages, max_tokens, temperature=0.3, n=1):
+        response = await self.client.post(
+            "/chat/completions",
+            json={
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "n": n
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        usage = data.get("usage") or {}
+        return {
+            "contents": [choice["message"]["content"] for choice in data.get("choices", [])],
+            "usage": {
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0)
+            }
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class BackendRegistry:
+    """Named LLM backends available to the model router."""
+
+    def __init__(self):
+        self._backends: Dict[str, LLMBackend] = {}
+
+    def register(self, backend: LLMBackend):
+        self._backends[backend.name] = backend
+
+    def get(self, name: str) -> Optional[LLMBackend]:
+        return self._backends.get(name)
+
+    def all(self) -> List[LLMBackend]:
+        return list(self._backends.values())
+
+    async def aclose(self):
+        for backend in self._backends.values():
+            await backend.aclose()
+
+def build_backend_registry() -> BackendRegistry:
+    """Build the registry from settings.
+
+    Every model in ``openai_models`` becomes an ``openai:<model>`` backend when an
+    API key is configured. Entries in ``llm_backends`` add OpenAI-compatible HTTP
+    backends, e.g.::
+
+        LLM_BACKENDS='[{"name": "local", "base_url": "http://127.0.0.1:8080/v1",
+                        "model": "llama-3-8b", "tier": "fast", "expected_latency_seconds": 1.5}]'
+    """
+    registry = BackendRegistry()
+
+    if OPENAI_AVAILABLE and settings.openai_api_key:
+        for model in settings.openai_models:
+            profile = OPENAI_MODEL_PROFILES.get(model, OPENAI_MODEL_PROFILES["gpt-3.5-turbo"])
+            registry.register(OpenAIBackend(
+                f"openai:{model}",
+                model,
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                **profile
+            ))
+
+    for config in settings.llm_backends:
+        config = dict(config)
+        registry.register(OpenAICompatibleBackend(
+            config.pop("name"),
+            config.pop("model"),
+            base_url=config.pop("base_url"),
+            api_key=config.pop("api_key", None),
+            **config
+        ))
+
+    return registry
+
+_registry: Optional[BackendRegistry] = None
+
+def get_backend_registry() -> BackendRegistry:
+    """Process-wide backend registry, built on first use."""
+    global _registry
+    if _registry is None:
+        _registry = build_backend_registry()
+    return _registry
+
+async def close_backend_registry():
+    """Close backend connection pools and drop the registry (rebuilt on next use)."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
+
+def discard_backend_registry():
+    """Drop the registry without closing it.
+
+    For forked worker processes, whose inherited connection pools belong to
+    the parent and must not be reused or closed from the child.
+    """
+    global _registry
+    _registry = None
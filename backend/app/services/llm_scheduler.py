@@ -0,0 +1,207 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+from app.config import settings
+
+# Priority classes, highest first
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+class Grant:
+    """Permission for one LLM call, holding its share of concurrency and tokens."""
+
+    __slots__ = ("user_id", "priority", "tokens", "used_tokens", "enqueued_at", "future")
+
+    def __init__(self, user_id: Any, priority: str, tokens: int, enqueued_at: float, future: asyncio.Future):
+        self.user_id = user_id
+        self.priority = priority
+        self.tokens = tokens  # reserved up front: prompt plus max completion tokens
+        self.used_tokens: Optional[int] = None  # set after the call to settle the reservation
+        self.enqueued_at = enqueued_at
+        self.future = future
+
+def rate_limit_delay(error: Exception) -> Optional[float]:
+    """Seconds to wait if ``error`` is a provider 429 (from Retry-After when given), else None."""
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status_code != 429:
+        return None
+    retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        return settings.llm_rate_limit_pause_seconds
+
+class LLMScheduler:
+    """Admits LLM calls by priority class, fairly between users, within global limits.
+
+    Calls wait in per-class queues; within a class each waiting user has
+    their own queue and users take turns, so one large batch cannot hold
+    up another user's calls. Interactive calls always go before bulk ones.
+    A call starts when a concurrency slot is free (``llm_max_concurrency``)
+    and the token bucket (``llm_tokens_per_minute``) covers its prompt
+    plus ``max_tokens``; the estimate is corrected with the reported usage
+    afterwards. Bulk calls may only use ``llm_bulk_share`` of the slots and
+    tokens, so interactive requests find capacity even while batches run.
+    A provider 429 pauses all admissions (``throttle``).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        bulk_share: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_concurrency = max(max_concurrency or settings.llm_max_concurrency, 1)
+        self.tokens_per_minute = settings.llm_tokens_per_minute if tokens_per_minute is None else tokens_per_minute
+        self.bulk_share = settings.llm_bulk_share if bulk_share is None else bulk_share
+        # Tokens per minute bulk calls leave for interactive ones (whole tokens, so a capped bulk call always fits)
+        self._bulk_reserve = self.tokens_per_minute - math.floor(self.tokens_per_minute * self.bulk_share)
+        self.clock = clock
+        # Per class: user -> their waiting calls, users in turn order
+        self._queues: Dict[str, "OrderedDict[Any, Deque[Grant]]"] = {priority: OrderedDict() for priority in PRIORITIES}
+        self._in_flight = {priority: 0 for priority in PRIORITIES}
+        self._tokens = float(self.tokens_per_minute)
+        self._refilled_at = clock()
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Metrics
+        self._waits: Dict[str, Deque[float]] = {priority: deque(maxlen=1000) for priority in PRIORITIES}
+        self._granted = {priority: 0 for priority in PRIORITIES}
+        self._throttled = 0
+
+    @asynccontextmanager
+    async def slot(self, user_id: Any, priority: str, tokens: int) -> AsyncIterator[Grant]:
+        """Wait for a turn to make one call; set ``used_tokens`` on the grant when known."""
+        grant = await self.acquire(user_id, priority, tokens)
+        try:
+            yield grant
+        finally:
+            self.release(grant)
+
+    async def acquire(self, user_id: Any, priority: str, tokens: int) -> Grant:
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority: {priority}")
+        if self.tokens_per_minute > 0:
+            # A call bigger than its class's share of the bucket would never fit
+            allowance = self.tokens_per_minute if priority == INTERACTIVE else self.tokens_per_minute - self._bulk_reserve
+            tokens = min(tokens, allowance)
+        grant = Grant(user_id, priority, max(tokens, 0), self.clock(), asyncio.get_running_loop().create_future())
+        self._queues[priority].setdefault(user_id, deque()).append(grant)
+        self._pump()
+        try:
+            await grant.future
+        except asyncio.CancelledError:
+            if grant.future.done() and not grant.future.cancelled():
+                # Granted just as the caller gave up
+                self.release(grant)
+            else:
+                self._remove(grant)
+            raise
+        return grant
+
+    def release(self, grant: Grant):
+        self._in_flight[grant.priority] -= 1
+        if self.tokens_per_minute > 0 and grant.used_tokens is not None:
+            # Settle the reservation: refund an overestimate, charge an underestimate
+            self._refill(self.clock())
+            self._tokens = min(self._tokens + grant.tokens - grant.used_tokens, float(self.tokens_per_minute))
+        self._pump()
+
+    def throttle(self, seconds: float):
+        """The provider rate-limited a call: admit nothing for ``seconds``."""
+        self._throttled += 1
+        self._paused_until = max(self._paused_until, self.clock() + seconds)
+        self._pump()
+
+    def _remove(self, grant: Grant):
+        queue = self._queues[grant.priority]
+        waiting = queue.get(grant.user_id)
+        if waiting is not None and grant in waiting:
+            waiting.remove(grant)
+            if not waiting:
+                del queue[grant.user_id]
+        self._pump()
+
+    def _refill(self, now: float):
+        if self.tokens_per_minute > 0:
+            self._tokens = min(self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60, float(self.tokens_per_minute))
+        self._refilled_at = now
+
+    def _limits(self, priority: str):
+        """Concurrency and tokens available to a class (bulk leaves a reserve for interactive calls)."""
+        in_flight = sum(self._in_flight.values())
+        if priority == INTERACTIVE:
+            return self.max_concurrency - in_flight, self._tokens
+        bulk_slots = max(1, math.floor(self.max_concurrency * self.bulk_share))
+        return min(self.max_concurrency - in_flight, bulk_slots - self._in_flight[BULK]), self._tokens - self._bulk_reserve
+
+    def _pump(self):
+        """Start every call that may start now; arm a timer for when tokens or a pause run out."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = self.clock()
+        self._refill(now)
+        if now < self._paused_until:
+            if any(self._queues.values()):
+                self._timer = asyncio.get_running_loop().call_later(self._paused_until - now, self._pump)
+            return
+
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue:
+                user_id, waiting = next(iter(queue.items()))
+                grant = waiting[0]
+                slots, tokens = self._limits(priority)
+                if slots <= 0:
+                    break
+                if self.tokens_per_minute > 0 and grant.tokens > tokens:
+                    # Lower classes wait too: their token allowance is smaller still
+                    delay = (grant.tokens - tokens) * 60 / self.tokens_per_minute
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                    return
+
+                waiting.popleft()
+                # The user goes to the back of the line
+                queue.move_to_end(user_id)
+                if not waiting:
+                    del queue[user_id]
+                if self.tokens_per_minute > 0:
+                    self._tokens -= grant.tokens
+                self._in_flight[priority] += 1
+                self._granted[priority] += 1
+                self._waits[priority].append(now - grant.enqueued_at)
+                grant.future.set_result(None)
+            if queue:
+                # Capacity ran out; lower classes can't have any either
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls, wait times and limiter state, per class."""
+        self._refill(self.clock())
+        classes = {}
+        for priority in PRIORITIES:
+            waits = sorted(self._waits[priority])
+            classes[priority] = {
+                "queued": sum(len(waiting) for waiting in self._queues[priority].values()),
+                "queued_users": len(self._queues[priority]),
+                "in_flight": self._in_flight[priority],
+                "granted": self._granted[priority],
+                "wait_ms_p50": int(waits[len(waits) // 2] * 1000) if waits else 0,
+                "wait_ms_p95": int(waits[int(len(waits) * 0.95)] * 1000) if waits else 0,
+                "wait_ms_max": int(waits[-1] * 1000) if waits else 0
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": int(self._tokens) if self.tokens_per_minute > 0 else None,
+            "throttled": self._throttled,
+            "paused_seconds": round(max(self._paused_until - self.clock(), 0.0), 1),
+            "classes": classes
+        }
@@ -0,0 +1,110 @@
+import random
+from typing import Dict, Any, List, Optional
+from app.config import settings
+from app.services.circuit_breaker import get_circuit_breaker
+from app.services.llm_backends import BackendRegistry, LLMBackend, get_backend_registry
+from app.services.prompt_builder import COMPLETION_TOKENS
+
+# Preferred backend tiers for each email length, best first
+LENGTH_TIER_PREFERENCE = {
+    "short": ["fast", "standard", "quality"],
+    "normal": ["standard", "fast", "quality"],
+    "long": ["quality", "standard", "fast"]
+}
+
+# Typical prompt size used for cost estimates
+ESTIMATED_PROMPT_TOKENS = 800
+
+class ModelRouter:
+    """Orders backends for a request by expected latency, reliability, cost and fit.
+
+    Each backend gets a score in seconds (lower is better):
+
+    - latency: observed rolling p95 from the backend's circuit breaker, or its
+      declared expected latency until enough calls have been seen
+    - reliability: latency is inflated by ``1 / (1 - error_rate)``, the expected
+      number of attempts needed
+    - fit: ``llm_router_tier_penalty_seconds`` per step away from the preferred
+      tier for the requested length
+    - cost: estimated dollars times ``llm_router_cost_weight``
+
+    Backends whose breaker is open are left out. A small share of traffic
+    (``llm_router_explore_rate``) goes to the runner-up so its latency stats
+    stay fresh and traffic can shift back once it recovers.
+    """
+
+    def __init__(self, registry: Optional[BackendRegistry] = None):
+        self._registry = registry
+        # Requests that no backend could serve, by reason
+        self.fallbacks: Dict[str, int] = {}
+
+    @property
+    def registry(self) -> BackendRegistry:
+        # Built on first use so LLM client libraries aren't imported at startup
+        if self._registry is None:
+            self._registry = get_backend_registry()
+        return self._registry
+
+    def has_backends(self) -> bool:
+        return bool(self.registry.all())
+
+    def score(self, backend: LLMBackend, length: str) -> Dict[str, Any]:
+        breaker = get_circuit_breaker(backend.name)
+
+        observed_p95 = breaker.latency_p95()
+        latency = observed_p95 if observed_p95 is not None else backend.expected_latency_seconds
+        error_rate = breaker.failure_rate()
+        expected_latency = latency / max(0.05, 1.0 - error_rate)
+
+        tiers = LENGTH_TIER_PREFERENCE.get(length, LENGTH_TIER_PREFERENCE["normal"])
+        tier_distance = tiers.index(backend.tier) if backend.tier in tiers else len(tiers)
+
+        cost = backend.estimate_cost(ESTIMATED_PROMPT_TOKENS, COMPLETION_TOKENS.get(length, COMPLETION_TOKENS["normal"]))
+
+        return {
+            "backend": backend.name,
+            "latency_seconds": latency,
+            "error_rate": error_rate,
+            "estimated_cost": cost,
+            "score": (
+                expected_latency
+                + tier_distance * settings.llm_router_tier_penalty_seconds
+                + cost * settings.llm_router_cost_weight
+            )
+        }
+
+    def rank(self, length: str) -> List[LLMBackend]:
+        """Available backends for this request, best first."""
+        candidates = [
+            backend for backend in self.registry.all()
+            if get_circuit_breaker(backend.name).is_available()
+        ]
+        ranked = sorted(candidates, key=lambda backend: self.score(backend, length)["score"])
+
+        if len(ranked) > 1 and random.random() < settings.llm_router_explore_rate:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+
+        return ranked
+
+    def record_fallback(self, reason: str):
+        self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+
+    def describe(self, length: str = "normal") -> List[Dict[str, Any]]:
+        """Backend profiles with their current routing scores."""
+        return [
+            {**backend.profile(), **self.score(backend, length)}
+            for backend in self.registry.all()
+        ]
+
+_router: Optional[ModelRouter] = None
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router over the configured backend registry."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
+
+def reset_model_router():
+    global _router
+    _router = None
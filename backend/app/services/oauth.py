@@ -10,6 +10,9 @@ class GoogleOAuth:
         self.client_secret = settings.google_client_secret
         self.redirect_uri = f"{settings.frontend_url.replace('3000', '8000')}/api/v1/auth/oauth/google/callback"
         self.scope = "openid email profile https://www.googleapis.com/auth/gmail.send"
+        if settings.email_transport == "smtp" and "google" in settings.smtp_providers:
+            # SMTP XOAUTH2 needs full mail scope; gmail.send only covers the REST API
+            self.scope += " https://mail.google.com/"
         
     def get_authorization_url(self) -> str:
         params = {
@@ -65,7 +68,8 @@ class MicrosoftOAuth:
         self.client_id = settings.microsoft_client_id
         self.client_secret = settings.microsoft_client_secret
         self.redirect_uri = f"{settings.frontend_url.replace('3000', '8000')}/api/v1/auth/oauth/microsoft/callback"
-        self.scope = "openid email profile Mail.Send"
+        # Mail.ReadWrite: sends with attachments go through a draft the attachments are uploaded to
+        self.scope = "openid email profile Mail.Send Mail.ReadWrite"
         
     def get_authorization_url(self) -> str:
         params = {
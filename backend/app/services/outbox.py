@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import signal
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Union
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database import EmailOutbox, EmailSend, OAuthAccount
+from app.services.email_batching import BatchingEmailSender, build_email_transport
+from app.services.email_sender import EmailSender
+from app.services.smtp_transport import SMTPTransport
+from app.services.events import EventBroker, build_event_broker
+from app.services.recipients import RecipientHistory, normalize_address
+
+logger = logging.getLogger(__name__)
+
+async def publish_send_status(events: EventBroker, email_send: EmailSend):
+    await events.publish(email_send.user_id, "email.status", {
+        "send_id": email_send.id,
+        "status": email_send.status,
+        "draft_id": email_send.draft_id
+    })
+
+def enqueue_send(
+    db: Session,
+    email_send: EmailSend,
+    plain_body: Optional[str],
+    send_as_html: bool,
+    attachments: Optional[List[Dict[str, Any]]] = None
+) -> EmailOutbox:
+    """Queue a new send; commit it together with the EmailSend row.
+
+    ``attachments`` describe stored files (``file_id``, ``path``,
+    ``filename``, ``content_type``, ``size``), read when the send goes out.
+    A send with ``send_at`` set is stored as ``scheduled``, its entry held
+    until the scheduler releases it.
+    """
+    scheduled = email_send.send_at is not None
+    email_send.status = "scheduled" if scheduled else "queued"
+    db.add(email_send)
+    db.flush()
+    payload = {"plain_body": plain_body, "send_as_html": send_as_html}
+    if attachments:
+        payload["attachments"] = attachments
+    entry = EmailOutbox(
+        email_send_id=email_send.id,
+        payload=payload,
+        available_at=None if scheduled else datetime.utcnow()
+    )
+    db.add(entry)
+    return entry
+
+def queued_recipients(db: Session, user_id: int, addresses: Iterable[str]) -> List[str]:
+    """The given addresses that sends still in the outbox are going to."""
+    wanted = {normalize_address(address) for address in addresses}
+    found = set()
+    for to_list, cc_list, bcc_list in db.execute(
+        select(EmailSend.to_list, EmailSend.cc_list, EmailSend.bcc_list)
+        .join(EmailOutbox, EmailOutbox.email_send_id == EmailSend.id)
+        .where(EmailSend.user_id == user_id)
+    ):
+        found.update(wanted.intersection(map(normalize_address, (to_list or []) + (cc_list or []) + (bcc_list or []))))
+    return sorted(found)
+
+class Claim:
+    """An outbox entry leased to this dispatcher, with what is needed to send it."""
+
+    def __init__(self, entry: EmailOutbox, email_send: EmailSend, oauth_account: Optional[OAuthAccount]):
+        self.entry_id = entry.id
+        self.lease_owner = entry.lease_owner
+        self.attempts = entry.attempts
+        self.payload = entry.payload or {}
+        self.email_send = email_send
+        self.oauth_account = oauth_account
+
+class OutboxDispatcher:
+    """Delivers queued sends from the ``email_outbox`` table.
+
+    Entries are claimed in batches: candidates are selected with ``FOR
+    UPDATE SKIP LOCKED`` (on PostgreSQL; SQLite serializes writers anyway)
+    and leased by a conditional update that re-checks they are still
+    claimable, so any number of dispatchers, in web workers or run with
+    ``python -m app.cli dispatch-outbox``, can share the table. A lease
+    that runs out, because its dispatcher died mid-send, makes the entry
+    claimable again. Delivery is at least once: a send that reached the
+    provider just before a crash is sent again.
+    """
+
+    def __init__(self, email_sender: Union[EmailSender, SMTPTransport, BatchingEmailSender], events: EventBroker, recipients: RecipientHistory):
+        self.email_sender = email_sender
+        self.events = events
+        self.recipients = recipients
+        self.concurrency = max(settings.outbox_concurrency, 1)
+        self.lease = timedelta(seconds=settings.outbox_lease_seconds)
+        # Leaves time to record the outcome before the lease runs out
+        self.send_timeout = settings.outbox_lease_seconds / 2
+        self._wake = asyncio.Event()
+        self._tasks = set()
+        self._loop_task = None
+        self._stopping = False
+
+    def notify(self):
+        """Claim now instead of at the next poll; call after committing a new entry."""
+        self._wake.set()
+
+    def start(self):
+        self._stopping = False
+        self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop claiming and give in-flight sends ``timeout`` seconds to finish."""
+        self._stopping = True
+        self._wake.set()
+        if self._loop_task is not None:
+            await self._loop_task
+            self._loop_task = None
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            if pending:
+                # Their leases run out and another dispatcher retries them
+                logger.warning("Cancelling %d in-flight sends on shutdown", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self):
+        while not self._stopping:
+            self._wake.clear()
+            wanted = min(self.concurrency - len(self._tasks), settings.outbox_batch_size)
+            claims = []
+            if wanted > 0:
+                try:
+                    claims = await asyncio.to_thread(self._claim, wanted)
+                except Exception:
+                    logger.exception("Claiming outbox entries failed")
+            for claim in claims:
+                task = asyncio.create_task(self._process(claim))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            if wanted > 0 and len(claims) == wanted:
+                continue  # more may be waiting
+            try:
+                # Woken by new entries and by finished sends freeing a slot
+                await asyncio.wait_for(self._wake.wait(), settings.outbox_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claim(self, limit: int) -> List[Claim]:
+        now = datetime.utcnow()
+        lease_owner = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            candidates = db.execute(
+                select(EmailOutbox.id)
+                .where(EmailOutbox.available_at <= now)
+                .order_by(EmailOutbox.available_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not candidates:
+                db.rollback()
+                return []
+
+            # Re-checked so a dispatcher that read the same candidates loses the race cleanly
+            db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(candidates), EmailOutbox.available_at <= now)
+                .values(lease_owner=lease_owner, available_at=now + self.lease, attempts=EmailOutbox.attempts + 1)
+            )
+            leased = select(EmailOutbox.email_send_id).where(EmailOutbox.lease_owner == lease_owner)
+            db.execute(update(EmailSend).where(EmailSend.id.in_(leased)).values(status="sending"))
+            db.commit()
+
+            claims = []
+            for entry, email_send in db.execute(
+                select(EmailOutbox, EmailSend)
+                .join(EmailSend, EmailSend.id == EmailOutbox.email_send_id)
+                .where(EmailOutbox.lease_owner == lease_owner)
+                .order_by(EmailOutbox.id)
+            ):
+                claims.append(Claim(entry, email_send, db.get(OAuthAccount, email_send.from_account_id)))
+            # Detached with their attributes loaded, for use outside this thread
+            db.expunge_all()
+            return claims
+        finally:
+            db.close()
+
+    async def _process(self, claim: Claim):
+        try:
+            await publish_send_status(self.events, claim.email_send)
+            if claim.oauth_account is None:
+                result = {"success": False, "error": "Email account not found", "retryable": False}
+            else:
+                try:
+                    result = await asyncio.wait_for(self.email_sender.send_email(
+                        oauth_account=claim.oauth_account,
+                        to_emails=claim.email_send.to_list,
+                        cc_emails=claim.email_send.cc_list or [],
+                        bcc_emails=claim.email_send.bcc_list or [],
+                        subject=claim.email_send.subject,
+                        html_body=claim.email_send.html_body,
+                        plain_body=claim.payload.get("plain_body"),
+                        send_as_html=claim.payload.get("send_as_html", True),
+                        attachments=claim.payload.get("attachments")
+                    ), self.send_timeout)
+                except asyncio.TimeoutError:
+                    result = {"success": False, "error": "Email sending timed out", "retryable": True}
+                except Exception as e:
+                    result = {"success": False, "error": f"Email sending failed: {str(e)}", "retryable": False}
+
+            email_send = await asyncio.to_thread(self._finish, claim, result)
+            if email_send is not None:
+                await publish_send_status(self.events, email_send)
+        except Exception:
+            logger.exception("Dispatching email send %s failed", claim.email_send.id)
+        finally:
+            self._wake.set()
+
+    def _finish(self, claim: Claim, result: Dict[str, Any]) -> Optional[EmailSend]:
+        """Record the outcome and release or remove the entry. Returns the updated send."""
+        owned = (EmailOutbox.id == claim.entry_id, EmailOutbox.lease_owner == claim.lease_owner)
+        retry = (
+            not result.get("success")
+            and result.get("retryable")
+            and claim.attempts < settings.outbox_max_attempts
+        )
+        db = SessionLocal()
+        try:
+            if retry:
+                delay = min(settings.outbox_retry_base_seconds * 2 ** (claim.attempts - 1), 3600)
+                released = db.execute(
+                    update(EmailOutbox).where(*owned).values(
+                        lease_owner=None,
+                        available_at=datetime.utcnow() + timedelta(seconds=delay),
+                        last_error=result.get("error")
+                    )
+                ).rowcount
+                status = "queued"
+            else:
+                released = db.execute(delete(EmailOutbox).where(*owned)).rowcount
+                status = "sent" if result.get("success") else "failed"
+
+            email_send = db.get(EmailSend, claim.email_send.id)
+            # A lost lease means another dispatcher has the entry now; a
+            # completed send is still recorded, as it did go out
+            if email_send is None or (not released and status != "sent"):
+                db.commit()
+                return None
+            email_send.status = status
+            email_send.provider_response = result
+            if status == "sent":
+                email_send.sent_at = datetime.utcnow()
+                self.recipients.record(db, email_send)
+            db.commit()
+            db.refresh(email_send)
+            db.expunge(email_send)
+            return email_send
+        finally:
+            db.close()
+
+async def run_dispatcher():
+    """Dispatch queued sends, releasing scheduled ones, until SIGINT/SIGTERM (``python -m app.cli dispatch-outbox``)."""
+    from app.services.scheduler import SendScheduler
+
+    email_sender = EmailSender()
+    transport = build_email_transport(email_sender)
+    events = build_event_broker()
+    dispatcher = OutboxDispatcher(
+        transport,
+        events,
+        RecipientHistory(settings.recipient_filter_error_rate, settings.recipient_cache_users)
+    )
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+
+    scheduler = SendScheduler(dispatcher, events)
+    dispatcher.start()
+    scheduler.start()
+    logger.info("Dispatching queued email sends")
+    try:
+        await stopped.wait()
+    finally:
+        await scheduler.stop()
+        await dispatcher.stop(settings.outbox_drain_seconds)
+        if transport is not email_sender:
+            await transport.aclose()
+        await email_sender.aclose()
+        await events.aclose()
@@ -0,0 +1,137 @@
+from typing import Dict, Any, List, Optional
+from app.config import settings
+from app.services.tokens import count_tokens, fit_to_budget
+
+# Fixed instruction block sent as the system message. It never varies between
+# requests so it forms a stable prompt prefix that provider-side caching can reuse.
+SYSTEM_PROMPT = """You are a professional career advisor helping job seekers write compelling application emails.
+
+Every email you write must:
+- Include a compelling subject line (max 10 words)
+- Highlight 2-3 most relevant skills/experiences that match the job
+- Include contact information if available
+- End with a clear call-to-action
+
+OUTPUT FORMAT (return as JSON):
+{
+    "subject": "Subject line here",
+    "body_html": "<p>HTML formatted email body</p>",
+    "body_text": "Plain text version"
+}"""
+
+LENGTH_INSTRUCTIONS = {
+    "short": "Keep the email concise (150-200 words max)",
+    "normal": "Write a standard length email (200-300 words)",
+    "long": "Write a detailed email (300-400 words)"
+}
+
+TONE_INSTRUCTIONS = {
+    "professional": "Use a formal, professional tone",
+    "friendly": "Use a warm but professional tone",
+    "enthusiastic": "Use an enthusiastic and energetic tone"
+}
+
+# Completion budget per length. The body is returned twice (HTML and plain
+# text) plus JSON overhead, so this is roughly 2.5x the word target.
+COMPLETION_TOKENS = {
+    "short": 450,
+    "normal": 700,
+    "long": 1000
+}
+
+# Chat format overhead per message (role markers and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+class PromptBuilder:
+    """Builds chat messages that fit the candidate context into an input token budget."""
+
+    def __init__(self, model: str = "gpt-3.5-turbo", input_budget: Optional[int] = None):
+        self.model = model
+        self.input_budget = input_budget or settings.ai_prompt_input_budget
+        self.system_tokens = count_tokens(SYSTEM_PROMPT, model) + MESSAGE_OVERHEAD_TOKENS
+
+    def max_tokens_for(self, length: str) -> int:
+        """Completion token limit for the requested email length."""
+        return COMPLETION_TOKENS.get(length, COMPLETION_TOKENS["normal"])
+
+    def build(self, context: Dict[str, Any], tone: str, length: str) -> Dict[str, Any]:
+        """Build messages, completion limit and the counted prompt size."""
+        requirements = (
+            "REQUIREMENTS:\n"
+            f"- {TONE_INSTRUCTIONS.get(tone, 'Use a professional tone')}\n"
+            f"- {LENGTH_INSTRUCTIONS.get(length, 'Write a standard length email')}"
+        )
+        return self._build(context, requirements, self.max_tokens_for(length))
+
+    def build_variants(self, context: Dict[str, Any], tones: List[str], length: str) -> Dict[str, Any]:
+        """Build one prompt asking for a draft per tone, sharing the candidate/job context."""
+        versions = "\n".join(
+            f"{index}. \"{tone}\": {TONE_INSTRUCTIONS.get(tone, 'Use a professional tone')}"
+            for index, tone in enumerate(tones, start=1)
+        )
+        requirements = (
+            "REQUIREMENTS:\n"
+            f"- {LENGTH_INSTRUCTIONS.get(length, 'Write a standard length email')}\n"
+            f"- Write {len(tones)} separate versions of the email, one per tone:\n"
+            f"{versions}\n"
+            "- Return a JSON object of the form {\"drafts\": [...]} with one entry per version, "
+            "in the order above. Each entry uses the output format plus a \"tone\" field."
+        )
+        return self._build(context, requirements, self.max_tokens_for(length) * len(tones))
+
+    def _build(self, context: Dict[str, Any], requirements: str, max_tokens: int) -> Dict[str, Any]:
+        job_header = (
+            "JOB DETAILS:\n"
+            f"Company: {context['company_name']}\n"
+            f"Position: {context['role']}\n"
+            "Job Description: "
+        )
+        closing = "Generate the email now:"
+
+        fixed_tokens = self.system_tokens + MESSAGE_OVERHEAD_TOKENS + sum(
+            count_tokens(part, self.model)
+            for part in ("CANDIDATE INFORMATION:\n", job_header, requirements, closing)
+        )
+        available = max(0, self.input_budget - fixed_tokens)
+
+        candidate_summary, job_description = self._fit_context(
+            context["candidate_summary"], context["job_description"], available
+        )
+
+        prompt = "\n\n".join([
+            f"CANDIDATE INFORMATION:\n{candidate_summary}",
+            f"{job_header}{job_description}",
+            requirements,
+            closing
+        ])
+
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+        return {
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "prompt_tokens": self.system_tokens + count_tokens(prompt, self.model) + MESSAGE_OVERHEAD_TOKENS
+        }
+
+    def _fit_context(self, candidate_summary: str, job_description: str, available: int) -> List[str]:
+        """Split the available tokens between candidate info and the job description.
+
+        The job description gets whatever the candidate info leaves over, but never
+        less than a third of the budget.
+        """
+        candidate_tokens = count_tokens(candidate_summary, self.model)
+        job_tokens = count_tokens(job_description, self.model)
+
+        if candidate_tokens + job_tokens <= available:
+            return [candidate_summary, job_description]
+
+        job_budget = min(job_tokens, max(available - candidate_tokens, available // 3))
+        candidate_budget = available - job_budget
+
+        return [
+            fit_to_budget(candidate_summary, candidate_budget, self.model),
+            fit_to_budget(job_description, job_budget, self.model)
+        ]
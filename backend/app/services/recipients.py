@@ -0,0 +1,178 @@
+import hashlib
+import math
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from email.utils import parseaddr
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.models.database import EmailRecipient, EmailSend
+
+def normalize_address(address: str) -> str:
+    """Bare, lowercased address: ``"Jobs <Jobs@Acme.com>"`` -> ``jobs@acme.com``."""
+    return (parseaddr(address)[1] or address).strip().lower()
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded false-positive rate."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + n * second) % self.size for n in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+# Rows are re-read this far back when topping up a filter, so sends whose
+# transaction committed just after a sync, or stamped by a host with a
+# slightly different clock, still get in
+RECHECK_WINDOW = timedelta(seconds=10)
+
+class UserRecipients:
+    """A user's recipient filter and when it was last brought up to date."""
+
+    def __init__(self, bloom: BloomFilter, synced_at: datetime):
+        self.bloom = bloom
+        self.synced_at = synced_at
+
+class RecipientHistory:
+    """Who a user has already emailed.
+
+    Delivered addresses are stored one row each in ``email_recipients``,
+    indexed on ``(user_id, address)``. Duplicate checks go through a
+    per-process Bloom filter per user, topped up with rows created since it
+    was last synced (other workers' sends included), so checking an address
+    that was never contacted needs no lookup by address. A filter hit is
+    confirmed against the table, which also covers deleted send records.
+    """
+
+    def __init__(self, error_rate: float = 0.01, cache_users: int = 1000):
+        self.error_rate = error_rate
+        self.cache_users = cache_users
+        self._users: "OrderedDict[int, UserRecipients]" = OrderedDict()
+
+    def record(self, db: Session, email_send: EmailSend):
+        """Store the send's recipients; call in the transaction marking it sent."""
+        rows = {}
+        for kind, addresses in (("to", email_send.to_list), ("cc", email_send.cc_list), ("bcc", email_send.bcc_list)):
+            for address in addresses or []:
+                rows.setdefault(normalize_address(address), kind)
+        if rows:
+            db.execute(insert(EmailRecipient), [
+                {"user_id": email_send.user_id, "email_send_id": email_send.id, "address": address, "kind": kind}
+                for address, kind in rows.items()
+            ])
+
+    def forget_send(self, db: Session, email_send: EmailSend):
+        # Filters keep the addresses; hits are confirmed against the table
+        db.execute(delete(EmailRecipient).where(EmailRecipient.email_send_id == email_send.id))
+
+    def already_contacted(self, db: Session, user_id: int, addresses: Iterable[str]) -> List[str]:
+        """The given addresses that earlier sends were delivered to."""
+        bloom = self._filter(db, user_id)
+        candidates = {address for address in map(normalize_address, addresses) if address in bloom}
+        if not candidates:
+            return []
+        return sorted(db.execute(
+            select(EmailRecipient.address).distinct().where(
+                EmailRecipient.user_id == user_id,
+                EmailRecipient.address.in_(candidates)
+            )
+        ).scalars())
+
+    def _filter(self, db: Session, user_id: int) -> BloomFilter:
+        now = datetime.utcnow()
+        cached = self._users.get(user_id)
+
+        if cached is not None:
+            recent = db.execute(
+                select(EmailRecipient.address).where(
+                    EmailRecipient.user_id == user_id,
+                    EmailRecipient.created_at >= cached.synced_at - RECHECK_WINDOW
+                )
+            ).scalars().all()
+            added = {address for address in recent if address not in cached.bloom}
+            if cached.bloom.count + len(added) > cached.bloom.capacity:
+                cached = None  # full: rebuild with more room
+            else:
+                for address in added:
+                    cached.bloom.add(address)
+                cached.synced_at = now
+
+        if cached is None:
+            addresses = db.execute(
+                select(EmailRecipient.address).distinct().where(EmailRecipient.user_id == user_id)
+            ).scalars().all()
+            # Headroom so a filter absorbs many sends before it is rebuilt
+            bloom = BloomFilter(max(1024, 2 * len(addresses)), self.error_rate)
+            for address in addresses:
+                bloom.add(address)
+            cached = UserRecipients(bloom, now)
+
+        self._users[user_id] = cached
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.cache_users:
+            self._users.popitem(last=False)
+        return cached.bloom
+
+    def history(self, db: Session, user_id: int, address: str, limit: int = 50) -> Dict[str, Any]:
+        """Sends delivered to one address, newest first, with totals."""
+        address = normalize_address(address)
+        scoped = (EmailRecipient.user_id == user_id, EmailRecipient.address == address)
+        # Send times rather than row times: rebuild() re-creates rows
+        count, first, last = db.execute(
+            select(func.count(), func.min(EmailSend.created_at), func.max(EmailSend.created_at))
+            .select_from(EmailRecipient)
+            .join(EmailSend, EmailSend.id == EmailRecipient.email_send_id)
+            .where(*scoped)
+        ).one()
+        sends = db.execute(
+            select(EmailSend.id, EmailSend.subject, EmailSend.status, EmailRecipient.kind, EmailSend.created_at)
+            .join(EmailSend, EmailSend.id == EmailRecipient.email_send_id)
+            .where(*scoped)
+            .order_by(EmailSend.id.desc())
+            .limit(limit)
+        ).all()
+        return {
+            "address": address,
+            "contacted": count > 0,
+            "send_count": count,
+            "first_contacted_at": first,
+            "last_contacted_at": last,
+            "sends": [
+                {"send_id": row.id, "subject": row.subject, "status": row.status, "kind": row.kind, "created_at": row.created_at}
+                for row in sends
+            ]
+        }
+
+    def rebuild(self, db: Session, batch_size: int = 1000) -> int:
+        """Re-create recipient rows from every sent email. Returns the number of sends."""
+        db.execute(delete(EmailRecipient))
+        count = 0
+        last_id = 0
+        while True:
+            # Keyset pagination keeps memory flat on large tables
+            batch = db.query(EmailSend).filter(EmailSend.id > last_id, EmailSend.status == "sent").order_by(EmailSend.id).limit(batch_size).all()
+            if not batch:
+                db.commit()
+                return count
+            for email_send in batch:
+                self.record(db, email_send)
+            db.commit()
+            count += len(batch)
+            last_id = batch[-1].id
+            db.expunge_all()
@@ -0,0 +1,148 @@
+import hashlib
+import re
+import zlib
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from app.services.tokens import count_tokens
+
+# Size of the hashed feature space. Collisions are rare enough at this size for
+# resume-length texts and keep every vector at a fixed 16KB.
+HASH_DIM = 2 ** 12
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOP_WORDS = frozenset({
+    "a", "about", "all", "also", "an", "and", "any", "are", "as", "at", "be", "been",
+    "but", "by", "can", "for", "from", "has", "have", "in", "into", "is", "it", "its",
+    "our", "of", "on", "or", "such", "that", "the", "their", "this", "to", "we", "will",
+    "with", "you", "your", "who", "what", "which", "while", "within", "would", "etc",
+    "able", "strong", "experience", "years", "work", "working", "team", "role", "including",
+})
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into keyword tokens, dropping stop words."""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+class HashedVectorizer:
+    """Maps text to sublinear term-frequency vectors via the hashing trick.
+
+    Unigrams and bigrams are hashed with CRC32, which is stable across processes,
+    so vectors can be cached or persisted and compared later.
+    """
+
+    def __init__(self, dim: int = HASH_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[int]:
+        tokens = tokenize(text)
+        features = [zlib.crc32(token.encode()) % self.dim for token in tokens]
+        features.extend(
+            zlib.crc32(f"{first} {second}".encode()) % self.dim
+            for first, second in zip(tokens, tokens[1:])
+        )
+        return features
+
+    def transform(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        features = self._features(text)
+        if features:
+            np.add.at(vector, features, 1.0)
+            np.log1p(vector, out=vector)
+        return vector
+
+    def transform_many(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if features:
+                np.add.at(matrix[row], features, 1.0)
+        np.log1p(matrix, out=matrix)
+        return matrix
+
+class RelevanceRanker:
+    """Scores candidate snippets against a job description with TF-IDF cosine similarity.
+
+    IDF is computed over the snippets being ranked plus the job description, so
+    terms shared by every snippet carry little weight. Job description vectors are
+    memoized by content hash, making repeated postings free to vectorize.
+    """
+
+    def __init__(self, vectorizer: Optional[HashedVectorizer] = None, cache_size: int = 512):
+        self.vectorizer = vectorizer or HashedVectorizer()
+        self.cache_size = cache_size
+        self._job_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def job_vector(self, job_description: str) -> np.ndarray:
+        """Return the (memoized) keyword vector for a job description."""
+        digest = hashlib.sha1((job_description or "").encode()).hexdigest()
+        vector = self._job_vectors.get(digest)
+        if vector is not None:
+            self._job_vectors.move_to_end(digest)
+            return vector
+
+        vector = self.vectorizer.transform(job_description)
+        vector.setflags(write=False)
+        self._job_vectors[digest] = vector
+        if len(self._job_vectors) > self.cache_size:
+            self._job_vectors.popitem(last=False)
+        return vector
+
+    def score(self, job_description: str, texts: List[str]) -> np.ndarray:
+        """Cosine similarity of each text to the job description."""
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+
+        query = self.job_vector(job_description)
+        matrix = self.vectorizer.transform_many(texts)
+
+        document_count = len(texts) + 1
+        document_frequency = np.count_nonzero(matrix, axis=0) + (query > 0)
+        idf = np.log((1.0 + document_count) / (1.0 + document_frequency)) + 1.0
+
+        weighted_query = query * idf
+        weighted = matrix * idf
+        norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(weighted_query)
+        return (weighted @ weighted_query) / np.maximum(norms, 1e-9)
+
+    def select(
+        self,
+        job_description: str,
+        texts: List[str],
+        top_k: int,
+        token_budget: int,
+        min_items: int = 0
+    ) -> List[int]:
+        """Pick indexes of the most relevant texts, best first, within a token budget.
+
+        Texts with no keyword overlap are only used to reach ``min_items``, in their
+        original order.
+        """
+        if not texts or top_k <= 0:
+            return []
+
+        scores = self.score(job_description, texts)
+        # Stable sort keeps the original (usually chronological) order on ties
+        order = np.argsort(-scores, kind="stable")
+
+        selected = []
+        used_tokens = 0
+        for index in order:
+            index = int(index)
+            if len(selected) >= top_k:
+                break
+            if scores[index] <= 0 and len(selected) >= min_items:
+                break
+
+            cost = count_tokens(texts[index])
+            if used_tokens + cost > token_budget:
+                continue
+            selected.append(index)
+            used_tokens += cost
+
+        return selected
+
+# Shared instance so the job description cache survives across requests
+relevance_ranker = RelevanceRanker()
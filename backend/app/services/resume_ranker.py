@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.database import File, ParsedDocument
+from app.services.relevance import HashedVectorizer, RelevanceRanker, relevance_ranker
+
+def resume_text(extraction: Dict[str, Any]) -> str:
+    """The text a resume is matched on: skills and experience, then the full text."""
+    parts = list(extraction.get("skills") or [])
+    parts.append(extraction.get("summary") or "")
+    for experience in extraction.get("experiences") or []:
+        parts.extend([experience.get("title") or "", experience.get("description") or ""])
+        parts.extend(experience.get("highlights") or [])
+    parts.append(extraction.get("raw_text") or "")
+    return "\n".join(part for part in parts if isinstance(part, str))
+
+class ResumeMatrix:
+    """A user's resume vectors, IDF-weighted and L2-normalized, one row each."""
+
+    def __init__(self, key: Tuple, documents: List[Dict[str, Any]], vectors: np.ndarray):
+        self.key = key
+        self.documents = documents
+        # IDF over the user's own resumes: terms every variant shares say
+        # little about which one fits a posting best
+        document_frequency = np.count_nonzero(vectors, axis=0)
+        self.idf = (np.log((1.0 + len(documents)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        weighted = vectors * self.idf
+        weighted /= np.maximum(np.linalg.norm(weighted, axis=1, keepdims=True), 1e-9)
+        self.weighted = weighted
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        weighted_query = query * self.idf
+        return self.weighted @ weighted_query / max(float(np.linalg.norm(weighted_query)), 1e-9)
+
+class ResumeRanker:
+    """Ranks a user's parsed resumes against a job description.
+
+    Each document's keyword vector is computed once when parsing completes
+    and stored on ``ParsedDocument.resume_vector``. Per user, the vectors are
+    stacked into a cached matrix that is rebuilt only when the user's set
+    of parsed documents changes, so ranking is one matrix-vector product
+    against the (memoized) job description vector.
+    """
+
+    def __init__(self, job_vectors: Optional[RelevanceRanker] = None, cache_users: int = 200):
+        self.job_vectors = job_vectors or relevance_ranker
+        self.vectorizer: HashedVectorizer = self.job_vectors.vectorizer
+        self.cache_users = cache_users
+        self._matrices: "OrderedDict[int, ResumeMatrix]" = OrderedDict()
+
+    def vectorize(self, parsed_doc: ParsedDocument):
+        """Store the document's vector; call whenever its extraction changes."""
+        parsed_doc.resume_vector = self._vector(parsed_doc.json_extraction).tobytes()
+
+    def _vector(self, extraction: Optional[Dict[str, Any]]) -> np.ndarray:
+        return self.vectorizer.transform(resume_text(extraction or {}))
+
+    def rank(self, db: Session, user_id: int, job_description: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The user's parsed documents with their similarity to the job description, best first."""
+        matrix = self._matrix(db, user_id)
+        if matrix is None:
+            return []
+
+        scores = matrix.scores(self.job_vectors.job_vector(job_description))
+        # Stable sort keeps the newest document first on ties
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [{**matrix.documents[index], "score": float(scores[index])} for index in order]
+
+    def _version(self, db: Session, user_id: int) -> Tuple:
+        # Any parse, re-parse or delete changes one of these
+        return tuple(db.execute(
+            select(func.count(ParsedDocument.id), func.max(ParsedDocument.id), func.max(ParsedDocument.updated_at))
+            .where(ParsedDocument.user_id == user_id)
+        ).one())
+
+    def _matrix(self, db: Session, user_id: int) -> Optional[ResumeMatrix]:
+        key = self._version(db, user_id)
+        if not key[0]:
+            self._matrices.pop(user_id, None)
+            return None
+
+        cached = self._matrices.get(user_id)
+        if cached is not None and cached.key == key:
+            self._matrices.move_to_end(user_id)
+            return cached
+
+        rows = db.execute(
+            select(ParsedDocument.id, ParsedDocument.file_id, File.filename, ParsedDocument.resume_vector)
+            .join(File, File.id == ParsedDocument.file_id)
+            .where(ParsedDocument.user_id == user_id)
+            .order_by(ParsedDocument.id.desc())
+        ).all()
+
+        vectors = np.zeros((len(rows), self.vectorizer.dim), dtype=np.float32)
+        for row_index, row in enumerate(rows):
+            stored = row.resume_vector
+            if stored is None or len(stored) != vectors.itemsize * self.vectorizer.dim:
+                # Parsed before vectors were stored, or with another dimension
+                parsed_doc = db.get(ParsedDocument, row.id)
+                self.vectorize(parsed_doc)
+                stored = parsed_doc.resume_vector
+            vectors[row_index] = np.frombuffer(stored, dtype=np.float32)
+        if db.dirty:
+            db.commit()
+            key = self._version(db, user_id)
+
+        matrix = ResumeMatrix(
+            key,
+            [{"parsed_document_id": row.id, "file_id": row.file_id, "filename": row.filename} for row in rows],
+            vectors
+        )
+        self._matrices[user_id] = matrix
+        self._matrices.move_to_end(user_id)
+        while len(self._matrices) > self.cache_users:
+            self._matrices.popitem(last=False)
+        return matrix
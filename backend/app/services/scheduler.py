@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database import EmailOutbox, EmailSend
+from app.services.events import EventBroker
+from app.services.outbox import OutboxDispatcher, publish_send_status
+
+logger = logging.getLogger(__name__)
+
+# Quota windows, each limited by a setting
+MINUTE = timedelta(minutes=1)
+DAY = timedelta(days=1)
+
+def to_utc(send_at: datetime, tz_name: Optional[str] = None) -> datetime:
+    """Naive UTC, as stored. A naive ``send_at`` is local time in ``tz_name`` (UTC if not given).
+
+    Raises ValueError for an unknown time zone.
+    """
+    if send_at.tzinfo is None and tz_name:
+        try:
+            send_at = send_at.replace(tzinfo=ZoneInfo(tz_name))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: {tz_name}")
+    if send_at.tzinfo is not None:
+        send_at = send_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return send_at
+
+def _quota_windows() -> List[Tuple[timedelta, int]]:
+    limits = ((MINUTE, settings.email_account_minute_limit), (DAY, settings.email_account_daily_limit))
+    return [(window, limit) for window, limit in limits if limit > 0]
+
+def next_send_times(db: Session, account_id: int, now: datetime, count: int) -> List[datetime]:
+    """When each of ``count`` more sends from the account may start, earliest first.
+
+    Each send waits until fewer than the limit of the account's sends fall
+    in the window before it, for every window: sends delivered (by
+    ``sent_at``), in flight (counted as now) and the ones placed before it.
+    """
+    windows = _quota_windows()
+    if not windows:
+        return [now] * count
+    in_flight = db.scalar(
+        select(func.count()).select_from(EmailSend)
+        .where(EmailSend.from_account_id == account_id, EmailSend.status.in_(("queued", "sending")))
+    )
+    sent = db.scalars(
+        select(EmailSend.sent_at)
+        .where(EmailSend.from_account_id == account_id, EmailSend.sent_at > now - max(window for window, _ in windows))
+        .order_by(EmailSend.sent_at)
+    ).all()
+    starts = [[at for at in sent if at > now - window] + [now] * in_flight for window, _ in windows]
+
+    times = []
+    for _ in range(count):
+        at = now
+        for (window, limit), started in zip(windows, starts):
+            # The send that must have left the window first
+            index = len(started) - limit
+            if index >= 0:
+                at = max(at, started[index] + window)
+        for started in starts:
+            started.append(at)
+        times.append(at)
+    return times
+
+class SendScheduler:
+    """Releases scheduled sends to the outbox when they are due.
+
+    Sends due within ``scheduler_lookahead_seconds`` are held in a heap,
+    loaded in ``send_at`` order from the ``(status, send_at)`` index a page
+    at a time (at most ``scheduler_max_loaded``), so far-off sends cost
+    nothing until their window comes up. The window is re-read every
+    ``scheduler_rescan_seconds`` to pick up sends other processes
+    scheduled; since state lives in the table, a restart just reloads it.
+    A due send is released within its account's per-minute and daily
+    limits (``next_send_times``), or held until the time it may start.
+    Releasing is a conditional update, so several schedulers can run.
+    """
+
+    def __init__(self, outbox: OutboxDispatcher, events: EventBroker):
+        self.outbox = outbox
+        self.events = events
+        self.lookahead = timedelta(seconds=settings.scheduler_lookahead_seconds)
+        # (due, send id, account id)
+        self._heap: List[Tuple[datetime, int, int]] = []
+        self._pending: Set[int] = set()
+        # Keyset position of the last row loaded, and how far the window is fully loaded
+        self._cursor: Optional[Tuple[datetime, int]] = None
+        self._loaded_until: Optional[datetime] = None
+        self._rescan_at = datetime.min
+        self._wake = asyncio.Event()
+        self._task = None
+        self._stopping = False
+
+    def add(self, email_send: EmailSend):
+        """Hold a send scheduled by this process without waiting for the next rescan."""
+        if email_send.send_at is not None and email_send.send_at <= datetime.utcnow() + self.lookahead:
+            self._push(email_send.send_at, email_send.id, email_send.from_account_id)
+            self._wake.set()
+
+    def _push(self, due: datetime, send_id: int, account_id: int):
+        if send_id not in self._pending:
+            self._pending.add(send_id)
+            heapq.heappush(self._heap, (due, send_id, account_id))
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                await self._tick()
+            except Exception:
+                logger.exception("Releasing scheduled sends failed")
+            now = datetime.utcnow()
+            wake_at = self._rescan_at
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+            try:
+                await asyncio.wait_for(self._wake.wait(), max((wake_at - now).total_seconds(), 0.01))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _tick(self):
+        now = datetime.utcnow()
+        if now >= self._rescan_at:
+            self._cursor = self._loaded_until = None
+            self._rescan_at = now + timedelta(seconds=settings.scheduler_rescan_seconds)
+        room = settings.scheduler_max_loaded - len(self._heap)
+        if room > 0 and (self._loaded_until is None or self._loaded_until < now + self.lookahead / 2):
+            for send_id, send_at, account_id in await asyncio.to_thread(self._load, now + self.lookahead, room):
+                self._push(send_at, send_id, account_id)
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        if due:
+            released, deferred = await asyncio.to_thread(self._release, due)
+            for _, send_id, _ in due:
+                self._pending.discard(send_id)
+            for item in deferred:
+                self._push(*item)
+            if released:
+                self.outbox.notify()
+                for email_send in released:
+                    await publish_send_status(self.events, email_send)
+
+    def _load(self, until: datetime, limit: int) -> List[Tuple[int, datetime, int]]:
+        """The next page of scheduled sends due before ``until``, in (send_at, id) order."""
+        db = SessionLocal()
+        try:
+            query = select(EmailSend.id, EmailSend.send_at, EmailSend.from_account_id).where(
+                EmailSend.status == "scheduled", EmailSend.send_at < until
+            )
+            if self._cursor is not None:
+                last_at, last_id = self._cursor
+                query = query.where(or_(EmailSend.send_at > last_at, and_(EmailSend.send_at == last_at, EmailSend.id > last_id)))
+            rows = db.execute(query.order_by(EmailSend.send_at, EmailSend.id).limit(limit)).all()
+        finally:
+            db.close()
+        if rows:
+            self._cursor = (rows[-1].send_at, rows[-1].id)
+        # A short page means everything before ``until`` is loaded
+        self._loaded_until = until if len(rows) < limit else self._cursor[0]
+        return [tuple(row) for row in rows]
+
+    def _release(self, due: List[Tuple[datetime, int, int]]) -> Tuple[List[EmailSend], List[Tuple[datetime, int, int]]]:
+        """Queue the due sends their accounts' limits allow; the others come back with when they may start."""
+        now = datetime.utcnow()
+        by_account: Dict[int, List[int]] = {}
+        for _, send_id, account_id in due:
+            by_account.setdefault(account_id, []).append(send_id)
+
+        db = SessionLocal()
+        try:
+            ready, deferred = [], []
+            for account_id, send_ids in by_account.items():
+                for send_id, at in zip(send_ids, next_send_times(db, account_id, now, len(send_ids))):
+                    if at <= now:
+                        ready.append(send_id)
+                    else:
+                        deferred.append((at, send_id, account_id))
+
+            released = []
+            if ready:
+                # Skips sends cancelled or released by another scheduler meanwhile
+                released = db.scalars(
+                    update(EmailSend)
+                    .where(EmailSend.id.in_(ready), EmailSend.status == "scheduled")
+                    .values(status="queued")
+                    .returning(EmailSend.id)
+                ).all()
+            if released:
+                db.execute(update(EmailOutbox).where(EmailOutbox.email_send_id.in_(released)).values(available_at=now))
+            db.commit()
+            sends = db.scalars(select(EmailSend).where(EmailSend.id.in_(released))).all() if released else []
+            db.expunge_all()
+            return sends, deferred
+        finally:
+            db.close()
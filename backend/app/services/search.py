@@ -0,0 +1,421 @@
+import html
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Connection, Engine
+from app.config import settings
+from app.models.database import AIDraft, EmailSend
+
+KIND_DRAFT = "draft"
+KIND_EMAIL = "email"
+
+# Index rows get a rowid derived from (kind, record ID) so a delete is a
+# primary-key lookup rather than a scan of the index
+KIND_CODES = {KIND_DRAFT: 0, KIND_EMAIL: 1}
+
+TAG_RE = re.compile(r"<[^>]+>")
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+def html_to_text(value: Optional[str]) -> str:
+    return html.unescape(TAG_RE.sub(" ", value or ""))
+
+def query_terms(query: str) -> List[str]:
+    return [term.lower() for term in TERM_RE.findall(query)]
+
+def make_snippet(body: Optional[str], terms: List[str], size: int = 24) -> str:
+    """HTML-escaped window of ``body`` around the first match, terms in <mark>.
+
+    Matching is a light approximation of the index's stemming: longer terms
+    match words sharing all but their last two letters, and the last term
+    matches as a prefix.
+    """
+    words = (body or "").split()
+    if not words:
+        return ""
+
+    stems = [
+        term if index == len(terms) - 1 or len(term) <= 4 else term[:-2]
+        for index, term in enumerate(terms)
+    ]
+    exact = set(terms[:-1])
+
+    def matches(word: str) -> bool:
+        word = TERM_RE.search(word.lower())
+        if word is None:
+            return False
+        word = word.group()
+        return word in exact or any(word.startswith(stem) for stem in stems)
+
+    first = next((index for index, word in enumerate(words) if matches(word)), 0)
+    start = max(0, first - size // 4)
+    window = words[start:start + size]
+
+    parts = [f"<mark>{html.escape(word)}</mark>" if matches(word) else html.escape(word) for word in window]
+    snippet = " ".join(parts)
+    if start > 0:
+        snippet = "... " + snippet
+    if start + size < len(words):
+        snippet += " ..."
+    return snippet
+
+def rank_window(limit: int, offset: int) -> int:
+    # Only the newest matches are scored, but never fewer than the page needs
+    return max(settings.search_rank_window, limit + offset)
+
+def index_rowid(kind: str, record_id: int) -> int:
+    return record_id * len(KIND_CODES) + KIND_CODES[kind]
+
+def draft_document(draft: AIDraft) -> Dict[str, Any]:
+    inputs = draft.inputs_json or {}
+    return {
+        "kind": KIND_DRAFT,
+        "record_id": draft.id,
+        "user_id": draft.user_id,
+        "created_at": draft.created_at,
+        "subject": draft.subject or "",
+        "body": draft.plain_body or html_to_text(draft.html_body),
+        "company": inputs.get("company_name") or "",
+        "role": inputs.get("role") or "",
+        "recipients": ""
+    }
+
+def email_document(email_send: EmailSend, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    inputs = inputs or {}
+    recipients = (email_send.to_list or []) + (email_send.cc_list or []) + (email_send.bcc_list or [])
+    return {
+        "kind": KIND_EMAIL,
+        "record_id": email_send.id,
+        "user_id": email_send.user_id,
+        "created_at": email_send.created_at,
+        "subject": email_send.subject or "",
+        "body": html_to_text(email_send.html_body),
+        "company": inputs.get("company_name") or "",
+        "role": inputs.get("role") or "",
+        "recipients": " ".join(recipients)
+    }
+
+class SearchIndex(ABC):
+    """Full-text index over drafts and sent emails, one row per record.
+
+    Rows are written in the same transaction as the record (see the mapper
+    events below) and ranked with field weights: subject, company and role
+    count more than recipients, which count more than the body.
+
+    Scoring every match of a term that appears in most of a user's history
+    dominates query time, so only the newest ``search_rank_window`` matches
+    are ranked; ``total`` still counts all of them.
+    """
+
+    dialect = ""
+
+    @abstractmethod
+    def create(self, connection: Connection):
+        """Create the index tables if missing."""
+
+    @abstractmethod
+    def add(self, connection: Connection, document: Dict[str, Any]):
+        """Index a document from ``draft_document`` or ``email_document``, replacing its old row."""
+
+    @abstractmethod
+    def remove(self, connection: Connection, kind: str, record_id: int):
+        """Drop one record's row."""
+
+    @abstractmethod
+    def clear(self, connection: Connection):
+        """Drop every row, before a rebuild."""
+
+    def optimize(self, connection: Connection):
+        """Compact index storage after bulk loads."""
+
+    @abstractmethod
+    def search(
+        self,
+        connection: Connection,
+        user_id: int,
+        query: str,
+        kind: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Ranked matches as ``{"total": int, "results": [...]}``."""
+
+class SQLiteSearchIndex(SearchIndex):
+    """SQLite FTS5 table with Porter stemming.
+
+    The owner is an indexed ``u<id>`` token so per-user filtering happens
+    inside the full-text match instead of after it.
+    """
+
+    dialect = "sqlite"
+
+    def create(self, connection):
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "owner, subject, body, company, role, recipients, "
+            "kind UNINDEXED, record_id UNINDEXED, created_at UNINDEXED, "
+            "tokenize = 'porter unicode61', prefix = '2 3 4')"
+        ))
+
+    def add(self, connection, document):
+        connection.execute(
+            text(
+                "INSERT OR REPLACE INTO search_index "
+                "(rowid, owner, subject, body, company, role, recipients, kind, record_id, created_at) "
+                "VALUES (:rowid, :owner, :subject, :body, :company, :role, :recipients, :kind, :record_id, :created_at)"
+            ),
+            {
+                **document,
+                "rowid": index_rowid(document["kind"], document["record_id"]),
+                "owner": f"u{document['user_id']}",
+                "created_at": document["created_at"].isoformat() if document["created_at"] else None
+            }
+        )
+
+    def remove(self, connection, kind, record_id):
+        connection.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), {"rowid": index_rowid(kind, record_id)})
+
+    def clear(self, connection):
+        connection.execute(text("DELETE FROM search_index"))
+
+    def optimize(self, connection):
+        # Merge the b-tree segments that many small inserts leave behind
+        connection.execute(text("INSERT INTO search_index(search_index) VALUES ('optimize')"))
+
+    @staticmethod
+    def match_expression(user_id: int, terms: List[str]) -> str:
+        # Quote every term so user input can't form FTS5 syntax; the last one
+        # is a prefix so results update while typing
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return f"owner:u{user_id} AND ({' AND '.join(quoted)})"
+
+    def search(self, connection, user_id, query, kind=None, limit=20, offset=0):
+        terms = query_terms(query)
+        if not terms:
+            return {"total": 0, "results": []}
+
+        # kind and record ID are encoded in the rowid, so filtering and
+        # ranking never read the stored columns of non-returned rows
+        kind_filter = f" AND rowid % {len(KIND_CODES)} = :code" if kind else ""
+        params = {
+            "expression": self.match_expression(user_id, terms),
+            "code": KIND_CODES.get(kind),
+            "window": rank_window(limit, offset),
+            "limit": limit,
+            "offset": offset
+        }
+
+        total = connection.execute(
+            text(f"SELECT count(*) FROM search_index WHERE search_index MATCH :expression{kind_filter}"),
+            params
+        ).scalar()
+
+        ranked = connection.execute(
+            text(
+                "SELECT rowid, rank FROM ("
+                "SELECT rowid, "
+                # Column weights: owner, subject, body, company, role, recipients
+                "bm25(search_index, 0.0, 10.0, 1.0, 5.0, 5.0, 3.0) AS rank "
+                f"FROM search_index WHERE search_index MATCH :expression{kind_filter} "
+                "ORDER BY rowid DESC LIMIT :window"
+                ") ORDER BY rank, rowid DESC LIMIT :limit OFFSET :offset"
+            ),
+            params
+        ).all()
+        if not ranked:
+            return {"total": total, "results": []}
+
+        # snippet() would re-run the match per row; fetching the page by rowid is cheap
+        rowids = ", ".join(str(rowid) for rowid, _ in ranked)
+        stored = {
+            row["rowid"]: row
+            for row in connection.execute(
+                text(f"SELECT rowid, kind, record_id, subject, body, created_at FROM search_index WHERE rowid IN ({rowids})")
+            ).mappings()
+        }
+
+        results = []
+        for rowid, rank in ranked:
+            row = stored[rowid]
+            results.append({
+                "kind": row["kind"],
+                "id": row["record_id"],
+                "subject": row["subject"],
+                "snippet": make_snippet(row["body"], terms),
+                # bm25 is negative, lower is better
+                "score": -rank,
+                "created_at": datetime.fromisoformat(row["created_at"]) if row["created_at"] else None
+            })
+        return {"total": total, "results": results}
+
+class PostgresSearchIndex(SearchIndex):
+    """Weighted ``tsvector`` column with a GIN index."""
+
+    dialect = "postgresql"
+
+    def create(self, connection):
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_documents ("
+            "id BIGINT PRIMARY KEY, user_id INTEGER NOT NULL, kind VARCHAR(16) NOT NULL, "
+            "record_id INTEGER NOT NULL, subject TEXT, body TEXT, created_at TIMESTAMP, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_search_documents_document ON search_documents USING GIN (document)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_search_documents_user_id ON search_documents (user_id)"
+        ))
+
+    def add(self, connection, document):
+        connection.execute(
+            text(
+                "INSERT INTO search_documents (id, user_id, kind, record_id, subject, body, created_at, document) "
+                "VALUES (:id, :user_id, :kind, :record_id, :subject, :body, :created_at, "
+                "setweight(to_tsvector('english', :subject), 'A') || "
+                "setweight(to_tsvector('english', :company || ' ' || :role), 'A') || "
+                "setweight(to_tsvector('english', :recipients), 'B') || "
+                "setweight(to_tsvector('english', :body), 'C')) "
+                "ON CONFLICT (id) DO UPDATE SET subject = EXCLUDED.subject, body = EXCLUDED.body, "
+                "document = EXCLUDED.document"
+            ),
+            {
+                **document,
+                "id": index_rowid(document["kind"], document["record_id"]),
+                # The default parser keeps addresses whole; split them like the query terms
+                "recipients": " ".join(TERM_RE.findall(document["recipients"]))
+            }
+        )
+
+    def remove(self, connection, kind, record_id):
+        connection.execute(text("DELETE FROM search_documents WHERE id = :id"), {"id": index_rowid(kind, record_id)})
+
+    def clear(self, connection):
+        connection.execute(text("TRUNCATE search_documents"))
+
+    def search(self, connection, user_id, query, kind=None, limit=20, offset=0):
+        terms = query_terms(query)
+        if not terms:
+            return {"total": 0, "results": []}
+
+        # to_tsquery with quoted lexemes, the last as a prefix, mirrors the SQLite query
+        tsquery = " & ".join(f"'{term}'" for term in terms) + ":*"
+        kind_filter = " AND kind = :kind" if kind else ""
+        params = {
+            "tsquery": tsquery,
+            "user_id": user_id,
+            "kind": kind,
+            "window": rank_window(limit, offset),
+            "limit": limit,
+            "offset": offset
+        }
+        where = f"user_id = :user_id AND document @@ to_tsquery('english', :tsquery){kind_filter}"
+
+        total = connection.execute(text(f"SELECT count(*) FROM search_documents WHERE {where}"), params).scalar()
+
+        rows = connection.execute(
+            text(
+                "SELECT kind, record_id, subject, body, created_at, "
+                "ts_rank_cd(document, to_tsquery('english', :tsquery)) AS rank FROM ("
+                f"SELECT * FROM search_documents WHERE {where} ORDER BY id DESC LIMIT :window"
+                ") AS recent ORDER BY rank DESC, id DESC LIMIT :limit OFFSET :offset"
+            ),
+            params
+        ).mappings().all()
+
+        return {
+            "total": total,
+            "results": [
+                {
+                    "kind": row["kind"],
+                    "id": row["record_id"],
+                    "subject": row["subject"],
+                    "snippet": make_snippet(row["body"], terms),
+                    "score": float(row["rank"]),
+                    "created_at": row["created_at"]
+                }
+                for row in rows
+            ]
+        }
+
+SEARCH_INDEXES = {index.dialect: index for index in (SQLiteSearchIndex(), PostgresSearchIndex())}
+
+def get_search_index(bind) -> Optional[SearchIndex]:
+    """Index implementation for the engine's dialect, or None if unsupported."""
+    return SEARCH_INDEXES.get(bind.dialect.name)
+
+def create_search_index(engine: Engine):
+    index = get_search_index(engine)
+    if index is not None:
+        with engine.begin() as connection:
+            index.create(connection)
+
+def rebuild_search_index(engine: Engine, batch_size: int = 1000) -> int:
+    """Re-index every draft and sent email. Returns the number of records indexed."""
+    index = get_search_index(engine)
+    if index is None:
+        return 0
+
+    count = 0
+    with engine.begin() as connection:
+        index.create(connection)
+        index.clear(connection)
+
+        for draft in _iter_rows(connection, AIDraft, batch_size):
+            index.add(connection, draft_document(draft))
+            count += 1
+
+        draft_inputs = {}
+        for email_send in _iter_rows(connection, EmailSend, batch_size):
+            if email_send.draft_id and email_send.draft_id not in draft_inputs:
+                draft_inputs[email_send.draft_id] = _draft_inputs(connection, email_send.draft_id)
+            index.add(connection, email_document(email_send, draft_inputs.get(email_send.draft_id)))
+            count += 1
+
+        index.optimize(connection)
+
+    return count
+
+def _iter_rows(connection: Connection, model, batch_size: int):
+    # Keyset pagination keeps memory flat on large tables
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(model.__table__).where(model.id > last_id).order_by(model.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        for row in rows:
+            yield row
+        last_id = rows[-1].id
+
+def _draft_inputs(connection: Connection, draft_id: int) -> Optional[Dict[str, Any]]:
+    return connection.execute(select(AIDraft.inputs_json).where(AIDraft.id == draft_id)).scalar()
+
+# Keep the index in step with the tables, inside the same transaction
+@event.listens_for(AIDraft, "after_insert")
+def _index_draft(mapper, connection, target):
+    index = get_search_index(connection)
+    if index is not None:
+        index.add(connection, draft_document(target))
+
+@event.listens_for(EmailSend, "after_insert")
+def _index_email(mapper, connection, target):
+    index = get_search_index(connection)
+    if index is not None:
+        inputs = _draft_inputs(connection, target.draft_id) if target.draft_id else None
+        index.add(connection, email_document(target, inputs))
+
+@event.listens_for(AIDraft, "after_delete")
+def _unindex_draft(mapper, connection, target):
+    index = get_search_index(connection)
+    if index is not None:
+        index.remove(connection, KIND_DRAFT, target.id)
+
+@event.listens_for(EmailSend, "after_delete")
+def _unindex_email(mapper, connection, target):
+    index = get_search_index(connection)
+    if index is not None:
+        index.remove(connection, KIND_EMAIL, target.id)
@@ -0,0 +1,301 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import String, cast, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.database import DocumentSkill, File, ParsedDocument, Skill, SkillIndexVersion, SkillPostingChange
+from app.services.skill_recognizer import get_skill_recognizer
+
+MAX_SKILL_LENGTH = 64
+
+def normalize_skill(name: Any) -> Optional[str]:
+    """Canonical form of a skill name, or None if it isn't usable.
+
+    Aliases resolve through the skill taxonomy ("k8s" -> "kubernetes");
+    names outside it are kept as written, lowercased.
+    """
+    if not isinstance(name, str):
+        return None
+    key = " ".join(name.lower().split()).strip(" .,;:")
+    if not key or len(key) > MAX_SKILL_LENGTH:
+        return None
+    canonical = get_skill_recognizer().canonical(key)
+    return canonical.lower() if canonical else key
+
+def normalize_skills(names: Iterable[Any]) -> Set[str]:
+    return {skill for skill in map(normalize_skill, names) if skill}
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:  # Python < 3.10
+    def popcount(bits: int) -> int:
+        return bin(bits).count("1")
+
+def to_bitmap(ids: Iterable[int]) -> int:
+    """Bitmap with bit ``id`` set for each ID."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for value in ids:
+        buffer[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(buffer, "little")
+
+def newest_ids(bits: int, limit: int, offset: int = 0) -> List[int]:
+    """The highest set bits, in descending order, after skipping ``offset``."""
+    ids = []
+    while bits and len(ids) < limit:
+        top = bits.bit_length() - 1
+        bits ^= 1 << top
+        if offset:
+            offset -= 1
+        else:
+            ids.append(top)
+    return ids
+
+class UserBitmaps:
+    """One user's loaded skill bitmaps and the index version they reflect."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.bitmaps: Dict[int, int] = {}
+
+class SkillIndex:
+    """Inverted index from normalized skills to the parsed documents mentioning them.
+
+    The database is the source of truth: ``skills`` holds one row per
+    distinct skill and ``document_skills`` the posting lists, with the owner
+    copied in so one skill's postings are a single range scan on
+    ``(user_id, skill_id, parsed_document_id)``.
+
+    Queries run on per-process bitmaps (an ``int`` with a bit per parsed
+    document ID) loaded from those scans, so AND/OR and counting cost
+    microseconds however long the lists are. Writes bump the user's row in
+    ``skill_index_versions`` first, which serializes them per user, and log
+    each added or removed posting under the new version. A query reads the
+    version and replays newer log entries onto the cached bitmaps; only a
+    worker that fell further behind than the retained log reloads them.
+    """
+
+    def __init__(self, cache_users: int = 200, change_log_size: int = 10000):
+        self.cache_users = cache_users
+        self.change_log_size = change_log_size
+        self._ids: Dict[str, int] = {}
+        self._users: "OrderedDict[int, UserBitmaps]" = OrderedDict()
+
+    def skill_ids(self, db: Session, names: Iterable[str], create: bool = False) -> Dict[str, int]:
+        names = set(names)
+        missing = [name for name in names if name not in self._ids]
+        if missing:
+            for skill_id, name in db.query(Skill.id, Skill.name).filter(Skill.name.in_(missing)):
+                self._ids[name] = skill_id
+
+        ids = {name: self._ids[name] for name in names if name in self._ids}
+        if create:
+            for name in names - ids.keys():
+                # Not cached until a later lookup sees it committed
+                ids[name] = self._create_skill(db, name)
+        return ids
+
+    def _create_skill(self, db: Session, name: str) -> int:
+        try:
+            with db.begin_nested():
+                skill = Skill(name=name)
+                db.add(skill)
+            return skill.id
+        except IntegrityError:
+            # Created concurrently by another request
+            return db.query(Skill.id).filter(Skill.name == name).scalar()
+
+    def index_document(self, db: Session, parsed_doc: ParsedDocument):
+        """Replace the document's postings with the skills in its extraction."""
+        db.flush()
+        skills = normalize_skills((parsed_doc.json_extraction or {}).get("skills") or [])
+        self._set_postings(db, parsed_doc, set(self.skill_ids(db, skills, create=True).values()))
+
+    def remove_document(self, db: Session, parsed_doc: ParsedDocument):
+        self._set_postings(db, parsed_doc, set())
+
+    def _set_postings(self, db: Session, parsed_doc: ParsedDocument, skill_ids: Set[int]):
+        version = self._bump_version(db, parsed_doc.user_id)
+        current = set(db.execute(
+            select(DocumentSkill.skill_id).where(DocumentSkill.parsed_document_id == parsed_doc.id)
+        ).scalars())
+        added, removed = skill_ids - current, current - skill_ids
+
+        if removed:
+            db.execute(delete(DocumentSkill).where(
+                DocumentSkill.parsed_document_id == parsed_doc.id,
+                DocumentSkill.skill_id.in_(removed)
+            ))
+        if added:
+            db.execute(insert(DocumentSkill), [
+                {"parsed_document_id": parsed_doc.id, "skill_id": skill_id, "user_id": parsed_doc.user_id}
+                for skill_id in added
+            ])
+        if added or removed:
+            db.execute(insert(SkillPostingChange), [
+                {"user_id": parsed_doc.user_id, "version": version, "skill_id": skill_id,
+                 "parsed_document_id": parsed_doc.id, "added": skill_id in added}
+                for skill_id in added | removed
+            ])
+        db.execute(delete(SkillPostingChange).where(
+            SkillPostingChange.user_id == parsed_doc.user_id,
+            SkillPostingChange.version <= version - self.change_log_size
+        ))
+
+    def _bump_version(self, db: Session, user_id: int) -> int:
+        """Increment the user's version, holding its row lock until commit."""
+        bump = update(SkillIndexVersion).where(SkillIndexVersion.user_id == user_id).values(version=SkillIndexVersion.version + 1)
+        if not db.execute(bump).rowcount:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(SkillIndexVersion).values(user_id=user_id, version=1))
+            except IntegrityError:
+                # First write for this user raced with another one
+                db.execute(bump)
+        return self._version(db, user_id)
+
+    def _version(self, db: Session, user_id: int) -> int:
+        return db.execute(
+            select(SkillIndexVersion.version).where(SkillIndexVersion.user_id == user_id)
+        ).scalar() or 0
+
+    def _user_bitmaps(self, db: Session, user_id: int) -> UserBitmaps:
+        version = self._version(db, user_id)
+        cached = self._users.get(user_id)
+        if cached is None or version < cached.version:
+            cached = UserBitmaps(version)
+        elif version > cached.version:
+            self._catch_up(db, user_id, cached, version)
+
+        self._users[user_id] = cached
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.cache_users:
+            self._users.popitem(last=False)
+        return cached
+
+    def _catch_up(self, db: Session, user_id: int, cached: UserBitmaps, version: int):
+        oldest = db.execute(
+            select(func.min(SkillPostingChange.version)).where(SkillPostingChange.user_id == user_id)
+        ).scalar()
+        if oldest is None or oldest > cached.version + 1:
+            # Changes we haven't seen were pruned from the log
+            cached.bitmaps.clear()
+        elif cached.bitmaps:
+            changes = db.execute(
+                select(SkillPostingChange.skill_id, SkillPostingChange.parsed_document_id, SkillPostingChange.added)
+                .where(
+                    SkillPostingChange.user_id == user_id,
+                    SkillPostingChange.version > cached.version,
+                    SkillPostingChange.version <= version
+                )
+                .order_by(SkillPostingChange.version, SkillPostingChange.id)
+            )
+            for skill_id, parsed_document_id, added in changes:
+                if skill_id in cached.bitmaps:
+                    if added:
+                        cached.bitmaps[skill_id] |= 1 << parsed_document_id
+                    else:
+                        cached.bitmaps[skill_id] &= ~(1 << parsed_document_id)
+        cached.version = version
+
+    def _bitmap(self, db: Session, user_id: int, cached: UserBitmaps, skill_id: int) -> int:
+        if skill_id not in cached.bitmaps:
+            cached.bitmaps[skill_id] = to_bitmap(self._postings(db, user_id, skill_id))
+        return cached.bitmaps[skill_id]
+
+    def _postings(self, db: Session, user_id: int, skill_id: int) -> Iterable[int]:
+        scoped = (DocumentSkill.user_id == user_id, DocumentSkill.skill_id == skill_id)
+        # Long posting lists come back as one delimited string; per-row
+        # result processing would cost several times the index scan
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            joined = db.execute(select(func.group_concat(DocumentSkill.parsed_document_id)).where(*scoped)).scalar()
+        elif dialect == "postgresql":
+            joined = db.execute(select(func.string_agg(cast(DocumentSkill.parsed_document_id, String), ",")).where(*scoped)).scalar()
+        else:
+            return db.execute(select(DocumentSkill.parsed_document_id).where(*scoped)).scalars()
+        return map(int, joined.split(",")) if joined else ()
+
+    def find_documents(
+        self,
+        db: Session,
+        user_id: int,
+        all_of: Iterable[str] = (),
+        any_of: Iterable[str] = (),
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Documents with every skill in ``all_of`` and at least one in ``any_of``.
+
+        Returns ``{"total": int, "documents": [...]}``, newest first.
+        """
+        empty = {"total": 0, "documents": []}
+        required, optional = normalize_skills(all_of), normalize_skills(any_of)
+        # A skill in both lists is satisfied by the AND clause alone
+        optional -= required
+        if not required and not optional:
+            return empty
+
+        ids = self.skill_ids(db, required | optional)
+        if len(ids) < len(required):
+            return empty  # no document has a skill nobody has indexed
+        if optional and not optional.intersection(ids):
+            return empty
+
+        cached = self._user_bitmaps(db, user_id)
+        bits = None
+        for name in required:
+            skill_bits = self._bitmap(db, user_id, cached, ids[name])
+            bits = skill_bits if bits is None else bits & skill_bits
+            if not bits:
+                return empty
+        if optional:
+            any_bits = 0
+            for name in optional.intersection(ids):
+                any_bits |= self._bitmap(db, user_id, cached, ids[name])
+            bits = any_bits if bits is None else bits & any_bits
+
+        page_ids = newest_ids(bits, limit, offset)
+        rows = {}
+        if page_ids:
+            rows = {
+                row.id: row
+                for row in db.execute(
+                    select(ParsedDocument.id, ParsedDocument.file_id, File.filename, ParsedDocument.created_at)
+                    .join(File, File.id == ParsedDocument.file_id)
+                    .where(ParsedDocument.id.in_(page_ids))
+                )
+            }
+
+        return {
+            "total": popcount(bits),
+            "documents": [
+                {"parsed_document_id": row.id, "file_id": row.file_id, "filename": row.filename, "created_at": row.created_at}
+                for row in (rows[doc_id] for doc_id in page_ids if doc_id in rows)
+            ]
+        }
+
+    def rebuild(self, db: Session, batch_size: int = 1000) -> int:
+        """Re-index every parsed document. Returns the number indexed."""
+        # Start from empty posting lists so postings of deleted documents go
+        # too; clearing the log makes every worker reload its bitmaps
+        db.execute(delete(DocumentSkill))
+        db.execute(delete(SkillPostingChange))
+        db.execute(update(SkillIndexVersion).values(version=SkillIndexVersion.version + 1))
+        db.commit()
+
+        count = 0
+        last_id = 0
+        while True:
+            # Keyset pagination keeps memory flat on large tables
+            batch = db.query(ParsedDocument).filter(ParsedDocument.id > last_id).order_by(ParsedDocument.id).limit(batch_size).all()
+            if not batch:
+                return count
+            for parsed_doc in batch:
+                self.index_document(db, parsed_doc)
+            db.commit()
+            count += len(batch)
+            last_id = batch[-1].id
+            db.expunge_all()
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "skill_taxonomy.txt")
+
+# Words, keeping the symbols that belong to skill names: "C++", "C#", ".NET",
+# "Node.js", "R&D". Hyphens, slashes and spaces separate words, so
+# "scikit-learn", "scikit learn" and "Python/Django" tokenize alike.
+TOKEN = re.compile(r"\.?\w[\w+#&]*(?:\.\w[\w+#&]*)*")
+
+# Bump when the compiled layout changes, so old cache files are ignored
+CACHE_FORMAT = 2
+CACHE_MAGIC = b"applybotx-skills"
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text)
+
+def parse_taxonomy(lines: Iterable[str]) -> List[Tuple[str, List[str]]]:
+    """``(canonical name, aliases)`` per skill line: names separated by ``|``, ``#`` comments."""
+    entries = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        names = [name.strip() for name in line.split("|") if name.strip()]
+        if names:
+            entries.append((names[0], names[1:]))
+    return entries
+
+class SkillRecognizer:
+    """Finds taxonomy skills in free text in one pass, with an Aho-Corasick automaton.
+
+    Every skill name and alias is a sequence of lowercased word tokens in a
+    trie with failure links, so scanning a text costs one step per token
+    however large the taxonomy is. Overlapping matches keep the leftmost,
+    then longest ("Google Cloud Platform" rather than "Google Cloud").
+    Names written with a leading ``=`` in the taxonomy match only with that
+    exact capitalisation, since they are also everyday words ("Go").
+    """
+
+    def __init__(self, entries: List[Tuple[str, List[str]]]):
+        self.skills: List[str] = []  # canonical names, without the "=" marker
+        # Trie: children by token, failure link, pattern ending here, next node on the failure chain with one
+        self._children: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._pattern: List[int] = [-1]
+        self._next_output: List[int] = [0]
+        # Per pattern: (skill index, length in tokens, exact tokens when case matters)
+        self._patterns: List[Tuple[int, int, Optional[Tuple[str, ...]]]] = []
+        # Lowercased tokens of every name and alias -> skill index
+        self._lookup: Dict[Tuple[str, ...], int] = {}
+
+        for canonical, aliases in entries:
+            skill = len(self.skills)
+            self.skills.append(canonical.lstrip("="))
+            for name in [canonical] + aliases:
+                self._add(name, skill)
+        self._link()
+
+    def _add(self, name: str, skill: int):
+        exact = name.startswith("=")
+        tokens = tokenize(name.lstrip("="))
+        key = tuple(token.lower() for token in tokens)
+        if not key or key in self._lookup:
+            return
+        self._lookup[key] = skill
+
+        node = 0
+        for token in key:
+            child = self._children[node].get(token)
+            if child is None:
+                child = len(self._children)
+                self._children[node][token] = child
+                self._children.append({})
+                self._fail.append(0)
+                self._pattern.append(-1)
+                self._next_output.append(0)
+            node = child
+        self._pattern[node] = len(self._patterns)
+        self._patterns.append((skill, len(key), tuple(tokens) if exact else None))
+
+    def _link(self):
+        """Failure links, breadth first: the longest proper suffix of each node's path that is also in the trie."""
+        queue = deque(self._children[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._children[node].items():
+                fail = self._fail[node]
+                while fail and token not in self._children[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._children[fail].get(token, 0)
+                target = self._fail[child]
+                self._next_output[child] = target if self._pattern[target] >= 0 else self._next_output[target]
+                queue.append(child)
+
+    def canonical(self, name: str) -> Optional[str]:
+        """The canonical skill a name or alias stands for, ignoring case; None if it isn't in the taxonomy."""
+        skill = self._lookup.get(tuple(token.lower() for token in tokenize(name)))
+        return None if skill is None else self.skills[skill]
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """``(canonical name, start, end)`` of each skill mention, by character offset, in order."""
+        tokens = list(TOKEN.finditer(text))
+        candidates = []
+        node = 0
+        for index, match in enumerate(tokens):
+            token = match.group().lower()
+            while node and token not in self._children[node]:
+                node = self._fail[node]
+            node = self._children[node].get(token, 0)
+            hit = node if self._pattern[node] >= 0 else self._next_output[node]
+            while hit:
+                skill, length, exact = self._patterns[self._pattern[hit]]
+                first = index - length + 1
+                if exact is None or self._matches_exactly(text, tokens, first, exact):
+                    candidates.append((first, index, skill))
+                hit = self._next_output[hit]
+
+        mentions = []
+        covered = -1
+        for first, last, skill in sorted(candidates, key=lambda candidate: (candidate[0], -candidate[1])):
+            if first > covered:
+                mentions.append((self.skills[skill], tokens[first].start(), tokens[last].end()))
+                covered = last
+        return mentions
+
+    def _matches_exactly(self, text: str, tokens: List[re.Match], first: int, exact: Tuple[str, ...]) -> bool:
+        if tuple(match.group() for match in tokens[first:first + len(exact)]) != exact:
+            return False
+        if len(exact) == 1 and len(exact[0]) == 1:
+            # A lone letter joined to a word is something else: "C-level", "R's"
+            start, end = tokens[first].span()
+            if (start and text[start - 1] in "-'") or text[end:end + 1] in ("-", "'"):
+                return False
+        return True
+
+    def mentions(self, text: str) -> List[Dict[str, Any]]:
+        """Each skill found with its mention count and character offsets, most mentioned first."""
+        found: Dict[str, Dict[str, Any]] = {}
+        for name, start, _ in self.find(text):
+            mention = found.setdefault(name, {"name": name, "count": 0, "positions": []})
+            mention["count"] += 1
+            mention["positions"].append(start)
+        return sorted(found.values(), key=lambda mention: (-mention["count"], mention["positions"][0]))
+
+    def _state(self) -> Dict[str, Any]:
+        """The compiled automaton as plain JSON values."""
+        return {
+            "skills": self.skills,
+            "children": self._children,
+            "fail": self._fail,
+            "pattern": self._pattern,
+            "next_output": self._next_output,
+            "patterns": self._patterns,
+            "lookup": [[list(key), skill] for key, skill in self._lookup.items()],
+        }
+
+    @classmethod
+    def _from_state(cls, state: Dict[str, Any]) -> "SkillRecognizer":
+        recognizer = cls.__new__(cls)
+        recognizer.skills = state["skills"]
+        recognizer._children = state["children"]
+        recognizer._fail = state["fail"]
+        recognizer._pattern = state["pattern"]
+        recognizer._next_output = state["next_output"]
+        recognizer._patterns = [
+            (skill, length, tuple(exact) if exact is not None else None) for skill, length, exact in state["patterns"]
+        ]
+        recognizer._lookup = {tuple(key): skill for key, skill in state["lookup"]}
+        return recognizer
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = None) -> "SkillRecognizer":
+        """The recognizer for a taxonomy file, from the compiled cache when it matches the file's contents.
+
+        The cache is JSON, so a file planted in the cache directory can at
+        worst change which skills are found, never run code. Its header line
+        holds the format, the taxonomy digest and a hash of the body; a file
+        whose header doesn't match is rebuilt.
+        """
+        with open(path, "rb") as source:
+            data = source.read()
+        digest = hashlib.sha256(data + f":{CACHE_FORMAT}".encode()).hexdigest()
+        cache_path = None
+        if cache_dir:
+            cache_path = os.path.join(cache_dir, f"skills-{digest[:32]}.json")
+            try:
+                with open(cache_path, "rb") as cached:
+                    header = cached.readline().split()
+                    body = cached.read()
+                if header == [CACHE_MAGIC, str(CACHE_FORMAT).encode(), digest.encode(), hashlib.sha256(body).hexdigest().encode()]:
+                    return cls._from_state(json.loads(body))
+                logger.warning("Ignoring stale or corrupt skill automaton cache %s", cache_path)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                logger.warning("Ignoring unreadable skill automaton cache %s", cache_path, exc_info=True)
+
+        recognizer = cls(parse_taxonomy(data.decode("utf-8").splitlines()))
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                body = json.dumps(recognizer._state(), separators=(",", ":")).encode()
+                header = b" ".join([CACHE_MAGIC, str(CACHE_FORMAT).encode(), digest.encode(), hashlib.sha256(body).hexdigest().encode()])
+                # Written aside and renamed, so a concurrent reader never sees half a file
+                fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as cached:
+                    cached.write(header + b"\n" + body)
+                os.replace(temp_path, cache_path)
+            except OSError:
+                logger.warning("Could not cache the skill automaton in %s", cache_dir, exc_info=True)
+        return recognizer
+
+_recognizer: Optional[SkillRecognizer] = None
+_recognizer_lock = threading.Lock()
+
+def get_skill_recognizer() -> SkillRecognizer:
+    """Process-wide recognizer for ``skill_taxonomy_path``, loaded on first use."""
+    global _recognizer
+    if _recognizer is None:
+        with _recognizer_lock:
+            if _recognizer is None:
+                cache_dir = settings.skill_automaton_cache_dir or os.path.join(os.path.expanduser("~"), ".cache", "applybotx")
+                _recognizer = SkillRecognizer.load(settings.skill_taxonomy_path or DEFAULT_TAXONOMY_PATH, cache_dir)
+    return _recognizer
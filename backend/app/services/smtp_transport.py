@@ -0,0 +1,351 @@
+import asyncio
+import base64
+import logging
+import re
+import socket
+import ssl
+import time
+from email.policy import SMTP as SMTP_POLICY
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+from app.config import settings
+from app.models.database import OAuthAccount
+from app.services.email_sender import EmailSender, build_mime_message, spool_mime_message
+
+logger = logging.getLogger(__name__)
+
+# (sender, envelope recipients, message with CRLF line endings: bytes, or a spooled file when it has attachments)
+Envelope = Tuple[str, List[str], Union[bytes, BinaryIO]]
+
+# Buffered message data written before waiting for the socket to drain
+STREAM_DRAIN_BYTES = 64 * 1024
+
+class SMTPReplyError(Exception):
+    def __init__(self, code: int, text: str):
+        super().__init__(f"{code} {text}")
+        self.code = code
+        self.text = text
+
+def _failure(code: int, text: str) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": f"SMTP error: {code}",
+        "detail": text,
+        # 4xx replies are transient by definition
+        "retryable": 400 <= code < 500,
+        "provider": "smtp"
+    }
+
+def _connection_failure(error: Exception, retryable: bool = True) -> Dict[str, Any]:
+    return {"success": False, "error": f"SMTP sending failed: {error!r}", "retryable": retryable, "provider": "smtp"}
+
+class SMTPConnection:
+    """One authenticated SMTP session, sending with PIPELINING when offered."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: float):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.extensions = set()
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+        # Index of the message whose data was written but not yet acknowledged
+        self.in_doubt: Optional[int] = None
+
+    @classmethod
+    async def open(cls, host: str, port: int, starttls: bool, user: str, access_token: str, timeout: float = 30.0) -> "SMTPConnection":
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        connection = cls(reader, writer, timeout)
+        try:
+            code, text = await connection._reply()
+            if code != 220:
+                raise SMTPReplyError(code, text)
+            await connection._ehlo()
+            if starttls:
+                await connection._expect(await connection.command("STARTTLS"), 220)
+                await writer.start_tls(ssl.create_default_context(), server_hostname=host)
+                await connection._ehlo()
+            await connection._auth_xoauth2(user, access_token)
+        except BaseException:
+            await connection.close(quit=False)
+            raise
+        return connection
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    async def _reply(self) -> Tuple[int, str]:
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            if not line:
+                raise ConnectionError("SMTP server closed the connection")
+            line = line.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(line[4:])
+            if len(line) < 4 or line[3] != "-":
+                return int(line[:3]), "\n".join(lines)
+
+    def _write(self, *lines: str, data: bytes = b""):
+        self.writer.write(data + b"".join(line.encode() + b"\r\n" for line in lines))
+
+    async def _write_stream(self, source: BinaryIO):
+        """Write a spooled message line by line, dot-stuffed, without holding it all in memory."""
+        source.seek(0)
+        buffered = 0
+        line = b"\r\n"
+        for line in source:
+            if line.startswith(b"."):
+                line = b"." + line
+            self.writer.write(line)
+            buffered += len(line)
+            if buffered >= STREAM_DRAIN_BYTES:
+                await self.writer.drain()
+                buffered = 0
+        if not line.endswith(b"\r\n"):
+            self.writer.write(b"\r\n")
+
+    async def command(self, line: str) -> Tuple[int, str]:
+        self._write(line)
+        await self.writer.drain()
+        return await self._reply()
+
+    @staticmethod
+    async def _expect(reply: Tuple[int, str], code: int):
+        if reply[0] != code:
+            raise SMTPReplyError(*reply)
+
+    async def _ehlo(self):
+        code, text = await self.command(f"EHLO {socket.gethostname()}")
+        if code != 250:
+            raise SMTPReplyError(code, text)
+        self.extensions = {line.split()[0].lower() for line in text.splitlines()[1:] if line.strip()}
+
+    async def _auth_xoauth2(self, user: str, access_token: str):
+        credentials = base64.b64encode(f"user={user}\x01auth=Bearer {access_token}\x01\x01".encode()).decode()
+        code, text = await self.command(f"AUTH XOAUTH2 {credentials}")
+        if code == 334:
+            # The challenge carries the error details; an empty line ends the exchange
+            code, text = await self.command("")
+        if code != 235:
+            raise SMTPReplyError(code, text)
+
+    @staticmethod
+    def _envelope_lines(envelope: Envelope) -> List[str]:
+        sender, recipients, _ = envelope
+        return [f"MAIL FROM:<{sender}>"] + [f"RCPT TO:<{recipient}>" for recipient in recipients] + ["DATA"]
+
+    async def send_many(self, envelopes: List[Envelope], results: List[Optional[Dict[str, Any]]]):
+        """Send the envelopes that have no result yet, filling in ``results``.
+
+        With PIPELINING, a message's envelope commands go out together and
+        its end of data goes out with the next message's envelope, so each
+        message costs about one round trip. Raises on a broken connection,
+        leaving unsent messages without a result.
+        """
+        pipelining = "pipelining" in self.extensions
+        todo = [index for index, result in enumerate(results) if result is None]
+        if pipelining and todo:
+            self._write(*self._envelope_lines(envelopes[todo[0]]))
+            await self.writer.drain()
+
+        for position, index in enumerate(todo):
+            lines = self._envelope_lines(envelopes[index])
+            next_lines = self._envelope_lines(envelopes[todo[position + 1]]) if pipelining and position + 1 < len(todo) else []
+            if pipelining:
+                replies = [await self._reply() for _ in lines]
+            else:
+                replies = []
+                for line in lines:
+                    replies.append(await self.command(line))
+                    if replies[-1][0] >= 400 and line.startswith("MAIL"):
+                        break
+            mail_reply, data_reply = replies[0], replies[-1]
+            recipients = envelopes[index][1]
+            rejected = [recipient for recipient, reply in zip(recipients, replies[1:-1]) if reply[0] >= 300]
+
+            if len(replies) < len(lines) or data_reply[0] != 354:
+                failed = next(reply for reply in replies if reply[0] >= 400) if any(reply[0] >= 400 for reply in replies) else data_reply
+                results[index] = _failure(*failed)
+                self._write("RSET", *next_lines)
+                await self.writer.drain()
+                await self._reply()
+                continue
+
+            data = envelopes[index][2]
+            if isinstance(data, bytes):
+                if not data.endswith(b"\r\n"):
+                    data += b"\r\n"
+                # Dot-stuffing: a line starting with "." gets another one
+                self._write(".", *next_lines, data=re.sub(rb"(?m)^\.", b"..", data))
+            else:
+                await self._write_stream(data)
+                self._write(".", *next_lines)
+            await self.writer.drain()
+            self.in_doubt = index
+            code, text = await self._reply()
+            self.in_doubt = None
+            self.messages_sent += 1
+            if code != 250:
+                results[index] = _failure(code, text)
+            elif len(rejected) == len(recipients):
+                results[index] = _failure(550, "All recipients were rejected")
+            else:
+                results[index] = {"success": True, "provider": "smtp", "response": text}
+                if rejected:
+                    results[index]["rejected_recipients"] = rejected
+        self.last_used = time.monotonic()
+
+    async def close(self, quit: bool = True):
+        try:
+            if quit and not self.closed:
+                await asyncio.wait_for(self.command("QUIT"), 5)
+        except Exception:
+            pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+class SMTPTransport:
+    """Sends over SMTP with XOAUTH2 using each account's stored OAuth tokens.
+
+    Authenticated sessions are pooled per account (up to
+    ``smtp_connections_per_account``) and reused across sends, and a batch of
+    messages is pipelined over one session. A pooled session the server has
+    dropped is replaced and the unsent messages retried once; a message
+    whose data went out before the connection broke is reported retryable,
+    as it may or may not have been delivered. Failed connects back off
+    exponentially per account. Providers not in ``smtp_providers`` use the
+    REST sender.
+    """
+
+    def __init__(self, email_sender: EmailSender):
+        self.email_sender = email_sender
+        self.providers = {provider.strip() for provider in settings.smtp_providers.split(",") if provider.strip()}
+        self._idle: Dict[int, List[SMTPConnection]] = {}
+        self._slots: Dict[int, asyncio.Semaphore] = {}
+        self._failures: Dict[int, int] = {}
+        self._retry_at: Dict[int, float] = {}
+
+    def _server(self, oauth_account: OAuthAccount) -> Tuple[str, int]:
+        if oauth_account.provider == "google":
+            return settings.smtp_gmail_host, settings.smtp_gmail_port
+        return settings.smtp_outlook_host, settings.smtp_outlook_port
+
+    async def send_email(self, oauth_account: OAuthAccount, **message) -> Dict[str, Any]:
+        if oauth_account.provider not in self.providers:
+            return await self.email_sender.send_email(oauth_account=oauth_account, **message)
+        return (await self.send_batch(oauth_account, [message]))[0]
+
+    async def send_batch(self, oauth_account: OAuthAccount, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send several messages from one account over one pooled session, results in order."""
+        if oauth_account.provider not in self.providers:
+            return await self.email_sender.send_batch(oauth_account, messages)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        envelopes: List[Envelope] = []
+        try:
+            for index, message in enumerate(messages):
+                try:
+                    envelopes.append(await self._envelope(oauth_account, **message))
+                except OSError as e:
+                    # e.g. an attachment was deleted from storage; send_many skips it
+                    results[index] = _connection_failure(e, retryable=False)
+                    envelopes.append((oauth_account.email, [], b""))
+            if all(result is not None for result in results):
+                return results
+            return await self._send_envelopes(oauth_account, envelopes, results)
+        finally:
+            for envelope in envelopes:
+                if not isinstance(envelope[2], bytes):
+                    envelope[2].close()
+
+    async def _send_envelopes(self, oauth_account: OAuthAccount, envelopes: List[Envelope], results: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        slots = self._slots.setdefault(oauth_account.id, asyncio.Semaphore(settings.smtp_connections_per_account))
+        async with slots:
+            # A second attempt only when a pooled session turned out to be dead
+            for attempt in range(2):
+                try:
+                    connection, reused = await self._checkout(oauth_account)
+                except SMTPReplyError as e:
+                    return [result or _failure(e.code, e.text) for result in results]
+                except (OSError, asyncio.TimeoutError, ConnectionError) as e:
+                    return [result or _connection_failure(e) for result in results]
+                except Exception as e:
+                    # e.g. the token could not be refreshed
+                    return [result or _connection_failure(e, retryable=False) for result in results]
+
+                try:
+                    await connection.send_many(envelopes, results)
+                except (OSError, asyncio.TimeoutError, ConnectionError) as e:
+                    if connection.in_doubt is not None:
+                        results[connection.in_doubt] = _connection_failure(e)
+                    await connection.close(quit=False)
+                    if reused and attempt == 0:
+                        continue
+                    return [result or _connection_failure(e) for result in results]
+                self._checkin(oauth_account.id, connection)
+                break
+        return results
+
+    async def _envelope(
+        self,
+        oauth_account: OAuthAccount,
+        to_emails: List[str],
+        cc_emails: List[str],
+        bcc_emails: List[str],
+        subject: str,
+        html_body: str,
+        plain_body: str,
+        send_as_html: bool = True,
+        attachments: Optional[List[Dict[str, Any]]] = None
+    ) -> Envelope:
+        recipients = list(dict.fromkeys(to_emails + (cc_emails or []) + (bcc_emails or [])))
+        if attachments:
+            spool, _ = await asyncio.to_thread(
+                spool_mime_message, oauth_account.email, to_emails, cc_emails, subject,
+                html_body, plain_body, send_as_html, attachments, self.email_sender.file_storage
+            )
+            return oauth_account.email, recipients, spool
+        message = build_mime_message(oauth_account.email, to_emails, cc_emails, subject, html_body, plain_body, send_as_html)
+        return oauth_account.email, recipients, message.as_bytes(policy=SMTP_POLICY)
+
+    async def _checkout(self, oauth_account: OAuthAccount) -> Tuple[SMTPConnection, bool]:
+        idle = self._idle.get(oauth_account.id, [])
+        while idle:
+            connection = idle.pop()
+            if not connection.closed and time.monotonic() - connection.last_used < settings.smtp_idle_seconds:
+                return connection, True
+            await connection.close()
+
+        retry_at = self._retry_at.get(oauth_account.id, 0.0)
+        if time.monotonic() < retry_at:
+            raise ConnectionError(f"SMTP reconnect backing off for {retry_at - time.monotonic():.1f}s")
+
+        access_token = await self.email_sender.access_token(oauth_account)
+        host, port = self._server(oauth_account)
+        try:
+            connection = await SMTPConnection.open(
+                host, port, settings.smtp_starttls, oauth_account.email, access_token, settings.smtp_timeout_seconds
+            )
+        except (OSError, asyncio.TimeoutError, ConnectionError, SMTPReplyError) as e:
+            failures = self._failures[oauth_account.id] = self._failures.get(oauth_account.id, 0) + 1
+            delay = min(settings.smtp_backoff_base_seconds * 2 ** (failures - 1), settings.smtp_backoff_max_seconds)
+            self._retry_at[oauth_account.id] = time.monotonic() + delay
+            logger.warning("SMTP connect to %s:%s failed (%s); next attempt in %.1fs", host, port, e, delay)
+            raise
+        self._failures.pop(oauth_account.id, None)
+        self._retry_at.pop(oauth_account.id, None)
+        return connection, False
+
+    def _checkin(self, account_id: int, connection: SMTPConnection):
+        if connection.closed or connection.messages_sent >= settings.smtp_max_messages_per_connection:
+            asyncio.create_task(connection.close())
+            return
+        self._idle.setdefault(account_id, []).append(connection)
+
+    async def aclose(self):
+        connections = [connection for idle in self._idle.values() for connection in idle]
+        self._idle.clear()
+        await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
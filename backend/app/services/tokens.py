@@ -0,0 +1,85 @@
+import importlib.util
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+DEFAULT_ENCODING = "cl100k_base"
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """The model's tiktoken encoding, or None when it can't be loaded.
+
+    tiktoken downloads its BPE file on first use, which fails on offline
+    hosts; the failure is logged once and counting falls back to the
+    approximation rather than failing every request.
+    """
+    import tiktoken  # loads BPE tables, so only on first use
+    
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        logger.warning("Could not load the tiktoken encoding for %s; approximating token counts", model, exc_info=True)
+        return None
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count LLM tokens in text.
+
+    Uses the model's tiktoken encoding when it loads, otherwise a word-piece
+    approximation (short words are one token, longer ones about four characters
+    per token, punctuation one token each).
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model) if TIKTOKEN_AVAILABLE else None
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in WORD_PATTERN.findall(text))
+
+def split_sentences(text: str) -> List[str]:
+    """Split free text into sentences/lines."""
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.split(text or "") if sentence.strip()]
+
+def fit_to_budget(text: str, token_budget: int, model: str = "gpt-3.5-turbo") -> str:
+    """Trim text to whole sentences/lines that fit within the token budget."""
+    if token_budget <= 0:
+        return ""
+    if count_tokens(text, model) <= token_budget:
+        return text
+
+    kept = []
+    used_tokens = 0
+    for sentence in split_sentences(text):
+        cost = count_tokens(sentence, model)
+        if used_tokens + cost > token_budget:
+            break
+        kept.append(sentence)
+        used_tokens += cost
+
+    if kept:
+        return "\n".join(kept) if "\n" in text else " ".join(kept)
+
+    # A single oversized sentence: keep the longest word prefix that fits
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle]), model) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low == 0:
+        # No whitespace to cut on (e.g. a long URL): fall back to characters
+        return text[:token_budget * 4]
+    return " ".join(words[:low])
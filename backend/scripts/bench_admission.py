@@ -0,0 +1,142 @@
+"""Parse spikes with and without admission control.
+
+Run from backend/ (uses a scratch SQLite database unless DATABASE_URL is set):
+
+    python scripts/bench_admission.py --requests 60 --users 6 --pages 10
+
+Uploads a ``--pages`` page PDF per request, then fires every parse at once
+from ``--users`` users, while another client checks ``/health`` every 50 ms
+to show whether the worker stays responsive. Reports requests served and
+refused, latency of the served ones, the worst ``/health`` latency during
+the spike and peak traced memory (tracing slows parsing several times
+over), for three setups: parsing inline on the event loop with no limits
+(as before), in threads with no limits, and in threads behind the parse
+lane's caps and quotas.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/admission.db")
+
+import httpx
+
+from app import main
+from app.services.document_parser import DocumentParser
+
+def make_pdf(pages: int) -> bytes:
+    """A text PDF with ``pages`` pages of resume-like lines."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = b" ".join(b"(Built Go and Python services on Kubernetes, line %d of page %d) Tj T*" % (n, page) for n in range(40))
+        stream = b"BT /F1 10 Tf 14 TL 40 780 Td " + lines + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+async def login(client: httpx.AsyncClient, n: int) -> dict:
+    email = f"bench{n}@example.com"
+    await client.post("/api/v1/auth/register", json={"email": email, "password": "bench-password", "name": f"Bench {n}"})
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": "bench-password"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def spike(client: httpx.AsyncClient, uploads: list) -> dict:
+    latencies, refused, probes = [], 0, []
+    done = asyncio.Event()
+
+    async def parse(headers, file_id):
+        nonlocal refused
+        started = time.perf_counter()
+        response = await client.post(f"/api/v1/files/{file_id}/parse", headers=headers)
+        if response.status_code == 429:
+            refused += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/health")
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.05)
+
+    prober = asyncio.create_task(probe())
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    await asyncio.gather(*(parse(headers, file_id) for headers, file_id in uploads))
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - before
+    done.set()
+    await prober
+    latencies.sort()
+    return {
+        "served": len(latencies),
+        "refused": refused,
+        "p50": latencies[len(latencies) // 2] if latencies else 0,
+        "p95": latencies[int(len(latencies) * 0.95)] if latencies else 0,
+        "elapsed": elapsed,
+        "health_max": max(probes, default=0),
+        "peak_mb": peak / 1024 / 1024
+    }
+
+async def run(args):
+    pdf = make_pdf(args.pages)
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            users = [await login(client, n) for n in range(args.users)]
+            print(f"{args.requests} parses of a {args.pages}-page PDF ({len(pdf) // 1024} KB) from {args.users} users at once")
+            print(f"{'':22} {'served':>6} {'429':>5} {'p50':>7} {'p95':>7} {'total':>7} {'/health max':>11} {'peak mem':>9}")
+            parse_lane = next(lane for lane in main.admission_lanes if lane.name == "parse")
+            limits = (parse_lane.concurrency, parse_lane.user_per_minute)
+            for label in ("inline, no limits", "threads, no limits", "admission control"):
+                # The old behaviour ran extraction on the event loop, with nothing refused
+                DocumentParser.parse_document = inline_parse if label.startswith("inline") else threaded_parse
+                parse_lane.concurrency, parse_lane.user_per_minute = limits if label == "admission control" else (0, 0)
+                uploads = []
+                for n in range(args.requests):
+                    headers = users[n % args.users]
+                    response = await client.post("/api/v1/files/upload", headers=headers,
+                                                 files={"file": ("resume.pdf", pdf, "application/pdf")})
+                    uploads.append((headers, response.json()["id"]))
+                result = await spike(client, uploads)
+                print(f"{label:22} {result['served']:6d} {result['refused']:5d} {result['p50']:6.2f}s {result['p95']:6.2f}s "
+                      f"{result['elapsed']:6.2f}s {result['health_max'] * 1000:9.0f}ms {result['peak_mb']:7.1f}MB")
+
+threaded_parse = DocumentParser.parse_document
+
+async def inline_parse(self, file_path: str, content_type: str):
+    return self._parse_document(file_path, content_type)
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--users", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=10)
+    args = parser.parse_args()
+    os.chdir(tempfile.mkdtemp())  # uploads/ is created in the working directory
+    tracemalloc.start()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,117 @@
+"""Peak memory per send with attachments: streamed uploads vs. building the message in memory.
+
+Run from backend/:
+
+    python scripts/bench_attachments.py --sizes 1 5 20
+
+Starts ``stub_mail_providers.py`` in a subprocess (so only the sending side
+is measured), writes a random attachment of each size in MB, and sends it
+from a Gmail and a Microsoft account through ``EmailSender.send_email``
+under ``tracemalloc``. For comparison it also measures building the same
+request the way a JSON send does: the whole file read, MIME-encoded and
+base64-encoded again in memory. Each delivered attachment's SHA-256 is
+checked against the file.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from email.mime.application import MIMEApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.config import settings
+from app.models.database import OAuthAccount
+from app.services.email_sender import EmailSender, build_mime_message
+from app.services.encryption import encrypt_token
+
+MB = 1024 * 1024
+
+def start_stub() -> tuple:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_mail_providers.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port)])
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/stats")
+            return process, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("stub mail server did not start")
+
+def in_memory_request(path: str) -> int:
+    """What a base64-inside-JSON send holds at once; returns the body size."""
+    message = build_mime_message("me@gmail.com", ["jobs@example.com"], [], "Application", "<p>Hello</p>", "Hello")
+    with open(path, "rb") as source:
+        message.attach(MIMEApplication(source.read(), Name="resume.pdf"))
+    body = json.dumps({"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()})
+    return len(body)
+
+def measure(loop: asyncio.AbstractEventLoop, function, *args):
+    """The function's result and peak traced memory above what was allocated before the call."""
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function(*args)
+    if asyncio.iscoroutine(result):
+        result = loop.run_until_complete(result)
+    return result, tracemalloc.get_traced_memory()[1] - before
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    process, stub_url = start_stub()
+    settings.gmail_api_url = stub_url
+    settings.graph_api_url = f"{stub_url}/v1.0"
+    token = encrypt_token("stub-token")
+    accounts = [
+        OAuthAccount(id=1, provider="google", email="me@gmail.com", access_token_encrypted=token),
+        OAuthAccount(id=2, provider="microsoft", email="me@outlook.com", access_token_encrypted=token),
+    ]
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    sender = EmailSender()
+    tracemalloc.start()
+    try:
+        print(f"{'attachment':>10} {'in memory':>10} {'gmail':>10} {'graph':>10} {'delivered ok':>12}")
+        for size_mb in args.sizes:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as attachment:
+                attachment.write(os.urandom(int(size_mb * MB)))
+                attachment.flush()
+                attachment.seek(0)
+                digest = hashlib.sha256(attachment.read()).hexdigest()
+
+                _, in_memory_peak = measure(loop, in_memory_request, attachment.name)
+                peaks, ok = [], True
+                for account in accounts:
+                    result, peak = measure(loop, sender.send_email, account, ["jobs@example.com"], [], [], "Application",
+                                           "<p>Hello</p>", "Hello", True,
+                                           [{"path": attachment.name, "filename": "resume.pdf", "content_type": "application/pdf"}])
+                    delivered = httpx.get(f"{stub_url}/stats").json()["attachments"][-1]
+                    ok = ok and result["success"] and delivered["sha256"] == digest
+                    peaks.append(peak)
+                print(f"{size_mb:8.1f}MB {in_memory_peak / MB:8.1f}MB {peaks[0] / MB:8.1f}MB {peaks[1] / MB:8.1f}MB {str(ok):>12}")
+        stats = httpx.get(f"{stub_url}/stats").json()
+        print(f"largest request body the stub received: {stats['largest_request_bytes'] / MB:.1f}MB")
+    finally:
+        tracemalloc.stop()
+        loop.run_until_complete(sender.aclose())
+        process.terminate()
+
+if __name__ == "__main__":
+    main()
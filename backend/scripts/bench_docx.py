@@ -0,0 +1,140 @@
+"""DOCX text extraction: streaming iterparse vs. the python-docx object model.
+
+Run from backend/:
+
+    python scripts/bench_docx.py --files 200 --paragraphs 200 --rows 40
+    python scripts/bench_docx.py --corpus ~/resumes
+
+Extracts every .docx under ``--corpus``, or a generated corpus of ``--files``
+resumes with a header, ``--paragraphs`` to ten times as many paragraphs
+and a ``--rows`` row skills table, with ``iter_docx_text`` and, when
+python-docx is installed (``requirements-dev.txt``), with ``docx.Document``
+the way the parser used to (paragraphs only) and with table cells added.
+Reports files per second, peak traced memory for the largest file, and how
+many words each method recovered.
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.docx_text import iter_docx_text
+
+try:
+    import docx
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+NAMESPACE = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>'
+    '</Types>'
+)
+PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>'
+    '</Relationships>'
+)
+WORDS = ("built", "scaled", "Python", "Go", "Kubernetes", "services", "team", "led", "migrated", "PostgreSQL",
+         "latency", "reduced", "customers", "React", "pipelines", "designed", "AWS", "Terraform", "the", "and")
+SKILLS = ("Python", "Go", "Docker", "Kubernetes", "AWS", "Terraform", "React", "SQL", "Kafka", "Redis", "Java", "Rust")
+
+def paragraph(text: str) -> str:
+    # Split into runs, as Word does around formatting changes
+    words = text.split(" ")
+    runs = (" ".join(words[start:start + 4]) + " " for start in range(0, len(words), 4))
+    return "<w:p>" + "".join(f'<w:r><w:rPr><w:b w:val="0"/></w:rPr><w:t xml:space="preserve">{escape(run)}</w:t></w:r>' for run in runs) + "</w:p>"
+
+def write_resume(path: str, paragraphs: int, rows: int):
+    body = [paragraph("Summary"), paragraph("Engineer focused on distributed systems."), paragraph("Experience")]
+    body += [paragraph(" ".join(random.choices(WORDS, k=random.randint(12, 30)))) for _ in range(paragraphs)]
+    body.append(paragraph("Skills"))
+    body.append("<w:tbl>" + "".join(
+        "<w:tr>" + "".join(f"<w:tc>{paragraph(skill)}</w:tc>" for skill in random.sample(SKILLS, 3)) + "</w:tr>"
+        for _ in range(rows)
+    ) + "</w:tbl>")
+    document = f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {NAMESPACE}><w:body>{"".join(body)}<w:sectPr/></w:body></w:document>'
+    header = f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:hdr {NAMESPACE}>{paragraph("Jane Doe jane@example.com")}</w:hdr>'
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", PACKAGE_RELS)
+        archive.writestr("word/_rels/document.xml.rels", DOCUMENT_RELS)
+        archive.writestr("word/document.xml", document)
+        archive.writestr("word/header1.xml", header)
+
+def streaming(path: str) -> str:
+    return "\n".join(iter_docx_text(path))
+
+def python_docx_paragraphs(path: str) -> str:
+    text = ""
+    for paragraph in docx.Document(path).paragraphs:
+        text += paragraph.text + "\n"
+    return text
+
+def python_docx_with_tables(path: str) -> str:
+    document = docx.Document(path)
+    lines = [paragraph.text for paragraph in document.paragraphs]
+    lines += ["\t".join(cell.text for cell in row.cells) for table in document.tables for row in table.rows]
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of .docx files (default: generate one)")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=40)
+    args = parser.parse_args()
+
+    if args.corpus:
+        paths = sorted(glob.glob(os.path.join(os.path.expanduser(args.corpus), "**", "*.docx"), recursive=True))
+    else:
+        random.seed(7)
+        directory = tempfile.mkdtemp()
+        paths = []
+        for n in range(args.files):
+            path = os.path.join(directory, f"resume{n}.docx")
+            write_resume(path, args.paragraphs * (1 + 9 * n // max(args.files - 1, 1)), args.rows)
+            paths.append(path)
+    largest = max(paths, key=os.path.getsize)
+    print(f"{len(paths)} files, {sum(map(os.path.getsize, paths)) / 1024 / 1024:.1f} MB, largest {os.path.getsize(largest) / 1024:.0f} KB")
+
+    methods = [("iterparse", streaming)]
+    if DOCX_AVAILABLE:
+        methods += [("python-docx", python_docx_paragraphs), ("python-docx + tables", python_docx_with_tables)]
+    else:
+        print("python-docx is not installed; measuring the streaming extractor only")
+
+    print(f"{'method':22} {'files/s':>8} {'peak mem (largest)':>19} {'words':>10}")
+    for label, extract in methods:
+        started = time.perf_counter()
+        words = sum(len(extract(path).split()) for path in paths)
+        elapsed = time.perf_counter() - started
+        tracemalloc.start()
+        extract(largest)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:22} {len(paths) / elapsed:8.0f} {peak / 1024 / 1024:17.1f}MB {words:10d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Provider calls per send: one request per message vs. batched per account.
+
+Run from backend/:
+
+    python scripts/bench_email_batch.py --sends 200 --latency-ms 40
+
+Starts ``stub_mail_providers.py`` in-process, then sends ``--sends`` messages
+from one Gmail and one Microsoft account, ``--concurrency`` at a time as the
+outbox dispatcher does, through ``EmailSender.send_email`` and through
+``BatchingEmailSender``. Every tenth recipient is rejected and every
+twenty-fifth throttled by the stub, so each run also checks that per-message
+results survive batching.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.config import settings
+from app.models.database import OAuthAccount
+from app.services.email_batching import BatchingEmailSender
+from app.services.email_sender import EmailSender
+from app.services.encryption import encrypt_token
+from stub_mail_providers import start_in_thread
+
+def recipient(n: int) -> str:
+    if n % 10 == 0:
+        return f"reject{n}@example.com"
+    if n % 25 == 0:
+        return f"throttle{n}@example.com"
+    return f"jobs{n}@example.com"
+
+async def run(transport, account: OAuthAccount, sends: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(n: int):
+        async with slots:
+            return await transport.send_email(
+                account, to_emails=[recipient(n)], cc_emails=[], bcc_emails=[],
+                subject=f"Application {n}", html_body="<p>Hello</p>", plain_body="Hello"
+            )
+
+    return await asyncio.gather(*(send(n) for n in range(1, sends + 1)))
+
+async def main_async(args, stub_url: str):
+    token = encrypt_token("stub-token")
+    accounts = [
+        OAuthAccount(id=1, provider="google", email="me@gmail.com", access_token_encrypted=token),
+        OAuthAccount(id=2, provider="microsoft", email="me@outlook.com", access_token_encrypted=token),
+    ]
+    expected = [not (n % 10 == 0 or n % 25 == 0) for n in range(1, args.sends + 1)]
+
+    print(f"{args.sends} sends per account, {args.concurrency} in flight, {args.latency_ms:.0f} ms per provider request")
+    print(f"{'provider':10} {'transport':10} {'requests':>8} {'seconds':>8} {'sent':>5} {'results ok':>10}")
+    async with httpx.AsyncClient() as stats_client:
+        for account in accounts:
+            for label in ("single", "batched"):
+                sender = EmailSender()
+                transport = BatchingEmailSender(sender, settings.email_batch_window_seconds) if label == "batched" else sender
+                before = (await stats_client.get(f"{stub_url}/stats")).json()["http_requests"]
+                started = time.perf_counter()
+                results = await run(transport, account, args.sends, args.concurrency)
+                elapsed = time.perf_counter() - started
+                requests = (await stats_client.get(f"{stub_url}/stats")).json()["http_requests"] - before
+                correct = [result["success"] for result in results] == expected
+                throttled_retryable = all(
+                    result["retryable"] for n, result in enumerate(results, 1) if n % 25 == 0 and n % 10
+                )
+                print(f"{account.provider:10} {label:10} {requests:8d} {elapsed:8.2f} {sum(expected):5d} "
+                      f"{str(correct and throttled_retryable):>10}")
+                await sender.aclose()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sends", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    stub_url = start_in_thread(args.latency_ms)
+    settings.gmail_api_url = stub_url
+    settings.gmail_batch_url = f"{stub_url}/batch/gmail/v1"
+    settings.graph_api_url = f"{stub_url}/v1.0"
+    asyncio.run(main_async(args, stub_url))
+
+if __name__ == "__main__":
+    main()
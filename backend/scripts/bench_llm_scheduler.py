@@ -0,0 +1,90 @@
+"""Interactive LLM latency under bulk load, with and without the call scheduler.
+
+Run from backend/:
+
+    python scripts/bench_llm_scheduler.py --bulk 400 --interactive 40 --concurrency 8
+
+A fake provider serves ``--concurrency`` calls at a time, ``--latency``
+seconds each; calls beyond that queue at the provider, as they would
+behind its rate limit. At the start, one user submits a ``--bulk`` call
+batch and another a batch of 20; meanwhile ``--interactive`` single calls
+from other users arrive at ``--rate`` per second. Reports interactive
+latency (queueing included), when each batch finished, and the
+scheduler's own metrics: first with every call sent straight to the
+provider, then through ``LLMScheduler``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_scheduler import BULK, INTERACTIVE, LLMScheduler
+
+class FakeProvider:
+    def __init__(self, concurrency: int, latency: float):
+        self.slots = asyncio.Semaphore(concurrency)
+        self.latency = latency
+
+    async def complete(self) -> int:
+        async with self.slots:
+            await asyncio.sleep(self.latency * random.uniform(0.8, 1.2))
+        return 800
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+async def run(args, scheduler) -> dict:
+    provider = FakeProvider(args.concurrency, args.latency)
+    started = time.monotonic()
+
+    async def call(user_id, priority):
+        if scheduler is None:
+            await provider.complete()
+            return
+        async with scheduler.slot(user_id, priority, 1000) as grant:
+            grant.used_tokens = await provider.complete()
+
+    async def batch(user_id, size):
+        await asyncio.gather(*(call(user_id, BULK) for _ in range(size)))
+        return time.monotonic() - started
+
+    async def interactive(n):
+        await asyncio.sleep(n / args.rate)
+        began = time.monotonic()
+        await call(f"interactive-{n}", INTERACTIVE)
+        return time.monotonic() - began
+
+    big = asyncio.create_task(batch("bulk-large", args.bulk))
+    small = asyncio.create_task(batch("bulk-small", 20))
+    latencies = await asyncio.gather(*(interactive(n) for n in range(args.interactive)))
+    return {"latencies": latencies, "large": await big, "small": await small}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", type=int, default=400)
+    parser.add_argument("--interactive", type=int, default=40)
+    parser.add_argument("--rate", type=float, default=4.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{args.bulk} + 20 bulk calls, {args.interactive} interactive at {args.rate}/s, "
+          f"provider: {args.concurrency} at a time, {args.latency * 1000:.0f} ms each")
+    print(f"{'':12} {'interactive p50':>16} {'p95':>8} {'max':>8} {'small batch':>12} {'large batch':>12}")
+    for label in ("direct", "scheduled"):
+        scheduler = LLMScheduler(max_concurrency=args.concurrency, tokens_per_minute=0) if label == "scheduled" else None
+        result = asyncio.run(run(args, scheduler))
+        latencies = result["latencies"]
+        print(f"{label:12} {percentile(latencies, 0.5) * 1000:14.0f}ms {percentile(latencies, 0.95) * 1000:6.0f}ms "
+              f"{max(latencies) * 1000:6.0f}ms {result['small']:11.2f}s {result['large']:11.2f}s")
+        if scheduler is not None:
+            for priority, metrics in scheduler.snapshot()["classes"].items():
+                print(f"  {priority}: {metrics}")
+
+if __name__ == "__main__":
+    main()
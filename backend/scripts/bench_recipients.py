@@ -0,0 +1,89 @@
+"""Already-contacted checks: scanning send rows vs. the recipient index.
+
+Run from backend/ (uses a scratch SQLite database unless DATABASE_URL is set):
+
+    python scripts/bench_recipients.py --sends 50000
+
+Creates ``--sends`` sent emails with recipient rows for one user (dated a day
+ago, as the filter re-reads only recent rows), then times checking five
+addresses (none or one previously contacted) by deserializing every send's
+to/cc/bcc lists, as was needed before, and with
+``RecipientHistory.already_contacted``.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/recipients.db")
+
+from sqlalchemy import insert, select
+
+from app.database import SessionLocal, init_db
+from app.models.database import EmailRecipient, EmailSend
+from app.services.recipients import RecipientHistory
+
+def populate(db, count: int, batch_size: int = 5000):
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    for start in range(1, count + 1, batch_size):
+        ids = range(start, min(start + batch_size, count + 1))
+        db.execute(insert(EmailSend), [
+            {"id": n, "user_id": 1, "from_account_id": 1, "to_list": [f"jobs{n}@company{n % 5000}.com"], "cc_list": [],
+             "bcc_list": [], "subject": "Application", "html_body": "<p>...</p>", "status": "sent"}
+            for n in ids
+        ])
+        db.execute(insert(EmailRecipient), [
+            {"user_id": 1, "email_send_id": n, "address": f"jobs{n}@company{n % 5000}.com", "kind": "to", "created_at": yesterday}
+            for n in ids
+        ])
+        db.commit()
+
+def scan(db, addresses):
+    wanted = set(addresses)
+    found = set()
+    for to_list, cc_list, bcc_list in db.execute(
+        select(EmailSend.to_list, EmailSend.cc_list, EmailSend.bcc_list).where(EmailSend.user_id == 1, EmailSend.status == "sent")
+    ):
+        found.update(wanted.intersection((to_list or []) + (cc_list or []) + (bcc_list or [])))
+    return sorted(found)
+
+def timed(function, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sends", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        populate(db, args.sends)
+        history = RecipientHistory()
+        history.already_contacted(db, 1, [])  # build the filter
+
+        fresh = [f"new{n}@elsewhere.com" for n in range(5)]
+        one_hit = fresh[:4] + [f"jobs{args.sends // 2}@company{args.sends // 2 % 5000}.com"]
+        print(f"{args.sends} sends, checking 5 addresses")
+        print(f"{'method':10} {'case':8} {'mean ms':>8} {'p95 ms':>8}")
+        for case, addresses in (("new", fresh), ("1 hit", one_hit)):
+            for method, check in (("scan", lambda: scan(db, addresses)), ("index", lambda: history.already_contacted(db, 1, addresses))):
+                mean, p95 = timed(check, args.iterations if method == "index" else 5)
+                print(f"{method:10} {case:8} {mean:8.2f} {p95:8.2f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Resume ranking: re-vectorizing every document per request vs. stored vectors.
+
+Run from backend/ (uses a scratch SQLite database unless DATABASE_URL is set):
+
+    python scripts/bench_resume_rank.py --resumes 50
+
+Creates ``--resumes`` parsed documents of a few thousand characters for one
+user, then times ranking them against a job description two ways:
+
+- ``tokenize``: ``RelevanceRanker.score`` over every resume's text, which is
+  what ranking without stored vectors costs on each request
+- ``stored``: ``ResumeRanker.rank`` with the user's matrix cached (a version
+  query plus one matrix-vector product)
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/rank.db")
+
+from app.database import SessionLocal, init_db
+from app.models.database import File, ParsedDocument, User
+from app.services.relevance import RelevanceRanker
+from app.services.resume_ranker import ResumeRanker, resume_text
+
+WORDS = ("python go kubernetes react postgres distributed systems scaling latency leadership customers "
+         "platform analytics pipelines migration reliability mentoring design spark airflow terraform aws "
+         "typescript graphql kafka observability testing security compliance billing payments search").split()
+
+JOB = "Senior backend engineer: Go, Kubernetes and PostgreSQL, on-call for a distributed payments platform"
+
+def extraction() -> dict:
+    skills = random.sample(WORDS, 8)
+    experiences = [
+        {"title": "Engineer", "company": f"Company {n}", "description": " ".join(random.choices(WORDS, k=40)), "highlights": []}
+        for n in range(4)
+    ]
+    return {"skills": skills, "summary": " ".join(random.choices(WORDS, k=30)), "experiences": experiences,
+            "raw_text": " ".join(random.choices(WORDS, k=500))}
+
+def timed(function, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        user = User(email="bench@example.com")
+        db.add(user)
+        db.flush()
+
+        ranker = ResumeRanker(RelevanceRanker())
+        extractions = []
+        for n in range(args.resumes):
+            db_file = File(user_id=user.id, filename=f"resume-{n}.pdf", content_type="application/pdf", size=1, status="completed")
+            db.add(db_file)
+            db.flush()
+            parsed_doc = ParsedDocument(file_id=db_file.id, user_id=user.id, json_extraction=extraction())
+            ranker.vectorize(parsed_doc)
+            db.add(parsed_doc)
+            extractions.append(parsed_doc.json_extraction)
+        db.commit()
+
+        texts = [resume_text(data) for data in extractions]
+        tokenize = timed(lambda: ranker.job_vectors.score(JOB, texts), args.iterations)
+        ranker.rank(db, user.id, JOB)  # build the cached matrix
+        stored = timed(lambda: ranker.rank(db, user.id, JOB), args.iterations)
+
+        print(f"{args.resumes} resumes, {sum(map(len, texts)) // len(texts)} characters each on average")
+        print(f"{'method':10} {'mean ms':>8} {'p95 ms':>8}")
+        print(f"{'tokenize':10} {tokenize[0]:8.2f} {tokenize[1]:8.2f}")
+        print(f"{'stored':10} {stored[0]:8.2f} {stored[1]:8.2f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
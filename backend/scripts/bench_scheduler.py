@@ -0,0 +1,141 @@
+"""Scheduled-send loading and release, with and without per-account limits.
+
+Run from backend/ (uses a scratch SQLite database unless DATABASE_URL is set):
+
+    python scripts/bench_scheduler.py --scheduled 200000 --due 2000 --accounts 50
+
+Stores ``--scheduled`` sends spread over the next 30 days and ``--due``
+sends due now, across ``--accounts`` accounts. Times loading the
+scheduler's lookahead window from the ``(status, send_at)`` index against
+reading every scheduled row and filtering, as a polling loop would, then
+runs ``SendScheduler`` until the due sends are released: once with no
+account limits, once with ``--minute-limit`` per account per minute, where
+the rest must be held back for later.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/scheduler.db")
+
+from sqlalchemy import func, insert, select, text, update
+
+from app.config import settings
+from app.database import SessionLocal, engine, init_db
+from app.models.database import EmailOutbox, EmailSend, OAuthAccount, User
+from app.services.events import EventBroker
+from app.services.scheduler import SendScheduler
+
+class FakeOutbox:
+    def __init__(self):
+        self.notified = 0
+
+    def notify(self):
+        self.notified += 1
+
+def populate(db, scheduled: int, due: int, accounts: int, batch_size: int = 5000):
+    user = User(email="bench@example.com")
+    db.add(user)
+    db.flush()
+    account_ids = []
+    for n in range(accounts):
+        account = OAuthAccount(user_id=user.id, provider="google", provider_user_id=f"bench{n}", email=f"bench{n}@example.com")
+        db.add(account)
+        db.flush()
+        account_ids.append(account.id)
+    db.commit()
+
+    now = datetime.utcnow()
+    rows = [now - timedelta(seconds=random.uniform(0, 60)) for _ in range(due)]
+    rows += [now + timedelta(seconds=random.uniform(600, 30 * 86400)) for _ in range(scheduled)]
+    for start in range(0, len(rows), batch_size):
+        ids = range(start + 1, min(start + batch_size, len(rows)) + 1)
+        db.execute(insert(EmailSend), [
+            {"id": n, "user_id": user.id, "from_account_id": account_ids[n % accounts], "to_list": [f"jobs{n}@company.com"],
+             "cc_list": [], "bcc_list": [], "subject": f"send-{n}", "html_body": "<p>...</p>", "status": "scheduled",
+             "send_at": rows[n - 1]}
+            for n in ids
+        ])
+        db.execute(insert(EmailOutbox), [{"email_send_id": n, "payload": {}, "attempts": 0, "available_at": None} for n in ids])
+    db.commit()
+
+def reset(db):
+    db.execute(update(EmailSend).where(EmailSend.status == "queued").values(status="scheduled"))
+    db.execute(update(EmailOutbox).values(available_at=None))
+    db.commit()
+
+async def release_all(due: int) -> tuple:
+    """Run a scheduler until it has nothing due; seconds taken, sends released, sends held back."""
+    outbox = FakeOutbox()
+    scheduler = SendScheduler(outbox, EventBroker())
+    started = time.perf_counter()
+    scheduler.start()
+    db = SessionLocal()
+    try:
+        while True:
+            await asyncio.sleep(0.02)
+            released = db.scalar(select(func.count()).select_from(EmailSend).where(EmailSend.status == "queued"))
+            held = sum(1 for due_at, _, _ in scheduler._heap if due_at > datetime.utcnow())
+            if released + held >= due:
+                break
+        return time.perf_counter() - started, released, held
+    finally:
+        db.close()
+        await scheduler.stop()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scheduled", type=int, default=200000)
+    parser.add_argument("--due", type=int, default=2000)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--minute-limit", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    populate(db, args.scheduled, args.due, args.accounts)
+
+    now = datetime.utcnow()
+    until = now + timedelta(seconds=settings.scheduler_lookahead_seconds)
+    scheduler = SendScheduler(FakeOutbox(), EventBroker())
+    started = time.perf_counter()
+    window = scheduler._load(until, settings.scheduler_max_loaded)
+    indexed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    polled = [row for row in db.execute(
+        select(EmailSend.id, EmailSend.send_at, EmailSend.from_account_id).where(EmailSend.status == "scheduled")
+    ) if row.send_at < until]
+    scan = time.perf_counter() - started
+    with engine.connect() as connection:
+        plan = connection.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM email_sends WHERE status = 'scheduled' AND send_at < :until ORDER BY send_at, id"
+        ), {"until": until}).all()
+
+    print(f"{args.scheduled + args.due} scheduled sends, {args.due} due now, {args.accounts} accounts")
+    print(f"lookahead window ({settings.scheduler_lookahead_seconds:.0f}s): {len(window)} rows in {indexed * 1000:.1f} ms from the index "
+          f"vs {scan * 1000:.1f} ms reading all {args.scheduled + args.due} and filtering ({len(polled)} rows)")
+    print(f"query plan: {plan[-1][-1]}")
+
+    settings.email_account_minute_limit = 0
+    settings.email_account_daily_limit = 0
+    elapsed, released, held = asyncio.run(release_all(args.due))
+    print(f"no limits: {released} released in {elapsed:.2f}s ({released / elapsed:.0f}/s), {held} held")
+
+    reset(db)
+    settings.email_account_minute_limit = args.minute_limit
+    elapsed, released, held = asyncio.run(release_all(args.due))
+    expected = min(args.due, args.accounts * args.minute_limit)
+    print(f"{args.minute_limit}/min per account: {released} released in {elapsed:.2f}s (expected {expected}), "
+          f"{held} held for the next minute")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Full-text search latency over a large draft/email history.
+
+Run from backend/ (uses a scratch SQLite database unless DATABASE_URL is set):
+
+    python scripts/bench_search.py --records 20000 --other-users 4 [--optimize]
+
+Inserts ``--records`` drafts and sent emails for one user, the same number
+spread over other users, through the ORM so the index is maintained by the
+same mapper events as in the app, then times ranked first-page queries.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/search.db")
+
+from app.database import SessionLocal, init_db
+from app.models.database import AIDraft, EmailSend
+from app.services.search import get_search_index
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Cyberdyne"]
+ROLES = ["Backend Engineer", "Data Scientist", "Product Manager", "SRE", "Frontend Developer", "ML Engineer"]
+WORDS = ("python go kubernetes react postgres distributed systems scaling latency team leadership "
+         "customers platform analytics pipelines migration reliability mentoring design").split()
+
+QUERIES = ["acme", "kubernetes", "backend engineer", "data scien", "hooli platform migration", "recruiter@globex.com"]
+
+def body() -> str:
+    return " ".join(random.choices(WORDS, k=120))
+
+def populate(user_id: int, count: int, batch_size: int = 2000):
+    db = SessionLocal()
+    try:
+        for start in range(0, count, batch_size):
+            rows = []
+            for _ in range(min(batch_size, count - start)):
+                company, role = random.choice(COMPANIES), random.choice(ROLES)
+                if random.random() < 0.5:
+                    rows.append(AIDraft(
+                        user_id=user_id,
+                        inputs_json={"company_name": company, "role": role},
+                        subject=f"Application for {role} - {company}",
+                        html_body="<p>...</p>",
+                        plain_body=body()
+                    ))
+                else:
+                    rows.append(EmailSend(
+                        user_id=user_id,
+                        from_account_id=1,
+                        to_list=[f"recruiter@{company.split()[0].lower()}.com"],
+                        subject=f"Application for {role} at {company}",
+                        html_body=f"<p>{body()}</p>",
+                        status="sent"
+                    ))
+            db.add_all(rows)
+            db.commit()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20000, help="records for the measured user")
+    parser.add_argument("--other-users", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--optimize", action="store_true", help="merge index segments before querying")
+    args = parser.parse_args()
+
+    init_db()
+
+    started = time.perf_counter()
+    populate(1, args.records)
+    for user_id in range(2, args.other_users + 2):
+        populate(user_id, args.records // max(1, args.other_users))
+    elapsed = time.perf_counter() - started
+    total = args.records * 2
+    print(f"Indexed ~{total} records in {elapsed:.1f}s ({elapsed / total * 1e6:.0f} us per insert incl. ORM)")
+
+    db = SessionLocal()
+    try:
+        index = get_search_index(db.get_bind())
+        connection = db.connection()
+        if args.optimize:
+            index.optimize(connection)
+            db.commit()
+            connection = db.connection()
+        print(f"\n{'query':28} {'matches':>8} {'mean ms':>8} {'p95 ms':>8}")
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                found = index.search(connection, 1, query, limit=20)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            print(f"{query:28} {found['total']:8d} {statistics.mean(samples):8.2f} {samples[int(len(samples) * 0.95) - 1]:8.2f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
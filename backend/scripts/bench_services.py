@@ -0,0 +1,127 @@
+"""Per-request service construction vs. the app-scoped service container.
+
+Run from backend/ (optionally with scripts/fake_llm_server.py running so the
+generate route exercises a real HTTP round-trip):
+
+    python scripts/bench_services.py --iterations 200
+
+Part 1 measures what each route used to build on every request
+(AIEmailGenerator + OpenAI client, EmailSender + OAuth helpers + HTTP pool,
+DocumentParser) against a container lookup: wall time and bytes allocated.
+
+Part 2 drives the generate and parse routes through TestClient twice: once with
+the container's shared services, once with dependency overrides that build
+fresh services per request as before.
+"""
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("OPENAI_BASE_URL", "http://127.0.0.1:9100/v1")
+os.environ.setdefault("LLM_MAX_RETRIES", "0")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.ai_generator import AIEmailGenerator
+from app.services.container import get_ai_generator, get_document_parser
+from app.services.document_parser import DocumentParser
+from app.services.email_sender import EmailSender
+from app.services.llm_backends import build_backend_registry
+from app.services.model_router import ModelRouter
+
+PROFILE = {
+    "contact": {"name": "Jane Doe", "email": "jane@example.com"},
+    "skills": ["Python", "Go", "Kubernetes", "PostgreSQL", "React"],
+    "experiences": [{"title": "Backend Engineer", "company": "Acme", "description": "Built Go services", "highlights": []}],
+    "education": [],
+    "summary": "Backend engineer focused on distributed systems.",
+    "raw_text": "Jane Doe"
+}
+
+RESUME = b"Jane Doe\njane@example.com\n\nSkills\nPython, Go, Kubernetes\n\nExperience\nBackend Engineer 2020 - 2024\nAcme\n"
+
+def per_request_factories():
+    return {
+        "ai (AIEmailGenerator + client)": lambda: AIEmailGenerator(ModelRouter(build_backend_registry())),
+        "email (EmailSender + OAuth + pool)": EmailSender,
+        "files (DocumentParser)": DocumentParser,
+    }
+
+def measure_construction(factory, iterations):
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    keep = [factory() for _ in range(iterations)]
+    elapsed = time.perf_counter() - started
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return elapsed / iterations * 1e6, (after - before) / iterations
+
+def time_requests(send, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        send()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print("Service setup per request")
+    print(f"{'route':38} {'old us':>10} {'old KiB':>10} {'new us':>8} {'new KiB':>8}")
+    for name, factory in per_request_factories().items():
+        old_us, old_bytes = measure_construction(factory, args.iterations)
+        print(f"{name:38} {old_us:10.1f} {old_bytes / 1024:10.1f} {0.0:8.1f} {0.0:8.1f}")
+
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/register", json={"email": "bench@example.com", "password": "bench"})
+        token = client.post("/api/v1/auth/login", data={"username": "bench@example.com", "password": "bench"}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        def generate():
+            client.post("/api/v1/ai/generate-email", json={
+                "extracted_data": PROFILE,
+                "job_description": "Go and Kubernetes backend engineer",
+                "company_name": "Acme",
+                "role": "Backend Engineer"
+            })
+
+        def parse():
+            file_id = client.post("/api/v1/files/upload", files={"file": ("resume.txt", RESUME, "text/plain")}).json()["id"]
+            client.post(f"/api/v1/files/{file_id}/parse")
+
+        routes = {"POST /ai/generate-email": (generate, get_ai_generator, per_request_factories()["ai (AIEmailGenerator + client)"]),
+                  "POST /files/upload + parse": (parse, get_document_parser, DocumentParser)}
+
+        print("\nRoute latency (ms)")
+        print(f"{'route':30} {'mode':10} {'mean':>8} {'p95':>8}")
+        for name, (send, dependency, factory) in routes.items():
+            send()  # warm up
+            mean, p95 = time_requests(send, args.iterations)
+            print(f"{name:30} {'shared':10} {mean:8.2f} {p95:8.2f}")
+
+            app.dependency_overrides[dependency] = factory
+            try:
+                mean, p95 = time_requests(send, args.iterations)
+            finally:
+                app.dependency_overrides.pop(dependency)
+            print(f"{name:30} {'per-req':10} {mean:8.2f} {p95:8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Skill recognition: the Aho-Corasick taxonomy automaton vs. the skills-section split it replaced.
+
+Run from backend/:
+
+    python scripts/bench_skill_recognizer.py --skills 50000 --resumes 500
+
+Builds a taxonomy of the bundled skills plus ``--skills`` generated ones
+(each with an alias), and ``--resumes`` resumes that list a few skills in a
+skills section and mention more, by name or alias, in experience bullets.
+Reports compile time, load time from the on-disk cache, scan throughput,
+and how many of the skills each resume really has were found (recall) and
+how many findings were real (precision), for the automaton and for the old
+section split (with its findings canonicalized the same way). For scale,
+it also times matching one precompiled regex per taxonomy entry on a few
+resumes.
+"""
+import argparse
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.document_parser import DocumentParser
+from app.services.skill_recognizer import DEFAULT_TAXONOMY_PATH, SkillRecognizer, parse_taxonomy
+
+SYLLABLES = ["ka", "zu", "vo", "rin", "tex", "quo", "lam", "dex", "pho", "gri", "nul", "sar", "ven", "myx", "oba", "tir"]
+FILLER = ("built", "designed", "led", "a", "team", "of", "engineers", "to", "deliver", "the", "platform", "for",
+          "customers", "across", "regions", "improving", "reliability", "and", "cutting", "costs", "using", "with")
+
+def word() -> str:
+    return "".join(random.choices(SYLLABLES, k=random.randint(2, 4)))
+
+def build_taxonomy(path: str, extra: int) -> list:
+    with open(DEFAULT_TAXONOMY_PATH) as bundled:
+        lines = bundled.read().splitlines()
+    seen = set()
+    added = 0
+    while added < extra:
+        name = " ".join(word().capitalize() for _ in range(random.randint(1, 3)))
+        alias = name.replace(" ", "").lower() + "x"
+        if name.lower() not in seen and alias not in seen:
+            seen.update((name.lower(), alias))
+            lines.append(f"{name}|{alias}")
+            added += 1
+    with open(path, "w") as taxonomy:
+        taxonomy.write("\n".join(lines) + "\n")
+    # Skills with every spelling that may appear in a resume (case-sensitive names as written)
+    return [(canonical.lstrip("="), [canonical.lstrip("=")] + [alias.lstrip("=") for alias in aliases])
+            for canonical, aliases in parse_taxonomy(lines)]
+
+def build_resume(skills: list) -> tuple:
+    picked = random.sample(skills, random.randint(8, 20))
+    listed, mentioned = picked[:4], picked[4:]
+    lines = ["Jane Doe", "jane@example.com", "Skills", ", ".join(random.choice(names) for _, names in listed), "Experience"]
+    for _, names in mentioned:
+        filler = random.choices(FILLER, k=random.randint(8, 20))
+        filler.insert(random.randint(0, len(filler)), random.choice(names))
+        sentence = " ".join(filler)
+        lines.append("- " + sentence[0].upper() + sentence[1:] + ".")
+    lines += ["Education", "BSc Computer Science, State University 2015"]
+    return "\n".join(lines), {canonical for canonical, _ in picked}
+
+def old_section_skills(parser: DocumentParser, text: str) -> list:
+    """The previous extractor: split the skills section on its first separator, at most 20."""
+    text = " ".join(parser._identify_sections(text.split("\n")).get("skills", []))
+    for separator in [",", "•", "·", "|", ";", "\n"]:
+        if separator in text:
+            candidates = text.split(separator)
+            break
+    else:
+        candidates = text.split()
+    skills = []
+    for skill in candidates:
+        skill = skill.strip()
+        if skill and 1 < len(skill) < 30:
+            skill = re.sub(r"^(proficient in|experience with|knowledge of)\s*", "", skill, flags=re.IGNORECASE).strip(".,;:")
+            if skill:
+                skills.append(skill)
+    return skills[:20]
+
+def score(found: list, truth: list) -> tuple:
+    hits = sum(len(set(f) & t) for f, t in zip(found, truth))
+    return hits / max(sum(map(len, truth)), 1), hits / max(sum(len(set(f)) for f in found), 1)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skills", type=int, default=50000)
+    parser.add_argument("--resumes", type=int, default=500)
+    args = parser.parse_args()
+    random.seed(11)
+
+    directory = tempfile.mkdtemp()
+    try:
+        taxonomy_path = os.path.join(directory, "taxonomy.txt")
+        skills = build_taxonomy(taxonomy_path, args.skills)
+        cache_dir = os.path.join(directory, "cache")
+
+        started = time.perf_counter()
+        recognizer = SkillRecognizer.load(taxonomy_path, cache_dir)
+        compiled = time.perf_counter() - started
+        started = time.perf_counter()
+        SkillRecognizer.load(taxonomy_path, cache_dir)
+        cached = time.perf_counter() - started
+        cache_size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+        print(f"taxonomy: {len(skills)} skills, {sum(len(names) for _, names in skills)} names; "
+              f"{len(recognizer._children)} automaton nodes")
+        print(f"compile {compiled * 1000:.0f} ms, load from cache {cached * 1000:.0f} ms ({cache_size / 1024 / 1024:.1f} MB)")
+
+        resumes = [build_resume(skills) for _ in range(args.resumes)]
+        texts, truth = [text for text, _ in resumes], [skills_in for _, skills_in in resumes]
+        size = sum(map(len, texts))
+
+        started = time.perf_counter()
+        found = [[mention["name"] for mention in recognizer.mentions(text)] for text in texts]
+        elapsed = time.perf_counter() - started
+        recall, precision = score(found, truth)
+        print(f"{'':22} {'resumes/s':>10} {'MB/s':>6} {'recall':>7} {'precision':>9}")
+        print(f"{'automaton':22} {len(texts) / elapsed:10.0f} {size / elapsed / 1024 / 1024:6.1f} {recall:7.1%} {precision:9.1%}")
+
+        document_parser = DocumentParser()
+        started = time.perf_counter()
+        old = [[recognizer.canonical(skill) or skill for skill in old_section_skills(document_parser, text)] for text in texts]
+        elapsed = time.perf_counter() - started
+        recall, precision = score(old, truth)
+        print(f"{'skills-section split':22} {len(texts) / elapsed:10.0f} {size / elapsed / 1024 / 1024:6.1f} {recall:7.1%} {precision:9.1%}")
+
+        patterns = [re.compile(r"(?<!\w)" + re.escape(name) + r"(?!\w)", re.IGNORECASE) for _, names in skills for name in names]
+        sample = texts[:5]
+        started = time.perf_counter()
+        for text in sample:
+            [pattern.search(text) for pattern in patterns]
+        elapsed = time.perf_counter() - started
+        print(f"{'regex per name':22} {len(sample) / elapsed:10.1f} {sum(map(len, sample)) / elapsed / 1024 / 1024:6.2f}"
+              f"  ({len(patterns)} patterns, {len(sample)} resumes)")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
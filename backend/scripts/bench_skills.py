@@ -0,0 +1,108 @@
+"""Skill query latency over a large set of parsed resumes.
+
+Run from backend/ (uses a scratch SQLite database unless DATABASE_URL is set):
+
+    python scripts/bench_skills.py --documents 100000
+
+Bulk-loads ``--documents`` parsed documents for one user (plus a tenth as
+many for another user) with 5-20 skills each drawn from a skewed
+distribution, so common skills have long posting lists, then times AND/OR
+queries through ``SkillIndex.find_documents``.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/skills.db")
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal, init_db
+from app.models.database import DocumentSkill, File, ParsedDocument, Skill
+from app.services.skill_index import SkillIndex
+
+COMMON = ["python", "sql", "git", "javascript", "aws", "docker", "linux", "java", "react", "kubernetes",
+          "go", "postgresql", "typescript", "terraform", "node.js", "c++", "spark", "kafka", "redis", "graphql"]
+SKILLS = COMMON + [f"skill-{n}" for n in range(2000)]
+# Zipf-like weights: "python" is in roughly a third of the documents
+WEIGHTS = [1 / (rank + 1) ** 0.9 for rank in range(len(SKILLS))]
+
+QUERIES = [
+    ("AND common", ["python", "sql"], []),
+    ("AND rare+common", ["skill-150", "python"], []),
+    ("AND x3", ["kubernetes", "go", "docker"], []),
+    ("OR", [], ["go", "rust", "kubernetes"]),
+    ("AND + OR", ["python"], ["aws", "google cloud", "azure"]),
+    ("single", ["terraform"], []),
+]
+
+def populate(db, user_id: int, count: int, first_id: int, batch_size: int = 5000):
+    for start in range(0, count, batch_size):
+        ids = range(first_id + start, first_id + min(start + batch_size, count))
+        files, docs, postings = [], [], []
+        for doc_id in ids:
+            skills = set(random.choices(range(len(SKILLS)), weights=WEIGHTS, k=random.randint(5, 20)))
+            files.append({"id": doc_id, "user_id": user_id, "filename": f"resume-{doc_id}.pdf", "content_type": "application/pdf", "size": 1, "status": "completed"})
+            docs.append({"id": doc_id, "file_id": doc_id, "user_id": user_id, "json_extraction": {"skills": [SKILLS[s] for s in skills]}})
+            postings.extend({"parsed_document_id": doc_id, "skill_id": s + 1, "user_id": user_id} for s in skills)
+        db.execute(insert(File), files)
+        db.execute(insert(ParsedDocument), docs)
+        db.execute(insert(DocumentSkill), postings)
+        db.commit()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        db.execute(insert(Skill), [{"id": n + 1, "name": name} for n, name in enumerate(SKILLS)])
+        populate(db, 1, args.documents, 1)
+        populate(db, 2, args.documents // 10, args.documents + 1)
+        print(f"Loaded {args.documents + args.documents // 10} documents in {time.perf_counter() - started:.1f}s")
+
+        # cold: bitmaps loaded from the posting table, as after a write
+        print(f"\n{'query':18} {'matches':>8} {'cold ms':>8} {'mean ms':>8} {'p95 ms':>8}")
+        for label, all_of, any_of in QUERIES:
+            index = SkillIndex()
+            samples = []
+            for _ in range(args.iterations + 1):
+                started = time.perf_counter()
+                found = index.find_documents(db, 1, all_of, any_of, limit=20)
+                samples.append((time.perf_counter() - started) * 1000)
+            cold, warm = samples[0], sorted(samples[1:])
+            print(f"{label:18} {found['total']:8d} {cold:8.2f} {statistics.mean(warm):8.2f} {warm[int(len(warm) * 0.95) - 1]:8.2f}")
+
+        # A resume is parsed between queries: the next query replays the change log
+        label, all_of, any_of = QUERIES[0]
+        writes, samples = [], []
+        for n in range(args.iterations):
+            started = time.perf_counter()
+            db_file = File(user_id=1, filename=f"new-{n}.pdf", content_type="application/pdf", size=1, status="completed")
+            db.add(db_file)
+            db.flush()
+            parsed_doc = ParsedDocument(file_id=db_file.id, user_id=1, json_extraction={"skills": random.sample(COMMON, 10)})
+            db.add(parsed_doc)
+            index.index_document(db, parsed_doc)
+            db.commit()
+            writes.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            index.find_documents(db, 1, all_of, any_of, limit=20)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"\nindex_document + commit: {statistics.mean(writes):.2f} ms; next '{label}' query: {statistics.mean(samples):.2f} ms")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
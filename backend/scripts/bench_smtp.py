@@ -0,0 +1,123 @@
+"""Send throughput: Gmail REST calls vs. pooled, pipelined SMTP sessions.
+
+Run from backend/ (needs ``pip install aiosmtpd``):
+
+    python scripts/bench_smtp.py --sends 500
+
+Starts ``stub_mail_providers.py`` and a local ``aiosmtpd`` server that
+accepts XOAUTH2 and advertises PIPELINING, both in-process, then sends
+``--sends`` messages from one Gmail account, ``--concurrency`` at a time as
+the outbox dispatcher does, through each transport, one message per call and
+batched per account. Also reports how many SMTP sessions were opened, and
+checks that a send after the server dropped every pooled session still
+succeeds.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from app.config import settings
+from app.models.database import OAuthAccount
+from app.services.email_batching import BatchingEmailSender
+from app.services.email_sender import EmailSender
+from app.services.encryption import encrypt_token
+from app.services.smtp_transport import SMTPTransport
+from stub_mail_providers import start_in_thread
+
+class Handler:
+    def __init__(self):
+        self.sessions = 0
+        self.messages = 0
+
+    async def auth_XOAUTH2(self, server, args):
+        return AuthResult(success=len(args) == 2, handled=False, auth_data=args[1] if len(args) == 2 else None)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses[:-1] + ["250-PIPELINING", responses[-1]]
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 2.0.0 OK"
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+async def run(transport, account: OAuthAccount, sends: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(n: int):
+        async with slots:
+            return await transport.send_email(
+                account, to_emails=[f"jobs{n}@example.com"], cc_emails=[], bcc_emails=[f"me+{n}@gmail.com"],
+                subject=f"Application {n}", html_body="<p>Hello</p>\n" * 50, plain_body="Hello\n" * 50
+            )
+
+    return await asyncio.gather(*(send(n) for n in range(1, sends + 1)))
+
+def start_server(handler: Handler, port: int) -> Controller:
+    controller = Controller(handler, hostname="127.0.0.1", port=port, auth_require_tls=False)
+    controller.start()
+    return controller
+
+async def main_async(args, handler: Handler, servers: list):
+    account = OAuthAccount(id=1, provider="google", email="me@gmail.com", access_token_encrypted=encrypt_token("stub-token"))
+    print(f"{args.sends} sends, {args.concurrency} in flight, {settings.smtp_connections_per_account} SMTP sessions per account")
+    print(f"{'transport':16} {'msgs/s':>8} {'sent':>6} {'sessions':>8}")
+    for label in ("rest", "rest batched", "smtp", "smtp pipelined"):
+        sender = EmailSender()
+        transport = SMTPTransport(sender) if label.startswith("smtp") else sender
+        if label.endswith(("batched", "pipelined")):
+            transport = BatchingEmailSender(transport, settings.email_batch_window_seconds)
+        sessions = handler.sessions
+        started = time.perf_counter()
+        results = await run(transport, account, args.sends, args.concurrency)
+        elapsed = time.perf_counter() - started
+        sent = sum(result["success"] for result in results)
+        print(f"{label:16} {args.sends / elapsed:8.0f} {sent:6d} {handler.sessions - sessions if label.startswith('smtp') else '-':>8}")
+
+        if label == "smtp pipelined":
+            # The server restarts, dropping pooled sessions: the next send reconnects
+            servers[-1].stop()
+            servers.append(start_server(handler, settings.smtp_gmail_port))
+            result = (await run(transport, account, 1, 1))[0]
+            print(f"after the server dropped its sessions: success={result['success']}")
+        if transport is not sender:
+            await transport.aclose()
+        await sender.aclose()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sends", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    # aiosmtpd logs a deprecation notice on every login
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+    handler = Handler()
+    port = free_port()
+    servers = [start_server(handler, port)]
+    stub_url = start_in_thread()
+    settings.gmail_api_url = stub_url
+    settings.gmail_batch_url = f"{stub_url}/batch/gmail/v1"
+    settings.smtp_gmail_host, settings.smtp_gmail_port = "127.0.0.1", port
+    settings.smtp_starttls = False
+    try:
+        asyncio.run(main_async(args, handler, servers))
+    finally:
+        servers[-1].stop()
+
+if __name__ == "__main__":
+    main()
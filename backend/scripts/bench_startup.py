@@ -0,0 +1,89 @@
+"""Cold-start cost of the API: import time and time until /health answers.
+
+Run from backend/:
+
+    python scripts/bench_startup.py --runs 5
+
+Each run starts a fresh interpreter. ``import`` is the wall time of
+``import app.main``; ``ready`` is the time from launching uvicorn until the
+first successful ``GET /health``. The slowest modules from ``-X importtime``
+are listed for the last run.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def bench_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/startup.db")
+    return env
+
+def measure_import(env: dict):
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            modules.append((int(parts[1]), parts[2].strip()))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+def measure_ready(env: dict, timeout: float = 30.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not become ready")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args()
+
+    env = bench_env()
+    imports, readies, modules = [], [], []
+    for _ in range(args.runs):
+        elapsed, modules = measure_import(env)
+        imports.append(elapsed)
+        readies.append(measure_ready(env))
+
+    print(f"{'metric':10} {'median s':>10} {'min s':>10}")
+    print(f"{'import':10} {statistics.median(imports):10.3f} {min(imports):10.3f}")
+    print(f"{'ready':10} {statistics.median(readies):10.3f} {min(readies):10.3f}")
+
+    print("\nSlowest imports (cumulative ms)")
+    for cumulative, name in sorted(modules, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:10.1f}  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Throughput of the dev launch mode vs. the production launcher.
+
+Run from backend/:
+
+    python scripts/bench_throughput.py --concurrency 64 --duration 10
+
+Starts the API twice on a scratch SQLite database:
+
+- ``dev``: what ``python -m app.main`` runs, one uvicorn process with --reload
+- ``server``: ``python -m app.server`` (gunicorn + uvicorn workers when
+  available, uvloop/httptools, one worker per core)
+
+and drives ``GET /health`` and ``POST /ai/generate-email`` (template path,
+no LLM configured) with a fixed number of concurrent clients.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "dev": lambda port: [sys.executable, "-m", "uvicorn", "app.main:app", "--reload", "--port", str(port)],
+    "server": lambda port: [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port)],
+}
+
+GENERATE = {
+    "extracted_data": {
+        "contact": {"name": "Jane Doe", "email": "jane@example.com"},
+        "skills": ["Python", "Go", "Kubernetes", "PostgreSQL"],
+        "experiences": [{"title": "Backend Engineer", "company": "Acme", "description": "Built Go services", "highlights": []}],
+        "education": [],
+        "summary": "Backend engineer focused on distributed systems.",
+        "raw_text": "Jane Doe"
+    },
+    "job_description": "Go and Kubernetes backend engineer",
+    "company_name": "Acme",
+    "role": "Backend Engineer"
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start(mode: str, port: int, env: dict) -> subprocess.Popen:
+    # Own process group so reloader/worker children are stopped with it
+    return subprocess.Popen(
+        MODES[mode](port), cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+
+def stop(process: subprocess.Popen):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"{base_url} did not become ready")
+
+async def login(client: httpx.AsyncClient) -> str:
+    await client.post("/api/v1/auth/register", json={"email": "bench@example.com", "password": "bench"})
+    response = await client.post("/api/v1/auth/login", data={"username": "bench@example.com", "password": "bench"})
+    return response.json()["access_token"]
+
+async def load(client: httpx.AsyncClient, send, concurrency: int, duration: float):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await send(client)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "mean": statistics.mean(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "errors": errors
+    }
+
+async def bench_mode(mode: str, args, env: dict):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = start(mode, port, env)
+    try:
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            client.headers["Authorization"] = f"Bearer {await login(client)}"
+            routes = {
+                "GET /health": lambda c: c.get("/health"),
+                "POST /ai/generate-email": lambda c: c.post("/api/v1/ai/generate-email", json=GENERATE),
+            }
+            results = {}
+            for route, send in routes.items():
+                await load(client, send, args.concurrency, 1.0)  # warm up
+                results[route] = await load(client, send, args.concurrency, args.duration)
+            return results
+    finally:
+        stop(process)
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/throughput.db"
+    env["OPENAI_API_KEY"] = ""
+    env["WEB_ACCESS_LOG"] = "false"
+
+    print(f"{os.cpu_count()} cores, {args.concurrency} concurrent clients, {args.duration:.0f}s per route")
+    print(f"{'route':26} {'mode':8} {'req/s':>9} {'mean ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for mode in args.modes:
+        for route, result in (await bench_mode(mode, args, env)).items():
+            print(f"{route:26} {mode:8} {result['rps']:9.1f} {result['mean']:9.1f} {result['p95']:9.1f} {result['errors']:7d}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
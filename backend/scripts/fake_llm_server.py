@@ -0,0 +1,113 @@
+"""Local fake of the OpenAI chat completions API with injectable latency and errors.
+
+Point the backend at it to exercise timeouts, the circuit breaker and the
+template fallback without calling a real provider:
+
+    python scripts/fake_llm_server.py --port 9100 --latency 0.2 --error-rate 0.1
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:9100/v1 python -m uvicorn app.main:app
+
+Behaviour can be changed while running, e.g. to simulate an outage:
+
+    curl -X POST localhost:9100/control -d '{"latency": 30, "error_rate": 1.0}'
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+config = {"latency": 0.0, "error_rate": 0.0, "error_status": 503}
+stats = {"requests": 0, "errors": 0}
+lock = threading.Lock()
+
+COMPLETION = {
+    "subject": "Application for the role",
+    "body_html": "<p>Dear Hiring Team,</p><p>I would love to join your team.</p>",
+    "body_text": "Dear Hiring Team,\n\nI would love to join your team."
+}
+
+class Handler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with lock:
+                self._send_json(200, {"config": config, "stats": stats})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/control":
+            with lock:
+                config.update(self._read_json())
+                self._send_json(200, config)
+            return
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        request = self._read_json()
+        with lock:
+            stats["requests"] += 1
+            latency, error_rate, error_status = config["latency"], config["error_rate"], config["error_status"]
+
+        time.sleep(latency)
+
+        if random.random() < error_rate:
+            with lock:
+                stats["errors"] += 1
+            self._send_json(error_status, {"error": {"message": "injected failure", "type": "server_error"}})
+            return
+
+        n = request.get("n", 1)
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        tones = re.findall(r'^\d+\. "(\w+)"', prompt, re.MULTILINE)
+        if tones:
+            # Multi-draft prompt: answer with one draft per requested tone
+            content = json.dumps({"drafts": [{**COMPLETION, "tone": tone} for tone in tones]})
+        else:
+            content = json.dumps(COMPLETION)
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [
+                {"index": i, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                for i in range(n)
+            ],
+            "usage": {"prompt_tokens": 200, "completion_tokens": 120 * n, "total_tokens": 200 + 120 * n}
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    config.update(latency=args.latency, error_rate=args.error_rate, error_status=args.error_status)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Fake LLM server on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
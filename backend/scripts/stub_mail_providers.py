@@ -0,0 +1,254 @@
+"""Local stand-in for the Gmail and Microsoft Graph send APIs, single and batch.
+
+Run from backend/:
+
+    python scripts/stub_mail_providers.py --port 9200 --latency-ms 40
+
+then point the app at it:
+
+    GMAIL_API_URL=http://127.0.0.1:9200
+    GMAIL_BATCH_URL=http://127.0.0.1:9200/batch/gmail/v1
+    GRAPH_API_URL=http://127.0.0.1:9200/v1.0
+
+Every message is accepted except those addressed to a recipient containing
+``reject`` (400) or ``throttle`` (429), so partial batch failures are easy to
+produce. Each HTTP request is delayed by ``--latency-ms``; ``GET /stats``
+reports how many HTTP requests and messages were received, the largest
+request body, and the name, size and SHA-256 of every attachment delivered.
+
+Sends with attachments are covered too: Gmail's upload endpoint (simple and
+resumable uploads) and Graph drafts with attachments added inline or through
+upload sessions.
+"""
+import argparse
+import asyncio
+import base64
+import email
+import hashlib
+import json
+import socket
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+
+from fastapi import FastAPI, Request, Response
+
+def build_app(latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    stats = {"http_requests": 0, "messages": 0, "largest_request_bytes": 0, "attachments": []}
+    # Resumable Gmail uploads, Graph drafts and Graph attachment upload sessions in progress
+    gmail_uploads = {}
+    drafts = {}
+    graph_uploads = {}
+
+    def outcome(recipients: str):
+        stats["messages"] += 1
+        if "reject" in recipients:
+            return 400, {"error": {"code": 400, "message": "Invalid recipient"}}
+        if "throttle" in recipients:
+            return 429, {"error": {"code": 429, "message": "Rate limit exceeded"}}
+        return None, None
+
+    def gmail_send(payload: dict):
+        message = email.message_from_bytes(base64.urlsafe_b64decode(payload["raw"]))
+        status, error = outcome(message.get("To", ""))
+        if status:
+            return status, error
+        return 200, {"id": uuid.uuid4().hex[:16], "labelIds": ["SENT"]}
+
+    def delivered(name: str, content: bytes):
+        stats["attachments"].append({"name": name, "size": len(content), "sha256": hashlib.sha256(content).hexdigest()})
+
+    def gmail_upload_send(raw: bytes):
+        message = email.message_from_bytes(raw)
+        status, error = outcome(message.get("To", ""))
+        if status:
+            return status, error
+        for part in message.walk():
+            if part.get_content_disposition() == "attachment":
+                delivered(part.get_filename(), part.get_payload(decode=True))
+        return 200, {"id": uuid.uuid4().hex[:16], "labelIds": ["SENT"]}
+
+    async def request_body(request: Request) -> bytes:
+        body = await request.body()
+        stats["largest_request_bytes"] = max(stats["largest_request_bytes"], len(body))
+        return body
+
+    def content_range(request: Request):
+        span, _, total = request.headers["content-range"].removeprefix("bytes ").partition("/")
+        start, _, end = span.partition("-")
+        return int(start), int(end), int(total)
+
+    def graph_send(payload: dict):
+        recipients = " ".join(r["emailAddress"]["address"] for r in payload["message"]["toRecipients"])
+        status, error = outcome(recipients)
+        return (status, error) if status else (202, None)
+
+    async def request_received():
+        stats["http_requests"] += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/gmail/v1/users/me/messages/send")
+    async def gmail_single(request: Request):
+        await request_received()
+        status, body = gmail_send(await request.json())
+        return Response(json.dumps(body), status_code=status, media_type="application/json")
+
+    @app.post("/upload/gmail/v1/users/me/messages/send")
+    async def gmail_upload(request: Request, uploadType: str):
+        await request_received()
+        if uploadType == "resumable":
+            upload_id = uuid.uuid4().hex
+            gmail_uploads[upload_id] = bytearray()
+            location = f"{str(request.base_url).rstrip('/')}/upload/gmail/sessions/{upload_id}"
+            return Response(status_code=200, headers={"Location": location})
+        status, body = gmail_upload_send(await request_body(request))
+        return Response(json.dumps(body), status_code=status, media_type="application/json")
+
+    @app.put("/upload/gmail/sessions/{upload_id}")
+    async def gmail_upload_chunk(upload_id: str, request: Request):
+        await request_received()
+        received = gmail_uploads[upload_id]
+        start, end, total = content_range(request)
+        chunk = await request_body(request)
+        if start != len(received) or end - start + 1 != len(chunk):
+            return Response(status_code=400)
+        received.extend(chunk)
+        if len(received) < total:
+            return Response(status_code=308, headers={"Range": f"bytes=0-{len(received) - 1}"})
+        status, body = gmail_upload_send(bytes(gmail_uploads.pop(upload_id)))
+        return Response(json.dumps(body), status_code=status, media_type="application/json")
+
+    @app.post("/batch/gmail/v1")
+    async def gmail_batch(request: Request):
+        await request_received()
+        envelope = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode() + await request.body()
+        )
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in envelope.iter_parts():
+            inner = part.get_payload(decode=True).decode().replace("\r\n", "\n")
+            status, body = gmail_send(json.loads(inner.partition("\n\n")[2]))
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(body)}\r\n"
+            )
+        return Response("".join(parts) + f"--{boundary}--\r\n", media_type=f"multipart/mixed; boundary={boundary}")
+
+    @app.post("/v1.0/me/sendMail")
+    async def graph_single(request: Request):
+        await request_received()
+        status, body = graph_send(await request.json())
+        return Response(json.dumps(body) if body else b"", status_code=status, media_type="application/json")
+
+    @app.post("/v1.0/me/messages")
+    async def graph_create_draft(request: Request):
+        await request_received()
+        message_id = f"AAMk{uuid.uuid4().hex}=="
+        drafts[message_id] = {"message": json.loads(await request_body(request)), "attachments": []}
+        return Response(json.dumps({"id": message_id}), status_code=201, media_type="application/json")
+
+    @app.post("/v1.0/me/messages/{message_id}/attachments")
+    async def graph_add_attachment(message_id: str, request: Request):
+        await request_received()
+        attachment = json.loads(await request_body(request))
+        drafts[message_id]["attachments"].append((attachment["name"], base64.b64decode(attachment["contentBytes"])))
+        return Response(json.dumps({"id": uuid.uuid4().hex}), status_code=201, media_type="application/json")
+
+    @app.post("/v1.0/me/messages/{message_id}/attachments/createUploadSession")
+    async def graph_create_upload_session(message_id: str, request: Request):
+        await request_received()
+        item = (await request.json())["AttachmentItem"]
+        upload_id = uuid.uuid4().hex
+        graph_uploads[upload_id] = {"message_id": message_id, "name": item["name"], "size": item["size"], "content": bytearray()}
+        upload_url = f"{str(request.base_url).rstrip('/')}/upload/graph/sessions/{upload_id}"
+        return Response(json.dumps({"uploadUrl": upload_url}), status_code=201, media_type="application/json")
+
+    @app.put("/upload/graph/sessions/{upload_id}")
+    async def graph_upload_chunk(upload_id: str, request: Request):
+        await request_received()
+        upload = graph_uploads[upload_id]
+        start, end, total = content_range(request)
+        chunk = await request_body(request)
+        if "authorization" in request.headers or start != len(upload["content"]) or total != upload["size"]:
+            return Response(status_code=400)
+        upload["content"].extend(chunk)
+        if len(upload["content"]) < total:
+            return {"nextExpectedRanges": [f"{len(upload['content'])}-"]}
+        del graph_uploads[upload_id]
+        drafts[upload["message_id"]]["attachments"].append((upload["name"], bytes(upload["content"])))
+        return Response(status_code=201)
+
+    @app.post("/v1.0/me/messages/{message_id}/send")
+    async def graph_send_draft(message_id: str):
+        await request_received()
+        draft = drafts[message_id]
+        status, body = graph_send({"message": draft["message"]})
+        if status != 202:
+            return Response(json.dumps(body), status_code=status, media_type="application/json")
+        del drafts[message_id]
+        for name, content in draft["attachments"]:
+            delivered(name, content)
+        return Response(status_code=202)
+
+    @app.delete("/v1.0/me/messages/{message_id}")
+    async def graph_delete_draft(message_id: str):
+        await request_received()
+        drafts.pop(message_id, None)
+        return Response(status_code=204)
+
+    @app.post("/v1.0/$batch")
+    async def graph_batch(request: Request):
+        await request_received()
+        requests = (await request.json())["requests"]
+        if len(requests) > 20:
+            return Response(json.dumps({"error": {"code": "BadRequest", "message": "Too many requests in batch"}}), status_code=400)
+        responses = []
+        for item in requests:
+            status, body = graph_send(item["body"])
+            response = {"id": item["id"], "status": status, "headers": {}}
+            if body:
+                response["body"] = body
+            if status == 429:
+                response["headers"]["Retry-After"] = "1"
+            responses.append(response)
+        return {"responses": responses}
+
+    return app
+
+def start_in_thread(latency_ms: float = 0.0) -> str:
+    """Serve the stub on a free local port from a daemon thread; returns its base URL."""
+    import uvicorn
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(build_app(latency_ms), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.latency_ms), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Shared fixtures. Run from backend/:
+
+    python -m pytest
+"""
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# A scratch database and cache directory, set before the app reads its settings
+SCRATCH = tempfile.mkdtemp(prefix="applybotx-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH, 'test.db')}"
+os.environ["SKILL_AUTOMATON_CACHE_DIR"] = os.path.join(SCRATCH, "cache")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, init_db
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    init_db()
+    yield
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client():
+    """A test client for the app, logged in as a new user."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        email = f"{uuid.uuid4().hex}@example.com"
+        test_client.post("/api/v1/auth/register", json={"email": email, "password": "pw", "name": "Jane Doe"})
+        token = test_client.post("/api/v1/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+        test_client.headers["Authorization"] = f"Bearer {token}"
+        yield test_client
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import admission_lanes, app
+from app.services.admission import AdmissionLane, Overloaded, RateLimiter
+
+def lane_for(path: str):
+    return next((lane.name for lane in admission_lanes if lane.matches("POST", path)), None)
+
+def test_expensive_routes_have_lanes():
+    assert lane_for("/api/v1/files/12/parse") == "parse"
+    assert lane_for("/api/v1/ai/generate-email") == "generate"
+    assert lane_for("/api/v1/ai/generate-batch") == "batch"
+    assert lane_for("/api/v1/ai/drafts") is None
+
+def test_lane_queues_then_rejects():
+    lane = AdmissionLane("test", "/x", concurrency=1, queue_size=1)
+
+    async def scenario():
+        await lane.acquire()
+        queued = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as rejected:
+            await lane.acquire()
+        assert rejected.value.retry_after >= 1
+        lane.release(0.5)
+        await queued
+        lane.release(0.5)
+        return lane.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert (snapshot["in_flight"], snapshot["queued"], snapshot["admitted"], snapshot["rejected"]) == (0, 0, 2, 1)
+
+def test_queued_request_times_out(monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_wait_seconds", 0.05)
+    lane = AdmissionLane("test", "/x", concurrency=1, queue_size=1)
+
+    async def scenario():
+        await lane.acquire()
+        with pytest.raises(Overloaded):
+            await lane.acquire()
+        return lane.snapshot()
+
+    assert asyncio.run(scenario())["queued"] == 0
+
+def test_rate_limiter_refills_and_refunds():
+    limiter = RateLimiter()
+
+    async def scenario():
+        assert await limiter.acquire("user", 60, 2) == 0
+        assert await limiter.acquire("user", 60, 2) == 0
+        wait = await limiter.acquire("user", 60, 2)
+        await limiter.refund("user", 60, 2)
+        return wait, await limiter.acquire("user", 60, 2)
+
+    wait, after_refund = asyncio.run(scenario())
+    assert 0.9 < wait <= 1.0
+    assert after_refund == 0
+
+BATCH = {
+    "extracted_data": {"contact": {"name": "Jane Doe"}, "skills": ["Go"], "raw_text": "Jane Doe Go"},
+    "jobs": [{"job_description": "Go services", "company_name": "Acme", "role": "SRE"}]
+}
+
+def log_in(client: TestClient, email: str):
+    client.post("/api/v1/auth/register", json={"email": email, "password": "pw", "name": "B"})
+    token = client.post("/api/v1/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+
+def test_batch_requests_over_the_user_quota_get_429():
+    with TestClient(app) as client:
+        log_in(client, "batch@example.com")
+        statuses = [client.post("/api/v1/ai/generate-batch", json=BATCH).status_code for _ in range(settings.batch_user_burst + 1)]
+        rejected = client.post("/api/v1/ai/generate-batch", json=BATCH)
+    assert statuses[:-1] == [200] * settings.batch_user_burst
+    assert statuses[-1] == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+
+def test_429_carries_cors_headers():
+    origin = "http://localhost:3000"
+    with TestClient(app) as client:
+        log_in(client, "batch-cors@example.com")
+        client.headers["Origin"] = origin
+        responses = [client.post("/api/v1/ai/generate-batch", json=BATCH) for _ in range(settings.batch_user_burst + 1)]
+    rejected = responses[-1]
+    assert rejected.status_code == 429
+    assert rejected.headers["Access-Control-Allow-Origin"] == origin
+    # The frontend can read when to retry
+    assert "retry-after" in rejected.headers["Access-Control-Expose-Headers"].lower()
+
+def test_idempotent_replays_cost_no_quota(monkeypatch):
+    lane = next(lane for lane in admission_lanes if lane.name == "generate")
+    monkeypatch.setattr(lane, "user_burst", 2)
+    monkeypatch.setattr(lane, "user_per_minute", 0.01)
+    generate = {
+        "extracted_data": BATCH["extracted_data"],
+        "job_description": "Go services", "company_name": "Acme", "role": "SRE"
+    }
+    with TestClient(app) as client:
+        log_in(client, "replay@example.com")
+        first = [client.post("/api/v1/ai/generate-email", json=generate, headers={"Idempotency-Key": "one"}) for _ in range(4)]
+        second = client.post("/api/v1/ai/generate-email", json=generate, headers={"Idempotency-Key": "two"})
+        over = [client.post("/api/v1/ai/generate-email", json=generate, headers={"Idempotency-Key": "three"}) for _ in range(2)]
+    assert [response.status_code for response in first] == [200] * 4
+    assert [response.headers.get("Idempotent-Replayed") for response in first] == [None, "true", "true", "true"]
+    assert second.status_code == 200
+    # Over quota: the 429 is not stored, so the retry is refused afresh rather than replayed
+    assert [response.status_code for response in over] == [429, 429]
+    assert over[1].headers.get("Idempotent-Replayed") is None
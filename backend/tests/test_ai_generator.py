@@ -0,0 +1,75 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.services.ai_generator import AIEmailGenerator
+from app.services.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.services.llm_scheduler import INTERACTIVE, LLMScheduler
+
+class FakeBackend:
+    model = "gpt-3.5-turbo"
+
+    def __init__(self, error: Exception = None):
+        self.name = f"fake-{uuid.uuid4().hex}"
+        self.error = error
+
+    async def complete(self, messages, max_tokens):
+        if self.error:
+            raise self.error
+        return {"contents": ["Hello"], "usage": {"total_tokens": 12}}
+
+class FakeRouter:
+    def __init__(self, *backends):
+        self.backends = list(backends)
+
+    def rank(self, length):
+        return self.backends
+
+def prompt(builder):
+    return {"messages": [{"role": "user", "content": "Hi"}], "prompt_tokens": 5, "max_tokens": 5}
+
+def generator(backend: FakeBackend) -> AIEmailGenerator:
+    return AIEmailGenerator(FakeRouter(backend), LLMScheduler(max_concurrency=1, tokens_per_minute=0))
+
+def tripped(name: str) -> CircuitBreaker:
+    """The backend's breaker, open for long enough to let a probe through."""
+    breaker = get_circuit_breaker(name)
+    breaker.state = CircuitBreaker.OPEN
+    breaker.opened_at = time.monotonic() - breaker.open_seconds - 1
+    return breaker
+
+def test_half_open_probe_is_claimed_once_the_scheduler_gives_a_turn():
+    backend = FakeBackend()
+    breaker = tripped(backend.name)
+    ai = generator(backend)
+
+    async def scenario():
+        held = await ai.scheduler.acquire("someone else", INTERACTIVE, 0)
+        task = asyncio.create_task(ai._complete("normal", prompt, user_id=1))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        # Queued behind the held slot without taking the probe
+        assert not task.done()
+        assert breaker.probes_in_flight == 0 and breaker.is_available()
+        ai.scheduler.release(held)
+        return await task
+
+    result = asyncio.run(asyncio.wait_for(scenario(), 2))
+    assert result["completion"]["contents"] == ["Hello"]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_scheduler_errors_are_not_counted_against_the_backend():
+    backend = FakeBackend()
+    breaker = get_circuit_breaker(backend.name)
+    with pytest.raises(ValueError):
+        asyncio.run(generator(backend)._complete("normal", prompt, priority="unknown"))
+    assert not breaker.calls
+
+def test_backend_errors_are_counted_and_fall_back():
+    backend = FakeBackend(RuntimeError("provider down"))
+    breaker = get_circuit_breaker(backend.name)
+    assert asyncio.run(generator(backend)._complete("normal", prompt)) == {"fallback_reason": "error"}
+    assert [succeeded for succeeded, _ in breaker.calls] == [False]
+    assert breaker.fallbacks == {"error": 1}
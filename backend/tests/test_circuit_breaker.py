@@ -0,0 +1,105 @@
+from app.services.circuit_breaker import CircuitBreaker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def make_breaker(clock: FakeClock, **options) -> CircuitBreaker:
+    options = {"window_size": 10, "minimum_calls": 4, "open_seconds": 30.0, "slow_call_seconds": 5.0, **options}
+    return CircuitBreaker("test", clock=clock, **options)
+
+def test_stays_closed_below_minimum_calls():
+    breaker = make_breaker(FakeClock())
+    for _ in range(3):
+        breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+def test_opens_on_failure_rate_and_rejects_until_open_seconds_pass():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["retry_in_seconds"] == 30.0
+
+    clock.now += 29.9
+    assert not breaker.is_available()
+    assert not breaker.allow_request()
+    clock.now += 0.1
+    assert breaker.is_available()
+
+def test_opens_on_slow_call_rate():
+    breaker = make_breaker(FakeClock(), slow_call_rate_threshold=0.75)
+    breaker.record_success(0.1)
+    for _ in range(3):
+        breaker.record_success(6.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_half_open_admits_one_probe_and_a_healthy_one_closes():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.now += 30
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success(0.2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["window_calls"] == 0
+    assert breaker.allow_request()
+
+def test_failed_or_slow_probe_reopens():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success(6.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow_request()
+
+def test_release_returns_an_unfinished_probe():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+def test_window_only_counts_recent_calls():
+    breaker = make_breaker(FakeClock(), window_size=4, failure_rate_threshold=0.75)
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    for _ in range(4):
+        breaker.record_success(0.1)
+    assert breaker.failure_rate() == 0.0
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_latency_p95_needs_minimum_calls():
+    breaker = make_breaker(FakeClock())
+    for latency in (0.1, 0.2, 0.3):
+        breaker.record_success(latency)
+    assert breaker.latency_p95() is None
+    breaker.record_success(0.4)
+    assert breaker.latency_p95() == 0.4
+
+def test_fallbacks_are_counted_by_reason():
+    breaker = make_breaker(FakeClock())
+    breaker.record_fallback("circuit_open")
+    breaker.record_fallback("circuit_open")
+    breaker.record_fallback("timeout")
+    assert breaker.snapshot()["fallbacks"] == {"circuit_open": 2, "timeout": 1}
@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.container import ServiceContainer
+
+EXTRACTED = {"contact": {"name": "Jane Doe"}, "skills": ["Go"], "raw_text": "Jane Doe Go"}
+
+def test_routes_use_the_services_built_at_startup(client, monkeypatch):
+    services = client.app.state.services
+    assert isinstance(services, ServiceContainer)
+    calls = []
+
+    async def generate_email(**kwargs):
+        calls.append(kwargs["role"])
+        return {"subject": f"{kwargs['role']} application", "html_body": "<p>Hi</p>", "plain_body": "Hi"}
+
+    # Patched on the container's instance: a route building its own generator would miss it
+    monkeypatch.setattr(services.ai_generator, "generate_email", generate_email)
+    for role in ("SRE", "Platform Engineer"):
+        response = client.post("/api/v1/ai/generate-email", json={
+            "extracted_data": EXTRACTED, "job_description": "Go", "company_name": "Acme", "role": role
+        })
+        assert response.json()["subject"] == f"{role} application"
+    assert calls == ["SRE", "Platform Engineer"]
+    assert client.app.state.services is services
+
+def test_shutdown_closes_connection_pools():
+    with TestClient(app):
+        services = app.state.services
+        assert not services.email_sender.http.is_closed
+    assert services.email_sender.http.is_closed
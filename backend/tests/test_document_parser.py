@@ -0,0 +1,20 @@
+from app.services.document_parser import DocumentParser
+
+RESUME = """Jane Doe
+jane@example.com
+
+Summary
+Platform engineer running Python services on k8s.
+
+Skills
+Python, Kubernetes, Quuxlang, Proficient in Frobnication
+"""
+
+def test_section_skills_the_taxonomy_lacks_follow_its_matches():
+    data = DocumentParser()._extract_structured_data(RESUME)
+    assert data["skills"] == ["Python", "Kubernetes", "Quuxlang", "Frobnication"]
+    assert [mention["name"] for mention in data["skill_mentions"]] == ["Python", "Kubernetes"]
+
+def test_section_skills_are_named_as_in_the_taxonomy():
+    data = DocumentParser()._extract_structured_data("Jane Doe\n\nSkills\nk8s, golang, Quuxlang\n")
+    assert data["skills"] == ["Kubernetes", "Go", "Quuxlang"]
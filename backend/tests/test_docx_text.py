@@ -0,0 +1,102 @@
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+
+from app.services.docx_text import iter_docx_text
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+
+def part(body: str, root: str = "w:document") -> str:
+    return f'<?xml version="1.0" encoding="UTF-8"?><{root} {NAMESPACES}>{body}</{root}>'
+
+def paragraph(*runs: str) -> str:
+    return "<w:p>" + "".join(f"<w:r>{run}</w:r>" for run in runs) + "</w:p>"
+
+def text(value: str) -> str:
+    return f'<w:t xml:space="preserve">{value}</w:t>'
+
+def write_docx(path, parts) -> str:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in parts.items():
+            archive.writestr(name, content)
+    return str(path)
+
+def test_lines_come_from_headers_body_and_footers_in_order(tmp_path):
+    table = (
+        "<w:tbl>"
+        "<w:tr><w:tc>" + paragraph(text("Go")) + paragraph(text("Rust")) + "</w:tc><w:tc>" + paragraph(text("5 years")) + "</w:tc></w:tr>"
+        "<w:tr><w:tc>" + paragraph() + "</w:tc><w:tc>" + paragraph(text("Python")) + "</w:tc></w:tr>"
+        "</w:tbl>"
+    )
+    body = (
+        "<w:body>"
+        + paragraph(text("Jane Doe"))
+        + paragraph(text("Skills"), "<w:tab/>", text("Go"), "<w:br/>", text("Site"), "<w:noBreakHyphen/>", text("reliability"))
+        + table
+        + paragraph(text("Summary  "))
+        + "</w:body>"
+    )
+    path = write_docx(tmp_path / "resume.docx", {
+        "word/footer1.xml": part(paragraph(text("Page 1")), "w:ftr"),
+        "word/document.xml": part(body),
+        "word/header2.xml": part(paragraph(text("Second header")), "w:hdr"),
+        "word/header1.xml": part(paragraph(text("jane@example.com")), "w:hdr"),
+    })
+
+    assert list(iter_docx_text(path)) == [
+        "jane@example.com",
+        "Second header",
+        "Jane Doe",
+        "Skills\tGo\nSite-reliability",
+        "Go Rust\t5 years",
+        "Python",
+        "Summary",
+        "Page 1",
+    ]
+
+def test_text_box_fallbacks_are_not_read_twice(tmp_path):
+    box = paragraph(text("Boxed"))
+    body = (
+        "<w:body><w:p><w:r><mc:AlternateContent>"
+        f"<mc:Choice><w:txbxContent>{box}</w:txbxContent></mc:Choice>"
+        f"<mc:Fallback><w:txbxContent>{box}</w:txbxContent></mc:Fallback>"
+        "</mc:AlternateContent></w:r></w:p></w:body>"
+    )
+    path = write_docx(tmp_path / "box.docx", {"word/document.xml": part(body)})
+    assert [line for line in iter_docx_text(path) if line] == ["Boxed"]
+
+def test_long_documents_are_streamed(tmp_path):
+    body = "<w:body>" + "".join(paragraph(text(f"Line {n}")) for n in range(20000)) + "</w:body>"
+    path = write_docx(tmp_path / "long.docx", {"word/document.xml": part(body)})
+    lines = iter_docx_text(path)
+    assert next(lines) == "Line 0"
+    assert sum(1 for _ in lines) == 19999
+
+def test_invalid_files_raise(tmp_path):
+    not_zip = tmp_path / "resume.docx"
+    not_zip.write_bytes(b"not a zip")
+    with pytest.raises(zipfile.BadZipFile):
+        list(iter_docx_text(str(not_zip)))
+
+    with pytest.raises(KeyError):
+        list(iter_docx_text(write_docx(tmp_path / "empty.docx", {"word/styles.xml": part("")})))
+
+    with pytest.raises(ElementTree.ParseError):
+        list(iter_docx_text(write_docx(tmp_path / "broken.docx", {"word/document.xml": "<w:document"})))
+
+def test_documents_written_by_python_docx(tmp_path):
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "jane@example.com"
+    document.add_paragraph("Jane Doe")
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "Kubernetes"
+    table.rows[0].cells[1].text = "3 years"
+    path = str(tmp_path / "resume.docx")
+    document.save(path)
+
+    assert [line for line in iter_docx_text(path) if line] == ["jane@example.com", "Jane Doe", "Kubernetes\t3 years"]
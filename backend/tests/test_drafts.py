@@ -0,0 +1,35 @@
+EXTRACTED = {"contact": {"name": "Jane Doe", "email": "jane@example.com"}, "skills": ["Go"], "raw_text": "Jane Doe Go"}
+
+def generate(client, role: str = "SRE") -> int:
+    response = client.post("/api/v1/ai/generate-email", json={
+        "extracted_data": EXTRACTED, "job_description": "Go services", "company_name": "Acme", "role": role
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def test_draft_list_revalidates_after_changes(client):
+    generate(client)
+    listed = client.get("/api/v1/ai/drafts")
+    etag = listed.headers["ETag"]
+    assert listed.headers["Cache-Control"] == "private, no-cache"
+    assert client.get("/api/v1/ai/drafts", headers={"If-None-Match": etag}).status_code == 304
+
+    newest = generate(client, "Backend Engineer")
+    changed = client.get("/api/v1/ai/drafts", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and len(changed.json()) == 2
+    etag = changed.headers["ETag"]
+
+    # SQLite hands a deleted newest row's ID to the next insert: same count, same newest ID
+    assert client.delete(f"/api/v1/ai/drafts/{newest}").status_code == 200
+    assert generate(client, "Platform Engineer") == newest
+    replaced = client.get("/api/v1/ai/drafts", headers={"If-None-Match": etag})
+    assert replaced.status_code == 200
+    assert [draft["subject"] for draft in replaced.json()] != [draft["subject"] for draft in changed.json()]
+
+def test_single_draft_is_revalidated(client):
+    draft_id = generate(client)
+    fetched = client.get(f"/api/v1/ai/drafts/{draft_id}")
+    assert fetched.headers["Cache-Control"] == "private, no-cache"
+    assert client.get(f"/api/v1/ai/drafts/{draft_id}", headers={"If-None-Match": fetched.headers["ETag"]}).status_code == 304
+    client.delete(f"/api/v1/ai/drafts/{draft_id}")
+    assert client.get(f"/api/v1/ai/drafts/{draft_id}", headers={"If-None-Match": fetched.headers["ETag"]}).status_code == 404
@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import httpx
+
+from app.models.database import OAuthAccount
+from app.services.email_batching import BatchingEmailSender
+from app.services.email_sender import EmailSender
+from app.services.file_storage import FileStorage
+
+def message(to: str) -> dict:
+    return {"to_emails": [to], "cc_emails": [], "bcc_emails": [], "subject": "Application", "html_body": "<p>Hello</p>", "plain_body": "Hello"}
+
+def send_batch(handler, account: OAuthAccount, messages):
+    requests = []
+
+    async def record(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        requests.append(request)
+        return handler(request)
+
+    async def run():
+        sender = EmailSender(FileStorage())
+        sender.http = httpx.AsyncClient(transport=httpx.MockTransport(record))
+
+        async def access_token(oauth_account):
+            return "token"
+        sender._get_valid_access_token = access_token
+        try:
+            return await sender.send_batch(account, messages)
+        finally:
+            await sender.aclose()
+    return asyncio.run(run()), requests
+
+def gmail_batch_response(request: httpx.Request) -> httpx.Response:
+    # Parts answer in a different order than they were asked, as Gmail may
+    boundary = "response_boundary"
+    statuses = {"item-0": "200 OK", "item-1": "400 Bad Request", "item-2": "429 Too Many Requests"}
+    parts = [
+        f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+        f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n"
+        + (json.dumps({"id": f"sent-{content_id}"}) if status.startswith("200") else json.dumps({"error": status})) + "\r\n"
+        for content_id, status in sorted(statuses.items(), reverse=True)
+    ]
+    return httpx.Response(200, headers={"Content-Type": f"multipart/mixed; boundary={boundary}"}, content="".join(parts) + f"--{boundary}--\r\n")
+
+def test_gmail_batch_maps_each_part_to_its_message():
+    account = OAuthAccount(id=1, provider="google", email="me@gmail.com")
+    results, requests = send_batch(gmail_batch_response, account, [message("a@x.com"), message("b@x.com"), message("c@x.com")])
+
+    (batch,) = requests
+    assert batch.headers["Content-Type"].startswith("multipart/mixed; boundary=")
+    assert batch.content.count(b"POST /gmail/v1/users/me/messages/send") == 3
+    assert [result["success"] for result in results] == [True, False, False]
+    assert results[0]["message_id"] == "sent-item-0"
+    assert [result["retryable"] for result in results[1:]] == [False, True]
+
+def test_graph_batch_maps_each_response_to_its_message():
+    def graph(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"responses": [
+            {"id": "1", "status": 429, "body": {"error": "throttled"}},
+            {"id": "0", "status": 202},
+        ]})
+
+    account = OAuthAccount(id=2, provider="microsoft", email="me@outlook.com")
+    results, requests = send_batch(graph, account, [message("a@x.com"), message("b@x.com")])
+
+    (batch,) = requests
+    assert batch.url.path.endswith("/$batch")
+    sent = json.loads(batch.content)["requests"]
+    assert [(item["id"], item["url"]) for item in sent] == [("0", "/me/sendMail"), ("1", "/me/sendMail")]
+    assert sent[1]["body"]["message"]["toRecipients"][0]["emailAddress"]["address"] == "b@x.com"
+    assert results[0]["success"] and not results[1]["success"] and results[1]["retryable"]
+
+def test_a_failed_batch_call_fails_every_message():
+    account = OAuthAccount(id=2, provider="microsoft", email="me@outlook.com")
+    results, _ = send_batch(lambda request: httpx.Response(503), account, [message("a@x.com"), message("b@x.com")])
+    assert all(not result["success"] and result["retryable"] for result in results)
+
+def test_a_single_message_is_not_batched():
+    account = OAuthAccount(id=2, provider="microsoft", email="me@outlook.com")
+    results, requests = send_batch(lambda request: httpx.Response(202), account, [message("a@x.com")])
+    assert results[0]["success"]
+    assert requests[0].url.path.endswith("/me/sendMail")
+
+class StubBatchSender:
+    def __init__(self):
+        self.batches = []
+
+    async def send_batch(self, oauth_account, messages):
+        self.batches.append((oauth_account.id, [message["to_emails"][0] for message in messages]))
+        return [{"success": True, "to": message["to_emails"][0]} for message in messages]
+
+    async def send_email(self, oauth_account, **message):
+        return {"success": True, "single": True}
+
+def test_concurrent_sends_from_one_account_share_a_batch():
+    stub = StubBatchSender()
+    first = OAuthAccount(id=1, provider="google")
+    second = OAuthAccount(id=2, provider="microsoft")
+
+    async def run():
+        batching = BatchingEmailSender(stub, window_seconds=0.01)
+        return await asyncio.gather(
+            batching.send_email(first, **message("a@x.com")),
+            batching.send_email(second, **message("b@x.com")),
+            batching.send_email(first, **message("c@x.com")),
+        )
+
+    results = asyncio.run(run())
+    assert [result["to"] for result in results] == ["a@x.com", "b@x.com", "c@x.com"]
+    assert sorted(stub.batches) == [(1, ["a@x.com", "c@x.com"]), (2, ["b@x.com"])]
+
+def test_a_full_batch_goes_out_before_the_window_closes():
+    stub = StubBatchSender()
+    account = OAuthAccount(id=1, provider="google")
+
+    async def run():
+        batching = BatchingEmailSender(stub, window_seconds=60, max_batch_size=2)
+        return await asyncio.wait_for(asyncio.gather(
+            batching.send_email(account, **message("a@x.com")),
+            batching.send_email(account, **message("b@x.com")),
+        ), timeout=5)
+
+    assert len(asyncio.run(run())) == 2
+    assert stub.batches == [(1, ["a@x.com", "b@x.com"])]
+
+def test_other_providers_are_sent_directly():
+    stub = StubBatchSender()
+
+    async def run():
+        return await BatchingEmailSender(stub).send_email(OAuthAccount(id=3, provider="smtp"), **message("a@x.com"))
+
+    assert asyncio.run(run())["single"]
+    assert stub.batches == []
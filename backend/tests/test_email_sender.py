@@ -0,0 +1,156 @@
+import asyncio
+import base64
+import json
+from email import message_from_bytes
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.models.database import OAuthAccount
+from app.services import email_sender
+from app.services.email_sender import EmailSender
+from app.services.file_storage import FileStorage
+
+class Provider:
+    """Records the requests an EmailSender makes and answers them in turn."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        self.requests.append(request)
+        return self.responses.pop(0) if self.responses else httpx.Response(200, json={"id": "sent"})
+
+@pytest.fixture
+def attachment(tmp_path):
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(b"%PDF-1.4 resume")
+    return {"path": str(path), "filename": "resume.pdf", "content_type": "application/pdf"}
+
+def send(provider: Provider, account: OAuthAccount, **kwargs):
+    async def run():
+        sender = EmailSender(FileStorage())
+        sender.http = httpx.AsyncClient(transport=httpx.MockTransport(provider))
+
+        async def access_token(oauth_account):
+            return "token"
+        sender._get_valid_access_token = access_token
+        try:
+            return await sender.send_email(
+                oauth_account=account, to_emails=["jobs@example.com"], cc_emails=[], bcc_emails=["me+sent@example.com"],
+                subject="Application", html_body="<p>Hello</p>", plain_body="Hello", **kwargs
+            )
+        finally:
+            await sender.aclose()
+    return asyncio.run(run())
+
+def gmail():
+    return OAuthAccount(provider="google", email="me@gmail.com")
+
+def test_gmail_raw_message_carries_bcc():
+    provider = Provider()
+    assert send(provider, gmail())["success"]
+    raw = json.loads(provider.requests[0].content)["raw"]
+    assert message_from_bytes(base64.urlsafe_b64decode(raw))["Bcc"] == "me+sent@example.com"
+
+def test_gmail_upload_carries_bcc(attachment):
+    provider = Provider()
+    assert send(provider, gmail(), attachments=[attachment])["success"]
+    (upload,) = provider.requests
+    assert upload.url.params["uploadType"] == "media"
+    message = message_from_bytes(upload.content)
+    assert message["Bcc"] == "me+sent@example.com"
+    assert message["To"] == "jobs@example.com"
+
+def test_smtp_keeps_bcc_on_the_envelope_only(attachment):
+    from app.services.smtp_transport import SMTPTransport
+
+    transport = SMTPTransport(EmailSender(FileStorage()))
+    for attachments in (None, [attachment]):
+        sender, recipients, message = asyncio.run(transport._envelope(
+            gmail(), ["jobs@example.com"], [], ["me+sent@example.com"], "Application", "<p>Hello</p>", "Hello",
+            attachments=attachments
+        ))
+        assert recipients == ["jobs@example.com", "me+sent@example.com"]
+        data = message if isinstance(message, bytes) else message.read()
+        assert message_from_bytes(data)["Bcc"] is None
+
+class ResumableProvider(Provider):
+    """A Gmail resumable upload session that persists only part of the first chunk."""
+
+    def __init__(self):
+        super().__init__()
+        self.received = b""
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await super().__call__(request)
+        if request.method == "POST":
+            return httpx.Response(200, headers={"Location": "https://upload.example/session"})
+        span, _, size = request.headers["Content-Range"].split()[1].partition("/")
+        assert int(span.partition("-")[0]) == len(self.received)
+        chunk = request.content if len(self.requests) > 2 else request.content[:len(request.content) // 2]
+        self.received += chunk
+        if len(self.received) == int(size):
+            return httpx.Response(200, json={"id": "sent"})
+        return httpx.Response(308, headers={"Range": f"bytes=0-{len(self.received) - 1}"})
+
+@pytest.fixture
+def large_attachment(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_sender, "UPLOAD_CHUNK_SIZE", 256)
+    path = tmp_path / "portfolio.pdf"
+    path.write_bytes(bytes(range(256)) * 4)
+    return {"path": str(path), "filename": "portfolio.pdf", "content_type": "application/pdf"}
+
+def test_gmail_large_message_uploads_in_a_resumable_session(large_attachment, monkeypatch):
+    monkeypatch.setattr(settings, "gmail_resumable_threshold_bytes", 0)
+    provider = ResumableProvider()
+    assert send(provider, gmail(), attachments=[large_attachment])["success"]
+
+    session, *chunks = provider.requests
+    assert session.url.params["uploadType"] == "resumable"
+    assert int(session.headers["X-Upload-Content-Length"]) == len(provider.received)
+    assert len(chunks) > 2 and all(len(chunk.content) <= 256 for chunk in chunks)
+    # The second chunk resumed where the server said the first one stopped
+    assert chunks[1].headers["Content-Range"].startswith("bytes 128-")
+
+    message = message_from_bytes(provider.received)
+    (pdf,) = [part for part in message.walk() if part.get_filename() == "portfolio.pdf"]
+    assert pdf.get_payload(decode=True) == bytes(range(256)) * 4
+
+def outlook():
+    return OAuthAccount(provider="microsoft", email="me@outlook.com")
+
+def test_graph_large_attachment_uploads_in_a_session(large_attachment, monkeypatch):
+    monkeypatch.setattr(settings, "graph_upload_session_threshold_bytes", 0)
+    provider = Provider(
+        httpx.Response(201, json={"id": "draft/1"}),
+        httpx.Response(201, json={"uploadUrl": "https://upload.example/session"}),
+        *[httpx.Response(200)] * 3, httpx.Response(201),
+        httpx.Response(202)
+    )
+    assert send(provider, outlook(), attachments=[large_attachment])["success"]
+
+    draft, session, *chunks, sent = provider.requests
+    assert json.loads(draft.content)["bccRecipients"] == [{"emailAddress": {"address": "me+sent@example.com"}}]
+    assert session.url.raw_path == b"/v1.0/me/messages/draft%2F1/attachments/createUploadSession"
+    assert json.loads(session.content)["AttachmentItem"]["size"] == 1024
+    assert [chunk.headers["Content-Range"] for chunk in chunks] == [f"bytes {start}-{start + 255}/1024" for start in range(0, 1024, 256)]
+    # Chunks go to the session URL, which carries its own credentials
+    assert all(chunk.url.host == "upload.example" and "Authorization" not in chunk.headers for chunk in chunks)
+    assert b"".join(chunk.content for chunk in chunks) == bytes(range(256)) * 4
+    assert sent.url.path.endswith("/send")
+
+def test_graph_draft_is_deleted_when_an_upload_fails(large_attachment, monkeypatch):
+    monkeypatch.setattr(settings, "graph_upload_session_threshold_bytes", 0)
+    provider = Provider(
+        httpx.Response(201, json={"id": "draft1"}),
+        httpx.Response(201, json={"uploadUrl": "https://upload.example/session"}),
+        httpx.Response(500, text="upload failed"),
+        httpx.Response(204)
+    )
+    result = send(provider, outlook(), attachments=[large_attachment])
+    assert not result["success"] and result["retryable"]
+    assert provider.requests[-1].method == "DELETE"
@@ -0,0 +1,39 @@
+import pytest
+
+from app.config import settings
+
+@pytest.fixture(autouse=True)
+def short_streams(monkeypatch):
+    monkeypatch.setattr(settings, "event_stream_max_seconds", 0.2)
+
+def read_stream(client, url, **kwargs):
+    with client.stream("GET", url, **kwargs) as response:
+        return response.status_code, response.read().decode()
+
+def test_ticket_opens_the_stream(client):
+    ticket = client.post("/api/v1/events/ticket").json()["ticket"]
+    access_token = client.headers.pop("Authorization")
+
+    status_code, body = read_stream(client, f"/api/v1/events/stream?ticket={ticket}")
+    assert status_code == 200
+    assert "event: ready" in body
+
+    status_code, body = read_stream(client, "/api/v1/events/stream", headers={"Authorization": access_token})
+    assert status_code == 200
+
+def test_access_token_is_not_a_ticket(client):
+    access_token = client.headers.pop("Authorization").split()[1]
+    status_code, _ = read_stream(client, f"/api/v1/events/stream?ticket={access_token}")
+    assert status_code == 401
+
+def test_ticket_is_not_an_access_token(client):
+    ticket = client.post("/api/v1/events/ticket").json()["ticket"]
+    client.headers["Authorization"] = f"Bearer {ticket}"
+    assert client.get("/api/v1/auth/me").status_code == 401
+
+def test_expired_ticket_is_refused(client, monkeypatch):
+    monkeypatch.setattr(settings, "event_ticket_seconds", -1)
+    ticket = client.post("/api/v1/events/ticket").json()["ticket"]
+    client.headers.pop("Authorization")
+    status_code, _ = read_stream(client, f"/api/v1/events/stream?ticket={ticket}")
+    assert status_code == 401
@@ -0,0 +1,51 @@
+from app.models.database import File, ParsedDocument
+
+RESUME = b"Jane Doe\njane@example.com\nhttps://linkedin.com/in/janedoe\n\nSkills\nPython, Go, Kubernetes\n"
+
+def upload(client) -> int:
+    response = client.post("/api/v1/files/upload", files={"file": ("resume.txt", RESUME, "text/plain")})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def test_parsed_document_is_stored_in_the_response_shape(client, db):
+    file_id = upload(client)
+    parsed = client.post(f"/api/v1/files/{file_id}/parse")
+    assert parsed.status_code == 200
+
+    stored = db.query(ParsedDocument.json_extraction).filter(ParsedDocument.file_id == file_id).scalar()
+    assert set(stored["contact"]) == {"name", "email", "phone", "address"}
+    assert "skill_mentions" in stored
+    assert client.get(f"/api/v1/files/{file_id}/extracted").json() == stored
+
+def test_documents_parsed_before_normalization_are_served_in_the_response_shape(client, db):
+    user_id = client.get("/api/v1/auth/me").json()["id"]
+    db_file = File(user_id=user_id, filename="old.txt", content_type="text/plain", size=len(RESUME), status="completed")
+    db.add(db_file)
+    db.flush()
+    db.add(ParsedDocument(file_id=db_file.id, user_id=user_id, json_extraction={
+        "contact": {"name": "Jane Doe", "email": "jane@example.com", "linkedin": "linkedin.com/in/janedoe"},
+        "skills": ["Python"],
+        "raw_text": RESUME.decode(),
+    }))
+    db.commit()
+
+    served = client.get(f"/api/v1/files/{db_file.id}/extracted")
+    assert served.status_code == 200
+    assert served.json()["contact"] == {"name": "Jane Doe", "email": "jane@example.com", "phone": None, "address": None}
+    assert served.json()["skill_mentions"] == []
+    revalidated = client.get(f"/api/v1/files/{db_file.id}/extracted", headers={"If-None-Match": served.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+def test_extracted_data_revalidates_until_the_document_changes(client, db):
+    file_id = upload(client)
+    client.post(f"/api/v1/files/{file_id}/parse")
+    served = client.get(f"/api/v1/files/{file_id}/extracted")
+    assert served.headers["Cache-Control"] == "private, no-cache"
+    etag = served.headers["ETag"]
+    assert client.get(f"/api/v1/files/{file_id}/extracted", headers={"If-None-Match": etag}).status_code == 304
+
+    parsed_doc = db.query(ParsedDocument).filter(ParsedDocument.file_id == file_id).one()
+    parsed_doc.json_extraction = {**parsed_doc.json_extraction, "summary": "Edited"}
+    db.commit()
+    changed = client.get(f"/api/v1/files/{file_id}/extracted", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["summary"] == "Edited"
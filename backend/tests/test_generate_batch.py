@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+from app.models.database import AIDraft
+from app.models.schemas import AIBatchGenerateRequest
+from app.routers.ai import _stream_batch
+from app.services.events import EventBroker
+
+class StubGenerator:
+    """Finishes the job for ``fast_company`` at once; every other job never finishes."""
+
+    def __init__(self, fast_company: str):
+        self.fast_company = fast_company
+
+    async def generate_email(self, company_name: str, **kwargs):
+        if company_name != self.fast_company:
+            await asyncio.Event().wait()
+        return {"subject": f"Hello {company_name}", "html_body": "<p>Hi</p>", "plain_body": "Hi", "model_meta": {}}
+
+def batch_request(*companies: str) -> AIBatchGenerateRequest:
+    return AIBatchGenerateRequest(jobs=[{"job_description": "Go", "company_name": company, "role": "SRE"} for company in companies])
+
+def test_batch_stores_each_draft_as_it_completes(db):
+    async def run():
+        stream = _stream_batch(batch_request("Fast", "Slow"), {}, 101, StubGenerator("Fast"), EventBroker(), "batch-1")
+        first = json.loads(await stream.__anext__())
+        # The client disconnects before the batch is done
+        await stream.aclose()
+        return first
+
+    first = asyncio.run(run())
+    assert first["status"] == "completed"
+    draft = db.get(AIDraft, first["draft_id"])
+    assert draft is not None and draft.subject == "Hello Fast"
+    assert db.query(AIDraft).filter(AIDraft.user_id == 101).count() == 1
+
+def test_batch_done_lists_draft_ids_by_job(db):
+    async def run():
+        lines = []
+        async for line in _stream_batch(batch_request("A", "A"), {}, 102, StubGenerator("A"), EventBroker(), "batch-2"):
+            lines.append(json.loads(line))
+        return lines
+
+    lines = asyncio.run(run())
+    done = lines[-1]
+    assert done["status"] == "done" and done["completed"] == 2 and done["failed"] == 0
+    assert sorted(done["draft_ids"]) == ["0", "1"]
+    stored = {draft.id for draft in db.query(AIDraft).filter(AIDraft.user_id == 102)}
+    assert stored == set(done["draft_ids"].values())
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from starlette.requests import Request
+
+from app.services.http_cache import cache_headers, http_date, is_not_modified, make_etag
+
+UPDATED = datetime(2024, 5, 1, 12, 30, 15, 250000)
+
+def request(**headers) -> Request:
+    return Request({"type": "http", "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]})
+
+def test_etags_follow_the_version_parts():
+    assert make_etag("draft", 1, UPDATED) == make_etag("draft", 1, UPDATED)
+    assert make_etag("draft", 1, UPDATED) != make_etag("draft", 2, UPDATED)
+
+def test_if_none_match_compares_weakly_and_accepts_lists():
+    etag = make_etag("template", 1)
+    assert is_not_modified(request(if_none_match=etag), etag)
+    assert is_not_modified(request(if_none_match=f'"other", W/{etag}'), etag)
+    assert is_not_modified(request(if_none_match="*"), etag)
+    assert not is_not_modified(request(if_none_match='"other"'), etag)
+
+def test_if_none_match_wins_over_if_modified_since():
+    etag = make_etag("template", 1)
+    assert not is_not_modified(request(if_none_match='"other"', if_modified_since=http_date(UPDATED)), etag, UPDATED)
+
+def test_if_modified_since_has_second_resolution():
+    etag = make_etag("template", 1)
+    assert is_not_modified(request(if_modified_since=http_date(UPDATED)), etag, UPDATED)
+    assert not is_not_modified(request(if_modified_since=http_date(datetime(2024, 5, 1, 12, 30, 14))), etag, UPDATED)
+    assert not is_not_modified(request(if_modified_since="not a date"), etag, UPDATED)
+    # Ignored where the route has no modification time
+    assert not is_not_modified(request(if_modified_since=http_date(UPDATED)), etag)
+
+def test_private_responses_vary_on_the_token():
+    headers = cache_headers(make_etag("x"), UPDATED)
+    assert headers["Cache-Control"] == "private, no-cache"
+    assert headers["Vary"] == "Authorization"
+    assert headers["Last-Modified"] == "Wed, 01 May 2024 12:30:15 GMT"
+
+def test_builtin_templates_are_public_and_revalidated(client):
+    listed = client.get("/api/v1/templates/builtin/list")
+    assert listed.headers["Cache-Control"] == "public, max-age=3600"
+    assert "Authorization" not in listed.headers.get("Vary", "")
+    repeat = client.get("/api/v1/templates/builtin/list", headers={"If-None-Match": listed.headers["ETag"]})
+    assert repeat.status_code == 304 and repeat.content == b""
+
+def test_single_template_honours_if_modified_since(client):
+    created = client.post("/api/v1/templates/", json={"name": "Intro", "subject_template": "Hi", "body_template": "Hello"}).json()
+    fetched = client.get(f"/api/v1/templates/{created['id']}")
+    since = fetched.headers["Last-Modified"]
+    assert client.get(f"/api/v1/templates/{created['id']}", headers={"If-Modified-Since": since}).status_code == 304
+
+    client.put(f"/api/v1/templates/{created['id']}", json={"name": "Intro", "subject_template": "Hello", "body_template": "Hello"})
+    changed = client.get(f"/api/v1/templates/{created['id']}", headers={"If-None-Match": fetched.headers["ETag"]})
+    assert changed.status_code == 200 and changed.json()["subject_template"] == "Hello"
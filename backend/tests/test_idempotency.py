@@ -0,0 +1,101 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.services.idempotency import BUSY, MISMATCH, REPLAY, STARTED, IdempotencyStore, StoredResponse
+
+@pytest.fixture
+def scope():
+    return uuid.uuid4().hex
+
+RESPONSE = StoredResponse(201, [["content-type", "application/json"]], b'{"id": 7}')
+
+def test_first_request_runs_and_duplicates_replay(scope):
+    store = IdempotencyStore()
+
+    async def run():
+        assert await store.begin(scope, "key", "fp") == (STARTED, None)
+        assert await store.begin(scope, "key", "fp") == (BUSY, None)
+        await store.complete(scope, "key", "fp", RESPONSE)
+        return await store.begin(scope, "key", "fp")
+
+    outcome, stored = asyncio.run(run())
+    assert outcome == REPLAY
+    assert (stored.status, stored.headers, stored.body) == (RESPONSE.status, RESPONSE.headers, RESPONSE.body)
+
+def test_key_reused_for_another_request_is_a_mismatch(scope):
+    store = IdempotencyStore()
+
+    async def run():
+        await store.begin(scope, "key", "fp")
+        running = await store.begin(scope, "key", "other")
+        await store.complete(scope, "key", "fp", RESPONSE)
+        return running, await store.begin(scope, "key", "other")
+
+    assert asyncio.run(run()) == ((MISMATCH, None), (MISMATCH, None))
+
+def test_keys_are_scoped(scope):
+    store = IdempotencyStore()
+
+    async def run():
+        await store.begin(scope, "key", "fp")
+        return await store.begin(scope + "-other-user", "key", "fp")
+
+    assert asyncio.run(run()) == (STARTED, None)
+
+def test_released_key_runs_again(scope):
+    store = IdempotencyStore()
+
+    async def run():
+        await store.begin(scope, "key", "fp")
+        await store.release(scope, "key")
+        return await store.begin(scope, "key", "fp")
+
+    assert asyncio.run(run()) == (STARTED, None)
+
+def test_release_keeps_a_completed_response(scope):
+    store = IdempotencyStore()
+
+    async def run():
+        await store.begin(scope, "key", "fp")
+        await store.complete(scope, "key", "fp", RESPONSE)
+        await store.release(scope, "key")
+        return await store.begin(scope, "key", "fp")
+
+    assert asyncio.run(run())[0] == REPLAY
+
+def test_abandoned_request_is_taken_over(scope):
+    store = IdempotencyStore(lock_seconds=0)
+
+    async def run():
+        await store.begin(scope, "key", "fp")
+        return await store.begin(scope, "key", "fp")
+
+    assert asyncio.run(run()) == (STARTED, None)
+
+def test_expired_response_is_not_replayed(scope):
+    store = IdempotencyStore(ttl_seconds=0)
+
+    async def run():
+        await store.begin(scope, "key", "fp")
+        await store.complete(scope, "key", "fp", RESPONSE)
+        return await store.begin(scope, "key", "fp")
+
+    assert asyncio.run(run()) == (STARTED, None)
+
+def test_wait_wakes_when_the_first_request_completes(scope):
+    store = IdempotencyStore()
+    store.POLL_SECONDS = 5
+
+    async def run():
+        await store.begin(scope, "key", "fp")
+        waiter = asyncio.create_task(store.wait(scope, "key", timeout=5))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await store.complete(scope, "key", "fp", RESPONSE)
+        await waiter
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 1
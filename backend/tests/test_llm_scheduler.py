@@ -0,0 +1,160 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_scheduler import BULK, INTERACTIVE, LLMScheduler, rate_limit_delay
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 2))
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_bulk_call_larger_than_the_bulk_share_is_admitted():
+    scheduler = LLMScheduler(max_concurrency=4, tokens_per_minute=1000, bulk_share=0.7)
+
+    async def scenario():
+        grant = await scheduler.acquire("user", BULK, 900)
+        assert grant.tokens == 700
+        scheduler.release(grant)
+        # A bulk call behind it isn't held up either
+        later = await scheduler.acquire("user", BULK, 10)
+        scheduler.release(later)
+
+    run(scenario())
+
+def test_call_larger_than_the_bucket_is_capped():
+    scheduler = LLMScheduler(max_concurrency=4, tokens_per_minute=1000, bulk_share=0.5)
+
+    async def scenario():
+        return await scheduler.acquire("user", INTERACTIVE, 5000)
+
+    assert run(scenario()).tokens == 1000
+
+def test_interactive_calls_go_before_bulk():
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=0, bulk_share=1.0)
+    order = []
+
+    async def call(user, priority):
+        async with scheduler.slot(user, priority, 10):
+            order.append((user, priority))
+
+    async def scenario():
+        held = await scheduler.acquire("holder", INTERACTIVE, 10)
+        tasks = [asyncio.create_task(call("batch", BULK)), asyncio.create_task(call("person", INTERACTIVE))]
+        await settle()
+        scheduler.release(held)
+        await asyncio.gather(*tasks)
+
+    run(scenario())
+    assert order == [("person", INTERACTIVE), ("batch", BULK)]
+
+def test_users_take_turns_within_a_class():
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=0, bulk_share=1.0)
+    order = []
+
+    async def call(user):
+        async with scheduler.slot(user, BULK, 10):
+            order.append(user)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        held = await scheduler.acquire("holder", BULK, 10)
+        tasks = [asyncio.create_task(call(user)) for user in ("a", "a", "a", "b")]
+        await settle()
+        scheduler.release(held)
+        await asyncio.gather(*tasks)
+
+    run(scenario())
+    assert order == ["a", "b", "a", "a"]
+
+def test_bulk_leaves_slots_for_interactive_calls():
+    scheduler = LLMScheduler(max_concurrency=4, tokens_per_minute=0, bulk_share=0.5)
+
+    async def scenario():
+        bulk = [await scheduler.acquire("batch", BULK, 10) for _ in range(2)]
+        waiting = asyncio.create_task(scheduler.acquire("batch", BULK, 10))
+        await settle()
+        assert not waiting.done()
+        interactive = await scheduler.acquire("person", INTERACTIVE, 10)
+        assert scheduler.snapshot()["classes"][BULK]["queued"] == 1
+        scheduler.release(bulk[0])
+        await waiting
+        for grant in bulk[1:] + [interactive, waiting.result()]:
+            scheduler.release(grant)
+
+    run(scenario())
+
+def test_token_bucket_refills_and_settles_usage():
+    clock = FakeClock()
+    scheduler = LLMScheduler(max_concurrency=4, tokens_per_minute=600, bulk_share=0.5, clock=clock)
+
+    async def scenario():
+        first = await scheduler.acquire("user", INTERACTIVE, 600)
+        second = asyncio.create_task(scheduler.acquire("user", INTERACTIVE, 100))
+        await settle()
+        assert not second.done()
+
+        # The first call used only 300 of its 600: the rest comes back
+        first.used_tokens = 300
+        scheduler.release(first)
+        await second
+        assert scheduler.snapshot()["tokens_available"] == 200
+
+        third = asyncio.create_task(scheduler.acquire("user", INTERACTIVE, 500))
+        await settle()
+        assert not third.done()
+        clock.now += 30  # refills 300 tokens
+        scheduler._pump()
+        await third
+
+    run(scenario())
+
+def test_throttle_pauses_admissions():
+    clock = FakeClock()
+    scheduler = LLMScheduler(max_concurrency=4, tokens_per_minute=0, clock=clock)
+
+    async def scenario():
+        scheduler.throttle(10)
+        waiting = asyncio.create_task(scheduler.acquire("user", INTERACTIVE, 10))
+        await settle()
+        assert not waiting.done()
+        assert scheduler.snapshot()["paused_seconds"] == 10
+        clock.now += 10
+        scheduler._pump()
+        await waiting
+
+    run(scenario())
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=0)
+
+    async def scenario():
+        held = await scheduler.acquire("holder", INTERACTIVE, 10)
+        waiting = asyncio.create_task(scheduler.acquire("user", INTERACTIVE, 10))
+        await settle()
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert scheduler.snapshot()["classes"][INTERACTIVE]["queued"] == 0
+        scheduler.release(held)
+        assert scheduler.snapshot()["classes"][INTERACTIVE]["in_flight"] == 0
+
+    run(scenario())
+
+def test_rate_limit_delay():
+    def error(status_code, headers=None):
+        return SimpleNamespace(response=SimpleNamespace(status_code=status_code, headers=headers or {}))
+
+    assert rate_limit_delay(error(500)) is None
+    assert rate_limit_delay(error(429, {"retry-after": "12"})) == 12.0
+    assert rate_limit_delay(error(429)) > 0
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.services.llm_backends import BackendRegistry, LLMBackend, OpenAICompatibleBackend, build_backend_registry
+from app.services.model_router import ModelRouter
+
+@pytest.fixture(autouse=True)
+def no_exploration(monkeypatch):
+    monkeypatch.setattr(settings, "llm_router_explore_rate", 0.0)
+
+def backend(tier: str, expected_latency_seconds: float = 3.0, **profile) -> LLMBackend:
+    return LLMBackend(f"{tier}-{uuid.uuid4().hex}", "model", tier=tier, expected_latency_seconds=expected_latency_seconds, **profile)
+
+def router(*backends) -> ModelRouter:
+    registry = BackendRegistry()
+    for item in backends:
+        registry.register(item)
+    return ModelRouter(registry)
+
+def test_each_length_prefers_its_tier():
+    fast, standard, quality = backend("fast"), backend("standard"), backend("quality")
+    models = router(quality, fast, standard)
+    assert models.rank("short") == [fast, standard, quality]
+    assert models.rank("normal") == [standard, fast, quality]
+    assert models.rank("long") == [quality, standard, fast]
+
+def test_much_faster_backend_beats_the_preferred_tier():
+    slow_standard, quick_fast = backend("standard", 9.0), backend("fast", 1.0)
+    assert router(slow_standard, quick_fast).rank("normal") == [quick_fast, slow_standard]
+
+def test_observed_latency_replaces_the_declared_one():
+    first, second = backend("standard", 2.0), backend("standard", 3.0)
+    breaker = get_circuit_breaker(first.name)
+    for _ in range(breaker.minimum_calls):
+        breaker.record_success(8.0)
+    assert router(first, second).rank("normal") == [second, first]
+
+def test_cost_counts_against_a_backend():
+    cheap, pricey = backend("standard"), backend("standard", cost_per_1k_input=0.01, cost_per_1k_output=0.03)
+    assert router(pricey, cheap).rank("normal") == [cheap, pricey]
+
+def test_backends_with_an_open_circuit_are_left_out():
+    healthy, tripped = backend("standard"), backend("standard", 1.0)
+    breaker = get_circuit_breaker(tripped.name)
+    breaker.state = CircuitBreaker.OPEN
+    breaker.opened_at = breaker.clock()
+    assert router(healthy, tripped).rank("normal") == [healthy]
+
+def test_describe_reports_profiles_and_scores():
+    (described,) = router(backend("fast")).describe("short")
+    assert described["tier"] == "fast" and described["score"] == pytest.approx(3.0, abs=0.1)
+
+def test_registry_is_built_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", None)
+    monkeypatch.setattr(settings, "llm_backends", [
+        {"name": "local", "base_url": "http://127.0.0.1:8080/v1/", "model": "llama-3-8b", "tier": "fast", "expected_latency_seconds": 1.5}
+    ])
+    registry = build_backend_registry()
+    (local,) = registry.all()
+    assert registry.get("local") is local
+    assert isinstance(local, OpenAICompatibleBackend)
+    assert (local.model, local.tier, local.expected_latency_seconds) == ("llama-3-8b", "fast", 1.5)
+    asyncio.run(registry.aclose())
+
+def test_openai_compatible_backend_speaks_chat_completions():
+    requests = []
+
+    def server(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "One"}}, {"message": {"content": "Two"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}
+        })
+
+    async def complete():
+        local = OpenAICompatibleBackend("local", "llama-3-8b", base_url="http://127.0.0.1:8080/v1/", api_key="secret")
+        local.client = httpx.AsyncClient(base_url=local.client.base_url, headers=local.client.headers,
+                                          transport=httpx.MockTransport(server))
+        try:
+            return await local.complete([{"role": "user", "content": "Hi"}], max_tokens=50, n=2)
+        finally:
+            await local.aclose()
+
+    result = asyncio.run(complete())
+    assert result == {"contents": ["One", "Two"], "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}}
+    (request,) = requests
+    assert str(request.url) == "http://127.0.0.1:8080/v1/chat/completions"
+    assert request.headers["Authorization"] == "Bearer secret"
+    assert json.loads(request.content)["model"] == "llama-3-8b" and json.loads(request.content)["n"] == 2
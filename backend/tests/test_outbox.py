@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.database import EmailOutbox, EmailSend
+from app.services.events import EventBroker
+from app.services.outbox import OutboxDispatcher, enqueue_send
+
+class StubSender:
+    def __init__(self, result):
+        self.result = result
+        self.sent = []
+
+    async def send_email(self, **kwargs):
+        self.sent.append(kwargs)
+        return self.result
+
+class StubRecipients:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, db, email_send):
+        self.recorded.append(email_send.id)
+
+@pytest.fixture(autouse=True)
+def empty_outbox(db, monkeypatch):
+    # Tests claim entries themselves; the app's own dispatcher would race them
+    monkeypatch.setattr(settings, "outbox_dispatcher_enabled", False)
+    db.query(EmailOutbox).delete()
+    db.commit()
+
+@pytest.fixture
+def dispatcher():
+    return OutboxDispatcher(StubSender({"success": True}), EventBroker(), StubRecipients())
+
+def queue_send(db, user_id: int = 1, subject: str = "Hi", **fields) -> int:
+    email_send = EmailSend(user_id=user_id, from_account_id=1, to_list=["to@example.com"], subject=subject, html_body="<p>Hi</p>", **fields)
+    enqueue_send(db, email_send, "Hi", True)
+    db.commit()
+    return email_send.id
+
+def outbox_entry(db, send_id: int):
+    db.expire_all()
+    return db.query(EmailOutbox).filter(EmailOutbox.email_send_id == send_id).one_or_none()
+
+def test_claim_leases_the_entry_once(db, dispatcher):
+    send_id = queue_send(db)
+    claims = dispatcher._claim(10)
+    assert [claim.email_send.id for claim in claims] == [send_id]
+    assert claims[0].attempts == 1
+
+    entry = outbox_entry(db, send_id)
+    assert entry.lease_owner == claims[0].lease_owner
+    assert entry.available_at > datetime.utcnow() + dispatcher.lease - timedelta(seconds=5)
+    assert db.get(EmailSend, send_id).status == "sending"
+    # Leased entries are not handed to another dispatcher
+    assert dispatcher._claim(10) == []
+
+def test_scheduled_sends_are_not_claimed(db, dispatcher):
+    send_id = queue_send(db, send_at=datetime.utcnow() + timedelta(hours=1))
+    assert db.get(EmailSend, send_id).status == "scheduled"
+    assert dispatcher._claim(10) == []
+
+def test_success_removes_the_entry_and_records_recipients(db, dispatcher):
+    send_id = queue_send(db)
+    claim = dispatcher._claim(10)[0]
+    email_send = dispatcher._finish(claim, {"success": True})
+    assert email_send.status == "sent" and email_send.sent_at is not None
+    assert outbox_entry(db, send_id) is None
+    assert dispatcher.recipients.recorded == [send_id]
+
+def test_retryable_failure_backs_off(db, dispatcher, monkeypatch):
+    monkeypatch.setattr(settings, "outbox_retry_base_seconds", 30.0)
+    send_id = queue_send(db)
+    for attempt in (1, 2):
+        entry = outbox_entry(db, send_id)
+        entry.available_at = datetime.utcnow()
+        db.commit()
+        claim = dispatcher._claim(10)[0]
+        assert claim.attempts == attempt
+        started = datetime.utcnow()
+        email_send = dispatcher._finish(claim, {"success": False, "error": "throttled", "retryable": True})
+        assert email_send.status == "queued"
+
+        entry = outbox_entry(db, send_id)
+        assert entry.lease_owner is None and entry.last_error == "throttled"
+        delay = (entry.available_at - started).total_seconds()
+        assert 30 * 2 ** (attempt - 1) - 1 < delay < 30 * 2 ** (attempt - 1) + 5
+
+def test_gives_up_after_max_attempts(db, dispatcher, monkeypatch):
+    monkeypatch.setattr(settings, "outbox_max_attempts", 2)
+    send_id = queue_send(db)
+    for _ in range(2):
+        entry = outbox_entry(db, send_id)
+        entry.available_at = datetime.utcnow()
+        db.commit()
+        email_send = dispatcher._finish(dispatcher._claim(10)[0], {"success": False, "error": "throttled", "retryable": True})
+    assert email_send.status == "failed"
+    assert outbox_entry(db, send_id) is None
+
+def test_permanent_failure_is_not_retried(db, dispatcher):
+    send_id = queue_send(db)
+    email_send = dispatcher._finish(dispatcher._claim(10)[0], {"success": False, "error": "bad address", "retryable": False})
+    assert email_send.status == "failed"
+    assert outbox_entry(db, send_id) is None
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_loses(db, dispatcher):
+    send_id = queue_send(db)
+    stale = dispatcher._claim(10)[0]
+    # The first dispatcher died; its lease runs out
+    entry = outbox_entry(db, send_id)
+    entry.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    fresh = dispatcher._claim(10)[0]
+    assert fresh.lease_owner != stale.lease_owner and fresh.attempts == 2
+
+    # The stale owner's failure neither releases the entry nor changes the send
+    assert dispatcher._finish(stale, {"success": False, "error": "timeout", "retryable": True}) is None
+    assert outbox_entry(db, send_id).lease_owner == fresh.lease_owner
+    assert db.get(EmailSend, send_id).status == "sending"
+
+def test_send_completed_under_a_lost_lease_is_still_recorded(db, dispatcher):
+    send_id = queue_send(db)
+    stale = dispatcher._claim(10)[0]
+    entry = outbox_entry(db, send_id)
+    entry.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    dispatcher._claim(10)
+    email_send = dispatcher._finish(stale, {"success": True})
+    assert email_send is not None and email_send.status == "sent"
+
+def test_process_sends_and_publishes_status(db):
+    sender = StubSender({"success": True})
+    events = EventBroker()
+    dispatcher = OutboxDispatcher(sender, events, StubRecipients())
+    send_id = queue_send(db)
+    claim = dispatcher._claim(10)[0]
+    claim.oauth_account = object()
+
+    async def run():
+        async with events.subscribe(1) as queue:
+            await dispatcher._process(claim)
+            return [queue.get_nowait()["data"]["status"] for _ in range(queue.qsize())]
+
+    assert asyncio.run(run()) == ["sending", "sent"]
+    assert sender.sent[0]["to_emails"] == ["to@example.com"]
+    assert db.get(EmailSend, send_id).status == "sent"
+
+def test_queued_send_is_cancelled_by_deleting_it(db, client):
+    send_id = queue_send(db, client.get("/api/v1/auth/me").json()["id"], subject="Quarterly update")
+    assert client.get("/api/v1/search/", params={"q": "quarterly", "kind": "email"}).json()["total"] == 1
+    assert client.delete(f"/api/v1/email/sends/{send_id}").status_code == 200
+    assert outbox_entry(db, send_id) is None
+    assert db.get(EmailSend, send_id) is None
+    assert client.get("/api/v1/search/", params={"q": "quarterly", "kind": "email"}).json()["total"] == 0
+
+def test_send_being_sent_is_not_deleted_after_its_lease_runs_out(db, client, dispatcher):
+    send_id = queue_send(db, client.get("/api/v1/auth/me").json()["id"])
+    dispatcher._claim(10)
+    entry = outbox_entry(db, send_id)
+    entry.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    assert client.delete(f"/api/v1/email/sends/{send_id}").status_code == 409
+    assert outbox_entry(db, send_id) is not None
+    assert db.get(EmailSend, send_id).status == "sending"
+
+    # A leased entry whose send doesn't say "sending" is refused all the same
+    db.get(EmailSend, send_id).status = "queued"
+    db.commit()
+    assert client.delete(f"/api/v1/email/sends/{send_id}").status_code == 409
+    assert db.get(EmailSend, send_id) is not None
@@ -0,0 +1,63 @@
+from app.services.prompt_builder import COMPLETION_TOKENS, PromptBuilder
+from app.services.tokens import count_tokens, fit_to_budget
+
+CONTEXT = {
+    "company_name": "Acme",
+    "role": "SRE",
+    "candidate_summary": "Jane Doe. Scaled Kubernetes clusters. Built Go services.",
+    "job_description": "Run Kubernetes and Go services on AWS.",
+}
+
+def context(candidate_sentences: int, job_sentences: int):
+    return {
+        **CONTEXT,
+        "candidate_summary": " ".join(f"Led migration number {n} to Kubernetes." for n in range(candidate_sentences)),
+        "job_description": " ".join(f"Requirement {n}: operate Go services on AWS." for n in range(job_sentences)),
+    }
+
+def user_message(prompt):
+    return prompt["messages"][1]["content"]
+
+def test_small_context_is_sent_whole():
+    prompt = PromptBuilder(input_budget=2000).build(CONTEXT, "friendly", "short")
+    assert CONTEXT["candidate_summary"] in user_message(prompt)
+    assert CONTEXT["job_description"] in user_message(prompt)
+    assert "warm but professional" in user_message(prompt)
+    assert prompt["max_tokens"] == COMPLETION_TOKENS["short"]
+
+def test_prompt_tokens_count_the_messages_sent():
+    builder = PromptBuilder(input_budget=2000)
+    prompt = builder.build(CONTEXT, "professional", "normal")
+    counted = sum(count_tokens(message["content"]) + 4 for message in prompt["messages"])
+    assert prompt["prompt_tokens"] == counted
+
+def test_large_context_is_trimmed_to_the_budget():
+    prompt = PromptBuilder(input_budget=600).build(context(200, 200), "professional", "normal")
+    assert prompt["prompt_tokens"] <= 600
+    # Trimmed at sentence boundaries, keeping the first ones
+    assert "Led migration number 0 to Kubernetes." in user_message(prompt)
+    assert "Led migration number 199" not in user_message(prompt)
+
+def test_job_description_keeps_a_third_of_the_space():
+    prompt = PromptBuilder(input_budget=600).build(context(200, 200), "professional", "normal")
+    job = user_message(prompt).split("Job Description: ", 1)[1].split("\n\nREQUIREMENTS", 1)[0]
+    candidate = user_message(prompt).split("CANDIDATE INFORMATION:\n", 1)[1].split("\n\nJOB DETAILS", 1)[0]
+    # A third or more for the job leaves the candidate at most twice as much
+    assert count_tokens(job) > 50
+    assert count_tokens(candidate) <= 2 * count_tokens(job) + 10
+
+def test_short_job_description_leaves_the_rest_to_the_candidate():
+    prompt = PromptBuilder(input_budget=600).build(context(200, 1), "professional", "normal")
+    assert "Requirement 0: operate Go services on AWS." in user_message(prompt)
+    assert prompt["prompt_tokens"] > 500
+
+def test_variants_share_one_prompt_and_scale_the_completion():
+    prompt = PromptBuilder(input_budget=2000).build_variants(CONTEXT, ["professional", "enthusiastic"], "long")
+    assert prompt["max_tokens"] == 2 * COMPLETION_TOKENS["long"]
+    assert '1. "professional"' in user_message(prompt) and '2. "enthusiastic"' in user_message(prompt)
+
+def test_fit_to_budget_cuts_an_oversized_sentence_at_a_word():
+    text = "one two three four five six seven eight nine ten eleven twelve"
+    trimmed = fit_to_budget(text, 5)
+    assert text.startswith(trimmed) and 0 < count_tokens(trimmed) <= 5
+    assert fit_to_budget(text, 0) == ""
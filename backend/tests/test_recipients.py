@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.database import EmailSend
+from app.services.recipients import BloomFilter, RecipientHistory, normalize_address
+
+@pytest.fixture
+def user_id(client):
+    return client.get("/api/v1/auth/me").json()["id"]
+
+def sent(db, user_id: int, to, **fields) -> EmailSend:
+    email_send = EmailSend(user_id=user_id, from_account_id=1, to_list=to, subject="Hi", html_body="<p>Hi</p>", status="sent", **fields)
+    db.add(email_send)
+    db.flush()
+    RecipientHistory().record(db, email_send)
+    db.commit()
+    return email_send
+
+def test_addresses_are_normalized():
+    assert normalize_address("Jobs <Jobs@Acme.com>") == "jobs@acme.com"
+    assert normalize_address("  HR@Acme.com ") == "hr@acme.com"
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    addresses = [f"person{n}@example.com" for n in range(1000)]
+    for address in addresses:
+        bloom.add(address)
+    assert all(address in bloom for address in addresses)
+    false_positives = sum(f"stranger{n}@example.com" in bloom for n in range(10000))
+    assert false_positives < 300
+
+def test_contacted_addresses_are_reported_once(db, user_id):
+    history = RecipientHistory()
+    sent(db, user_id, ["Jobs <jobs@acme.com>"], cc_list=["hr@acme.com"])
+    sent(db, user_id, ["jobs@acme.com"])
+    assert history.already_contacted(db, user_id, ["JOBS@acme.com", "hr@acme.com", "new@acme.com"]) == ["hr@acme.com", "jobs@acme.com"]
+
+    found = history.history(db, user_id, "jobs@acme.com")
+    assert found["contacted"] and found["send_count"] == 2
+    assert history.history(db, user_id, "new@acme.com")["contacted"] is False
+
+def test_sends_after_the_filter_was_built_are_picked_up(db, user_id):
+    history = RecipientHistory()
+    assert history.already_contacted(db, user_id, ["later@acme.com"]) == []
+    # Recorded by another worker once this one's filter exists
+    sent(db, user_id, ["later@acme.com"])
+    assert history.already_contacted(db, user_id, ["later@acme.com"]) == ["later@acme.com"]
+
+def test_a_full_filter_is_rebuilt_larger(db, user_id):
+    history = RecipientHistory()
+    history.already_contacted(db, user_id, [])
+    capacity = history._users[user_id].bloom.capacity
+    sent(db, user_id, [f"person{n}@acme.com" for n in range(capacity + 1)])
+    assert history.already_contacted(db, user_id, ["person0@acme.com"]) == ["person0@acme.com"]
+    assert history._users[user_id].bloom.capacity > capacity
+
+def test_filter_hits_are_confirmed_after_a_send_is_deleted(db, user_id):
+    history = RecipientHistory()
+    email_send = sent(db, user_id, ["gone@acme.com"])
+    assert history.already_contacted(db, user_id, ["gone@acme.com"]) == ["gone@acme.com"]
+
+    history.forget_send(db, email_send)
+    db.commit()
+    # The filter still has the address; the table no longer does
+    assert "gone@acme.com" in history._users[user_id].bloom
+    assert history.already_contacted(db, user_id, ["gone@acme.com"]) == []
+
+def test_deleting_a_send_record_clears_its_recipients(db, client, user_id):
+    email_send = sent(db, user_id, ["once@acme.com"])
+    check = lambda: client.post("/api/v1/email/recipients/check", json={"addresses": ["once@acme.com"]}).json()["contacted"]
+    assert check() == ["once@acme.com"]
+
+    assert client.delete(f"/api/v1/email/sends/{email_send.id}").status_code == 200
+    assert check() == []
+    assert client.get("/api/v1/email/recipients/once@acme.com").json()["contacted"] is False
+
+def test_recipients_are_scoped_to_the_user(db, user_id):
+    sent(db, user_id, ["mine@acme.com"])
+    assert RecipientHistory().already_contacted(db, user_id + 1000, ["mine@acme.com"]) == []
+
+def test_rebuild_recreates_rows_from_sent_emails(db, user_id):
+    history = RecipientHistory()
+    email_send = sent(db, user_id, ["rebuilt@acme.com"], created_at=datetime.utcnow() - timedelta(days=1))
+    history.forget_send(db, email_send)
+    db.commit()
+    assert history.already_contacted(db, user_id, ["rebuilt@acme.com"]) == []
+
+    assert history.rebuild(db) >= 1
+    assert history.already_contacted(db, user_id, ["rebuilt@acme.com"]) == ["rebuilt@acme.com"]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.services.relevance import HashedVectorizer, RelevanceRanker, tokenize
+
+JOB = "Senior Go engineer to run Kubernetes clusters and PostgreSQL on AWS"
+
+def test_tokenize_drops_stop_words_and_keeps_symbols():
+    assert tokenize("Experience with C++ and C# for the team, Node.js") == ["c++", "c#", "node.js"]
+
+def test_vectors_are_stable_across_instances():
+    text = "Scaled Kubernetes clusters"
+    assert np.array_equal(HashedVectorizer().transform(text), HashedVectorizer().transform(text))
+    assert np.array_equal(HashedVectorizer().transform_many([text])[0], HashedVectorizer().transform(text))
+
+def test_scores_rank_overlapping_texts_first():
+    scores = RelevanceRanker().score(JOB, ["Baked sourdough bread", "Ran Kubernetes clusters on AWS", "Wrote Go services"])
+    assert scores[0] == 0
+    assert scores[1] > scores[2] > 0
+
+def test_job_vectors_are_memoized_and_evicted():
+    ranker = RelevanceRanker(cache_size=2)
+    first = ranker.job_vector(JOB)
+    assert ranker.job_vector(JOB) is first
+    assert not first.flags.writeable
+    ranker.job_vector("Python developer")
+    ranker.job_vector("Data analyst")
+    assert ranker.job_vector(JOB) is not first
+
+def test_select_keeps_the_best_within_top_k_and_the_token_budget():
+    texts = ["Baked sourdough bread", "Ran Kubernetes clusters on AWS", "Wrote Go services", "Tuned PostgreSQL on AWS"]
+    ranker = RelevanceRanker()
+    ranked = ranker.select(JOB, texts, top_k=10, token_budget=1000)
+    assert 0 not in ranked and sorted(ranked) == [1, 2, 3]
+    assert ranker.select(JOB, texts, top_k=1, token_budget=1000) == ranked[:1]
+    assert ranker.select(JOB, texts, top_k=10, token_budget=0) == []
+
+def test_unrelated_texts_only_fill_min_items_in_their_order():
+    texts = ["Baked bread", "Painted fences", "Ran Kubernetes clusters"]
+    assert RelevanceRanker().select(JOB, texts, top_k=3, token_budget=1000) == [2]
+    assert RelevanceRanker().select(JOB, texts, top_k=3, token_budget=1000, min_items=2) == [2, 0]
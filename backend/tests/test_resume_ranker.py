@@ -0,0 +1,69 @@
+from app.models.database import ParsedDocument
+from app.services.resume_ranker import resume_text
+
+BACKEND = "Skills\nGo, Kubernetes, Terraform\n\nExperience\nSite reliability engineer running Go services on Kubernetes clusters\n"
+FRONTEND = "Skills\nJavaScript, React, CSS\n\nExperience\nFrontend developer building React interfaces and design systems\n"
+POSTING = "We need an SRE to run Go services on Kubernetes with Terraform"
+
+def parse(client, body: str) -> int:
+    uploaded = client.post("/api/v1/files/upload", files={"file": ("resume.txt", f"Jane Doe\njane@example.com\n\n{body}".encode(), "text/plain")})
+    assert uploaded.status_code == 200
+    file_id = uploaded.json()["id"]
+    assert client.post(f"/api/v1/files/{file_id}/parse").status_code == 200
+    return file_id
+
+def rank(client, **fields):
+    response = client.post("/api/v1/ai/rank-resumes", json={"job_description": POSTING, **fields})
+    assert response.status_code == 200
+    return [result["file_id"] for result in response.json()["results"]]
+
+def test_resume_text_puts_skills_and_experience_first():
+    text = resume_text({
+        "skills": ["Go"],
+        "summary": "SRE",
+        "experiences": [{"title": "Engineer", "description": "Ran clusters", "highlights": ["Cut costs"]}],
+        "raw_text": "Everything"
+    })
+    assert text.split("\n") == ["Go", "SRE", "Engineer", "Ran clusters", "Cut costs", "Everything"]
+    assert not resume_text({}).strip()
+
+def test_best_match_ranks_first(client):
+    backend, frontend = parse(client, BACKEND), parse(client, FRONTEND)
+    assert rank(client) == [backend, frontend]
+    assert rank(client, limit=1) == [backend]
+    assert rank(client, file_ids=[frontend]) == [frontend]
+
+def test_new_documents_are_ranked_without_a_stale_matrix(client):
+    frontend = parse(client, FRONTEND)
+    assert rank(client) == [frontend]
+    backend = parse(client, BACKEND)
+    assert rank(client) == [backend, frontend]
+    assert client.delete(f"/api/v1/files/{backend}").status_code == 200
+    assert rank(client) == [frontend]
+
+def test_documents_parsed_before_vectors_were_stored_are_vectorized(client, db):
+    backend, frontend = parse(client, BACKEND), parse(client, FRONTEND)
+    db.query(ParsedDocument).filter(ParsedDocument.file_id.in_([backend, frontend])).update(
+        {ParsedDocument.resume_vector: None}, synchronize_session=False
+    )
+    db.commit()
+    assert rank(client) == [backend, frontend]
+
+    db.expire_all()
+    vectors = db.query(ParsedDocument.resume_vector).filter(ParsedDocument.file_id.in_([backend, frontend])).all()
+    assert all(vector is not None for vector, in vectors)
+
+def test_auto_drafts_from_the_best_matching_resume(client):
+    backend, frontend = parse(client, BACKEND), parse(client, FRONTEND)
+    request = {"job_description": POSTING, "company_name": "Acme", "role": "SRE", "auto": True}
+
+    response = client.post("/api/v1/ai/generate-email", json=request)
+    assert response.status_code == 200
+    assert response.json()["selected_file_id"] == backend
+
+    response = client.post("/api/v1/ai/generate-email", json={**request, "file_ids": [frontend]})
+    assert response.json()["selected_file_id"] == frontend
+
+def test_auto_needs_a_parsed_resume(client):
+    request = {"job_description": POSTING, "company_name": "Acme", "role": "SRE", "auto": True}
+    assert client.post("/api/v1/ai/generate-email", json=request).status_code == 404
@@ -0,0 +1,162 @@
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.database import EmailOutbox, EmailSend, OAuthAccount
+from app.services.events import EventBroker
+from app.services.outbox import enqueue_send
+from app.services.scheduler import SendScheduler, next_send_times, to_utc
+
+# Accounts of their own, so other tests' sends don't count against the quotas
+account_ids = itertools.count(900000)
+
+class StubOutbox:
+    def __init__(self):
+        self.notified = 0
+
+    def notify(self):
+        self.notified += 1
+
+@pytest.fixture(autouse=True)
+def no_background_sending(monkeypatch):
+    # The app's dispatcher and scheduler would release sends under the tests
+    monkeypatch.setattr(settings, "outbox_dispatcher_enabled", False)
+
+@pytest.fixture
+def limits(monkeypatch):
+    def set_limits(minute: int, daily: int = 0):
+        monkeypatch.setattr(settings, "email_account_minute_limit", minute)
+        monkeypatch.setattr(settings, "email_account_daily_limit", daily)
+    return set_limits
+
+def add_send(db, account_id: int, **fields) -> EmailSend:
+    email_send = EmailSend(user_id=1, from_account_id=account_id, to_list=["to@example.com"], subject="Hi", html_body="<p>Hi</p>", **fields)
+    db.add(email_send)
+    db.commit()
+    return email_send
+
+def schedule(db, account_id: int, send_at: datetime) -> int:
+    email_send = EmailSend(user_id=1, from_account_id=account_id, to_list=["to@example.com"], subject="Hi", html_body="<p>Hi</p>", send_at=send_at)
+    enqueue_send(db, email_send, "Hi", True)
+    db.commit()
+    return email_send.id
+
+def test_send_times_are_converted_to_naive_utc():
+    assert to_utc(datetime(2026, 7, 1, 9), "America/New_York") == datetime(2026, 7, 1, 13)
+    assert to_utc(datetime(2026, 1, 1, 9), "America/New_York") == datetime(2026, 1, 1, 14)
+    assert to_utc(datetime.fromisoformat("2026-07-01T09:00:00+02:00"), "America/New_York") == datetime(2026, 7, 1, 7)
+    assert to_utc(datetime(2026, 7, 1, 9)) == datetime(2026, 7, 1, 9)
+    with pytest.raises(ValueError):
+        to_utc(datetime(2026, 7, 1, 9), "Mars/Olympus_Mons")
+
+def test_sends_under_the_limits_start_now(db, limits):
+    limits(minute=3)
+    now = datetime.utcnow()
+    assert next_send_times(db, next(account_ids), now, 3) == [now] * 3
+    limits(minute=0)
+    assert next_send_times(db, next(account_ids), now, 2) == [now] * 2
+
+def test_sends_over_the_minute_limit_wait_for_the_window(db, limits):
+    limits(minute=2)
+    account_id = next(account_ids)
+    now = datetime.utcnow()
+    add_send(db, account_id, status="sent", sent_at=now - timedelta(seconds=50))
+    add_send(db, account_id, status="sending")
+
+    first, second, third = next_send_times(db, account_id, now, 3)
+    # The delivered send leaves the window first, then the one in flight
+    assert first == now - timedelta(seconds=50) + timedelta(minutes=1)
+    assert second == now + timedelta(minutes=1)
+    assert third == first + timedelta(minutes=1)
+
+def test_daily_limit_applies_alongside_the_minute_limit(db, limits):
+    limits(minute=10, daily=2)
+    account_id = next(account_ids)
+    now = datetime.utcnow()
+    sent_at = [now - timedelta(hours=20), now - timedelta(hours=2)]
+    for at in sent_at:
+        add_send(db, account_id, status="sent", sent_at=at)
+    assert next_send_times(db, account_id, now, 2) == [at + timedelta(days=1) for at in sent_at]
+
+def test_due_sends_over_the_quota_are_deferred(db, limits):
+    limits(minute=1)
+    account_id = next(account_ids)
+    send_ids = [schedule(db, account_id, datetime.utcnow() + timedelta(hours=1)) for _ in range(2)]
+    scheduler = SendScheduler(StubOutbox(), EventBroker())
+
+    now = datetime.utcnow()
+    released, deferred = scheduler._release([(now, send_id, account_id) for send_id in send_ids])
+    assert [email_send.id for email_send in released] == [send_ids[0]]
+    assert released[0].status == "queued"
+    (at, send_id, deferred_account_id), = deferred
+    assert (send_id, deferred_account_id) == (send_ids[1], account_id)
+    assert now + timedelta(seconds=55) < at < now + timedelta(seconds=65)
+
+    db.expire_all()
+    assert db.query(EmailOutbox.available_at).filter(EmailOutbox.email_send_id == send_ids[0]).scalar() is not None
+    assert db.query(EmailOutbox.available_at).filter(EmailOutbox.email_send_id == send_ids[1]).scalar() is None
+    assert db.get(EmailSend, send_ids[1]).status == "scheduled"
+
+def test_cancelled_sends_are_not_released(db, limits):
+    limits(minute=0)
+    account_id = next(account_ids)
+    send_id = schedule(db, account_id, datetime.utcnow() + timedelta(hours=1))
+    db.get(EmailSend, send_id).status = "cancelled"
+    db.commit()
+    released, deferred = SendScheduler(StubOutbox(), EventBroker())._release([(datetime.utcnow(), send_id, account_id)])
+    assert released == [] and deferred == []
+
+def test_due_sends_are_loaded_a_page_at_a_time(db):
+    start = datetime(2100, 1, 1)
+    account_id = next(account_ids)
+    send_ids = [schedule(db, account_id, start + timedelta(minutes=minute)) for minute in (3, 1, 2, 1)]
+    scheduler = SendScheduler(StubOutbox(), EventBroker())
+    # Rows scheduled by other tests come before the range under test
+    scheduler._cursor = (start - timedelta(seconds=1), 0)
+
+    until = start + timedelta(minutes=10)
+    first = scheduler._load(until, 3)
+    assert [send_id for send_id, _, _ in first] == [send_ids[1], send_ids[3], send_ids[2]]
+    assert scheduler._loaded_until == start + timedelta(minutes=2)
+    second = scheduler._load(until, 3)
+    assert [send_id for send_id, _, _ in second] == [send_ids[0]]
+    assert scheduler._loaded_until == until
+
+def test_tick_releases_due_sends_and_holds_the_rest(db, limits):
+    limits(minute=0)
+    account_id = next(account_ids)
+    outbox = StubOutbox()
+    scheduler = SendScheduler(outbox, EventBroker())
+    due_id = schedule(db, account_id, datetime.utcnow() + timedelta(hours=1))
+    later_id = schedule(db, account_id, datetime.utcnow() + timedelta(hours=1))
+    # Pushed directly: a rescan would also pick up other tests' sends
+    scheduler._rescan_at = datetime.max
+    scheduler._loaded_until = datetime.max
+    scheduler._push(datetime.utcnow() - timedelta(seconds=1), due_id, account_id)
+    scheduler._push(datetime.utcnow() + timedelta(minutes=2), later_id, account_id)
+
+    asyncio.run(scheduler._tick())
+    assert outbox.notified == 1
+    db.expire_all()
+    assert db.get(EmailSend, due_id).status == "queued"
+    assert db.get(EmailSend, later_id).status == "scheduled"
+    assert [send_id for _, send_id, _ in scheduler._heap] == [later_id]
+
+def test_send_over_the_quota_is_scheduled(db, client, limits):
+    limits(minute=1)
+    user_id = client.get("/api/v1/auth/me").json()["id"]
+    account = OAuthAccount(id=next(account_ids), user_id=user_id, provider="google", provider_user_id="1", email="me@gmail.com")
+    db.add(account)
+    db.commit()
+    add_send(db, account.id, status="sent", sent_at=datetime.utcnow() - timedelta(seconds=30))
+
+    response = client.post("/api/v1/email/send", json={
+        "from_account_id": account.id, "to": ["jobs@example.com"], "subject": "Hi", "html_body": "<p>Hi</p>"
+    })
+    assert response.status_code == 202
+    assert response.json()["status"] == "scheduled"
+    send_at = datetime.fromisoformat(response.json()["send_at"])
+    assert datetime.utcnow() + timedelta(seconds=20) < send_at < datetime.utcnow() + timedelta(seconds=35)
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.database import upgrade_schema
+from app.models.database import AIDraft, Base, EmailOutbox, EmailSend, ParsedDocument, Template
+from app.services.search import get_search_index
+
+# Tables as the first release created them
+OLD_TABLES = [
+    "CREATE TABLE ai_drafts (id INTEGER PRIMARY KEY, user_id INTEGER, inputs_json JSON NOT NULL, subject VARCHAR NOT NULL,"
+    " html_body TEXT NOT NULL, plain_body TEXT NOT NULL, model_meta JSON, created_at DATETIME)",
+    "CREATE TABLE parsed_documents (id INTEGER PRIMARY KEY, file_id INTEGER, user_id INTEGER, json_extraction JSON NOT NULL,"
+    " created_at DATETIME)",
+    "CREATE TABLE templates (id INTEGER PRIMARY KEY, user_id INTEGER, name VARCHAR NOT NULL, subject_template VARCHAR NOT NULL,"
+    " body_template TEXT NOT NULL, is_public BOOLEAN, created_at DATETIME)",
+    "CREATE TABLE email_sends (id INTEGER PRIMARY KEY, user_id INTEGER, draft_id INTEGER, from_account_id INTEGER,"
+    " to_list JSON NOT NULL, cc_list JSON, bcc_list JSON, subject VARCHAR NOT NULL, html_body TEXT NOT NULL,"
+    " provider_response JSON, status VARCHAR, created_at DATETIME)",
+    # As the outbox first shipped, before scheduled sends
+    "CREATE TABLE email_outbox (id INTEGER PRIMARY KEY, email_send_id INTEGER NOT NULL UNIQUE REFERENCES email_sends (id),"
+    " payload JSON NOT NULL, attempts INTEGER NOT NULL, available_at DATETIME NOT NULL, lease_owner VARCHAR,"
+    " last_error TEXT, created_at DATETIME)",
+    "CREATE INDEX ix_email_outbox_available ON email_outbox (available_at)",
+    "CREATE INDEX ix_email_outbox_id ON email_outbox (id)",
+]
+
+def old_database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for statement in OLD_TABLES:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "INSERT INTO ai_drafts (id, user_id, inputs_json, subject, html_body, plain_body, created_at)"
+            " VALUES (1, 1, '{}', 'Hi', '<p>Hi</p>', 'Hi', '2024-01-01 00:00:00')"
+        ))
+        connection.execute(text(
+            "INSERT INTO parsed_documents (id, file_id, user_id, json_extraction, created_at)"
+            " VALUES (1, 1, 1, '{}', '2024-01-02 00:00:00')"
+        ))
+        connection.execute(text(
+            "INSERT INTO templates (id, user_id, name, subject_template, body_template, is_public, created_at)"
+            " VALUES (1, 1, 'Intro', 'Hi', 'Hello', 0, '2024-01-03 00:00:00')"
+        ))
+        for send_id, status in ((1, "sent"), (2, "queued")):
+            connection.execute(text(
+                "INSERT INTO email_sends (id, user_id, from_account_id, to_list, subject, html_body, status, created_at)"
+                f" VALUES ({send_id}, 1, 1, '[]', 'Hi', 'Hello', '{status}', '2024-01-04 00:00:00')"
+            ))
+        connection.execute(text(
+            "INSERT INTO email_outbox (id, email_send_id, payload, attempts, available_at)"
+            " VALUES (1, 2, '{}', 0, '2024-01-04 00:00:00')"
+        ))
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def columns(engine, table):
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+def test_adds_missing_columns_and_their_indexes(tmp_path):
+    engine = old_database(tmp_path / "old.db")
+    added = upgrade_schema(engine)
+    assert {"ai_drafts.variant_group", "ai_drafts.variant_label"} <= set(added)
+    assert {"variant_group", "variant_label"} <= columns(engine, "ai_drafts")
+    assert "ix_ai_drafts_variant_group" in {index["name"] for index in inspect(engine).get_indexes("ai_drafts")}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT subject, variant_group FROM ai_drafts")).one() == ("Hi", None)
+
+def test_is_a_no_op_on_a_current_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    Base.metadata.create_all(bind=engine)
+    assert upgrade_schema(engine) == []
+    engine = old_database(tmp_path / "old.db")
+    upgrade_schema(engine)
+    assert upgrade_schema(engine) == []
+
+def test_updated_at_starts_from_created_at(tmp_path):
+    engine = old_database(tmp_path / "old.db")
+    assert {"parsed_documents.updated_at", "templates.updated_at"} <= set(upgrade_schema(engine))
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT updated_at FROM parsed_documents")).scalar() == "2024-01-02 00:00:00"
+        assert connection.execute(text("SELECT updated_at FROM templates")).scalar() == "2024-01-03 00:00:00"
+
+def test_resume_vector_is_left_for_the_ranker_to_fill(tmp_path):
+    engine = old_database(tmp_path / "old.db")
+    assert "parsed_documents.resume_vector" in upgrade_schema(engine)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT resume_vector FROM parsed_documents")).scalar() is None
+
+def test_email_sends_get_send_and_sent_times(tmp_path):
+    engine = old_database(tmp_path / "old.db")
+    assert {"email_sends.send_at", "email_sends.sent_at"} <= set(upgrade_schema(engine))
+    indexes = {index["name"] for index in inspect(engine).get_indexes("email_sends")}
+    assert {"ix_email_sends_status_send_at", "ix_email_sends_account_sent_at"} <= indexes
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT status, send_at, sent_at FROM email_sends ORDER BY id")).all()
+    # Sends made before the column existed count toward quotas from when they were created
+    assert rows == [("sent", None, "2024-01-04 00:00:00"), ("queued", None, None)]
+
+def test_outbox_available_at_becomes_nullable(tmp_path):
+    engine = old_database(tmp_path / "old.db")
+    assert "email_outbox.available_at" in upgrade_schema(engine)
+    available_at = next(column for column in inspect(engine).get_columns("email_outbox") if column["name"] == "available_at")
+    assert available_at["nullable"]
+    assert "ix_email_outbox_available" in {index["name"] for index in inspect(engine).get_indexes("email_outbox")}
+    with engine.begin() as connection:
+        assert connection.execute(text("SELECT email_send_id, available_at FROM email_outbox")).one() == (2, "2024-01-04 00:00:00")
+        # A scheduled send has no available_at yet
+        connection.execute(text("INSERT INTO email_outbox (email_send_id, payload, attempts) VALUES (1, '{}', 0)"))
+
+def test_init_db_brings_an_old_database_up_to_date(tmp_path, monkeypatch):
+    engine = old_database(tmp_path / "old.db")
+    monkeypatch.setattr(database, "engine", engine)
+    database.init_db()
+
+    session = sessionmaker(bind=engine)()
+    try:
+        # Every model loads the rows written before the upgrade
+        assert [draft.variant_group for draft in session.query(AIDraft)] == [None]
+        assert session.query(ParsedDocument).one().updated_at == datetime(2024, 1, 2)
+        assert session.query(Template).one().updated_at == datetime(2024, 1, 3)
+        assert [send.sent_at for send in session.query(EmailSend).order_by(EmailSend.id)] == [datetime(2024, 1, 4), None]
+
+        # and writes the new columns, indexing new drafts for search
+        session.add(AIDraft(user_id=1, inputs_json={}, subject="Platform role", html_body="<p>Hi</p>", plain_body="Hi",
+                            variant_group="group", variant_label="formal"))
+        scheduled = EmailSend(user_id=1, from_account_id=1, to_list=["to@example.com"], subject="Later", html_body="Hi",
+                              status="scheduled", send_at=datetime(2030, 1, 1))
+        session.add(scheduled)
+        session.flush()
+        session.add(EmailOutbox(email_send_id=scheduled.id, payload={}, attempts=0, available_at=None))
+        session.commit()
+
+        with engine.connect() as connection:
+            results = get_search_index(engine).search(connection, 1, "platform")["results"]
+        assert [result["subject"] for result in results] == ["Platform role"]
+    finally:
+        session.close()
@@ -0,0 +1,61 @@
+import uuid
+
+from app.database import engine
+from app.services.search import make_snippet, query_terms, rebuild_search_index
+
+EXTRACTED = {"contact": {"name": "Jane Doe"}, "skills": ["Go"], "raw_text": "Jane Doe Go"}
+
+def generate(client, company: str, role: str = "SRE") -> int:
+    response = client.post("/api/v1/ai/generate-email", json={
+        "extracted_data": EXTRACTED, "job_description": "Go services", "company_name": company, "role": role
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def search(client, q: str, **params):
+    response = client.get("/api/v1/search/", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+def company() -> str:
+    # Letters only, so the tokenizer keeps it as one term
+    return "Zq" + "".join(chr(ord("a") + int(digit, 16) % 26) for digit in uuid.uuid4().hex[:10])
+
+def test_new_drafts_are_found_and_deleted_ones_are_not(client):
+    name = company()
+    kept, dropped = generate(client, name), generate(client, name, "Platform Engineer")
+    assert {result["id"] for result in search(client, name)["results"]} == {kept, dropped}
+
+    assert client.delete(f"/api/v1/ai/drafts/{dropped}").status_code == 200
+    found = search(client, name)
+    assert found["total"] == 1 and [result["id"] for result in found["results"]] == [kept]
+
+def test_results_are_scoped_to_the_user(client):
+    name = company()
+    generate(client, name)
+    email = f"{uuid.uuid4().hex}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "pw", "name": "Other"})
+    token = client.post("/api/v1/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    assert search(client, name)["total"] == 0
+
+def test_last_term_matches_as_a_prefix_and_kind_filters(client):
+    name = company()
+    draft_id = generate(client, name)
+    assert [result["id"] for result in search(client, name[:5])["results"]] == [draft_id]
+    assert search(client, name, kind="email")["total"] == 0
+    assert search(client, name, kind="draft")["total"] == 1
+    assert client.get("/api/v1/search/", params={"q": name, "kind": "memo"}).status_code == 400
+
+def test_rebuild_restores_every_record(client):
+    name = company()
+    draft_id = generate(client, name)
+    assert rebuild_search_index(engine) >= 1
+    assert [result["id"] for result in search(client, name)["results"]] == [draft_id]
+
+def test_query_terms_and_snippets():
+    assert query_terms('Go "k8s"  AND-ops') == ["go", "k8s", "and", "ops"]
+    body = "filler " * 40 + "Built Kubernetes operators <fast>" + " tail" * 40
+    snippet = make_snippet(body, ["go", "kubernetes"])
+    assert snippet.startswith("... ") and snippet.endswith(" ...")
+    assert "Built <mark>Kubernetes</mark> operators &lt;fast&gt;" in snippet
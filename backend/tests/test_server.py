@@ -0,0 +1,18 @@
+import logging
+
+from app import server
+from app.config import settings
+
+def test_warns_about_memory_events_with_several_workers(caplog, monkeypatch):
+    monkeypatch.setattr(settings, "event_backend", "memory")
+    with caplog.at_level(logging.WARNING, logger="app.server"):
+        server.check_event_backend(1)
+        assert not caplog.records
+        server.check_event_backend(4)
+    assert "EVENT_BACKEND=redis" in caplog.text
+
+def test_redis_events_work_with_several_workers(caplog, monkeypatch):
+    monkeypatch.setattr(settings, "event_backend", "redis")
+    with caplog.at_level(logging.WARNING, logger="app.server"):
+        server.check_event_backend(4)
+    assert not caplog.records
@@ -0,0 +1,62 @@
+import uuid
+
+from app.services.skill_index import newest_ids, normalize_skill, to_bitmap
+
+def resume(skills: str) -> bytes:
+    return f"Jane Doe\njane@example.com\n\nSkills\n{skills}\n".encode()
+
+def parse(client, skills: str) -> int:
+    uploaded = client.post("/api/v1/files/upload", files={"file": ("resume.txt", resume(skills), "text/plain")})
+    assert uploaded.status_code == 200
+    file_id = uploaded.json()["id"]
+    assert client.post(f"/api/v1/files/{file_id}/parse").status_code == 200
+    return file_id
+
+def find(client, **params):
+    response = client.get("/api/v1/skills/documents", params=params)
+    assert response.status_code == 200
+    found = response.json()
+    return found["total"], [document["file_id"] for document in found["documents"]]
+
+def test_skill_names_are_normalized():
+    assert normalize_skill("K8s") == "kubernetes"
+    assert normalize_skill("  Rust  ") == "rust"
+    assert normalize_skill("") is None
+    assert normalize_skill(None) is None
+
+def test_bitmaps_list_newest_ids_first():
+    bits = to_bitmap([3, 9, 200])
+    assert bits == (1 << 3) | (1 << 9) | (1 << 200)
+    assert to_bitmap([]) == 0
+    assert newest_ids(bits, 2) == [200, 9]
+    assert newest_ids(bits, 10, offset=1) == [9, 3]
+
+def test_documents_are_found_by_all_and_any_skills(client):
+    platform = parse(client, "Python, Go, Kubernetes")
+    cloud = parse(client, "Python, AWS")
+
+    assert find(client, all=["python"]) == (2, [cloud, platform])
+    assert find(client, all=["python", "go"]) == (1, [platform])
+    assert find(client, any=["aws", "go"]) == (2, [cloud, platform])
+    assert find(client, all=["python"], any=["aws"]) == (1, [cloud])
+    # Aliases resolve to the same skill
+    assert find(client, all=["k8s"]) == (1, [platform])
+    assert find(client, all=["python"], limit=1, offset=1) == (2, [platform])
+    assert find(client, all=["cobol"]) == (0, [])
+
+def test_deleted_documents_leave_the_index(client):
+    kept, dropped = parse(client, "Go"), parse(client, "Go")
+    assert find(client, all=["go"]) == (2, [dropped, kept])
+    assert client.delete(f"/api/v1/files/{dropped}").status_code == 200
+    assert find(client, all=["go"]) == (1, [kept])
+
+def test_results_are_scoped_to_the_user(client):
+    parse(client, "Go")
+    email = f"{uuid.uuid4().hex}@example.com"
+    client.post("/api/v1/auth/register", json={"email": email, "password": "pw", "name": "Other"})
+    token = client.post("/api/v1/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    assert find(client, all=["go"]) == (0, [])
+
+def test_a_skill_is_required(client):
+    assert client.get("/api/v1/skills/documents").status_code == 400
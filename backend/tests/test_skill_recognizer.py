@@ -0,0 +1,130 @@
+import os
+import pathlib
+import pickle
+
+from app.services.skill_recognizer import SkillRecognizer, get_skill_recognizer, parse_taxonomy, tokenize
+
+TAXONOMY = """
+# Languages
+Python|py3
+=Go|golang
+=R
+C++|cpp
+Node.js|nodejs
+Google Cloud|gcp
+Google Cloud Platform
+Machine Learning|ml
+Kubernetes|k8s
+"""
+
+def recognizer() -> SkillRecognizer:
+    return SkillRecognizer(parse_taxonomy(TAXONOMY.splitlines()))
+
+def names(text: str):
+    return [name for name, _, _ in recognizer().find(text)]
+
+def test_parse_taxonomy_skips_comments_and_blank_lines():
+    assert parse_taxonomy(TAXONOMY.splitlines())[:2] == [("Python", ["py3"]), ("=Go", ["golang"])]
+
+def test_tokenize_keeps_symbols_in_skill_names():
+    assert tokenize("C++, C#, .NET and Node.js; scikit-learn") == ["C++", "C#", ".NET", "and", "Node.js", "scikit", "learn"]
+
+def test_finds_names_and_aliases_with_offsets():
+    text = "Built k8s operators in golang and Python."
+    assert recognizer().find(text) == [
+        ("Kubernetes", text.index("k8s"), text.index("k8s") + 3),
+        ("Go", text.index("golang"), text.index("golang") + 6),
+        ("Python", text.index("Python"), text.index("Python") + 6),
+    ]
+
+def test_case_sensitive_names_need_their_capitalisation():
+    assert names("Wrote Go services") == ["Go"]
+    assert names("ready to go live") == []
+    assert names("Statistics in R.") == ["R"]
+    assert names("r and d") == []
+
+def test_lone_letters_joined_to_words_are_not_skills():
+    assert names("Presented to R-level staff, R's") == []
+
+def test_longest_match_wins_at_the_same_start():
+    assert names("Deployed on Google Cloud Platform") == ["Google Cloud Platform"]
+    assert names("Deployed on Google Cloud too") == ["Google Cloud"]
+
+def test_patterns_sharing_a_prefix_match_after_a_failed_longer_one():
+    # "Google Cloud" is a prefix of a longer pattern that fails at "Run"
+    assert names("Google Cloud Run and C++ on Google Cloud Platform") == ["Google Cloud", "C++", "Google Cloud Platform"]
+
+def test_matches_in_the_middle_of_other_patterns():
+    # A skill starting inside a longer pattern that fails is found through the failure links
+    taxonomy = [("Ab Cd Ef", []), ("Cd Gh", []), ("Ab Cd", [])]
+    assert [name for name, _, _ in SkillRecognizer(taxonomy).find("ab cd gh")] == ["Ab Cd"]
+    assert [name for name, _, _ in SkillRecognizer(taxonomy[:2]).find("ab cd gh")] == ["Cd Gh"]
+
+def test_mentions_are_counted_most_mentioned_first():
+    text = "Python scripts. Kubernetes clusters. More k8s, and python again; py3 too."
+    assert recognizer().mentions(text) == [
+        {"name": "Python", "count": 3, "positions": [0, text.index("python"), text.index("py3")]},
+        {"name": "Kubernetes", "count": 2, "positions": [text.index("Kubernetes"), text.index("k8s")]},
+    ]
+
+def test_canonical_resolves_aliases_ignoring_case():
+    assert recognizer().canonical("GOLANG") == "Go"
+    assert recognizer().canonical("nodejs") == "Node.js"
+    assert recognizer().canonical("Rust") is None
+
+def test_load_caches_the_compiled_automaton(tmp_path):
+    taxonomy = tmp_path / "skills.txt"
+    taxonomy.write_text(TAXONOMY)
+    cache_dir = tmp_path / "cache"
+    compiled = SkillRecognizer.load(str(taxonomy), str(cache_dir))
+    cached_files = os.listdir(cache_dir)
+    assert len(cached_files) == 1
+
+    loaded = SkillRecognizer.load(str(taxonomy), str(cache_dir))
+    assert loaded.find("k8s and Go") == compiled.find("k8s and Go")
+
+    # A changed taxonomy gets its own cache entry
+    taxonomy.write_text(TAXONOMY + "Rust\n")
+    assert SkillRecognizer.load(str(taxonomy), str(cache_dir)).canonical("rust") == "Rust"
+    assert len(os.listdir(cache_dir)) == 2
+
+def test_unreadable_cache_is_rebuilt(tmp_path):
+    taxonomy = tmp_path / "skills.txt"
+    taxonomy.write_text(TAXONOMY)
+    cache_dir = tmp_path / "cache"
+    SkillRecognizer.load(str(taxonomy), str(cache_dir))
+    (cache_path,) = cache_dir.iterdir()
+    cache_path.write_bytes(b"not a cache")
+    assert SkillRecognizer.load(str(taxonomy), str(cache_dir)).canonical("k8s") == "Kubernetes"
+
+def test_cache_body_must_match_its_header(tmp_path):
+    taxonomy = tmp_path / "skills.txt"
+    taxonomy.write_text(TAXONOMY)
+    cache_dir = tmp_path / "cache"
+    SkillRecognizer.load(str(taxonomy), str(cache_dir))
+    (cache_path,) = cache_dir.iterdir()
+    cache_path.write_bytes(cache_path.read_bytes().replace(b'"Kubernetes"', b'"Kubernetez"'))
+    assert SkillRecognizer.load(str(taxonomy), str(cache_dir)).canonical("k8s") == "Kubernetes"
+
+class Planted:
+    def __init__(self, marker):
+        self.marker = marker
+
+    def __reduce__(self):
+        return pathlib.Path.touch, (pathlib.Path(self.marker),)
+
+def test_cache_is_never_unpickled(tmp_path):
+    taxonomy = tmp_path / "skills.txt"
+    taxonomy.write_text(TAXONOMY)
+    cache_dir = tmp_path / "cache"
+    SkillRecognizer.load(str(taxonomy), str(cache_dir))
+    (cache_path,) = cache_dir.iterdir()
+    marker = tmp_path / "ran"
+    cache_path.write_bytes(pickle.dumps(Planted(str(marker))))
+    assert SkillRecognizer.load(str(taxonomy), str(cache_dir)).canonical("k8s") == "Kubernetes"
+    assert not marker.exists()
+
+def test_bundled_taxonomy():
+    skills = get_skill_recognizer()
+    text = "Senior engineer: Python, Golang, K8s, PostgreSQL and scikit-learn. C-level reporting. R&D team."
+    assert [name for name, _, _ in skills.find(text)] == ["Python", "Go", "Kubernetes", "PostgreSQL", "scikit-learn"]
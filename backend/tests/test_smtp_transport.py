@@ -0,0 +1,187 @@
+import asyncio
+from email import message_from_bytes
+
+import pytest
+
+from app.config import settings
+from app.models.database import OAuthAccount
+from app.services.email_sender import EmailSender
+from app.services.file_storage import FileStorage
+from app.services.smtp_transport import SMTPTransport
+
+class SMTPServer:
+    """A minimal SMTP server: XOAUTH2, PIPELINING, and rejects recipients containing "reject"."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.messages = []
+        self.connections = []
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.drop()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def drop(self):
+        for writer in self.connections:
+            writer.close()
+        self.connections.clear()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.sessions += 1
+        self.connections.append(writer)
+        reply = lambda line: writer.write(line.encode() + b"\r\n")
+        reply("220 stub ESMTP")
+        sender, recipients = None, []
+        try:
+            while line := (await reader.readline()).decode().rstrip("\r\n"):
+                verb = line.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    reply("250-stub")
+                    reply("250-PIPELINING")
+                    reply("250 AUTH XOAUTH2")
+                elif verb == "AUTH":
+                    reply("235 2.7.0 Accepted")
+                elif verb == "MAIL":
+                    sender, recipients = line[len("MAIL FROM:<"):-1], []
+                    reply("250 OK")
+                elif verb == "RCPT":
+                    recipient = line[len("RCPT TO:<"):-1]
+                    if "reject" in recipient:
+                        reply("550 No such user")
+                    else:
+                        recipients.append(recipient)
+                        reply("250 OK")
+                elif verb == "DATA":
+                    if not recipients:
+                        reply("554 No valid recipients")
+                        continue
+                    reply("354 Go ahead")
+                    data = b""
+                    while (chunk := await reader.readline()) != b".\r\n":
+                        data += chunk[1:] if chunk.startswith(b"..") else chunk
+                    self.messages.append((sender, recipients, data))
+                    reply("250 2.0.0 OK queued")
+                elif verb == "RSET":
+                    sender, recipients = None, []
+                    reply("250 OK")
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    break
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+def message(to, **fields) -> dict:
+    return {
+        "to_emails": to, "cc_emails": [], "bcc_emails": ["me+sent@gmail.com"], "subject": "Application",
+        "html_body": "<p>Hello</p>", "plain_body": "Hello", **fields
+    }
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """Runs ``scenario(transport, server)`` against a local server, in one event loop."""
+    monkeypatch.setattr(settings, "smtp_starttls", False)
+    monkeypatch.setattr(settings, "smtp_gmail_host", "127.0.0.1")
+
+    def run(scenario):
+        async def main():
+            server = SMTPServer()
+            monkeypatch.setattr(settings, "smtp_gmail_port", await server.start())
+            sender = EmailSender(FileStorage())
+
+            async def access_token(oauth_account):
+                return "token"
+            sender.access_token = access_token
+            transport = SMTPTransport(sender)
+            try:
+                return await scenario(transport, server)
+            finally:
+                await transport.aclose()
+                await sender.aclose()
+                await server.stop()
+        return asyncio.run(main())
+    return run
+
+def gmail():
+    return OAuthAccount(id=1, provider="google", email="me@gmail.com")
+
+def test_batch_is_pipelined_over_one_session(smtp):
+    async def scenario(transport, server):
+        results = await transport.send_batch(gmail(), [
+            message(["a@example.com"], plain_body=".leading dot", send_as_html=False),
+            message(["reject@example.com"]),
+            message(["b@example.com", "reject-too@example.com"]),
+        ])
+        return results, server
+
+    results, server = smtp(scenario)
+    assert [result["success"] for result in results] == [True, True, True]
+    assert results[2]["rejected_recipients"] == ["reject-too@example.com"]
+    assert server.sessions == 1
+
+    sender, recipients, data = server.messages[0]
+    assert (sender, recipients) == ("me@gmail.com", ["a@example.com", "me+sent@gmail.com"])
+    sent = message_from_bytes(data)
+    assert sent["Bcc"] is None
+    plain = next(part for part in sent.walk() if part.get_content_type() == "text/plain")
+    assert plain.get_payload(decode=True).startswith(b".leading dot")
+
+def test_message_with_every_recipient_rejected_fails_alone(smtp):
+    async def scenario(transport, server):
+        return await transport.send_batch(gmail(), [
+            message(["reject@example.com"], bcc_emails=[]),
+            message(["a@example.com"]),
+        ]), server
+
+    results, server = smtp(scenario)
+    assert not results[0]["success"] and not results[0]["retryable"]
+    assert results[1]["success"]
+    assert len(server.messages) == 1
+
+def test_sessions_are_pooled_and_replaced_when_dropped(smtp):
+    async def scenario(transport, server):
+        first = await transport.send_email(gmail(), **message(["a@example.com"]))
+        second = await transport.send_email(gmail(), **message(["b@example.com"]))
+        sessions = server.sessions
+        # The server drops the pooled session; the next send reconnects
+        server.drop()
+        await asyncio.sleep(0.05)
+        third = await transport.send_email(gmail(), **message(["c@example.com"]))
+        return [first, second, third], sessions, server.sessions
+
+    results, before, after = smtp(scenario)
+    assert all(result["success"] for result in results)
+    assert (before, after) == (1, 2)
+
+def test_failed_connects_back_off(smtp, monkeypatch):
+    monkeypatch.setattr(settings, "smtp_backoff_base_seconds", 60.0)
+
+    async def scenario(transport, server):
+        await server.stop()
+        first = await transport.send_email(gmail(), **message(["a@example.com"]))
+        second = await transport.send_email(gmail(), **message(["a@example.com"]))
+        return first, second
+
+    first, second = smtp(scenario)
+    assert not first["success"] and first["retryable"]
+    assert "backing off" in second["error"]
+
+def test_other_providers_use_the_rest_sender(smtp):
+    async def scenario(transport, server):
+        sent = []
+
+        async def send_email(**kwargs):
+            sent.append(kwargs["oauth_account"].provider)
+            return {"success": True}
+        transport.email_sender.send_email = send_email
+        await transport.send_email(OAuthAccount(id=2, provider="microsoft", email="me@outlook.com"), **message(["a@example.com"]))
+        return sent, server.sessions
+
+    assert smtp(scenario) == (["microsoft"], 0)
@@ -0,0 +1,26 @@
+def create_template(client, name: str) -> int:
+    response = client.post("/api/v1/templates/", json={"name": name, "subject_template": "Hi", "body_template": "Hello"})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def test_deleting_a_template_invalidates_the_list(client):
+    older = create_template(client, "Older")
+    create_template(client, "Newer")
+    listed = client.get("/api/v1/templates/")
+    etag, last_modified = listed.headers["ETag"], listed.headers["Last-Modified"]
+    assert client.get("/api/v1/templates/", headers={"If-None-Match": etag}).status_code == 304
+
+    # The latest update time stays the same when an older template is deleted
+    assert client.delete(f"/api/v1/templates/{older}").status_code == 200
+    by_date = client.get("/api/v1/templates/", headers={"If-Modified-Since": last_modified})
+    assert by_date.status_code == 200
+    assert "Older" not in [template["name"] for template in by_date.json()]
+    assert client.get("/api/v1/templates/", headers={"If-None-Match": etag}).status_code == 200
+
+def test_editing_a_template_changes_its_etag(client):
+    template_id = create_template(client, "Intro")
+    etag = client.get(f"/api/v1/templates/{template_id}").headers["ETag"]
+    assert client.get(f"/api/v1/templates/{template_id}", headers={"If-None-Match": etag}).status_code == 304
+    client.put(f"/api/v1/templates/{template_id}", json={"name": "Intro", "subject_template": "Hello", "body_template": "Hi"})
+    edited = client.get(f"/api/v1/templates/{template_id}", headers={"If-None-Match": etag})
+    assert edited.status_code == 200 and edited.json()["subject_template"] == "Hello"
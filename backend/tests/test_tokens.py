@@ -0,0 +1,35 @@
+import logging
+import sys
+import types
+
+import pytest
+
+from app.services import tokens
+
+@pytest.fixture
+def offline_tiktoken(monkeypatch):
+    """tiktoken installed, but its BPE file can't be downloaded."""
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("openaipublic.blob.core.windows.net is unreachable")
+
+    tiktoken = types.ModuleType("tiktoken")
+    tiktoken.encoding_for_model = unreachable
+    tiktoken.get_encoding = unreachable
+    monkeypatch.setitem(sys.modules, "tiktoken", tiktoken)
+    monkeypatch.setattr(tokens, "TIKTOKEN_AVAILABLE", True)
+    tokens._get_encoding.cache_clear()
+    yield
+    tokens._get_encoding.cache_clear()
+
+def test_counts_fall_back_to_the_approximation_offline(offline_tiktoken, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.services.tokens"):
+        assert tokens.count_tokens("Scaled Kubernetes clusters.") == 8
+        assert tokens.count_tokens("Built Go services") == 5
+    # Logged once, not on every call
+    assert len(caplog.records) == 1
+
+def test_fit_to_budget_works_offline(offline_tiktoken):
+    assert tokens.fit_to_budget("One line.\nTwo lines here.\nThree.", 4) == "One line."
+
+def test_empty_text_has_no_tokens():
+    assert tokens.count_tokens("") == 0
@@ -89,4 +89,45 @@ export const templatesAPI = {
   listBuiltin: () => api.get('/templates/builtin/list'),
 }
 
+// Events API: status pushes over server-sent events instead of polling
+// getStatus endpoints. `handlers` maps event types (file.status, email.status,
+// batch.progress, batch.done) to callbacks receiving the event data.
+// Returns a function that closes the stream.
+//
+// EventSource can't set headers, so each connection opens with a short-lived
+// stream ticket in the query string rather than the access token. Tickets
+// expire within seconds, so every reconnect fetches a new one.
+export const eventsAPI = {
+  subscribe: (handlers) => {
+    let source = null
+    let retryTimer = null
+    let closed = false
+
+    const connect = async () => {
+      try {
+        const response = await api.post('/events/ticket')
+        if (closed) return
+        source = new EventSource(`${API_BASE_URL}/events/stream?ticket=${encodeURIComponent(response.data.ticket)}`)
+      } catch (error) {
+        if (!closed) retryTimer = setTimeout(connect, 3000)
+        return
+      }
+      Object.entries(handlers).forEach(([type, handler]) => {
+        source.addEventListener(type, (event) => handler(JSON.parse(event.data)))
+      })
+      source.onerror = () => {
+        source.close()
+        if (!closed) retryTimer = setTimeout(connect, 3000)
+      }
+    }
+
+    connect()
+    return () => {
+      closed = true
+      clearTimeout(retryTimer)
+      if (source) source.close()
+    }
+  },
+}
+
 export default api
\ No newline at end of file